@@ -302,6 +302,7 @@ def run_workflow_part1(company_id: str) -> Dict[str, Any]:
         evaluator_node,
         risk_detector_node,
         WorkflowState,
+        mcp_client,
     )
     from datetime import timezone
     
@@ -387,7 +388,15 @@ def run_workflow_part1(company_id: str) -> Dict[str, Any]:
             "state_file": str(state_file),
         }
     
-    return asyncio.run(run_workflow_part1_async())
+    async def run_part1_and_close_client():
+        try:
+            return await run_workflow_part1_async()
+        finally:
+            # The shared MCP client is bound to this event loop; close it before asyncio.run() does
+            if mcp_client is not None:
+                await mcp_client.aclose()
+    
+    return asyncio.run(run_part1_and_close_client())
 
 
 @task
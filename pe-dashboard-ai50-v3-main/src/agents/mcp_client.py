@@ -5,10 +5,15 @@ MCP Client - HTTP client for calling MCP server tools
 import json
 import requests
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional
 import logging
 import os
 
+try:
+    from streaming import iter_sse_events
+except ImportError:
+    from src.streaming import iter_sse_events
+
 logger = logging.getLogger(__name__)
 
 
@@ -164,6 +169,194 @@ class MCPClient:
             "error": f"Failed after {attempts} attempts"
         }
     
+    def call_tools_batch(
+        self,
+        calls: List[Dict[str, Any]],
+        max_concurrency: int = 8,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run many tool calls in one request to the MCP server's /tool/batch
+        
+        Args:
+            calls: [{"tool": "generate_rag_dashboard", "params": {"company_id": "abridge"}}, ...]
+                   (an optional "id" is echoed back in the result; optional "fields"
+                   trims the response, e.g. "success,metadata.tokens_used")
+            max_concurrency: Calls the server runs at once
+            on_result: Called with each result as soon as it arrives
+        
+        Returns:
+            One result per call, in the order of `calls`:
+            {"index", "id", "tool", "company_id", "success", "status_code", "elapsed_s", "response"}
+            where "response" is what call_tool would have returned
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        
+        # Filtered tools are answered locally and never sent
+        to_send = []
+        for index, call in enumerate(calls):
+            if self._is_tool_allowed(call["tool"]):
+                to_send.append(index)
+                continue
+            results[index] = {
+                "index": index,
+                "id": call.get("id"),
+                "tool": call["tool"],
+                "company_id": call.get("params", {}).get("company_id"),
+                "success": False,
+                "status_code": 403,
+                "response": {
+                    "success": False,
+                    "error": f"Tool '{call['tool']}' is not allowed by filtering rules"
+                }
+            }
+        
+        if to_send:
+            url = f"{self.base_url}/tool/batch"
+            body = {
+                "calls": [
+                    {
+                        "tool": calls[i]["tool"],
+                        "params": calls[i].get("params", {}),
+                        "id": calls[i].get("id"),
+                        "fields": calls[i].get("fields")
+                    }
+                    for i in to_send
+                ],
+                "max_concurrency": max_concurrency
+            }
+            
+            try:
+                logger.info(f"Calling MCP batch: {len(to_send)} calls (max_concurrency={max_concurrency})")
+                # The read timeout applies between events, so long batches are fine
+                with requests.post(url, json=body, stream=True, timeout=self.timeout) as response:
+                    if response.status_code != 200:
+                        raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+                    for event, data in iter_sse_events(response.iter_lines(chunk_size=None, decode_unicode=True)):
+                        if event != "result":
+                            continue
+                        # Map the server's index (into the sent calls) back to ours
+                        index = to_send[data["index"]]
+                        data["index"] = index
+                        results[index] = data
+                        if on_result:
+                            on_result(data)
+            except Exception as e:
+                logger.error(f"MCP batch failed: {e}")
+                error = str(e)
+            else:
+                error = "No result returned by MCP server"
+            
+            for index in to_send:
+                if results[index] is None:
+                    results[index] = {
+                        "index": index,
+                        "id": calls[index].get("id"),
+                        "tool": calls[index]["tool"],
+                        "company_id": calls[index].get("params", {}).get("company_id"),
+                        "success": False,
+                        "status_code": None,
+                        "response": {"success": False, "error": error}
+                    }
+        
+        return results
+    
+    def submit_dashboard_job(
+        self,
+        company_id: str,
+        dashboard_type: str = "unified",
+        params: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        callback_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue dashboard generation on the MCP server (returns immediately)
+        
+        Args:
+            company_id: Company identifier
+            dashboard_type: 'unified', 'rag' or 'structured'
+            params: Extra tool parameters (e.g. {"top_k": 10})
+            priority: Higher runs first
+            callback_url: Optional webhook for the finished job
+        
+        Returns:
+            {"job_id", "status", "deduplicated", "status_url"} or {"success": False, "error"}
+        """
+        url = f"{self.base_url}/jobs/dashboard"
+        body = {
+            "company_id": company_id,
+            "dashboard_type": dashboard_type,
+            "params": params or {},
+            "priority": priority
+        }
+        if callback_url:
+            body["callback_url"] = callback_url
+        
+        try:
+            # Submitting is cheap and deduplicated server-side, so a short timeout is safe
+            response = requests.post(url, json=body, timeout=10)
+            if response.status_code == 202:
+                return response.json()
+            return {
+                "success": False,
+                "error": f"HTTP {response.status_code}: {response.text}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        """Get job status (and result once finished)"""
+        url = f"{self.base_url}/jobs/{job_id}"
+        
+        try:
+            response = requests.get(url, timeout=10)
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                return {
+                    "success": False,
+                    "error": f"HTTP {response.status_code}"
+                }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def wait_for_job(self, job_id: str, poll_interval: float = 2.0, max_wait: float = 600) -> Dict[str, Any]:
+        """
+        Poll a job until it finishes
+        
+        Returns:
+            The tool response on success, otherwise {"success": False, "error": ...}
+        """
+        import time
+        deadline = time.monotonic() + max_wait
+        
+        while time.monotonic() < deadline:
+            job = self.get_job(job_id)
+            status = job.get("status")
+            
+            if status == "succeeded":
+                return job["result"]
+            if status == "failed":
+                return {"success": False, "error": job.get("error")}
+            if status is None:
+                # Transient lookup error; keep polling until the deadline
+                logger.warning(f"Job {job_id} lookup failed: {job.get('error')}")
+            
+            time.sleep(poll_interval)
+        
+        return {
+            "success": False,
+            "error": f"Job {job_id} did not finish within {max_wait}s"
+        }
+    
     def get_resource(self, resource_path: str) -> Dict[str, Any]:
         """Get a resource from MCP server"""
         url = f"{self.base_url}/resource/{resource_path}"
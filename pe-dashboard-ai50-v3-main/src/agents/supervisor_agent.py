@@ -18,7 +18,7 @@ from dotenv import load_dotenv
 
 from src.tools.payload_tool import get_latest_structured_payload
 from src.tools.rag_tool import rag_search_company
-from src.tools.risk_logger import report_risk_signal, RiskSignal
+from src.tools.risk_logger import record_risk_signal, RiskSignal
 
 load_dotenv()
 
@@ -236,7 +236,7 @@ def rag_search_wrapper(company_id: str, query: str) -> str:
 
 
 def risk_logger_wrapper(company_id: str, occurred_on: str, description: str, source_url: str, risk_type: str, severity: str = "medium") -> str:
-    """Wrapper for report_risk_signal."""
+    """Wrapper for record_risk_signal."""
     try:
         from pydantic import HttpUrl
         signal = RiskSignal(
@@ -247,8 +247,12 @@ def risk_logger_wrapper(company_id: str, occurred_on: str, description: str, sou
             risk_type=risk_type,
             severity=severity
         )
-        success = _run_async(report_risk_signal(signal))
-        return "Risk signal logged successfully" if success else "Failed to log risk signal"
+        recorded = _run_async(record_risk_signal(signal))
+        if recorded is None:
+            return "Failed to log risk signal"
+        if recorded["duplicate"]:
+            return "Risk signal already logged (no need to report it again)"
+        return "Risk signal logged successfully"
     except Exception as e:
         return f"Error: {str(e)}"
 
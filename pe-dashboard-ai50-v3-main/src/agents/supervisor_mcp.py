@@ -47,7 +47,7 @@ from mcp_client import MCPClient
 
 # ✅ Import GCS client
 try:
-    from src.storage.gcs_client import DashboardStorage
+    from src.storage.gcs_client import DashboardStorage, get_storage
     GCS_AVAILABLE = True
     print("✅ GCS module loaded")
 except ImportError as e:
@@ -103,7 +103,7 @@ Use the tools available to you. Think step by step."""
         if GCS_AVAILABLE:
             try:
                 bucket_name = os.getenv('GCS_BUCKET_NAME', 'pe-dashboard-storage')
-                self.storage = DashboardStorage(bucket_name)
+                self.storage = get_storage(bucket_name)
             except Exception as e:
                 print(f"⚠️ GCS client failed: {e}")
                 self.storage = None
@@ -267,6 +267,20 @@ Use the tools available to you. Think step by step."""
                     metadata=metadata
                 )
                 
+                # Optionally have the MCP server restructure it now (queued job), so the
+                # first viewer gets the stored restructure instead of waiting on GPT
+                if os.getenv('RESTRUCTURE_ON_SAVE', '').lower() in ('1', 'true', 'yes'):
+                    job = self.mcp_client.submit_dashboard_job(
+                        company_id,
+                        dashboard_type="unified",
+                        params={"restructure_with_gpt": True, "refresh_latest": True},
+                        priority=-1
+                    )
+                    if job.get("job_id"):
+                        print(f"  🔄 Queued GPT restructure (job {job['job_id']})")
+                    else:
+                        print(f"  ⚠️ Could not queue GPT restructure: {job.get('error')}")
+                
                 return {
                     "success": True,
                     "company_id": company_id,
@@ -5,17 +5,29 @@ Lab 4 RAG Search + Lab 7 Dashboard Generation
 
 import os
 import sys
+import asyncio
+import threading
+import time
 from dotenv import load_dotenv
 from pathlib import Path
 from rag_pipeline import VectorStore 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 import json
 from openai import OpenAI
 from structured_pipeline import load_payload
 from dashboard_generator import generate_dashboard, generate_dashboard_from_rag
+from concurrency import (
+    chat_completion, get_single_flight, limiter_stats, run_in_thread,
+    single_flight_stats, stream_chat_completion
+)
+from streaming import SSE_HEADERS, SSE_MEDIA_TYPE, sse_event
+from result_cache import cache_stats, chunk_signature, fingerprint, get_cache, text_digest
+from metrics import instrument_app, timed
+from http_encoding import CompactJSONResponse, enable_compression
 
 env_path=Path(__file__).parent.parent/'src'/'.env'
 load_dotenv(env_path,override=True)
@@ -40,7 +52,8 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", 'production')  # Changed to 'local' for t
 app = FastAPI(
     title="PE Dashboard API - Complete",
     description="Lab 4 RAG Search + Lab 7 Dashboard Generation",
-    version="0.2.0"
+    version="0.2.0",
+    default_response_class=CompactJSONResponse
 )
 
 app.add_middleware(
@@ -50,12 +63,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counters / latency per route, plus GET /metrics
+instrument_app(app, "api")
+# gzip / br for dashboard responses
+enable_compression(app)
+
 if ENVIRONMENT == "local":
     DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 
 # Global instances
 vector_store = None
 openai_client = None
+_vector_store_lock = threading.Lock()
 
 # System prompt (inline)
 DASHBOARD_SYSTEM_PROMPT = """You generate an investor-facing diligence dashboard for a private AI startup.
@@ -80,6 +99,10 @@ Required section order:
 ## Disclosure Gaps"""
 
 
+# Bump when dashboard_generator's prompt or model changes (part of the structured cache key)
+STRUCTURED_GENERATOR_VERSION = "dashboard_generator:gpt-4o-mini:v1"
+
+
 # ========== UTILITY FUNCTIONS ==========
 
 def clean_env_value(value):
@@ -93,9 +116,13 @@ def clean_env_value(value):
 
 
 def get_vector_store():
-    """Get or create vector store instance."""
+    """Get or create vector store instance (thread-safe; called from worker threads)."""
     global vector_store
-    if vector_store is None:
+    if vector_store is not None:
+        return vector_store
+    with _vector_store_lock:
+        if vector_store is not None:
+            return vector_store
         api_key = clean_env_value(os.getenv('CHROMA_API_KEY'))
         tenant = clean_env_value(os.getenv('CHROMA_TENANT'))
         database = clean_env_value(os.getenv('CHROMA_DB'))
@@ -122,42 +149,80 @@ def get_openai_client():
     return openai_client
 
 
+DASHBOARD_QUERIES = [
+    "{company_name} company overview mission",
+    "funding investors series round capital valuation",
+    "business model revenue pricing customers GTM",
+    "founders CEO leadership team executives",
+    "hiring jobs positions growth expansion",
+    "product platform features technology AI",
+    "customers clients partnerships enterprise",
+    "awards press recognition forbes AI 50"
+]
+
+
+def _dashboard_queries(company_name: str) -> List[str]:
+    return [query.format(company_name=company_name) for query in DASHBOARD_QUERIES]
+
+
+def _merge_context(result_lists: List[List[Dict]], top_k: int) -> List[Dict]:
+    """Dedupe chunks across queries and keep the closest top_k."""
+    all_results = []
+    seen_chunks = set()
+    
+    for results in result_lists:
+        for result in results:
+            chunk_id = f"{result['source_type']}_{result['chunk_index']}"
+            if chunk_id not in seen_chunks:
+                all_results.append(result)
+                seen_chunks.add(chunk_id)
+    
+    all_results.sort(key=lambda x: x.get('distance', 999))
+    return all_results[:top_k]
+
+
 def retrieve_context_for_dashboard(company_name: str, top_k: int = 15) -> List[Dict]:
     """Retrieve context for dashboard."""
     vs = get_vector_store()
+    queries = _dashboard_queries(company_name)
     
-    queries = [
-        f"{company_name} company overview mission",
-        "funding investors series round capital valuation",
-        "business model revenue pricing customers GTM",
-        "founders CEO leadership team executives",
-        "hiring jobs positions growth expansion",
-        "product platform features technology AI",
-        "customers clients partnerships enterprise",
-        "awards press recognition forbes AI 50"
-    ]
-    
-    all_results = []
-    seen_chunks = set()
-    
+    result_lists = []
     for query in queries:
         try:
-            results = vs.search(
+            result_lists.append(vs.search(
                 company_name=company_name,
                 query=query,
                 top_k=max(2, top_k // len(queries))
-            )
-            
-            for result in results:
-                chunk_id = f"{result['source_type']}_{result['chunk_index']}"
-                if chunk_id not in seen_chunks:
-                    all_results.append(result)
-                    seen_chunks.add(chunk_id)
+            ))
         except:
             continue
     
-    all_results.sort(key=lambda x: x.get('distance', 999))
-    return all_results[:top_k]
+    return _merge_context(result_lists, top_k)
+
+
+async def retrieve_context_for_dashboard_async(company_name: str, top_k: int = 15) -> List[Dict]:
+    """
+    Retrieve context for dashboard without blocking the event loop.
+    
+    The per-query searches run concurrently in worker threads, bounded by the
+    'chroma' upstream limiter.
+    """
+    vs = await run_in_thread('chroma', get_vector_store)
+    queries = _dashboard_queries(company_name)
+    
+    with timed("retrieval"):
+        results = await asyncio.gather(*[
+            run_in_thread(
+                'chroma',
+                vs.search,
+                company_name=company_name,
+                query=query,
+                top_k=max(2, top_k // len(queries))
+            )
+            for query in queries
+        ], return_exceptions=True)
+    
+    return _merge_context([r for r in results if not isinstance(r, BaseException)], top_k)
 
 
 def format_payload(company_name: str, chunks: List[Dict]) -> str:
@@ -188,6 +253,45 @@ def format_payload(company_name: str, chunks: List[Dict]) -> str:
     return payload
 
 
+REQUIRED_SECTIONS = [
+    "## Company Overview", "## Business Model and GTM",
+    "## Funding & Investor Profile", "## Growth Momentum",
+    "## Visibility & Market Sentiment", "## Risks and Challenges",
+    "## Outlook", "## Disclosure Gaps"
+]
+
+
+def build_dashboard_prompt(company_name: str, payload: str) -> str:
+    """User prompt for RAG dashboard generation."""
+    return f"""Generate a PE dashboard for {company_name}.
+
+Use ONLY the data below. Use "Not disclosed." for missing info.
+
+{payload}
+
+Generate all 8 sections.
+"""
+
+
+def rag_dashboard_cache_key(request: "DashboardRequest", chunks: List[Dict]) -> str:
+    """Fingerprint of everything that shapes a RAG dashboard completion."""
+    return fingerprint(
+        endpoint="dashboard/rag",
+        prompt=text_digest(DASHBOARD_SYSTEM_PROMPT + build_dashboard_prompt("", "")),
+        company=request.company_name,
+        model=request.model,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens,
+        chunks=chunk_signature(chunks)
+    )
+
+
+def verify_dashboard(dashboard: str):
+    """Return (required sections present, 'Not disclosed' count)."""
+    sections = sum(1 for s in REQUIRED_SECTIONS if s in dashboard)
+    return sections, dashboard.count("Not disclosed")
+
+
 # ========== PYDANTIC MODELS ==========
 
 class SearchRequest(BaseModel):
@@ -237,9 +341,11 @@ def root():
         "version": "0.2.0",
         "endpoints": {
             "health": "GET /health",
+            "metrics": "GET /metrics (Prometheus)",
             "companies": "GET /companies",
             "rag_search": "GET/POST /rag/search",
-            "dashboard_rag": "GET/POST /dashboard/rag"
+            "dashboard_rag": "GET/POST /dashboard/rag",
+            "dashboard_rag_stream": "GET/POST /dashboard/rag/stream (SSE)"
         },
         "test_urls": {
             "companies": "http://localhost:8000/companies",
@@ -257,10 +363,19 @@ def health():
         return {
             "status": "ok",
             "vector_db_connected": True,
-            "companies_indexed": len(companies)
+            "companies_indexed": len(companies),
+            "upstreams": limiter_stats(),
+            "caches": cache_stats(),
+            "coalescing": single_flight_stats()
         }
     except:
-        return {"status": "ok", "vector_db_connected": False}
+        return {
+            "status": "ok",
+            "vector_db_connected": False,
+            "upstreams": limiter_stats(),
+            "caches": cache_stats(),
+            "coalescing": single_flight_stats()
+        }
 
 
 @app.get("/companies")
@@ -284,18 +399,21 @@ def list_companies():
 async def search_post(request: SearchRequest):
     """Lab 4: RAG Search (POST)"""
     try:
-        vs = get_vector_store()
+        vs = await run_in_thread('chroma', get_vector_store)
         
         filter_source = request.filter_source
         if filter_source in ["string", "null", ""]:
             filter_source = None
         
-        results = vs.search(
-            company_name=request.company_name,
-            query=request.query,
-            top_k=request.top_k,
-            filter_by_source_type=filter_source
-        )
+        with timed("total", tool="rag_search"):
+            results = await run_in_thread(
+                'chroma',
+                vs.search,
+                company_name=request.company_name,
+                query=request.query,
+                top_k=request.top_k,
+                filter_by_source_type=filter_source
+            )
         
         return SearchResponse(
             company_name=request.company_name,
@@ -331,11 +449,19 @@ async def search_get(
 @app.post("/dashboard/rag", response_model=DashboardResponse)
 async def dashboard_post(request: DashboardRequest):
     """Lab 7: Generate Dashboard (POST)"""
+    # Identical concurrent requests share one retrieval + GPT call
+    key = fingerprint(endpoint="dashboard/rag", **request.model_dump())
+    with timed("total", tool="dashboard_rag"):
+        return await get_single_flight("dashboard_rag").do(key, lambda: _generate_dashboard(request))
+
+
+async def _generate_dashboard(request: DashboardRequest) -> DashboardResponse:
+    """Retrieve context and generate a dashboard (one upstream computation)."""
     try:
         print(f"\n🚀 Generating dashboard: {request.company_name}")
         
         # Retrieve context
-        chunks = retrieve_context_for_dashboard(request.company_name, request.top_k)
+        chunks = await retrieve_context_for_dashboard_async(request.company_name, request.top_k)
         
         if not chunks:
             return DashboardResponse(
@@ -347,23 +473,23 @@ async def dashboard_post(request: DashboardRequest):
         
         print(f"✓ Retrieved {len(chunks)} chunks")
         
-        # Format payload
-        payload = format_payload(request.company_name, chunks)
+        # Same context + prompt + model settings -> reuse the earlier completion
+        cache = get_cache("dashboard_rag")
+        cache_key = rag_dashboard_cache_key(request, chunks)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"✓ Cache hit for {request.company_name}")
+            return DashboardResponse(**{**cached, 'metadata': dict(cached['metadata'], cache='hit')})
         
-        # Create prompt
-        user_prompt = f"""Generate a PE dashboard for {request.company_name}.
-
-Use ONLY the data below. Use "Not disclosed." for missing info.
-
-{payload}
-
-Generate all 8 sections.
-"""
-        
-        # Call GPT
-        client = get_openai_client()
+        with timed("prompt_build"):
+            # Format payload
+            payload = format_payload(request.company_name, chunks)
+            
+            # Create prompt
+            user_prompt = build_dashboard_prompt(request.company_name, payload)
         
-        response = client.chat.completions.create(
+        # Call GPT (async client, bounded by the 'openai' limiter)
+        response = await chat_completion(
             model=request.model,
             messages=[
                 {"role": "system", "content": DASHBOARD_SYSTEM_PROMPT},
@@ -376,18 +502,11 @@ Generate all 8 sections.
         dashboard = response.choices[0].message.content
         
         # Verify
-        sections = sum(1 for s in [
-            "## Company Overview", "## Business Model and GTM",
-            "## Funding & Investor Profile", "## Growth Momentum",
-            "## Visibility & Market Sentiment", "## Risks and Challenges",
-            "## Outlook", "## Disclosure Gaps"
-        ] if s in dashboard)
-        
-        not_disclosed = dashboard.count("Not disclosed")
+        sections, not_disclosed = verify_dashboard(dashboard)
         
         print(f"✓ Generated | Sections: {sections}/8 | 'Not disclosed': {not_disclosed}x")
         
-        return DashboardResponse(
+        result = DashboardResponse(
             company_name=request.company_name,
             dashboard=dashboard,
             metadata={
@@ -397,10 +516,13 @@ Generate all 8 sections.
                 'tokens_used': {'total': response.usage.total_tokens},
                 'not_disclosed_count': not_disclosed,
                 'sections_present': sections,
-                'status': 'success'
+                'status': 'success',
+                'cache': 'miss'
             },
             context_sources=list(set(c['source_type'] for c in chunks))
         )
+        cache.set(cache_key, result.model_dump(), company_id=request.company_name)
+        return result
         
     except Exception as e:
         import traceback
@@ -427,6 +549,129 @@ async def dashboard_get(
     return await dashboard_post(request)
 
 
+@app.post("/dashboard/rag/stream")
+async def dashboard_stream_post(request: DashboardRequest):
+    """
+    Lab 7: Generate Dashboard as a Server-Sent Events stream.
+    
+    Emits 'start' immediately, 'retrieval' once context is ready, a 'delta'
+    per completion token chunk, then 'done' with the same metadata as
+    POST /dashboard/rag (or 'error').
+    """
+    return StreamingResponse(
+        _stream_dashboard(request),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS
+    )
+
+
+@app.get("/dashboard/rag/{company_name}/stream")
+async def dashboard_stream_get(
+    company_name: str,
+    top_k: int = Query(15, ge=5, le=30),
+    max_tokens: int = Query(4000, ge=1000, le=8000),
+    temperature: float = Query(0.3, ge=0.0, le=1.0),
+    model: str = Query("gpt-4o")
+):
+    """Lab 7: Dashboard stream (GET, usable from EventSource)"""
+    request = DashboardRequest(
+        company_name=company_name,
+        top_k=top_k,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        model=model
+    )
+    return await dashboard_stream_post(request)
+
+
+async def _stream_dashboard(request: DashboardRequest):
+    with timed("total", tool="dashboard_rag_stream"):
+        async for event in _dashboard_events(request):
+            yield event
+
+
+async def _dashboard_events(request: DashboardRequest):
+    started = time.monotonic()
+    yield sse_event("start", {"company_name": request.company_name})
+    
+    try:
+        chunks = await retrieve_context_for_dashboard_async(request.company_name, request.top_k)
+        sources = list(set(c['source_type'] for c in chunks))
+        retrieval_s = round(time.monotonic() - started, 3)
+        yield sse_event("retrieval", {
+            "chunks_retrieved": len(chunks),
+            "sources": sources,
+            "elapsed_s": retrieval_s
+        })
+        
+        if not chunks:
+            dashboard = _empty_dashboard(request.company_name)
+            yield sse_event("delta", {"text": dashboard})
+            yield sse_event("done", {"metadata": {"status": "no_context", "chunks_retrieved": 0}})
+            return
+        
+        cache = get_cache("dashboard_rag")
+        cache_key = rag_dashboard_cache_key(request, chunks)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield sse_event("delta", {"text": cached['dashboard']})
+            yield sse_event("done", {"metadata": dict(cached['metadata'], cache='hit')})
+            return
+        
+        user_prompt = build_dashboard_prompt(request.company_name, format_payload(request.company_name, chunks))
+        
+        parts = []
+        usage = None
+        first_token_s = None
+        async for delta, final_usage in stream_chat_completion(
+            model=request.model,
+            messages=[
+                {"role": "system", "content": DASHBOARD_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=request.max_tokens,
+            temperature=request.temperature
+        ):
+            if final_usage is not None:
+                usage = final_usage
+                continue
+            if first_token_s is None:
+                first_token_s = round(time.monotonic() - started, 3)
+            parts.append(delta)
+            yield sse_event("delta", {"text": delta})
+        
+        dashboard = "".join(parts)
+        sections, not_disclosed = verify_dashboard(dashboard)
+        metadata = {
+            'chunks_retrieved': len(chunks),
+            'sources_used': sources,
+            'model': request.model,
+            'tokens_used': {'total': usage.total_tokens if usage else None},
+            'not_disclosed_count': not_disclosed,
+            'sections_present': sections,
+            'status': 'success',
+            'cache': 'miss'
+        }
+        cache.set(cache_key, {
+            'company_name': request.company_name,
+            'dashboard': dashboard,
+            'metadata': metadata,
+            'context_sources': sources
+        }, company_id=request.company_name)
+        
+        yield sse_event("done", {"metadata": dict(
+            metadata,
+            retrieval_s=retrieval_s,
+            first_token_s=first_token_s,
+            total_s=round(time.monotonic() - started, 3)
+        )})
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        yield sse_event("error", {"error": str(e), "error_type": type(e).__name__})
+
+
 def _empty_dashboard(company_name: str) -> str:
     """Empty dashboard."""
     return f"""# {company_name} - PE Intelligence Dashboard
@@ -488,10 +733,22 @@ def dashboard_structured(company_id: str = "00000000-0000-0000-0000-000000000000
         raise HTTPException(status_code=404, detail=error_msg)
 
     try:
-        markdown = generate_dashboard(payload)
+        cache = get_cache("dashboard_structured_llm")
+        cache_key = fingerprint(
+            endpoint="dashboard/structured",
+            generator=STRUCTURED_GENERATOR_VERSION,
+            payload=text_digest(payload.model_dump_json())
+        )
+        markdown = cache.get(cache_key)
+        cache_status = "hit"
+        if markdown is None:
+            markdown = generate_dashboard(payload)
+            cache.set(cache_key, markdown, company_id=company_id)
+            cache_status = "miss"
         return {
             "markdown": markdown,
-            "company_id": company_id
+            "company_id": company_id,
+            "cache": cache_status
         }
     except Exception as e:
         print(f"Error in /dashboard/structured: {e}")
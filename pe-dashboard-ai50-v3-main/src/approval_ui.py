@@ -38,12 +38,23 @@ except Exception as e:
     st.info("Make sure MCP server is running: `python src/server/mcp_server.py`")
     st.stop()
 
-# Fetch pending approvals
+# Fetch pending approvals (one page at a time from the approvals index)
+PAGE_SIZE = 25
+if "approvals_cursors" not in st.session_state:
+    st.session_state.approvals_cursors = [None]
+
+total_pending = 0
+next_cursor = None
 try:
-    response = requests.get(f"{API_BASE}/api/pending-approvals", timeout=5)
+    params = {"limit": PAGE_SIZE}
+    if st.session_state.approvals_cursors[-1] is not None:
+        params["cursor"] = st.session_state.approvals_cursors[-1]
+    response = requests.get(f"{API_BASE}/api/pending-approvals", params=params, timeout=5)
     if response.status_code == 200:
         data = response.json()
         pending_dashboards = data.get("pending", [])
+        total_pending = data.get("total", len(pending_dashboards))
+        next_cursor = data.get("next_cursor")
     else:
         st.error(f"Failed to fetch approvals: {response.status_code}")
         pending_dashboards = []
@@ -51,11 +62,26 @@ except Exception as e:
     st.error(f"Error fetching approvals: {e}")
     pending_dashboards = []
 
+if not pending_dashboards and len(st.session_state.approvals_cursors) > 1:
+    # Later page emptied by approvals; start over from the first page
+    st.session_state.approvals_cursors = [None]
+    st.rerun()
+
 if not pending_dashboards:
     st.info("🎉 No pending approvals! All dashboards are approved.")
     st.stop()
 
-st.header(f"Pending Approvals ({len(pending_dashboards)})")
+st.header(f"Pending Approvals ({total_pending})")
+
+col_prev, col_next = st.columns(2)
+with col_prev:
+    if len(st.session_state.approvals_cursors) > 1 and st.button("← Previous page"):
+        st.session_state.approvals_cursors.pop()
+        st.rerun()
+with col_next:
+    if next_cursor is not None and st.button("Next page →"):
+        st.session_state.approvals_cursors.append(next_cursor)
+        st.rerun()
 
 # Display each pending dashboard
 for idx, dashboard in enumerate(pending_dashboards):
@@ -0,0 +1,413 @@
+"""
+Approvals Index - SQLite index of dashboards awaiting (or past) human approval
+
+The due diligence workflow records every dashboard it saves here, with its
+status, scores, storage locations and a precomputed preview. The MCP
+approval endpoints then page through pending dashboards and find a run's
+blob directly instead of scanning data/dashboards/*/pending_approval or
+listing and downloading every pending blob in GCS.
+
+Pages use keyset pagination on the row id, so each page costs O(page size)
+regardless of how many dashboards have been indexed.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+APPROVALS_DB = Path(os.getenv(
+    "APPROVALS_DB_PATH",
+    Path(__file__).resolve().parents[1] / "data" / "approvals" / "approvals.db"
+))
+DASHBOARDS_DIR = Path(__file__).resolve().parents[1] / "data" / "dashboards"
+
+PREVIEW_CHARS = 500
+APPROVAL_STATUSES = ("pending", "approved", "rejected")
+# How often the background reconcile re-checks data/dashboards for files saved by other writers
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("APPROVALS_RECONCILE_SECONDS", "30"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS approvals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    evaluation_score REAL,
+    risk_detected INTEGER NOT NULL DEFAULT 0,
+    generated_at TEXT,
+    updated_at REAL NOT NULL,
+    preview TEXT,
+    gcs_blob TEXT,
+    gcs_metadata_blob TEXT,
+    local_path TEXT,
+    metadata TEXT,
+    UNIQUE (company_id, run_id)
+);
+CREATE INDEX IF NOT EXISTS approvals_status ON approvals (status, id);
+CREATE INDEX IF NOT EXISTS approvals_company ON approvals (company_id, status, id);
+"""
+
+
+def make_preview(content: str, max_chars: int = PREVIEW_CHARS) -> str:
+    """First max_chars characters of a dashboard (same format the UI always showed)."""
+    return content[:max_chars] + "..." if len(content) > max_chars else content
+
+
+def status_from_folder(md_file: Path) -> str:
+    """
+    Approval status implied by where a dashboard sits on disk.
+
+    pending_approval/ holds pending dashboards, rejected/ rejected ones, and the
+    company root (or approved/) approved ones. Sidecars are not rewritten when
+    a dashboard is moved, so the folder is the source of truth.
+    """
+    folder = md_file.parent.name
+    if folder == "pending_approval":
+        return "pending"
+    if folder == "rejected":
+        return "rejected"
+    return "approved"
+
+
+class ApprovalsIndex:
+    """Thread-safe SQLite index of saved dashboards keyed by (company_id, run_id)."""
+
+    def __init__(self, db_path: Path = None):
+        """
+        Args:
+            db_path: SQLite file (defaults to data/approvals/approvals.db or APPROVALS_DB_PATH)
+        """
+        self.db_path = Path(db_path or APPROVALS_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._reconcile_lock = threading.Lock()
+        self._dir_signature: Optional[Tuple[int, float]] = None
+        self._synced_mtime = 0.0
+
+    def record(
+        self,
+        company_id: str,
+        run_id: str,
+        content: str,
+        metadata: Dict,
+        gcs_blob: Optional[str] = None,
+        gcs_metadata_blob: Optional[str] = None,
+        local_path: Optional[str] = None
+    ):
+        """
+        Insert or replace the entry for a saved dashboard.
+
+        Args:
+            company_id: Company identifier
+            run_id: Workflow run identifier
+            content: Dashboard markdown (only the preview is stored)
+            metadata: Metadata saved alongside the dashboard ('status', 'evaluation_score', ...)
+            gcs_blob: Dashboard blob name in the bucket, if uploaded
+            gcs_metadata_blob: Metadata JSON blob name, if uploaded
+            local_path: Local markdown path, if written
+        """
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO approvals (company_id, run_id, status, evaluation_score, risk_detected,
+                    generated_at, updated_at, preview, gcs_blob, gcs_metadata_blob, local_path, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (company_id, run_id) DO UPDATE SET
+                    status = excluded.status,
+                    evaluation_score = excluded.evaluation_score,
+                    risk_detected = excluded.risk_detected,
+                    generated_at = excluded.generated_at,
+                    updated_at = excluded.updated_at,
+                    preview = excluded.preview,
+                    gcs_blob = COALESCE(excluded.gcs_blob, approvals.gcs_blob),
+                    gcs_metadata_blob = COALESCE(excluded.gcs_metadata_blob, approvals.gcs_metadata_blob),
+                    local_path = COALESCE(excluded.local_path, approvals.local_path),
+                    metadata = excluded.metadata
+                """,
+                (
+                    company_id, run_id, metadata.get("status", "pending"),
+                    metadata.get("evaluation_score"), int(bool(metadata.get("risk_detected"))),
+                    metadata.get("generated_at"), time.time(), make_preview(content),
+                    gcs_blob, gcs_metadata_blob, local_path, json.dumps(metadata, default=str)
+                )
+            )
+
+    def set_status(
+        self,
+        company_id: str,
+        run_id: str,
+        status: str,
+        metadata: Dict,
+        gcs_blob: Optional[str] = None,
+        gcs_metadata_blob: Optional[str] = None,
+        local_path: Optional[str] = None
+    ) -> bool:
+        """Record an approval decision (and the dashboard's new location). Returns False if unknown."""
+        if status not in APPROVAL_STATUSES:
+            raise ValueError(f"Unknown approval status '{status}', expected one of {APPROVAL_STATUSES}")
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE approvals SET status = ?, metadata = ?, updated_at = ?,
+                    gcs_blob = COALESCE(?, gcs_blob),
+                    gcs_metadata_blob = COALESCE(?, gcs_metadata_blob),
+                    local_path = COALESCE(?, local_path)
+                WHERE company_id = ? AND run_id = ?
+                """,
+                (status, json.dumps(metadata, default=str), time.time(),
+                 gcs_blob, gcs_metadata_blob, local_path, company_id, run_id)
+            )
+            return cursor.rowcount > 0
+
+    def get(self, company_id: str, run_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM approvals WHERE company_id = ? AND run_id = ?",
+                (company_id, run_id)
+            ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list(
+        self,
+        status: Optional[str] = "pending",
+        company_id: Optional[str] = None,
+        min_score: Optional[float] = None,
+        risk_detected: Optional[bool] = None,
+        limit: int = 50,
+        cursor: Optional[int] = None
+    ) -> Dict:
+        """
+        One page of entries, newest first.
+
+        Args:
+            status: Filter by status (None for all)
+            company_id: Filter by company
+            min_score: Minimum evaluation score
+            risk_detected: Filter by risk flag
+            limit: Page size
+            cursor: next_cursor from the previous page
+
+        Returns:
+            {"items": [...], "next_cursor": int or None}
+        """
+        clauses, args = self._filters(status, company_id, min_score, risk_detected)
+        if cursor is not None:
+            clauses.append("id < ?")
+            args.append(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM approvals {where} ORDER BY id DESC LIMIT ?",
+                args + [limit + 1]
+            ).fetchall()
+
+        items = [self._to_dict(row) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def count(
+        self,
+        status: Optional[str] = "pending",
+        company_id: Optional[str] = None,
+        min_score: Optional[float] = None,
+        risk_detected: Optional[bool] = None
+    ) -> int:
+        clauses, args = self._filters(status, company_id, min_score, risk_detected)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM approvals {where}", args).fetchone()[0]
+
+    def latest_by_company(self) -> Dict[str, Dict]:
+        """Most recent indexed dashboard per company: {company_id: {"generated_at", "status", "dashboards"}}."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT company_id, MAX(COALESCE(generated_at, '')) AS generated_at, COUNT(*) AS dashboards,
+                    (SELECT status FROM approvals AS newest WHERE newest.company_id = approvals.company_id
+                     ORDER BY newest.id DESC LIMIT 1) AS status
+                FROM approvals GROUP BY company_id
+                """
+            ).fetchall()
+        return {
+            row["company_id"]: {
+                "generated_at": row["generated_at"] or None,
+                "status": row["status"],
+                "dashboards": row["dashboards"]
+            }
+            for row in rows
+        }
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM approvals LIMIT 1").fetchone() is None
+
+    def backfill_from_directory(self, data_dir: Path = DASHBOARDS_DIR) -> int:
+        """
+        Index dashboards already on disk (<company>/[pending_approval|rejected]/*.md with .json sidecars).
+
+        The status comes from the folder (see status_from_folder), not the sidecar.
+        Returns the number indexed.
+        """
+        if not data_dir.exists():
+            return 0
+        return self._index_files(data_dir.glob("*/**/*.md"))
+
+    def reconcile_with_directory(self, data_dir: Path = DASHBOARDS_DIR) -> int:
+        """
+        Index dashboards saved or moved on disk since the last reconcile.
+
+        Writers that save dashboards without calling record() (CLI runs, agents)
+        would otherwise never appear. Each pass stats the markdown files and
+        folders; if anything changed, only files newer than the previous pass
+        or whose path is not indexed yet are read. Meant to run off the request
+        path (get_approvals_index starts a background thread for it).
+
+        Args:
+            data_dir: Dashboards directory
+
+        Returns:
+            Number of dashboards indexed (0 if nothing changed)
+        """
+        with self._reconcile_lock:
+            files, signature = self._scan_directory(data_dir)
+            if signature == self._dir_signature:
+                return 0
+            with self._lock:
+                known = {
+                    row[0] for row in
+                    self._conn.execute("SELECT local_path FROM approvals WHERE local_path IS NOT NULL")
+                }
+            changed = [
+                md_file for md_file, mtime in files.items()
+                if mtime > self._synced_mtime or str(md_file) not in known
+            ]
+            indexed = self._index_files(changed)
+            self._dir_signature = signature
+            self._synced_mtime = max(self._synced_mtime, signature[1])
+            return indexed
+
+    def _index_files(self, md_files: Iterable[Path]) -> int:
+        """
+        Index markdown dashboards from their JSON sidecars.
+
+        Rows that already hold an approval decision keep their metadata (local
+        sidecars are moved, never rewritten, so they lack approved_by/notes);
+        only their local_path is updated.
+        """
+        indexed = 0
+        for md_file in md_files:
+            json_file = md_file.with_suffix(".json")
+            if not json_file.exists():
+                continue
+            try:
+                metadata = json.loads(json_file.read_text(encoding="utf-8"))
+                if not metadata.get("company_id") or not metadata.get("run_id"):
+                    continue
+                existing = self.get(metadata["company_id"], metadata["run_id"])
+                if existing is not None and existing["status"] != "pending":
+                    if existing["local_path"] != str(md_file):
+                        with self._lock:
+                            self._conn.execute(
+                                "UPDATE approvals SET local_path = ? WHERE id = ?",
+                                (str(md_file), existing["id"])
+                            )
+                    continue
+                metadata["status"] = status_from_folder(md_file)
+                self.record(
+                    metadata["company_id"],
+                    metadata["run_id"],
+                    md_file.read_text(encoding="utf-8"),
+                    metadata,
+                    local_path=str(md_file)
+                )
+                indexed += 1
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not index {md_file}: {e}")
+        return indexed
+
+    @staticmethod
+    def _scan_directory(data_dir: Path) -> Tuple[Dict[Path, float], Tuple[int, float]]:
+        """
+        Markdown files with their mtimes, and a (file count, newest mtime) signature.
+
+        Folder mtimes are part of the signature so dashboards moved between
+        folders (which keeps their own mtime) are noticed.
+        """
+        files: Dict[Path, float] = {}
+        if not data_dir.exists():
+            return files, (0, 0.0)
+        newest = 0.0
+        for md_file in data_dir.glob("*/**/*.md"):
+            try:
+                files[md_file] = md_file.stat().st_mtime
+            except OSError:
+                continue
+            newest = max(newest, files[md_file])
+        for folder in {f.parent for f in files} | {d for d in data_dir.iterdir() if d.is_dir()}:
+            try:
+                newest = max(newest, folder.stat().st_mtime)
+            except OSError:
+                continue
+        return files, (len(files), newest)
+
+    @staticmethod
+    def _filters(status, company_id, min_score, risk_detected):
+        clauses, args = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            args.append(status)
+        if company_id is not None:
+            clauses.append("company_id = ?")
+            args.append(company_id)
+        if min_score is not None:
+            clauses.append("evaluation_score >= ?")
+            args.append(min_score)
+        if risk_detected is not None:
+            clauses.append("risk_detected = ?")
+            args.append(int(risk_detected))
+        return clauses, args
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        entry = dict(row)
+        entry["risk_detected"] = bool(entry["risk_detected"])
+        entry["metadata"] = json.loads(entry["metadata"]) if entry["metadata"] else {}
+        return entry
+
+
+_index: Optional[ApprovalsIndex] = None
+_index_lock = threading.Lock()
+
+
+def _reconcile_forever(index: ApprovalsIndex):
+    """Background loop keeping the index in step with data/dashboards."""
+    while True:
+        try:
+            count = index.reconcile_with_directory()
+            if count:
+                print(f"✅ Indexed {count} dashboards from data/dashboards for approvals")
+        except Exception as e:
+            print(f"⚠️ Approvals reconcile failed: {e}")
+        time.sleep(RECONCILE_INTERVAL_SECONDS)
+
+
+def get_approvals_index() -> ApprovalsIndex:
+    """Process-wide index; a daemon thread reconciles it with data/dashboards off the request path."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ApprovalsIndex()
+            threading.Thread(
+                target=_reconcile_forever, args=(_index,), name="approvals-reconcile", daemon=True
+            ).start()
+        return _index
@@ -0,0 +1,241 @@
+"""
+Section Chunker for the RAG Pipeline
+
+Splits heading-structured text (the "# / ## / ###" format produced by
+sectionizer.html_to_structured_text) on heading boundaries and sizes chunks
+by real token counts instead of characters:
+- Small neighbouring sections are packed together while they fit
+- Oversized sections are split on paragraphs, then sentences, with token overlap
+- Each chunk records its heading path ("About > Leadership") as metadata and
+  starts with it, so the embedding carries the section context
+- Token counting is batched across every document in a call
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from embedding_scheduler import get_batch_token_counter
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+HEADING_SEPARATOR = " > "
+
+
+@dataclass
+class Section:
+    """A heading path and the text units (paragraphs/sentences) under it."""
+    heading_path: Tuple[str, ...]
+    units: List[str] = field(default_factory=list)
+    unit_tokens: List[int] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        return HEADING_SEPARATOR.join(self.heading_path)
+
+    @property
+    def tokens(self) -> int:
+        return sum(self.unit_tokens)
+
+
+def has_headings(text: str) -> bool:
+    """True if the text contains at least one "#" heading line."""
+    return any(HEADING_PATTERN.match(line.strip()) for line in text.splitlines())
+
+
+def parse_sections(text: str) -> List[Section]:
+    """
+    Split heading-structured text into sections.
+
+    Text without any heading lines becomes a single section with an empty path.
+    """
+    sections: List[Section] = []
+    path: List[str] = []
+    current = Section(heading_path=())
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        match = HEADING_PATTERN.match(line)
+        if match:
+            if current.units:
+                sections.append(current)
+            level = len(match.group(1))
+            path = path[:level - 1] + [match.group(2)]
+            current = Section(heading_path=tuple(path))
+        else:
+            current.units.append(line)
+
+    if current.units:
+        sections.append(current)
+    return sections
+
+
+def _common_prefix(a: Tuple[str, ...], b: Tuple[str, ...]) -> Tuple[str, ...]:
+    prefix = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        prefix.append(x)
+    return tuple(prefix)
+
+
+class SectionChunker:
+    """Token-bounded, heading-aware chunker."""
+
+    def __init__(
+        self,
+        max_tokens: int = 400,
+        overlap_tokens: int = 40,
+        model: str = "text-embedding-3-small"
+    ):
+        """
+        Args:
+            max_tokens: Upper bound on tokens per chunk (heading line included)
+            overlap_tokens: Trailing tokens repeated when a section spans chunks
+            model: Embedding model name, used to pick the tokenizer
+        """
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens_batch = get_batch_token_counter(model)
+
+    def _recount(self, sections: List[Section]):
+        """Count tokens for every unit of the given sections in one batch."""
+        texts = [unit for section in sections for unit in section.units]
+        counts = self.count_tokens_batch(texts) if texts else []
+        position = 0
+        for section in sections:
+            section.unit_tokens = list(counts[position:position + len(section.units)])
+            position += len(section.units)
+
+    @staticmethod
+    def _split_sentences(unit: str, count: int, max_tokens: int) -> List[str]:
+        return [part for part in SENTENCE_PATTERN.split(unit) if part.strip()]
+
+    @staticmethod
+    def _split_words(unit: str, count: int, max_tokens: int) -> List[str]:
+        words = unit.split()
+        # Aim slightly under the limit since tokens are not spread evenly across words
+        step = max(1, int(len(words) * max_tokens * 0.9 / count))
+        return [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+
+    def _size_units(self, sections: List[Section]):
+        """Count unit tokens; break units larger than max_tokens into sentences, then word runs."""
+        self._recount(sections)
+        for splitter in (self._split_sentences, self._split_words):
+            oversized = [
+                section for section in sections
+                if any(count > self.max_tokens for count in section.unit_tokens)
+            ]
+            if not oversized:
+                return
+            for section in oversized:
+                units = []
+                for unit, count in zip(section.units, section.unit_tokens):
+                    if count > self.max_tokens:
+                        units.extend(splitter(unit, count, self.max_tokens))
+                    else:
+                        units.append(unit)
+                section.units = units
+            self._recount(oversized)
+
+    def _pack(self, sections: List[Section], title_tokens: Dict[str, int]) -> List[Tuple[Tuple[str, ...], str, int]]:
+        """Pack sections into chunks. Returns (heading path, text, approx tokens) per chunk."""
+        chunks = []
+        segments: List[Tuple[Tuple[str, ...], List[Tuple[str, int]]]] = []
+        used = 0
+
+        def flush():
+            nonlocal segments, used
+            if not segments:
+                return
+            if len(segments) == 1:
+                path = segments[0][0]
+                body = [text for text, _ in segments[0][1]]
+            else:
+                path = segments[0][0]
+                for segment_path, _ in segments[1:]:
+                    path = _common_prefix(path, segment_path)
+                body = []
+                for segment_path, units in segments:
+                    if len(segment_path) > len(path):
+                        body.append(f"{'#' * len(segment_path)} {segment_path[-1]}")
+                    body.extend(text for text, _ in units)
+            header = [HEADING_SEPARATOR.join(path)] if path else []
+            chunks.append((path, "\n".join(header + body), used))
+            segments = []
+            used = 0
+
+        for section in sections:
+            header_cost = title_tokens.get(section.title, 0)
+
+            # Small neighbouring sections share a chunk while they fit
+            if segments and used + header_cost + section.tokens <= self.max_tokens:
+                segments.append((section.heading_path, list(zip(section.units, section.unit_tokens))))
+                used += header_cost + section.tokens
+                continue
+
+            flush()
+            units: List[Tuple[str, int]] = []
+            used = header_cost
+            for unit, count in zip(section.units, section.unit_tokens):
+                if units and used + count > self.max_tokens:
+                    segments = [(section.heading_path, units)]
+                    flush()
+                    # Carry trailing units forward as overlap
+                    carried: List[Tuple[str, int]] = []
+                    carried_tokens = 0
+                    for previous in reversed(units):
+                        if carried_tokens + previous[1] > self.overlap_tokens:
+                            break
+                        carried.insert(0, previous)
+                        carried_tokens += previous[1]
+                    if header_cost + carried_tokens + count > self.max_tokens:
+                        carried, carried_tokens = [], 0
+                    units = carried
+                    used = header_cost + carried_tokens
+                units.append((unit, count))
+                used += count
+            segments = [(section.heading_path, units)]
+
+        flush()
+        return chunks
+
+    def chunk_documents(self, documents: Sequence[Tuple[str, Optional[Dict]]]) -> List[List[Document]]:
+        """
+        Chunk many documents at once (token counting is batched across all of them).
+
+        Args:
+            documents: (text, metadata) pairs
+
+        Returns:
+            One list of LangChain Documents per input document. Each chunk's
+            metadata adds 'heading_path', 'chunk_tokens' and 'chunker'.
+        """
+        parsed = [parse_sections(text or "") for text, _ in documents]
+        all_sections = [section for sections in parsed for section in sections]
+        self._size_units(all_sections)
+
+        titles = sorted({section.title for section in all_sections if section.heading_path})
+        title_tokens = dict(zip(titles, self.count_tokens_batch(titles))) if titles else {}
+
+        results = []
+        for sections, (_, metadata) in zip(parsed, documents):
+            chunks = []
+            for path, text, tokens in self._pack(sections, title_tokens):
+                chunk_metadata = dict(metadata or {})
+                chunk_metadata.update({
+                    'heading_path': HEADING_SEPARATOR.join(path),
+                    'chunk_tokens': int(tokens),
+                    'chunker': 'sections'
+                })
+                chunks.append(Document(page_content=text, metadata=chunk_metadata))
+            results.append(chunks)
+        return results
+
+    def chunk(self, text: str, metadata: Dict = None) -> List[Document]:
+        """Chunk a single document (see chunk_documents)."""
+        return self.chunk_documents([(text, metadata)])[0]
@@ -0,0 +1,202 @@
+"""
+Company Catalog - in-memory list of AI50 companies with per-company status
+
+Backs the MCP server's /resource/ai50/companies resource, which Streamlit
+requests on every rerun. The catalog is built once and kept current cheaply:
+
+- forbes_ai50_seed.json is re-parsed only when its (mtime, size) changes
+- the payload directory is re-listed only when its mtime changes
+- per-company data generation (result_cache markers, bumped on re-ingest
+  or payload save) and last dashboard (approvals index) are re-read at most
+  once per refresh_interval
+
+Each rebuilt snapshot carries an ETag (hash of its content), so unchanged
+catalogs are answered with 304 Not Modified.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from result_cache import company_generation, fingerprint
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SEED_FILE = PROJECT_ROOT / "data" / "forbes_ai50_seed.json"
+PAYLOADS_DIR = PROJECT_ROOT / "data" / "payloads"
+REFRESH_INTERVAL_SECONDS = float(os.getenv("COMPANY_CATALOG_REFRESH_SECONDS", 5))
+
+
+def normalize_company_id(company_name: str) -> str:
+    """Seed display name -> company_id (lowercase, spaces to hyphens)."""
+    return company_name.lower().replace(' ', '-')
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _iso_from_ns(timestamp_ns: int) -> Optional[str]:
+    if not timestamp_ns:
+        return None
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat()
+
+
+class CompanyCatalog:
+    """Company list plus status details, refreshed incrementally from disk and the approvals index."""
+
+    def __init__(
+        self,
+        seed_file: Path = SEED_FILE,
+        payloads_dir: Path = PAYLOADS_DIR,
+        dashboard_lookup: Optional[Callable[[], Dict[str, Dict]]] = None,
+        refresh_interval: float = REFRESH_INTERVAL_SECONDS
+    ):
+        """
+        Args:
+            seed_file: forbes_ai50_seed.json
+            payloads_dir: data/payloads (payload presence)
+            dashboard_lookup: Returns {company_id: {"generated_at", "status", ...}}
+                (e.g. ApprovalsIndex.latest_by_company); omitted -> no dashboard info
+            refresh_interval: Seconds between change checks
+        """
+        self.seed_file = Path(seed_file)
+        self.payloads_dir = Path(payloads_dir)
+        self.dashboard_lookup = dashboard_lookup
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._seed_signature = None
+        self._seed: Dict[str, Dict] = {}
+        self._payloads_signature = None
+        self._payload_ids: set = set()
+        self._generations: Dict[str, int] = {}
+        self._dashboards: Dict[str, Dict] = {}
+        self._snapshot: Optional[Dict] = None
+        self.rebuilds = 0
+
+    def snapshot(self) -> Dict:
+        """
+        Current catalog (refreshed first if refresh_interval has passed).
+
+        Returns:
+            {"companies": [company_id...], "details": {company_id: {...}}, "etag": str, "built_at": str}
+        """
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._checked_at >= self.refresh_interval:
+                self._refresh()
+            return self._snapshot
+
+    def invalidate(self):
+        """Force a full reload on the next snapshot() (e.g. after a bulk ingest)."""
+        with self._lock:
+            self._seed_signature = self._payloads_signature = None
+            self._checked_at = 0.0
+
+    def _refresh(self):
+        changed = self._snapshot is None
+
+        seed_signature = _stat_signature(self.seed_file)
+        if seed_signature != self._seed_signature:
+            self._seed = self._load_seed()
+            self._seed_signature = seed_signature
+            changed = True
+
+        payloads_signature = _stat_signature(self.payloads_dir)
+        if payloads_signature != self._payloads_signature:
+            self._payload_ids = {f.stem for f in self.payloads_dir.glob("*.json")} if payloads_signature else set()
+            self._payloads_signature = payloads_signature
+            changed = True
+
+        company_ids = self._company_ids()
+        generations = {company_id: company_generation(company_id) for company_id in company_ids}
+        if generations != self._generations:
+            self._generations = generations
+            changed = True
+
+        if self.dashboard_lookup is not None:
+            try:
+                dashboards = self.dashboard_lookup()
+            except Exception as e:
+                print(f"⚠️ Company catalog could not read dashboard status: {e}")
+                dashboards = self._dashboards
+            if dashboards != self._dashboards:
+                self._dashboards = dashboards
+                changed = True
+
+        if changed:
+            self._snapshot = self._build(company_ids)
+            self.rebuilds += 1
+        self._checked_at = time.monotonic()
+
+    def _load_seed(self) -> Dict[str, Dict]:
+        seed = {}
+        try:
+            with open(self.seed_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                for item in data:
+                    if 'company_name' in item:
+                        seed[normalize_company_id(item['company_name'])] = item
+            print(f"✓ Loaded {len(seed)} companies from {self.seed_file.name}")
+        except FileNotFoundError:
+            print(f"❌ {self.seed_file.name} not found at: {self.seed_file}")
+        except Exception as e:
+            print(f"Error reading {self.seed_file.name}: {e}")
+        return seed
+
+    def _company_ids(self) -> List[str]:
+        # The seed defines the AI50 list; payloads are the fallback when it is missing
+        return sorted(self._seed) if self._seed else sorted(self._payload_ids)
+
+    def _build(self, company_ids: List[str]) -> Dict:
+        details = {}
+        for company_id in company_ids:
+            seed_item = self._seed.get(company_id, {})
+            dashboard = self._dashboards.get(company_id, {})
+            details[company_id] = {
+                "name": seed_item.get("company_name", company_id),
+                "website": seed_item.get("website"),
+                "hq_city": seed_item.get("hq_city"),
+                "hq_country": seed_item.get("hq_country"),
+                "payload_available": company_id in self._payload_ids,
+                # Last re-ingest / payload save (result_cache generation marker)
+                "data_updated_at": _iso_from_ns(self._generations.get(company_id, 0)),
+                "last_dashboard_at": dashboard.get("generated_at"),
+                "last_dashboard_status": dashboard.get("status")
+            }
+        return {
+            "companies": company_ids,
+            "details": details,
+            "etag": fingerprint(companies=company_ids, details=details)[:32],
+            "built_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "companies": len(self._snapshot["companies"]) if self._snapshot else 0,
+                "rebuilds": self.rebuilds,
+                "etag": self._snapshot["etag"] if self._snapshot else None
+            }
+
+
+_catalog: Optional[CompanyCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_company_catalog(dashboard_lookup: Optional[Callable[[], Dict[str, Dict]]] = None) -> CompanyCatalog:
+    """Process-wide catalog (dashboard_lookup is only used when the catalog is first created)."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = CompanyCatalog(dashboard_lookup=dashboard_lookup)
+        return _catalog
@@ -0,0 +1,262 @@
+"""
+Upstream Concurrency Limits for the API and MCP Servers
+
+Request handlers are `async def`, so any blocking call inside them (the sync
+OpenAI client, ChromaDB, GCS) stalls the whole event loop. This module gives
+them:
+- one shared AsyncOpenAI client
+- a bounded limiter per upstream ('openai', 'chroma', 'gcs', ...), sized from
+  env vars such as OPENAI_MAX_CONCURRENCY, so dozens of concurrent dashboard
+  requests queue fairly instead of overrunning a provider
+- run_in_thread() to offload the remaining blocking SDK calls to a worker thread
+  while holding the upstream's limiter
+- single-flight groups that coalesce concurrent identical requests onto one
+  in-flight computation
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from openai import AsyncOpenAI
+
+from metrics import STAGE_SECONDS, current_tool, record_llm_usage, register_collector, stats_families, timed
+
+T = TypeVar("T")
+
+# Default in-flight calls per upstream (override with <NAME>_MAX_CONCURRENCY)
+DEFAULT_LIMITS = {
+    'openai': 16,
+    'chroma': 8,
+    'gcs': 16,
+}
+
+
+class UpstreamLimiter:
+    """
+    Async context manager bounding in-flight calls to one upstream.
+
+    Semaphores are created per event loop so the limiter can be shared by
+    module-level code and still work under test runners that start new loops.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.total = 0
+        self.errors = 0
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.limit)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    async def __aenter__(self):
+        semaphore = self._semaphore()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.total += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.errors += 1
+        self._semaphore().release()
+        return False
+
+    def stats(self) -> Dict:
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'total': self.total,
+            'errors': self.errors
+        }
+
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(upstream: str) -> UpstreamLimiter:
+    """Get (or create) the process-wide limiter for an upstream."""
+    with _limiters_lock:
+        limiter = _limiters.get(upstream)
+        if limiter is None:
+            env_name = f"{upstream.upper()}_MAX_CONCURRENCY"
+            limit = int(os.getenv(env_name, DEFAULT_LIMITS.get(upstream, 8)))
+            limiter = UpstreamLimiter(upstream, limit)
+            _limiters[upstream] = limiter
+        return limiter
+
+
+def limiter_stats() -> Dict[str, Dict]:
+    """Current in-flight / waiting / error counts for every upstream (for health and metrics endpoints)."""
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
+
+
+async def run_in_thread(upstream: str, func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call in a worker thread while holding the upstream's limiter."""
+    async with get_limiter(upstream):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical async calls.
+
+    The first caller for a key starts the work as a task; callers that arrive
+    while it is running await the same task instead of repeating it. Callers
+    await through asyncio.shield, so one client disconnecting does not cancel
+    the work for the others. Nothing is kept once the task finishes (see
+    result_cache.py for reuse across time).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run func() once per key among concurrent callers.
+
+        Args:
+            key: Identity of the request (everything that affects the result)
+            func: Zero-argument coroutine function doing the work
+
+        Returns:
+            The shared result (exceptions are re-raised to every caller)
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        self.calls += 1
+
+        task = self._tasks.get(flight_key)
+        if task is None:
+            self.executions += 1
+            task = loop.create_task(func())
+            self._tasks[flight_key] = task
+            task.add_done_callback(lambda done: self._finish(flight_key, done))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, flight_key: Tuple[int, Hashable], task: asyncio.Task):
+        self._tasks.pop(flight_key, None)
+        # Retrieve the exception so it is not reported as unhandled if every caller left
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'in_flight': len(self._tasks)
+        }
+
+
+_single_flights: Dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Get (or create) the process-wide single-flight group for an endpoint."""
+    with _limiters_lock:
+        group = _single_flights.get(name)
+        if group is None:
+            group = SingleFlight(name)
+            _single_flights[name] = group
+        return group
+
+
+def single_flight_stats() -> Dict[str, Dict]:
+    """Calls vs. executions per single-flight group (for health endpoints)."""
+    with _limiters_lock:
+        return {name: group.stats() for name, group in _single_flights.items()}
+
+
+def _collect_metrics():
+    return (
+        stats_families("pe_upstream", "upstream", limiter_stats())
+        + stats_families("pe_single_flight", "group", single_flight_stats())
+    )
+
+
+register_collector(_collect_metrics)
+
+
+_async_openai: Optional[AsyncOpenAI] = None
+
+
+def get_async_openai() -> AsyncOpenAI:
+    """Shared AsyncOpenAI client (one connection pool per process)."""
+    global _async_openai
+    if _async_openai is None:
+        _async_openai = AsyncOpenAI(api_key=os.getenv('OPENAI_KEY'))
+    return _async_openai
+
+
+async def chat_completion(**kwargs):
+    """chat.completions.create on the shared async client, bounded by the 'openai' limiter (timed as stage 'llm')."""
+    with timed("llm"):
+        async with get_limiter('openai'):
+            response = await get_async_openai().chat.completions.create(**kwargs)
+    record_llm_usage(kwargs.get('model'), getattr(response, 'usage', None))
+    return response
+
+
+async def stream_chat_completion(**kwargs) -> AsyncIterator[Tuple[Optional[str], Optional[object]]]:
+    """
+    Streaming chat.completions.create on the shared async client.
+
+    Holds the 'openai' limiter for the life of the stream. Time to the first
+    delta is recorded as stage 'llm_first_token', the whole stream as 'llm'.
+
+    Yields:
+        (text_delta, None) for each content delta, then (None, usage) once at the end
+    """
+    usage = None
+    started = time.perf_counter()
+    first_token = True
+    with timed("llm"):
+        async with get_limiter('openai'):
+            stream = await get_async_openai().chat.completions.create(
+                stream=True,
+                stream_options={"include_usage": True},
+                **kwargs
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token:
+                        first_token = False
+                        STAGE_SECONDS.observe(
+                            time.perf_counter() - started, tool=current_tool(), stage="llm_first_token"
+                        )
+                    yield chunk.choices[0].delta.content, None
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+                    yield None, chunk.usage
+    record_llm_usage(kwargs.get('model'), usage)
@@ -0,0 +1,290 @@
+"""
+Embedding Scheduler for the RAG Pipeline
+Splits chunks into token-bounded batches and embeds them concurrently
+under a shared requests-per-minute / tokens-per-minute budget.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# tiktoken ships with langchain-openai; fall back to a char-based estimate if missing
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+
+# text-embedding-3-small limits: 8191 tokens per input, 2048 inputs per request
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_INPUT = 8191
+
+
+_encodings: Dict[str, object] = {}
+
+
+def _get_encoding(model: str):
+    """Load (once) the tiktoken encoding for a model, or None if unavailable."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    if model not in _encodings:
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # Encoding files are downloaded on first use; offline hosts fall through
+            print(f"Warning: tiktoken encoding unavailable ({e}); estimating tokens")
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def get_token_counter(model: str = "text-embedding-3-small") -> Callable[[str], int]:
+    """Return a function that counts tokens for the embedding model."""
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+    # ~4 characters per token for English text
+    return lambda text: max(1, len(text) // 4)
+
+
+def get_batch_token_counter(model: str = "text-embedding-3-small") -> Callable[[List[str]], List[int]]:
+    """Return a function that counts tokens for many texts in one call (tiktoken encodes them in parallel)."""
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return lambda texts: [len(tokens) for tokens in encoding.encode_batch(list(texts), disallowed_special=())]
+
+    return lambda texts: [max(1, len(text) // 4) for text in texts]
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception is an HTTP 429 from the embeddings API."""
+    if type(error).__name__ == "RateLimitError":
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        response = getattr(error, "response", None)
+        status_code = getattr(response, "status_code", None)
+    return status_code == 429
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After header from a 429 response, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket enforcing requests-per-minute and tokens-per-minute.
+
+    One instance can be shared by every VectorStore / scheduler in the process
+    so concurrent companies draw from the same API budget.
+    """
+
+    def __init__(self, requests_per_minute: int = 3000, tokens_per_minute: int = 1_000_000):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        # After a 429 nobody sends until this moment (monotonic clock)
+        self._blocked_until = 0.0
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(
+            float(self.requests_per_minute),
+            self._request_allowance + elapsed * self.requests_per_minute / 60.0
+        )
+        self._token_allowance = min(
+            float(self.tokens_per_minute),
+            self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+        )
+
+    def acquire(self, tokens: int):
+        """Block until one request carrying `tokens` tokens fits in the budget."""
+        # A single batch larger than the whole TPM budget would never fit
+        tokens = min(tokens, self.tokens_per_minute)
+
+        with self._condition:
+            while True:
+                blocked_for = self._blocked_until - time.monotonic()
+                if blocked_for > 0:
+                    self._condition.wait(timeout=blocked_for)
+                    continue
+                self._refill()
+                if self._request_allowance >= 1 and self._token_allowance >= tokens:
+                    self._request_allowance -= 1
+                    self._token_allowance -= tokens
+                    return
+
+                request_wait = (1 - self._request_allowance) * 60.0 / self.requests_per_minute
+                token_wait = (tokens - self._token_allowance) * 60.0 / self.tokens_per_minute
+                self._condition.wait(timeout=max(request_wait, token_wait, 0.01))
+
+    def penalize(self, seconds: float):
+        """
+        Pause every worker for `seconds` after a 429.
+
+        Concurrent penalties overlap instead of adding up: several workers
+        hitting the same 429 burst extend one shared pause to the latest
+        deadline rather than each draining a backoff's worth of budget.
+        """
+        with self._condition:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class EmbeddingScheduler:
+    """
+    Concurrent, rate-limited embedding of text chunks.
+
+    Features:
+    - Packs chunks into batches bounded by token count and input count
+    - Runs batches on a thread pool (LangChain embeddings are synchronous)
+    - Retries 429s with exponential backoff + jitter, honouring Retry-After
+    - Yields batches as they finish so callers can store them while later
+      batches are still in flight
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        max_batch_tokens: int = 100_000,
+        max_batch_size: int = 256,
+        max_workers: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 6,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        model: str = "text-embedding-3-small"
+    ):
+        """
+        Args:
+            embeddings: LangChain Embeddings instance (embed_documents is called per batch)
+            max_batch_tokens: Upper bound on tokens sent in one request
+            max_batch_size: Upper bound on inputs sent in one request
+            max_workers: Number of batches in flight at once
+            rate_limiter: Shared RateLimiter (a private one is created if omitted)
+            max_retries: Retries per batch on 429 before giving up
+            base_backoff: Initial backoff in seconds
+            max_backoff: Backoff ceiling in seconds
+            model: Embedding model name, used to pick the tokenizer
+        """
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = min(max_batch_size, MAX_INPUTS_PER_REQUEST)
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.count_tokens = get_token_counter(model)
+
+    def make_batches(self, texts: List[str]) -> List[Tuple[List[int], int]]:
+        """
+        Split texts into token-bounded batches.
+
+        Returns:
+            List of (indices into texts, total tokens) tuples, in input order
+        """
+        batches = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for idx, text in enumerate(texts):
+            tokens = min(self.count_tokens(text), MAX_TOKENS_PER_INPUT)
+
+            if current and (
+                current_tokens + tokens > self.max_batch_tokens
+                or len(current) >= self.max_batch_size
+            ):
+                batches.append((current, current_tokens))
+                current = []
+                current_tokens = 0
+
+            current.append(idx)
+            current_tokens += tokens
+
+        if current:
+            batches.append((current, current_tokens))
+
+        return batches
+
+    def _embed_batch(self, batch_texts: List[str], tokens: int) -> Tuple[List[List[float]], Dict]:
+        """Embed one batch, retrying on 429. Returns (vectors, batch stats)."""
+        retries = 0
+        started = time.monotonic()
+
+        while True:
+            self.rate_limiter.acquire(tokens)
+            try:
+                vectors = self.embeddings.embed_documents(batch_texts)
+                return vectors, {
+                    'tokens': tokens,
+                    'retries': retries,
+                    'latency_s': round(time.monotonic() - started, 3)
+                }
+            except Exception as e:
+                if not is_rate_limit_error(e) or retries >= self.max_retries:
+                    raise
+
+                delay = _retry_after_seconds(e)
+                if delay is None:
+                    delay = min(self.max_backoff, self.base_backoff * (2 ** retries))
+                    delay += random.uniform(0, delay / 2)
+
+                retries += 1
+                print(f"  ⚠️ Embedding rate limited, retry {retries}/{self.max_retries} in {delay:.1f}s")
+                self.rate_limiter.penalize(delay)
+                time.sleep(delay)
+
+    def embed_stream(self, texts: List[str]) -> Iterator[Tuple[List[int], List[List[float]], Dict]]:
+        """
+        Embed texts concurrently and yield results as each batch completes.
+
+        Yields:
+            (indices into texts, embedding vectors, batch stats) per batch,
+            in completion order. A failed batch yields vectors=None and the
+            error message under batch_stats['error'] so the others still land.
+        """
+        batches = self.make_batches(texts)
+        if not batches:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            futures = {
+                executor.submit(self._embed_batch, [texts[i] for i in indices], tokens): indices
+                for indices, tokens in batches
+            }
+            for future in as_completed(futures):
+                indices = futures[future]
+                try:
+                    vectors, batch_stats = future.result()
+                except Exception as e:
+                    vectors, batch_stats = None, {'error': str(e), 'size': len(indices)}
+                yield indices, vectors, batch_stats
+
+    def embed_all(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts concurrently and return vectors in input order."""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for indices, vectors, batch_stats in self.embed_stream(texts):
+            if vectors is None:
+                raise RuntimeError(f"Embedding batch failed: {batch_stats['error']}")
+            for idx, vector in zip(indices, vectors):
+                results[idx] = vector
+        return results
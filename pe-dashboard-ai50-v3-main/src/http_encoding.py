@@ -0,0 +1,249 @@
+"""
+HTTP Encoding - compact JSON, negotiated compression and field selection
+
+Tool responses carry whole dashboards and approval listings carry full
+metadata objects, and both travel between the Airflow, MCP and Streamlit
+containers on every call. This module gives the FastAPI apps:
+
+- CompactJSONResponse: default response class, serialized with orjson when
+  it is installed (falls back to the standard compact json.dumps)
+- CompressionMiddleware: br (when the brotli package is installed) or gzip,
+  negotiated from Accept-Encoding; small bodies and SSE streams are sent as-is
+- select_fields(): trims a JSON-able object to comma-separated, dotted
+  field paths (the `fields=` query parameter)
+
+requests and httpx send Accept-Encoding and decompress transparently, so
+clients need no changes.
+"""
+
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# Below this many bytes compression costs more than it saves
+MINIMUM_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# SSE frames must reach the client as they are produced
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream",)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes (orjson when available)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CompactJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() (pass as the app's default_response_class)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ============================================================================
+# FIELD SELECTION
+# ============================================================================
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict]:
+    """
+    'company_id,metadata.status' -> {"company_id": {}, "metadata": {"status": {}}}
+
+    Returns None when no fields are given (keep everything).
+    """
+    if not fields:
+        return None
+    tree: Dict = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree or None
+
+
+def _select(data: Any, tree: Dict) -> Any:
+    if not tree:
+        return data
+    if isinstance(data, list):
+        return [_select(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: _select(data[key], subtree) for key, subtree in tree.items() if key in data}
+
+
+def select_fields(data: Any, fields: Optional[str]) -> Any:
+    """
+    Keep only the requested fields of a JSON-able object.
+
+    Lists are trimmed item by item; unknown fields are ignored.
+
+    Args:
+        data: Dict / list to trim
+        fields: Comma-separated dotted paths, e.g. "success,result,metadata.tokens_used"
+
+    Returns:
+        Trimmed copy (or data itself when fields is empty)
+    """
+    tree = parse_fields(fields)
+    return data if tree is None else _select(data, tree)
+
+
+def select_response(response, fields: Optional[str]):
+    """Return a Pydantic response as-is, or as a trimmed CompactJSONResponse when fields are given."""
+    if not fields:
+        return response
+    return CompactJSONResponse(select_fields(response.model_dump(mode="json"), fields))
+
+
+# ============================================================================
+# COMPRESSION
+# ============================================================================
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header (None for identity)."""
+    offered = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            offered[name.strip()] = quality
+
+    candidates = (["br"] if BROTLI_AVAILABLE else []) + ["gzip"]
+    wildcard = offered.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = offered.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """Streaming gzip / brotli compressor with a common interface."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + (self._zlib.flush() if final else self._zlib.flush(zlib.Z_SYNC_FLUSH))
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies with the client's preferred encoding.
+
+    Single-message bodies are compressed whole (with an exact Content-Length);
+    streamed bodies are compressed chunk by chunk with a flush per chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                # First body message decides whether this response is compressed
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or content_type.startswith(UNCOMPRESSED_CONTENT_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    data = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(data))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                await send(start)
+
+            if passthrough:
+                await send(message)
+                return
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body
+            })
+
+        await self.app(scope, receive, send_compressed)
+        if start_message is not None:
+            # Response ended without a body message
+            await send(start_message)
+
+
+def enable_compression(app, minimum_size: int = MINIMUM_COMPRESS_SIZE):
+    """Add CompressionMiddleware to a FastAPI app."""
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
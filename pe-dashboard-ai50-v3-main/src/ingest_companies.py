@@ -4,11 +4,19 @@ Ingestion Script - Load data, chunk with LangChain, and store in ChromaDB
 
 import os
 import sys
+import json
+import argparse
+import math
+import threading
 from pathlib import Path
 import time
-from typing import List
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from rag_pipeline import VectorStore, load_company_data_from_disk
+from rag_pipeline import VectorStore, iter_company_documents
+from embedding_scheduler import RateLimiter
+from result_cache import bump_company_generation
 
 # Load .env from project root - FORCE OVERRIDE
 env_path = Path(__file__).parent.parent / 'src'/'.env'
@@ -57,60 +65,238 @@ def get_all_companies(base_path: str) -> List[str]:
     return sorted(companies)
 
 
-def ingest_single_company(
+def _empty_record(company_name: str) -> Dict:
+    """Stats record for a company that has not (successfully) ingested anything yet."""
+    return {
+        'company': company_name,
+        'status': 'failed',
+        'sources': 0,
+        'bytes': 0,
+        'chunks_created': 0,
+        'chunks_stored': 0,
+        'chunks_skipped': 0,
+        'embed_batches': 0,
+        'embed_retries': 0,
+        'tokens_embedded': 0,
+        'embed_latency_s': 0.0,
+        'elapsed_s': 0.0,
+        'errors': []
+    }
+
+
+def ingest_company_with_stats(
     company_name: str,
     base_path: str,
     vector_store: VectorStore,
     force_refresh: bool = False
-) -> bool:
-    """Ingest a single company's data using LangChain."""
-    print(f"\n{'='*70}")
-    print(f"📦 Processing: {company_name}")
-    print(f"{'='*70}")
+) -> Dict:
+    """
+    Ingest a single company and return a machine-readable stats record.
+
+    Never raises - failures are captured in the record's 'status' and 'errors'
+    so one company cannot take down a parallel run.
+    """
+    record = _empty_record(company_name)
+    started = time.monotonic()
     
     try:
-        # Load from disk
-        print("Loading scraped data...")
-        scraped_data = load_company_data_from_disk(company_name, base_path)
-        
-        if not scraped_data:
-            print(f"❌ No data found for {company_name}")
-            return False
-        
-        print(f"✓ Loaded {len(scraped_data)} sources:")
-        for source in scraped_data:
-            print(f"  - {source['source_type']}: {len(source['text'])} chars")
-        
-        # Chunk with LangChain and store with OpenAI embeddings
-        print("\nChunking with LangChain and embedding with OpenAI...")
+        # Documents are read lazily while the vector store consumes them
         stats = vector_store.ingest_company_data(
             company_name=company_name,
-            scraped_data=scraped_data,
+            scraped_data=iter_company_documents(company_name, base_path),
             force_refresh=force_refresh
         )
         
-        # Print stats
-        print(f"\n📊 Ingestion Stats:")
-        print(f"  ✓ Sources processed: {stats['sources_processed']}")
-        print(f"  ✓ Chunks created: {stats['chunks_created']}")
-        print(f"  ✓ Chunks stored: {stats['chunks_stored']}")
+        record['sources'] = stats['sources_processed']
+        record['bytes'] = stats.get('bytes_processed', 0)
+        if record['sources'] == 0 and not stats['errors']:
+            record['status'] = 'no_data'
+            return record
         
-        if stats['errors']:
-            print(f"  ⚠️  Errors: {len(stats['errors'])}")
-            for error in stats['errors'][:3]:
-                print(f"    - {error}")
+        record['chunks_created'] = stats['chunks_created']
+        record['chunks_stored'] = stats['chunks_stored']
+        record['chunks_skipped'] = stats['chunks_created'] - stats['chunks_stored']
+        record['embed_batches'] = stats.get('embed_batches', 0)
+        record['embed_retries'] = stats.get('embed_retries', 0)
+        record['tokens_embedded'] = stats.get('tokens_embedded', 0)
+        record['embed_latency_s'] = stats.get('embed_seconds', 0.0)
+        record['errors'] = stats['errors']
+        record['status'] = 'success' if stats['chunks_stored'] > 0 else 'failed'
         
-        return stats['chunks_stored'] > 0
+        if stats['chunks_stored'] > 0:
+            # Cached dashboards built from the previous chunks are now stale
+            bump_company_generation(company_name)
         
     except Exception as e:
-        print(f"❌ Failed to ingest {company_name}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        record['errors'].append(f"{type(e).__name__}: {str(e)}")
+    finally:
+        record['elapsed_s'] = round(time.monotonic() - started, 3)
+    
+    return record
+
+
+def ingest_single_company(
+    company_name: str,
+    base_path: str,
+    vector_store: VectorStore,
+    force_refresh: bool = False
+) -> bool:
+    """Ingest a single company's data using LangChain."""
+    print(f"\n{'='*70}")
+    print(f"📦 Processing: {company_name}")
+    print(f"{'='*70}")
+    
+    record = ingest_company_with_stats(company_name, base_path, vector_store, force_refresh)
+    
+    if record['status'] == 'no_data':
+        print(f"❌ No data found for {company_name}")
         return False
+    
+    # Print stats
+    print(f"\n📊 Ingestion Stats:")
+    print(f"  ✓ Sources processed: {record['sources']} ({record['bytes']:,} bytes)")
+    print(f"  ✓ Chunks created: {record['chunks_created']}")
+    print(f"  ✓ Chunks stored: {record['chunks_stored']}")
+    print(f"  ✓ Embedding time: {record['embed_latency_s']}s")
+    
+    if record['errors']:
+        print(f"  ⚠️  Errors: {len(record['errors'])}")
+        for error in record['errors'][:3]:
+            print(f"    - {error}")
+    
+    return record['status'] == 'success'
+
+
+class StatsSink:
+    """Thread-safe JSONL writer for per-company ingestion records."""
+    
+    def __init__(self, path: Optional[Path]):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._file = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+    
+    def write(self, record: Dict):
+        if not self._file:
+            return
+        line = json.dumps({'timestamp': datetime.now(timezone.utc).isoformat(), **record})
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+def summarize_records(records: List[Dict], elapsed: float) -> Dict:
+    """
+    Aggregate per-company records into a run summary.
+
+    Args:
+        records: Records from ingest_company_with_stats
+        elapsed: Wall-clock seconds for the whole run
+
+    Returns:
+        Totals per status and counter, plus p50/p95 of per-company
+        elapsed and embedding latency
+    """
+    company_seconds = [r['elapsed_s'] for r in records]
+    embed_seconds = [r['embed_latency_s'] for r in records]
+    return {
+        'event': 'summary',
+        'companies': len(records),
+        'success': sum(1 for r in records if r['status'] == 'success'),
+        'failed': sum(1 for r in records if r['status'] == 'failed'),
+        'no_data': sum(1 for r in records if r['status'] == 'no_data'),
+        'chunks_created': sum(r['chunks_created'] for r in records),
+        'chunks_stored': sum(r['chunks_stored'] for r in records),
+        'chunks_skipped': sum(r['chunks_skipped'] for r in records),
+        'bytes': sum(r['bytes'] for r in records),
+        'tokens_embedded': sum(r['tokens_embedded'] for r in records),
+        'embed_retries': sum(r['embed_retries'] for r in records),
+        'company_elapsed_p50_s': _percentile(company_seconds, 50),
+        'company_elapsed_p95_s': _percentile(company_seconds, 95),
+        'embed_latency_p50_s': _percentile(embed_seconds, 50),
+        'embed_latency_p95_s': _percentile(embed_seconds, 95),
+        'elapsed_s': round(elapsed, 3)
+    }
+
+
+def ingest_companies_parallel(
+    companies: List[str],
+    base_path: str,
+    vector_store: VectorStore,
+    workers: int,
+    force_refresh: bool = False,
+    sink: Optional[StatsSink] = None
+) -> List[Dict]:
+    """
+    Ingest companies concurrently on a shared VectorStore.
+
+    The store's EmbeddingScheduler holds one RateLimiter, so every worker
+    draws from the same RPM/TPM budget.
+    """
+    records = []
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(ingest_company_with_stats, company, base_path, vector_store, force_refresh): company
+            for company in companies
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                record = future.result()
+            except Exception as e:
+                # Keep the records already collected; this company just counts as failed
+                record = _empty_record(futures[future])
+                record['errors'].append(f"{type(e).__name__}: {str(e)}")
+            records.append(record)
+            if sink:
+                sink.write({'event': 'company', **record})
+            
+            icon = '✓' if record['status'] == 'success' else '❌'
+            print(f"[{done}/{len(companies)}] {icon} {record['company']}: "
+                  f"{record['chunks_stored']}/{record['chunks_created']} chunks, "
+                  f"{record['elapsed_s']}s"
+                  + (f" - {record['errors'][0]}" if record['errors'] else ""))
+    
+    return records
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Chunk, embed and store company data in ChromaDB.")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Companies ingested concurrently (default: 1, sequential).")
+    p.add_argument("--embedding-workers", type=int, default=4,
+                   help="Embedding batches in flight per company.")
+    p.add_argument("--rpm", type=int, default=3000, help="Embedding requests-per-minute budget.")
+    p.add_argument("--tpm", type=int, default=1_000_000, help="Embedding tokens-per-minute budget.")
+    p.add_argument("--stats-file", default=None,
+                   help="Append per-company JSONL stats and a summary line to this file.")
+    p.add_argument("--companies", nargs="*", default=None, help="Only ingest these companies.")
+    p.add_argument("--yes", "-y", action="store_true", help="Skip the confirmation prompt.")
+    p.add_argument("--force-refresh", action="store_true",
+                   help="Delete existing chunks first (skips the refresh prompt).")
+    return p.parse_args()
 
 
 def main():
     """Main ingestion process with LangChain."""
+    args = _parse_args()
+    
     print("="*70)
     print("🚀 Lab 4: LangChain Chunking + OpenAI Embeddings")
     print("="*70)
@@ -154,7 +340,9 @@ def main():
             database=chroma_db,
             openai_api_key=openai_api_key,  # ← THIS IS REQUIRED NOW
             chunk_size=1000,                 # ~750 tokens
-            chunk_overlap=200                # Overlap for context
+            chunk_overlap=200,               # Overlap for context
+            embedding_workers=args.embedding_workers,
+            rate_limiter=RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
         )
     except Exception as e:
         print(f"❌ Initialization failed: {str(e)}")
@@ -165,6 +353,8 @@ def main():
     # Get companies
     print("\n🔍 Discovering companies...")
     companies = get_all_companies(datapath)
+    if args.companies:
+        companies = [c for c in companies if c in set(args.companies)]
     
     if not companies:
         print("❌ No companies found")
@@ -179,15 +369,21 @@ def main():
     # Confirm
     print(f"\n⚠️  This will chunk and embed data for {len(companies)} companies using OpenAI.")
     print(f"⚠️  Note: OpenAI embeddings API will be called (costs ~$0.00013 per 1K tokens)")
-    response = input("Continue? (yes/no): ").strip().lower()
-    
-    if response not in ['yes', 'y']:
-        print("Cancelled.")
-        sys.exit(0)
+    if not args.yes:
+        response = input("Continue? (yes/no): ").strip().lower()
+        
+        if response not in ['yes', 'y']:
+            print("Cancelled.")
+            sys.exit(0)
     
     # Ask about refresh
-    refresh_response = input("Force refresh (delete existing)? (yes/no): ").strip().lower()
-    force_refresh = refresh_response in ['yes', 'y']
+    if args.force_refresh or args.yes:
+        force_refresh = args.force_refresh
+    else:
+        refresh_response = input("Force refresh (delete existing)? (yes/no): ").strip().lower()
+        force_refresh = refresh_response in ['yes', 'y']
+    
+    sink = StatsSink(args.stats_file)
     
     # Process all companies
     print(f"\n{'='*70}")
@@ -198,22 +394,40 @@ def main():
     fail = 0
     start_time = time.time()
     
-    for idx, company in enumerate(companies, 1):
-        print(f"\n[{idx}/{len(companies)}] {company}")
-        
+    if args.workers > 1:
+        print(f"Parallel mode: {args.workers} workers, {args.rpm} RPM / {args.tpm} TPM shared budget")
         try:
-            if ingest_single_company(company, datapath, vector_store, force_refresh):
-                success += 1
-            else:
-                fail += 1
+            records = ingest_companies_parallel(
+                companies, datapath, vector_store, args.workers, force_refresh, sink
+            )
         except KeyboardInterrupt:
             print("\n\n⚠️  Interrupted by user")
-            break
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            fail += 1
-        
-        time.sleep(0.5)
+            records = []
+        success = sum(1 for r in records if r['status'] == 'success')
+        fail = len(records) - success
+    else:
+        records = []
+        for idx, company in enumerate(companies, 1):
+            print(f"\n[{idx}/{len(companies)}] {company}")
+            
+            try:
+                record = ingest_company_with_stats(company, datapath, vector_store, force_refresh)
+                records.append(record)
+                sink.write({'event': 'company', **record})
+                
+                if record['status'] == 'success':
+                    print(f"✓ {company}: {record['chunks_stored']} chunks stored in {record['elapsed_s']}s")
+                    success += 1
+                else:
+                    print(f"❌ {company}: {record['status']} {record['errors'][:1]}")
+                    fail += 1
+            except KeyboardInterrupt:
+                print("\n\n⚠️  Interrupted by user")
+                break
+    
+    summary = summarize_records(records, time.time() - start_time)
+    sink.write(summary)
+    sink.close()
     
     # Summary
     elapsed = time.time() - start_time
@@ -224,6 +438,9 @@ def main():
     print(f"  Failed: {fail}")
     print(f"  Total: {len(companies)}")
     print(f"  Time: {elapsed:.2f}s ({elapsed/60:.2f} min)")
+    print(f"  Chunks stored: {summary['chunks_stored']} (skipped {summary['chunks_skipped']})")
+    if args.stats_file:
+        print(f"  Stats: {args.stats_file}")
     
     # Show stats
     try:
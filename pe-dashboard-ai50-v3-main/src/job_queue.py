@@ -0,0 +1,407 @@
+"""
+SQLite-Backed Job Queue for Long-Running Dashboard Generation
+
+Dashboard generation takes 15-60s, close to the HTTP timeouts of the MCP
+clients and Streamlit. Instead of holding a request open, callers submit a
+job, get an ID back immediately and poll GET /jobs/{id} (or receive a
+webhook callback) for the result.
+
+- Jobs live in a local SQLite file (data/jobs/jobs.db), so no broker is needed
+  and several server processes on one host can share the queue
+- Higher priority runs first, then oldest first
+- Submitting a job whose dedupe key matches a queued/running job returns the
+  existing job instead of creating a duplicate (no double GPT spend on retries)
+- A claimed job holds a lease; if its worker dies, the job is picked up again
+  once the lease expires, until max_attempts runs have been used
+- Webhook callbacks only go to http(s) URLs on public hosts, or to the hosts
+  listed in JOB_CALLBACK_ALLOWED_HOSTS when that is set
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+JOBS_DB = Path(os.getenv("JOBS_DB_PATH", Path(__file__).resolve().parents[1] / "data" / "jobs" / "jobs.db"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+ACTIVE_STATUSES = ("queued", "running")
+
+# Comma-separated hostnames callbacks may target; unset allows any public host
+CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower()
+    for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    dedupe_key TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 1,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    callback_url TEXT,
+    callback_status TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status);
+"""
+
+
+def validate_callback_url(url: str) -> str:
+    """
+    Check that a webhook URL is safe for the server to POST to.
+
+    Only http(s) is accepted. When CALLBACK_ALLOWED_HOSTS is set the host must
+    be listed; otherwise every address the host resolves to must be public
+    (no loopback, private, link-local, reserved or multicast ranges), so
+    clients cannot make the server call internal services.
+
+    Args:
+        url: Callback URL supplied by the client
+
+    Returns:
+        The URL unchanged
+
+    Raises:
+        ValueError: If the URL is not allowed
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError(f"Callback URL must use http or https, got '{parts.scheme or url}'")
+    host = (parts.hostname or "").lower()
+    if not host:
+        raise ValueError("Callback URL has no host")
+
+    if CALLBACK_ALLOWED_HOSTS:
+        if host not in CALLBACK_ALLOWED_HOSTS:
+            raise ValueError(f"Callback host '{host}' is not in JOB_CALLBACK_ALLOWED_HOSTS")
+        return url
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or None)}
+    except (socket.gaierror, UnicodeError) as e:
+        raise ValueError(f"Callback host '{host}' does not resolve: {e}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Callback host '{host}' resolves to non-public address {ip}")
+    return url
+
+
+class JobQueue:
+    """Persistent priority queue of jobs (one SQLite connection per instance)."""
+
+    def __init__(self, db_path: Path = None, lease_seconds: int = 600):
+        """
+        Args:
+            db_path: SQLite file (defaults to data/jobs/jobs.db or JOBS_DB_PATH)
+            lease_seconds: How long a claimed job may run before another worker may retry it
+        """
+        self.db_path = Path(db_path or JOBS_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+
+    def submit(
+        self,
+        kind: str,
+        params: Dict,
+        priority: int = 0,
+        dedupe_key: Optional[str] = None,
+        callback_url: Optional[str] = None,
+        max_attempts: int = 1
+    ) -> Tuple[Dict, bool]:
+        """
+        Enqueue a job.
+
+        Args:
+            kind: Handler name
+            params: JSON-serialisable handler arguments
+            priority: Higher runs first
+            dedupe_key: Jobs with the same key share one execution while active
+            callback_url: Webhook POSTed with the job once it finishes (see validate_callback_url)
+            max_attempts: Runs allowed before the job is marked failed
+
+        Returns:
+            (job, deduplicated) - deduplicated is True if an active job was reused
+
+        Raises:
+            ValueError: If callback_url is not allowed
+        """
+        if callback_url:
+            validate_callback_url(callback_url)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if dedupe_key:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running') "
+                        "ORDER BY created_at LIMIT 1",
+                        (dedupe_key,)
+                    ).fetchone()
+                    if row is not None:
+                        # A more urgent duplicate bumps the existing job's priority
+                        if priority > row['priority']:
+                            self._conn.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, row['id']))
+                        self._conn.execute("COMMIT")
+                        return self._to_dict(row), True
+
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, params, priority, dedupe_key, status, max_attempts, "
+                    "callback_url, created_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                    (job_id, kind, json.dumps(params), priority, dedupe_key,
+                     max(1, max_attempts), callback_url, time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(job_id), False
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Atomically take the next runnable job (queued, or running with an expired lease).
+
+        Expired jobs that have already used max_attempts runs are marked failed
+        instead of being claimed again.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', lease_until = NULL, finished_at = ?, "
+                    "error = 'Lease expired after ' || attempts || ' attempt(s); the worker did not finish the job' "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, now)
+                )
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' "
+                    "OR (status = 'running' AND lease_until < ? AND attempts < max_attempts) "
+                    "ORDER BY priority DESC, created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+                    "started_at = ? WHERE id = ?",
+                    (now + self.lease_seconds, now, row['id'])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row['id'])
+
+    def complete(self, job_id: str, result: Any):
+        """Mark a job succeeded and store its JSON result."""
+        self._update(
+            "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, lease_until = NULL, "
+            "finished_at = ? WHERE id = ?",
+            (json.dumps(result, default=str), time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """
+        Record a failed run.
+
+        Returns:
+            True if the job was re-queued for another attempt, False if it is now failed
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            retry = row is not None and row['attempts'] < row['max_attempts']
+            if retry:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, lease_until = NULL WHERE id = ?",
+                    (error, job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, finished_at = ? WHERE id = ?",
+                    (error, time.time(), job_id)
+                )
+        return retry
+
+    def set_callback_status(self, job_id: str, status: str):
+        self._update("UPDATE jobs SET callback_status = ? WHERE id = ?", (status, job_id))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job as a dict (params/result decoded), or None if unknown."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def purge(self, older_than_seconds: int) -> int:
+        """Delete finished jobs older than the given age. Returns the number removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+            return cursor.rowcount
+
+    def _update(self, sql: str, args: tuple):
+        with self._lock:
+            self._conn.execute(sql, args)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['params'] = json.loads(job['params']) if job['params'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job.pop('lease_until', None)
+        return job
+
+
+JobHandler = Callable[[Dict], Awaitable[Any]]
+
+
+class JobWorkerPool:
+    """asyncio workers that drain a JobQueue with registered handlers."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        workers: int = 4,
+        poll_interval: float = 1.0,
+        job_timeout: float = 300.0,
+        callback_timeout: float = 10.0
+    ):
+        """
+        Args:
+            queue: Queue to drain
+            handlers: kind -> async handler(params) returning a JSON-serialisable result
+            workers: Concurrent jobs per process
+            poll_interval: Idle wait between checks for jobs from other processes
+            job_timeout: Per-job limit in seconds
+            callback_timeout: Webhook POST timeout in seconds
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.callback_timeout = callback_timeout
+        self.busy = 0
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Start the worker tasks on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers (call after submitting a job in this process)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run_job(job)
+
+    async def run_job(self, job: Dict):
+        """Run one claimed job and record its outcome."""
+        self.busy += 1
+        try:
+            handler = self.handlers.get(job['kind'])
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job['kind']}'")
+            result = await asyncio.wait_for(handler(job['params']), timeout=self.job_timeout)
+            await asyncio.to_thread(self.queue.complete, job['id'], result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if await asyncio.to_thread(self.queue.fail, job['id'], error):
+                self.notify()
+                return
+        finally:
+            self.busy -= 1
+
+        if job.get('callback_url'):
+            await self._send_callback(job['id'], job['callback_url'])
+
+    async def _send_callback(self, job_id: str, url: str):
+        finished = await asyncio.to_thread(self.queue.get, job_id)
+        # Re-check at send time: the host may resolve differently than at submit
+        try:
+            await asyncio.to_thread(validate_callback_url, url)
+        except ValueError as e:
+            await asyncio.to_thread(self.queue.set_callback_status, job_id, f"blocked: {e}")
+            return
+        if not HTTPX_AVAILABLE:
+            await asyncio.to_thread(self.queue.set_callback_status, job_id, "skipped: httpx not installed")
+            return
+        try:
+            async with httpx.AsyncClient(timeout=self.callback_timeout) as client:
+                response = await client.post(url, json=finished)
+            status = f"HTTP {response.status_code}"
+        except Exception as e:
+            status = f"error: {e}"
+        await asyncio.to_thread(self.queue.set_callback_status, job_id, status)
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'busy': self.busy,
+            'jobs': self.queue.counts()
+        }
@@ -0,0 +1,394 @@
+"""
+Metrics - in-process counters and latency histograms in Prometheus text format
+
+The API and MCP servers only had print statements and /health snapshots, so
+there was no way to see where a tool call spends its time. This module keeps
+a small registry of labelled counters and histograms (no prometheus_client
+dependency) and renders it for a GET /metrics scrape:
+
+- timed(stage, tool=...) times any block: `with timed("retrieval"):`.
+  A block that passes tool= also labels every stage timed inside it
+  (including the LLM calls in concurrency.py) with that tool
+- record_llm_usage() counts prompt / completion tokens per model
+- register_collector() adds values computed at scrape time, e.g. cache hit
+  ratios and upstream error counts from the existing *_stats() helpers
+- instrument_app() adds per-route request counters / latency and GET /metrics
+  to a FastAPI app
+"""
+
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the tail buckets cover full GPT-4o dashboard generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Tool whose stages are being timed in the current request / task
+_current_tool: contextvars.ContextVar = contextvars.ContextVar("metrics_tool", default="none")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set (observations in seconds)."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        lines = self._header()
+        for key, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+# A collector returns (name, type, help, [(labels dict, value), ...]) families at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+Collector = Callable[[], Iterable[Family]]
+
+_metrics: Dict[str, _Metric] = {}
+_collectors: List[Collector] = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric: _Metric) -> _Metric:
+    with _registry_lock:
+        existing = _metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        _metrics[metric.name] = metric
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Get (or create) a process-wide counter."""
+    return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Get (or create) a process-wide histogram."""
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def register_collector(collector: Collector):
+    """Add a function whose metric families are computed on every scrape (registered once)."""
+    with _registry_lock:
+        if collector not in _collectors:
+            _collectors.append(collector)
+
+
+def render_latest() -> str:
+    """All registered metrics in Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collector in collectors:
+        try:
+            families = list(collector())
+        except Exception as e:
+            print(f"⚠️ Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+            continue
+        for name, metric_type, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================================
+# STANDARD METRICS
+# ============================================================================
+
+STAGE_SECONDS = histogram(
+    "pe_stage_duration_seconds", "Time spent per tool and stage", ("tool", "stage")
+)
+STAGE_ERRORS = counter(
+    "pe_stage_errors_total", "Stages that raised, by tool, stage and exception type", ("tool", "stage", "error")
+)
+LLM_TOKENS = counter(
+    "pe_llm_tokens_total", "LLM tokens used, by model and kind (prompt / completion)", ("model", "kind")
+)
+LLM_CALLS = counter(
+    "pe_llm_calls_total", "LLM completions, by model and tool", ("model", "tool")
+)
+HTTP_REQUESTS = counter(
+    "pe_http_requests_total", "HTTP requests, by app, method, route and status", ("app", "method", "route", "status")
+)
+HTTP_SECONDS = histogram(
+    "pe_http_request_duration_seconds",
+    "Time until response headers are sent (streams keep running afterwards)",
+    ("app", "route")
+)
+
+
+def current_tool() -> str:
+    return _current_tool.get()
+
+
+class timed:
+    """
+    Context manager recording a block's duration in pe_stage_duration_seconds.
+
+    Usage:
+        with timed("total", tool="generate_rag_dashboard"):
+            with timed("retrieval"):
+                ...
+
+    Args:
+        stage: Stage name ('total', 'gcs_fetch', 'retrieval', 'llm', ...)
+        tool: Tool label; when given it also applies to nested stages.
+            Defaults to the enclosing block's tool.
+    """
+
+    def __init__(self, stage: str, tool: Optional[str] = None):
+        self.stage = stage
+        self.tool = tool
+        self.elapsed = None
+        self._token = None
+
+    def __enter__(self):
+        if self.tool is not None:
+            self._token = _current_tool.set(self.tool)
+        else:
+            self.tool = _current_tool.get()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._started
+        STAGE_SECONDS.observe(self.elapsed, tool=self.tool, stage=self.stage)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(tool=self.tool, stage=self.stage, error=exc_type.__name__)
+        if self._token is not None:
+            try:
+                _current_tool.reset(self._token)
+            except ValueError:
+                # Async generator closed from another context (client disconnect)
+                pass
+        return False
+
+
+def record_llm_usage(model: Optional[str], usage) -> None:
+    """Count one completion and its token usage (OpenAI usage object or None)."""
+    model = model or "unknown"
+    LLM_CALLS.inc(model=model, tool=current_tool())
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
+
+
+# Keys of the *_stats() dicts that only ever grow (exported as counters)
+COUNTER_STAT_KEYS = {
+    "hits", "disk_hits", "misses", "total", "errors", "calls", "executions", "coalesced", "rebuilds",
+    "flushes", "signals_written", "duplicates"
+}
+
+
+def stats_families(prefix: str, label: str, stats: Dict[str, Dict]) -> List[Family]:
+    """
+    Turn a {name: {key: number}} stats snapshot (cache_stats(), limiter_stats(), ...) into families.
+
+    Counter-like keys become `<prefix>_<key>_total`, the rest gauges `<prefix>_<key>`.
+    Stats with hits and misses also get `<prefix>_hit_ratio`.
+
+    Args:
+        prefix: Metric name prefix, e.g. 'pe_cache'
+        label: Label holding the stats name, e.g. 'cache'
+        stats: Snapshot to convert
+    """
+    samples: Dict[Tuple[str, str, str], List] = {}
+    for name, values in sorted(stats.items()):
+        if not isinstance(values, dict):
+            continue
+        for key, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in COUNTER_STAT_KEYS:
+                family = (f"{prefix}_{key}_total", "counter", f"'{key}' count per {label}")
+            else:
+                family = (f"{prefix}_{key}", "gauge", f"Current '{key}' per {label}")
+            samples.setdefault(family, []).append(({label: name}, value))
+        if "hits" in values and "misses" in values:
+            # disk_hits are already included in hits
+            hits = values["hits"]
+            lookups = hits + values["misses"]
+            family = (f"{prefix}_hit_ratio", "gauge", f"Hits / lookups per {label}")
+            samples.setdefault(family, []).append(({label: name}, hits / lookups if lookups else 0.0))
+    return [
+        (name, metric_type, documentation, family_samples)
+        for (name, metric_type, documentation), family_samples in samples.items()
+    ]
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them until response headers are sent.
+
+    Requests are labelled with the route template (/jobs/{job_id}, not every
+    job id), which the router stores in the scope before calling the endpoint.
+    """
+
+    def __init__(self, app, app_name: str):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        observed = False
+
+        def observe():
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(app=self.app_name, method=scope["method"], route=route, status=status)
+            HTTP_SECONDS.observe(time.perf_counter() - started, app=self.app_name, route=route)
+
+        async def send_with_metrics(message):
+            nonlocal status, observed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                observed = True
+                observe()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not observed:
+                observe()
+
+
+def instrument_app(app, app_name: str):
+    """
+    Add request counters / latency and a GET /metrics route to a FastAPI app.
+
+    Args:
+        app: FastAPI application
+        app_name: Value of the 'app' label ('api', 'mcp')
+    """
+    from fastapi import Response
+
+    app.add_middleware(MetricsMiddleware, app_name=app_name)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
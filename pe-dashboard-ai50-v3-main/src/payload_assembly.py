@@ -13,9 +13,11 @@ if __package__ in (None, "", "__main__"):
         sys.path.append(str(ROOT))
     from models import Payload  # type: ignore
     from structured_extraction import StructuredBundle, load_company_documents  # type: ignore
+    from result_cache import bump_company_generation  # type: ignore
 else:
     from .models import Payload
     from .structured_extraction import StructuredBundle, load_company_documents
+    from .result_cache import bump_company_generation
 
 STRUCTURED_DIR = Path(__file__).resolve().parents[1] / "data" / "structured"
 PAYLOAD_DIR = Path(__file__).resolve().parents[1] / "data" / "payloads"
@@ -186,6 +188,8 @@ def assemble_payload(company_id: str) -> Path:
     PAYLOAD_DIR.mkdir(parents=True, exist_ok=True)
     output_path = PAYLOAD_DIR / f"{company_id}.json"
     output_path.write_text(payload.model_dump_json(indent=2, by_alias=True))
+    # Cached dashboards built from the previous payload are now stale
+    bump_company_generation(company_id)
     return output_path
 
 
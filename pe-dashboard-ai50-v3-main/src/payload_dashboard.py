@@ -0,0 +1,236 @@
+"""
+Payload Dashboard - template renderer for structured (payload-based) dashboards
+
+The MCP server's generate_structured_dashboard tool turns a Payload into the
+8-section markdown dashboard without calling GPT. Rendering is split into:
+
+- PayloadIndex: one pass over the payload that precomputes what the
+  sections need (funding / risk / strategic events newest-first, latest snapshot and
+  visibility record, company display name)
+- SECTIONS: registry of section builders, each returning its lines
+- render_dashboard / render_many: join every section's lines once
+
+Sections are registered in display order with @section; adding a section
+means adding a builder (and bumping the server's STRUCTURED_TEMPLATE_VERSION).
+
+Run `python src/payload_dashboard.py` to benchmark rendering every payload
+in data/payloads.
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+NOT_DISCLOSED = "Not disclosed"
+RISK_EVENT_TYPES = ("layoff", "security_incident", "regulatory", "legal_action")
+STRATEGIC_EVENT_TYPES = ("product_release", "partnership", "mna")
+FOOTER = "\n---\n*Generated from structured payload*\n"
+
+# event_type -> slot in PayloadIndex's (funding, risk, strategic) buckets
+EVENT_BUCKET = {"funding": 0, **dict.fromkeys(RISK_EVENT_TYPES, 1), **dict.fromkeys(STRATEGIC_EVENT_TYPES, 2)}
+
+
+def safe_get(obj, attr, default=NOT_DISCLOSED):
+    """Attribute value, or default when the object or value is missing."""
+    if obj is None:
+        return default
+    value = getattr(obj, attr, None)
+    return value if value is not None else default
+
+
+class PayloadIndex:
+    """Precomputed views of a Payload shared by all section builders."""
+
+    def __init__(self, payload, company_id: str):
+        self.payload = payload
+        self.company_id = company_id
+        self.company = payload.company_record
+        self.name = safe_get(self.company, 'brand_name') or \
+            safe_get(self.company, 'legal_name', company_id.title())
+
+        # One stable sort, newest first, then one pass bucketing what the sections list
+        buckets = ([], [], [])
+        for event in sorted(payload.events, key=lambda e: e.occurred_on, reverse=True):
+            slot = EVENT_BUCKET.get(event.event_type)
+            if slot is not None:
+                buckets[slot].append(event)
+        self.funding_events, self.risk_events, self.strategic_events = buckets
+
+        self.latest_snapshot = max(payload.snapshots, key=lambda s: s.as_of) if payload.snapshots else None
+        self.latest_visibility = max(payload.visibility, key=lambda v: v.as_of) if payload.visibility else None
+
+
+SectionBuilder = Callable[[PayloadIndex], List[str]]
+SECTIONS: List[Tuple[str, SectionBuilder]] = []
+
+
+def section(title: str):
+    """Register a section builder; sections render in registration order."""
+    def register(builder: SectionBuilder) -> SectionBuilder:
+        SECTIONS.append((title, builder))
+        return builder
+    return register
+
+
+@section("1. Company Overview")
+def company_overview(index: PayloadIndex) -> List[str]:
+    company = index.company
+    return [
+        f"**Legal Name:** {safe_get(company, 'legal_name')}\n",
+        f"**Website:** {safe_get(company, 'website')}\n",
+        f"**Industry:** {', '.join(company.categories) if company.categories else NOT_DISCLOSED}\n",
+        f"**Founded:** {safe_get(company, 'founded_year')}\n",
+        f"**Headquarters:** {safe_get(company, 'hq_city')}, {safe_get(company, 'hq_country')}\n",
+    ]
+
+
+@section("2. Business Model and GTM")
+def business_model(index: PayloadIndex) -> List[str]:
+    products = index.payload.products
+    if not products:
+        return [f"{NOT_DISCLOSED}\n"]
+    lines = ["**Products/Services:**\n"]
+    for product in products:
+        lines.append(f"- **{product.name}**: {product.description or 'No description'}\n")
+        if product.pricing_model:
+            lines.append(f"  - Pricing: {product.pricing_model}\n")
+    return lines
+
+
+@section("3. Funding & Investor Profile")
+def funding(index: PayloadIndex) -> List[str]:
+    lines = []
+    total_raised = safe_get(index.company, 'total_raised_usd')
+    if total_raised != NOT_DISCLOSED:
+        lines.append(f"**Total Raised:** ${float(total_raised):,.0f} USD\n")
+
+    funding_events = index.funding_events
+    if funding_events:
+        lines.append("\n**Funding History:**\n")
+        for event in funding_events[:5]:
+            line = f"- **{event.title}** ({event.occurred_on.isoformat()})"
+            if event.amount_usd:
+                line += f" - ${event.amount_usd:,.0f}"
+            if event.investors:
+                line += f" - {', '.join(event.investors[:3])}"
+            lines.append(line + "\n")
+    return lines
+
+
+@section("4. Growth Momentum")
+def growth(index: PayloadIndex) -> List[str]:
+    latest = index.latest_snapshot
+    if latest is None:
+        return [f"{NOT_DISCLOSED}\n"]
+    lines = []
+    if latest.headcount_total:
+        lines.append(f"**Employee Count:** {latest.headcount_total:,}\n")
+    if latest.headcount_growth_pct:
+        lines.append(f"**Growth Rate:** {latest.headcount_growth_pct:.1f}%\n")
+    return lines
+
+
+@section("5. Visibility & Market Sentiment")
+def visibility(index: PayloadIndex) -> List[str]:
+    latest = index.latest_visibility
+    if latest is None:
+        return [f"{NOT_DISCLOSED}\n"]
+    lines = []
+    if latest.news_mentions_30d:
+        lines.append(f"**News Mentions (30d):** {latest.news_mentions_30d}\n")
+    if latest.github_stars:
+        lines.append(f"**GitHub Stars:** {latest.github_stars:,}\n")
+    return lines
+
+
+@section("6. Risks and Challenges")
+def risks(index: PayloadIndex) -> List[str]:
+    risk_events = index.risk_events
+    if not risk_events:
+        return ["No significant risks identified\n"]
+    return [
+        f"- **{event.event_type.title()}** ({event.occurred_on.isoformat()}): {event.title}\n"
+        for event in risk_events
+    ]
+
+
+@section("7. Outlook")
+def outlook(index: PayloadIndex) -> List[str]:
+    strategic_events = index.strategic_events
+    if not strategic_events:
+        return [f"{NOT_DISCLOSED}\n"]
+    return ["**Recent Strategic Initiatives:**\n"] + [
+        f"- {event.title} ({event.occurred_on.isoformat()})\n"
+        for event in strategic_events[:5]
+    ]
+
+
+@section("8. Disclosure Gaps")
+def disclosure_gaps(index: PayloadIndex) -> List[str]:
+    company, payload = index.company, index.payload
+    gaps = []
+    if not company.website or company.website == NOT_DISCLOSED:
+        gaps.append("Company website")
+    if not payload.leadership:
+        gaps.append("Leadership team details")
+    if not payload.products:
+        gaps.append("Product information")
+
+    if not gaps:
+        return ["All key information available\n"]
+    return ["**Missing Information:**\n"] + [f"- {gap}\n" for gap in gaps]
+
+
+def render_dashboard(payload, company_id: str) -> str:
+    """
+    Render the 8-section markdown dashboard for one payload.
+
+    Args:
+        payload: Payload (models.Payload or src.models.Payload)
+        company_id: Used for the title when the payload has no company name
+
+    Returns:
+        Dashboard markdown
+    """
+    index = PayloadIndex(payload, company_id)
+    parts = [f"# PE Dashboard for {index.name}\n"]
+    for title, builder in SECTIONS:
+        parts.append(f"\n## {title}\n")
+        parts.extend(builder(index))
+    parts.append(FOOTER)
+    return "".join(parts)
+
+
+def render_many(payloads: Dict[str, object]) -> Dict[str, str]:
+    """
+    Render dashboards for many companies.
+
+    Args:
+        payloads: company_id -> Payload
+
+    Returns:
+        company_id -> dashboard markdown
+    """
+    return {company_id: render_dashboard(payload, company_id) for company_id, payload in payloads.items()}
+
+
+if __name__ == "__main__":
+    import time
+
+    from models import Payload
+    from payload_repository import PayloadRepository
+
+    repository = PayloadRepository(Payload)
+    payloads = {}
+    for company_id in repository.available_company_ids():
+        try:
+            payloads[company_id] = repository.get(company_id)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"⚠️ Skipping {company_id}: {e}")
+
+    rounds = 20
+    started = time.perf_counter()
+    for _ in range(rounds):
+        dashboards = render_many(payloads)
+    elapsed = (time.perf_counter() - started) / rounds
+
+    print(f"📊 Rendered {len(dashboards)} dashboards in {elapsed * 1000:.2f} ms "
+          f"({elapsed * 1000 / max(len(dashboards), 1):.3f} ms each, mean of {rounds} rounds)")
@@ -0,0 +1,229 @@
+"""
+Payload Repository - shared, validated cache of data/payloads/<company_id>.json
+
+The planner, data generator, MCP structured tool and evaluator can all load
+the same payload during one workflow run. Each load used to re-read the file
+(or re-download it from GCS) and re-validate it into Pydantic. The repository
+keeps an LRU of validated Payload objects:
+
+- local files are revalidated by (mtime_ns, size), a single stat() per call
+- GCS blobs are revalidated by generation, at most once per ttl_seconds
+- preload() loads many companies at once (e.g. before a batch run)
+
+Payload objects are shared between callers; treat them as read-only.
+The model class is passed in because callers import Payload both as
+`models` and `src.models`.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+PAYLOADS_DIR = Path(__file__).resolve().parents[1] / "data" / "payloads"
+GCS_PAYLOAD_PREFIX = "data/payloads"
+
+
+class PayloadRepository:
+    """LRU of validated payloads keyed by company_id, invalidated by file mtime or blob generation."""
+
+    def __init__(
+        self,
+        model,
+        payload_dir: Path = PAYLOADS_DIR,
+        bucket_getter: Optional[Callable[[], Any]] = None,
+        max_entries: int = 128,
+        ttl_seconds: float = 60.0
+    ):
+        """
+        Args:
+            model: Pydantic Payload class to validate with
+            payload_dir: Local payload directory (used when bucket_getter is None)
+            bucket_getter: Returns a GCS bucket; switches the repository to GCS mode
+            max_entries: LRU capacity
+            ttl_seconds: GCS mode only - how long a cached payload is served without a generation check
+        """
+        self.model = model
+        self.payload_dir = Path(payload_dir)
+        self.bucket_getter = bucket_getter
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, company_id: str):
+        """
+        Validated payload for a company.
+
+        Raises:
+            FileNotFoundError: If no payload exists for company_id
+            ValueError: If the payload JSON is invalid or fails validation
+        """
+        return self._entry(company_id)['payload']
+
+    def _entry(self, company_id: str) -> Dict:
+        with self._lock:
+            entry = self._entries.get(company_id)
+
+        if entry is not None and self.bucket_getter is not None:
+            if time.monotonic() - entry['checked_at'] < self.ttl_seconds:
+                return self._hit(company_id, entry)
+
+        version, loader = self._current_version(company_id)
+        if entry is not None and entry['version'] == version:
+            entry['checked_at'] = time.monotonic()
+            return self._hit(company_id, entry)
+
+        text = loader()
+        entry = self._parse(company_id, text, version)
+        with self._lock:
+            self.misses += 1
+            self._entries[company_id] = entry
+            self._entries.move_to_end(company_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _hit(self, company_id: str, entry: Dict) -> Dict:
+        with self._lock:
+            self.hits += 1
+            if company_id in self._entries:
+                self._entries.move_to_end(company_id)
+        return entry
+
+    def _current_version(self, company_id: str) -> Tuple[Any, Callable[[], str]]:
+        """Current version marker of the payload plus a loader for its text."""
+        if self.bucket_getter is None:
+            path = self.payload_dir / f"{company_id}.json"
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Payload not found for company_id: {company_id}. "
+                    f"Expected file at: {path}"
+                )
+            return (stat.st_mtime_ns, stat.st_size), lambda: path.read_text(encoding='utf-8')
+
+        bucket = self.bucket_getter()
+        blob_name = f"{GCS_PAYLOAD_PREFIX}/{company_id}.json"
+        blob = bucket.get_blob(blob_name) if bucket is not None else None
+        if blob is None:
+            raise FileNotFoundError(f"Payload not found for company_id: {company_id} (gs://.../{blob_name})")
+        generation = blob.generation
+        # Download exactly the generation we validated against
+        return generation, lambda: blob.download_as_text(if_generation_match=generation)
+
+    def _parse(self, company_id: str, text: str, version: Any) -> Dict:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(
+                f"Invalid JSON in payload file for company_id: {company_id}. "
+                f"Error: {str(e)}"
+            ) from e
+        try:
+            payload = self.model.model_validate(data)
+        except Exception as e:
+            raise ValueError(
+                f"Payload validation failed for company_id: {company_id}. "
+                f"Error: {str(e)}"
+            ) from e
+        return {
+            'version': version,
+            'payload': payload,
+            'checked_at': time.monotonic()
+        }
+
+    # ------------------------------------------------------------------
+    # Bulk / maintenance
+    # ------------------------------------------------------------------
+
+    def available_company_ids(self) -> List[str]:
+        if self.bucket_getter is None:
+            return sorted(path.stem for path in self.payload_dir.glob("*.json"))
+        bucket = self.bucket_getter()
+        if bucket is None:
+            return []
+        return sorted(
+            blob.name.rsplit('/', 1)[-1][:-len(".json")]
+            for blob in bucket.list_blobs(prefix=f"{GCS_PAYLOAD_PREFIX}/")
+            if blob.name.endswith(".json")
+        )
+
+    def preload(self, company_ids: Optional[Iterable[str]] = None, max_workers: int = 8) -> Dict[str, str]:
+        """
+        Load and validate many payloads concurrently.
+
+        Args:
+            company_ids: Companies to load (defaults to every available payload)
+            max_workers: Parallel reads (mainly useful in GCS mode)
+
+        Returns:
+            company_id -> error message for payloads that failed to load
+        """
+        ids = list(company_ids) if company_ids is not None else self.available_company_ids()
+        errors: Dict[str, str] = {}
+
+        def load(company_id: str):
+            try:
+                self._entry(company_id)
+            except (FileNotFoundError, ValueError) as e:
+                errors[company_id] = str(e)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(load, ids))
+
+        print(f"✅ Preloaded {len(ids) - len(errors)}/{len(ids)} payloads")
+        return errors
+
+    def invalidate(self, company_id: Optional[str] = None):
+        """Drop one company (or everything) from the cache."""
+        with self._lock:
+            if company_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(company_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_repositories: Dict[Tuple[Any, str], PayloadRepository] = {}
+_repositories_lock = threading.Lock()
+
+
+def get_payload_repository(model, bucket_getter: Optional[Callable[[], Any]] = None) -> PayloadRepository:
+    """
+    Process-wide repository for a Payload class and source.
+
+    Args:
+        model: Pydantic Payload class
+        bucket_getter: Pass gcs_util.get_bucket to read payloads from GCS instead of data/payloads
+    """
+    key = (model, "gcs" if bucket_getter is not None else "local")
+    with _repositories_lock:
+        repository = _repositories.get(key)
+        if repository is None:
+            repository = PayloadRepository(model, bucket_getter=bucket_getter)
+            _repositories[key] = repository
+        return repository
+
+
+def payload_cache_stats() -> Dict[str, Dict]:
+    """Stats for every repository created in this process (for /health)."""
+    with _repositories_lock:
+        return {source: repository.stats() for (_, source), repository in _repositories.items()}
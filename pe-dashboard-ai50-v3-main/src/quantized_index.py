@@ -0,0 +1,333 @@
+"""
+Quantized In-Process Vector Index for the RAG Pipeline
+
+Keeps chunk embeddings in RAM as compact NumPy arrays so the MCP server can
+score every AI50 chunk without a round trip to ChromaDB Cloud:
+- int8: symmetric scalar quantization with one float32 scale per vector (~4x smaller)
+- float16: half precision (~2x smaller)
+- float32: no compression (baseline for comparisons)
+
+Scoring is brute-force cosine similarity over the quantized rows. The best
+rerank_top_n candidates can optionally be re-scored against the original
+float32 vectors. Those are not kept by default; build with keep_float32=True
+to hold them in RAM, or load a saved index to memory-map them from disk so
+they do not count against resident memory.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+PRECISIONS = ("int8", "float16", "float32")
+
+
+def quantize(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize L2-normalized vectors.
+
+    Args:
+        vectors: (n, dim) float32 array
+        precision: One of PRECISIONS
+
+    Returns:
+        (codes, scales) where vectors ≈ codes * scales[:, None]
+    """
+    if precision == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    if precision in ("float16", "float32"):
+        return vectors.astype(precision), np.ones(len(vectors), dtype=np.float32)
+    raise ValueError(f"Unsupported precision '{precision}', expected one of {PRECISIONS}")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class QuantizedIndex:
+    """
+    Thread-safe, append/upsert-able in-memory index of chunk embeddings.
+
+    Rows carry the same documents and metadata that are stored in ChromaDB,
+    so search() returns results in the VectorStore.search() format.
+    """
+
+    def __init__(self, precision: str = "int8", keep_float32: bool = False):
+        """
+        Args:
+            precision: Storage precision for scoring ('int8', 'float16', 'float32')
+            keep_float32: Also keep full-precision vectors in RAM for top-N re-ranking
+                (off by default; it costs 4x the int8 codes)
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}', expected one of {PRECISIONS}")
+        self.precision = precision
+        self.keep_float32 = keep_float32
+
+        self.dim: Optional[int] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._full: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._company_rows: Dict[str, List[int]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    def has_company(self, company_name: str) -> bool:
+        with self._lock:
+            return any(self._alive[row] for row in self._company_rows.get(company_name, ()))
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Iterable[Iterable[float]],
+        documents: List[str],
+        metadatas: List[Dict]
+    ):
+        """Add or replace rows (same arguments as collection.upsert)."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("embeddings must be a (len(ids), dim) matrix")
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._codes = np.zeros((0, self.dim), dtype=self.precision)
+                if self.keep_float32:
+                    self._full = np.zeros((0, self.dim), dtype=np.float32)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+            if isinstance(self._full, np.memmap):
+                # Loaded read-only from disk; copy before the first write
+                self._full = np.array(self._full)
+
+            normalized = _normalize(vectors)
+            codes, scales = quantize(normalized, self.precision)
+
+            new_rows = []
+            for i, chunk_id in enumerate(ids):
+                row = self._row_by_id.get(chunk_id)
+                if row is None:
+                    new_rows.append(i)
+                    continue
+                # Upsert in place (re-ingest reuses deterministic chunk IDs)
+                self._codes[row] = codes[i]
+                self._scales[row] = scales[i]
+                if self._full is not None:
+                    self._full[row] = normalized[i]
+                self._alive[row] = True
+                self.documents[row] = documents[i]
+                self._set_metadata(row, metadatas[i])
+
+            if new_rows:
+                start = len(self.ids)
+                self._codes = np.concatenate([self._codes, codes[new_rows]])
+                self._scales = np.concatenate([self._scales, scales[new_rows]])
+                if self._full is not None:
+                    self._full = np.concatenate([np.asarray(self._full), normalized[new_rows]])
+                self._alive = np.concatenate([self._alive, np.ones(len(new_rows), dtype=bool)])
+                for offset, i in enumerate(new_rows):
+                    self._row_by_id[ids[i]] = start + offset
+                    self.ids.append(ids[i])
+                    self.documents.append(documents[i])
+                    self.metadatas.append({})
+                    self._set_metadata(start + offset, metadatas[i])
+
+    def _set_metadata(self, row: int, metadata: Dict):
+        previous = self.metadatas[row].get('company_name')
+        if previous is not None and row in self._company_rows.get(previous, ()):
+            self._company_rows[previous].remove(row)
+        self.metadatas[row] = dict(metadata)
+        self._company_rows.setdefault(metadata.get('company_name'), []).append(row)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Tombstone rows by chunk ID. Returns the number of rows removed."""
+        with self._lock:
+            rows = [self._row_by_id[i] for i in ids if i in self._row_by_id]
+            rows = [row for row in rows if self._alive[row]]
+            self._alive[rows] = False
+            return len(rows)
+
+    def delete_company(self, company_name: str) -> int:
+        """Tombstone every row for a company. Returns the number of rows removed."""
+        with self._lock:
+            rows = [row for row in self._company_rows.get(company_name, ()) if self._alive[row]]
+            self._alive[rows] = False
+            return len(rows)
+
+    def search(
+        self,
+        query_embedding: Iterable[float],
+        top_k: int = 5,
+        company_name: Optional[str] = None,
+        source_type: Optional[str] = None,
+        rerank_top_n: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Brute-force cosine search over the quantized vectors.
+
+        Args:
+            query_embedding: Query vector
+            top_k: Number of results to return
+            company_name: Restrict to one company
+            source_type: Restrict to one source type
+            rerank_top_n: Re-score this many candidates in float32 (needs keep_float32)
+
+        Returns:
+            List of dicts with 'text', 'source_url', 'source_type', 'chunk_index',
+            'crawled_at', 'distance' and 'metadata'. 'distance' is the squared L2
+            distance between unit vectors (2 - 2 * cosine), the same value the
+            default l2 ChromaDB collection returns
+        """
+        with self._lock:
+            if self.dim is None or not len(self):
+                return []
+
+            query = _normalize(np.asarray([query_embedding], dtype=np.float32))[0]
+
+            if company_name is not None:
+                candidates = np.array(
+                    [row for row in self._company_rows.get(company_name, ()) if self._alive[row]],
+                    dtype=np.int64
+                )
+            else:
+                candidates = np.flatnonzero(self._alive)
+            if source_type is not None:
+                candidates = np.array(
+                    [row for row in candidates if self.metadatas[row].get('source_type') == source_type],
+                    dtype=np.int64
+                )
+            if not len(candidates):
+                return []
+
+            if self.precision == "int8":
+                scores = (self._codes[candidates].astype(np.float32) @ query) * self._scales[candidates]
+            else:
+                scores = self._codes[candidates].astype(np.float32) @ query
+
+            shortlist = max(top_k, rerank_top_n or 0)
+            if shortlist < len(candidates):
+                top = np.argpartition(-scores, shortlist - 1)[:shortlist]
+            else:
+                top = np.arange(len(candidates))
+            rows = candidates[top]
+            scores = scores[top]
+
+            if rerank_top_n and self._full is not None:
+                scores = np.asarray(self._full[rows], dtype=np.float32) @ query
+
+            order = np.argsort(-scores)[:top_k]
+
+            results = []
+            for i in order:
+                row = int(rows[i])
+                metadata = self.metadatas[row]
+                results.append({
+                    'text': self.documents[row],
+                    'source_url': metadata.get('source_url', 'unknown'),
+                    'source_type': metadata.get('source_type', 'unknown'),
+                    'chunk_index': metadata.get('chunk_index', 0),
+                    'crawled_at': metadata.get('crawled_at', ''),
+                    'distance': float(2.0 * (1.0 - scores[i])),
+                    'metadata': metadata
+                })
+            return results
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Resident size of the scoring arrays vs. the float32 copy."""
+        with self._lock:
+            full_bytes = 0
+            if self._full is not None and not isinstance(self._full, np.memmap):
+                full_bytes = self._full.nbytes
+            return {
+                'codes': self._codes.nbytes if self._codes is not None else 0,
+                'scales': self._scales.nbytes if self.precision == "int8" else 0,
+                'float32_resident': full_bytes
+            }
+
+    def save(self, path: str):
+        """Persist the index to a directory (arrays as .npy, rows as JSON)."""
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            live = np.flatnonzero(self._alive)
+            np.save(out / "codes.npy", self._codes[live] if self._codes is not None else np.zeros((0, 0)))
+            np.save(out / "scales.npy", self._scales[live])
+            if self._full is not None:
+                np.save(out / "full.npy", np.asarray(self._full)[live])
+            with open(out / "rows.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    'precision': self.precision,
+                    'dim': self.dim,
+                    'ids': [self.ids[i] for i in live],
+                    'documents': [self.documents[i] for i in live],
+                    'metadatas': [self.metadatas[i] for i in live]
+                }, f)
+
+    @classmethod
+    def load(cls, path: str, mmap_float32: bool = True) -> "QuantizedIndex":
+        """
+        Load a saved index.
+
+        Args:
+            path: Directory written by save()
+            mmap_float32: Memory-map the float32 re-rank vectors instead of reading them into RAM
+        """
+        src = Path(path)
+        with open(src / "rows.json", 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+
+        full_path = src / "full.npy"
+        index = cls(precision=rows['precision'], keep_float32=full_path.exists())
+        index.dim = rows['dim']
+        index._codes = np.load(src / "codes.npy")
+        index._scales = np.load(src / "scales.npy")
+        if full_path.exists():
+            index._full = np.load(full_path, mmap_mode='r' if mmap_float32 else None)
+        index.ids = rows['ids']
+        index.documents = rows['documents']
+        index.metadatas = rows['metadatas']
+        index._alive = np.ones(len(index.ids), dtype=bool)
+        index._row_by_id = {chunk_id: row for row, chunk_id in enumerate(index.ids)}
+        for row, metadata in enumerate(index.metadatas):
+            index._company_rows.setdefault(metadata.get('company_name'), []).append(row)
+        return index
+
+    @classmethod
+    def from_collection(
+        cls,
+        collection,
+        precision: str = "int8",
+        keep_float32: bool = False,
+        page_size: int = 1000
+    ) -> "QuantizedIndex":
+        """Build an index from every row of a ChromaDB collection, one page at a time."""
+        index = cls(precision=precision, keep_float32=keep_float32)
+        offset = 0
+        while True:
+            page = collection.get(
+                include=['embeddings', 'documents', 'metadatas'],
+                limit=page_size,
+                offset=offset
+            )
+            if not page['ids']:
+                break
+            index.add(page['ids'], page['embeddings'], page['documents'], page['metadatas'])
+            offset += len(page['ids'])
+            if len(page['ids']) < page_size:
+                break
+        return index
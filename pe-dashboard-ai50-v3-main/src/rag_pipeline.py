@@ -6,7 +6,8 @@ Uses LangChain for text splitting and OpenAI for embeddings
 import os
 import json
 import hashlib
-from typing import List, Dict, Optional
+import time
+from typing import Iterable, Iterator, List, Dict, Optional, Set
 from pathlib import Path
 from datetime import datetime
 
@@ -16,56 +17,132 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 from dotenv import load_dotenv
 
+from embedding_scheduler import EmbeddingScheduler, RateLimiter
+from run_resolver import iter_external_files, iter_latest_sections
+from quantized_index import QuantizedIndex
+from chunker import SectionChunker, has_headings
+from sectionizer import html_to_structured_text
+
 env_path=Path(__file__).parent.parent/'src'/'.env'
 load_dotenv(env_path,override=True)
 openai_api_key=os.getenv('OPENAI_KEY')
 print("API key - RAGPIPELINE - ",openai_api_key)
 
 
-def load_company_data_from_disk(company_name: str, base_path: str) -> List[Dict]:
+def _read_json(path: Path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _news_document(company_name: str, company_dir: Path) -> Optional[Dict]:
     """
-    Load all scraped data for a company from disk.
+    Merge external/news.json across runs into one document.
+
+    news.json is a daily delta feed, so articles are unioned across runs
+    (deduplicated by URL) rather than taking only the newest file.
+    """
+    articles = {}
+    newest_run = None
+    for run, path in iter_external_files(company_dir, 'news.json'):
+        try:
+            items = _read_json(path)
+        except Exception as e:
+            print(f"Warning: Could not load news for {company_name} ({run.name}): {str(e)}")
+            continue
+        if newest_run is None:
+            newest_run = run
+        for item in items if isinstance(items, list) else []:
+            key = item.get('url') or item.get('title')
+            if key and key not in articles:
+                articles[key] = item
+
+    if not articles:
+        return None
+
+    ordered = sorted(articles.values(), key=lambda item: item.get('published_at') or '', reverse=True)
+    lines = []
+    for item in ordered:
+        lines.append(f"{item.get('title', '').strip()}")
+        lines.append(f"Source: {item.get('source', 'unknown')} | Published: {item.get('published_at', 'unknown')}")
+        if item.get('url'):
+            lines.append(f"URL: {item['url']}")
+        lines.append("")
+
+    return {
+        'source_url': ordered[0].get('feed_url') or ordered[0].get('url', ''),
+        'text': "\n".join(lines).strip(),
+        'crawled_at': ordered[0].get('published_at') or datetime.utcnow().isoformat(),
+        'source_type': 'external_news',
+        'company_name': company_name,
+        'run_id': newest_run.name
+    }
+
+
+def _github_document(company_name: str, company_dir: Path) -> Optional[Dict]:
+    """Render the newest external/github.json snapshot as a document."""
+    for run, path in iter_external_files(company_dir, 'github.json'):
+        try:
+            github = _read_json(path)
+        except Exception as e:
+            print(f"Warning: Could not load GitHub data for {company_name} ({run.name}): {str(e)}")
+            continue
+        org = github.get('organization')
+        if not org:
+            continue
+
+        lines = [
+            f"GitHub organization: {org}",
+            f"Public repositories: {github.get('repos_count', 'unknown')}",
+            f"Total stars: {github.get('stars_total', 'unknown')}",
+        ]
+        if github.get('recent_activity'):
+            lines.append(f"Recent activity: {github['recent_activity']}")
+        for repo in github.get('top_repos') or []:
+            line = f"- {repo.get('name')} ({repo.get('stars', 0)} stars)"
+            if repo.get('description'):
+                line += f": {repo['description']}"
+            lines.append(line)
+
+        return {
+            'source_url': f"https://github.com/{org}",
+            'text': "\n".join(lines),
+            'crawled_at': run.started_at.isoformat() if run.started_at else datetime.utcnow().isoformat(),
+            'source_type': 'github',
+            'company_name': company_name,
+            'run_id': run.name
+        }
+    return None
+
+
+def iter_company_documents(company_name: str, base_path: str) -> Iterator[Dict]:
+    """
+    Lazily yield scraped documents for a company, merged across runs.
+
+    The newest usable version of each section wins (see run_resolver);
+    external news and GitHub data are yielded as additional sources.
+    Files are read one at a time as the caller consumes the iterator.
     
     Args:
         company_name: Name of the company
         base_path: Path to data/raw directory
     
-    Returns:
-        List of dicts with 'source_url', 'text', 'crawled_at', 'source_type'
+    Yields:
+        Dicts with 'source_url', 'text', 'crawled_at', 'source_type', 'run_id'
     """
-    company_path = Path(base_path) / company_name / "initial"
-    
-    if not company_path.exists():
-        raise ValueError(f"Company path does not exist: {company_path}")
+    company_dir = Path(base_path) / company_name
     
-    data = []
-    source_types = [
-        'homepage', 'home', 'about', 'product', 'careers', 
-        'blog', 'news', 'manifest', 'platform'
-    ]
+    # Validate eagerly so callers fail before e.g. a force-refresh delete
+    if not company_dir.is_dir():
+        raise ValueError(f"Company path does not exist: {company_dir}")
     
-    for source_type in source_types:
-        # Try different file extensions
-        possible_files = [
-            company_path / source_type,
-            company_path / f"{source_type}.txt",
-            company_path / f"{source_type}.html"
-        ]
-        
-        text_file = None
-        for pf in possible_files:
-            if pf.exists():
-                text_file = pf
-                break
-        
-        if text_file is None:
-            continue
-        
-        meta_file = company_path / f"{source_type}.meta"
-        
+    return _iter_documents(company_name, company_dir)
+
+
+def _iter_documents(company_name: str, company_dir: Path) -> Iterator[Dict]:
+    for version in iter_latest_sections(company_dir):
+        source_type = version.section
         try:
-            # Read text content
-            with open(text_file, 'r', encoding='utf-8', errors='ignore') as f:
+            with open(version.text_path, 'r', encoding='utf-8', errors='ignore') as f:
                 text = f.read()
             
             # Skip empty or very short files
@@ -74,29 +151,58 @@ def load_company_data_from_disk(company_name: str, base_path: str) -> List[Dict]
             
             # Load metadata if available
             metadata = {}
-            if meta_file.exists():
+            if version.meta_path is not None:
                 try:
-                    with open(meta_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                except:
+                    metadata = _read_json(version.meta_path)
+                except Exception:
                     pass
             
             # Extract source URL from metadata or construct default
-            source_url = metadata.get('url', f"https://{company_name.lower()}.com/{source_type}")
-            crawled_at = metadata.get('timestamp', metadata.get('crawled_at', datetime.utcnow().isoformat()))
+            source_url = metadata.get('source_url') or metadata.get('url') or f"https://{company_name.lower()}.com/{source_type}"
+            crawled_at = metadata.get('crawled_at') or metadata.get('timestamp') or datetime.utcnow().isoformat()
             
-            data.append({
+            document = {
                 'source_url': source_url,
                 'text': text,
                 'crawled_at': crawled_at,
                 'source_type': source_type,
-                'company_name': company_name
-            })
+                'company_name': company_name,
+                'run_id': version.run.name
+            }
+            
+            # Heading-structured text from the same run's HTML, for the section chunker
+            if version.html_path is not None:
+                try:
+                    with open(version.html_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        structured = html_to_structured_text(f.read(), include_all_text=True)
+                    if has_headings(structured):
+                        document['structured_text'] = structured
+                except Exception as e:
+                    print(f"Warning: Could not sectionize {source_type} for {company_name}: {str(e)}")
+            
+            yield document
             
         except Exception as e:
             print(f"Warning: Could not load {source_type} for {company_name}: {str(e)}")
     
-    return data
+    for build_document in (_news_document, _github_document):
+        document = build_document(company_name, company_dir)
+        if document is not None:
+            yield document
+
+
+def load_company_data_from_disk(company_name: str, base_path: str) -> List[Dict]:
+    """
+    Load all scraped data for a company from disk.
+    
+    Args:
+        company_name: Name of the company
+        base_path: Path to data/raw directory
+    
+    Returns:
+        List of dicts with 'source_url', 'text', 'crawled_at', 'source_type'
+    """
+    return list(iter_company_documents(company_name, base_path))
 
 
 class VectorStore:
@@ -104,9 +210,11 @@ class VectorStore:
     ChromaDB Vector Store with LangChain Integration.
     
     Features:
-    - Uses LangChain's RecursiveCharacterTextSplitter for intelligent chunking
+    - Chunks on sectionizer heading boundaries by token count (character splitting optional)
     - Uses OpenAI embeddings for high-quality vector representations
+    - Embeds token-bounded batches concurrently under an RPM/TPM budget
     - Stores in ChromaDB Cloud for persistence
+    - Optional in-process quantized index (int8/float16) for local search
     """
     
     def __init__(
@@ -117,7 +225,14 @@ class VectorStore:
         openai_api_key: str,
         collection_name: str = 'forbes_ai50_companies',
         chunk_size: int = 1000,
-        chunk_overlap: int = 200
+        chunk_overlap: int = 200,
+        embedding_workers: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        local_index: Optional[QuantizedIndex] = None,
+        rerank_top_n: Optional[int] = 20,
+        chunking: str = 'sections',
+        chunk_tokens: int = 400,
+        chunk_overlap_tokens: int = 40
     ):
         """
         Initialize ChromaDB with LangChain components.
@@ -130,6 +245,15 @@ class VectorStore:
             collection_name: Name for the collection
             chunk_size: Size of text chunks (characters, ~750 tokens)
             chunk_overlap: Overlap between chunks (characters)
+            embedding_workers: Embedding batches kept in flight concurrently
+            rate_limiter: Shared RPM/TPM limiter (pass one in to share it across stores)
+            local_index: In-process QuantizedIndex; when set, search() scores locally
+                and ingestion writes to it alongside ChromaDB
+            rerank_top_n: Candidates re-scored in float32 by the local index (None to disable)
+            chunking: 'sections' (heading-aware, token-sized) or 'characters'
+                (RecursiveCharacterTextSplitter with chunk_size/chunk_overlap)
+            chunk_tokens: Max tokens per chunk for 'sections' chunking
+            chunk_overlap_tokens: Token overlap between chunks of one section
         """
         try:
             # Initialize ChromaDB
@@ -155,6 +279,15 @@ class VectorStore:
                 keep_separator=True
             )
             
+            # Heading-aware, token-sized chunking over sectionizer output
+            if chunking not in ('sections', 'characters'):
+                raise ValueError(f"Unknown chunking mode: {chunking}")
+            self.chunking = chunking
+            self.section_chunker = SectionChunker(
+                max_tokens=chunk_tokens,
+                overlap_tokens=chunk_overlap_tokens
+            )
+            
             # Initialize OpenAI Embeddings
             # Uses text-embedding-3-small by default (1536 dimensions)
             self.embeddings = OpenAIEmbeddings(
@@ -164,9 +297,22 @@ class VectorStore:
                 dimensions=384
             )
             
+            self.local_index = local_index
+            self.rerank_top_n = rerank_top_n
+            
+            # Concurrent, rate-limited batching on top of the embeddings client
+            self.embedding_scheduler = EmbeddingScheduler(
+                embeddings=self.embeddings,
+                max_workers=embedding_workers,
+                rate_limiter=rate_limiter
+            )
+            
             print(f"✓ Connected to ChromaDB collection: {collection_name}")
             print(f"✓ Using OpenAI embeddings: text-embedding-3-small")
-            print(f"✓ Chunk size: {chunk_size} chars (~{chunk_size//4} tokens)")
+            if chunking == 'sections':
+                print(f"✓ Chunking: heading sections, up to {chunk_tokens} tokens")
+            else:
+                print(f"✓ Chunk size: {chunk_size} chars (~{chunk_size//4} tokens)")
             
         except Exception as e:
             raise ConnectionError(f"Failed to initialize: {str(e)}")
@@ -214,21 +360,25 @@ class VectorStore:
     def ingest_company_data(
         self,
         company_name: str,
-        scraped_data: List[Dict],
+        scraped_data: Iterable[Dict],
         force_refresh: bool = False
     ) -> Dict:
         """
         Ingest company data into ChromaDB using LangChain.
         
         Process:
-        1. Uses LangChain RecursiveCharacterTextSplitter to chunk text
-        2. Uses OpenAI embeddings (text-embedding-3-small) to generate vectors
-        3. Stores chunks + embeddings + metadata in ChromaDB
+        1. Chunks each source on heading boundaries by token count (SectionChunker),
+           or with LangChain RecursiveCharacterTextSplitter when chunking='characters'
+        2. Uses OpenAI embeddings (text-embedding-3-small) to generate vectors,
+           batched and embedded concurrently by the EmbeddingScheduler
+        3. Stores each batch of chunks + embeddings + metadata in ChromaDB
+           as soon as it is embedded
         
         Args:
             company_name: Name of the company
-            scraped_data: List of dicts with 'source_url', 'text', 'crawled_at', 'source_type'
-            force_refresh: If True, delete existing data first
+            scraped_data: Iterable of dicts with 'source_url', 'text', 'crawled_at', 'source_type'
+                (e.g. the lazy iter_company_documents generator)
+            force_refresh: If True, delete existing data first (only if there is usable data)
         
         Returns:
             Dict with ingestion statistics
@@ -236,39 +386,61 @@ class VectorStore:
         stats = {
             'company': company_name,
             'sources_processed': 0,
+            'bytes_processed': 0,
             'chunks_created': 0,
             'chunks_stored': 0,
+            'embed_batches': 0,
+            'embed_retries': 0,
+            'tokens_embedded': 0,
+            'embed_seconds': 0.0,
             'errors': []
         }
         
         try:
-            # Delete existing data if force refresh
-            if force_refresh:
-                self._delete_company_data(company_name)
-            
             all_chunks_text = []
             all_metadatas = []
             all_ids = []
             
+            sources = []
             for source_data in scraped_data:
+                source_type = source_data.get('source_type', 'unknown')
+                text = source_data.get('text', '')
+                
+                if not text or not text.strip():
+                    continue
+                
+                base_metadata = {
+                    'company_name': company_name,
+                    'source_url': source_data.get('source_url', 'unknown'),
+                    'source_type': source_type,
+                    'crawled_at': source_data.get('crawled_at', datetime.utcnow().isoformat()),
+                    'run_id': source_data.get('run_id', 'initial')
+                }
+                # Prefer heading-structured text when the loader produced it
+                chunk_input = text
+                if self.chunking == 'sections' and source_data.get('structured_text'):
+                    chunk_input = source_data['structured_text']
+                sources.append((chunk_input, base_metadata))
+                
+                stats['sources_processed'] += 1
+                stats['bytes_processed'] += len(text.encode('utf-8'))
+            
+            # scraped_data may be lazy: only drop the existing chunks once there
+            # is something to replace them with
+            if not sources:
+                return stats
+            if force_refresh:
+                self._delete_company_data(company_name)
+            
+            # Chunk every source of the company in one pass
+            if self.chunking == 'sections':
+                chunked_sources = self.section_chunker.chunk_documents(sources)
+            else:
+                chunked_sources = [self.chunk_text_langchain(text, metadata) for text, metadata in sources]
+            
+            for (_, base_metadata), chunks in zip(sources, chunked_sources):
+                source_type = base_metadata['source_type']
                 try:
-                    source_url = source_data.get('source_url', 'unknown')
-                    source_type = source_data.get('source_type', 'unknown')
-                    text = source_data.get('text', '')
-                    crawled_at = source_data.get('crawled_at', datetime.utcnow().isoformat())
-                    
-                    if not text or not text.strip():
-                        continue
-                    
-                    # Chunk using LangChain
-                    base_metadata = {
-                        'company_name': company_name,
-                        'source_url': source_url,
-                        'source_type': source_type,
-                        'crawled_at': crawled_at
-                    }
-                    
-                    chunks = self.chunk_text_langchain(text, base_metadata)
                     stats['chunks_created'] += len(chunks)
                     
                     # Prepare chunks for ChromaDB
@@ -276,19 +448,22 @@ class VectorStore:
                         chunk_id = self.generate_chunk_id(company_name, source_type, chunk_idx)
                         
                         all_chunks_text.append(chunk.page_content)
-                        all_metadatas.append({
+                        chunk_metadata = {
                             'company_name': str(company_name),
-                            'source_url': str(source_url),
+                            'source_url': str(base_metadata['source_url']),
                             'source_type': str(source_type),
                             'chunk_index': int(chunk_idx),
                             'total_chunks': int(len(chunks)),
-                            'crawled_at': str(crawled_at),
+                            'crawled_at': str(base_metadata['crawled_at']),
+                            'run_id': str(base_metadata['run_id']),
                             'chunk_size': int(len(chunk.page_content))
-                        })
+                        }
+                        if 'heading_path' in chunk.metadata:
+                            chunk_metadata['heading_path'] = str(chunk.metadata['heading_path'])
+                            chunk_metadata['chunk_tokens'] = int(chunk.metadata['chunk_tokens'])
+                        all_metadatas.append(chunk_metadata)
                         all_ids.append(chunk_id)
                     
-                    stats['sources_processed'] += 1
-                    
                 except Exception as e:
                     stats['errors'].append(f"Error processing {source_type}: {str(e)}")
             
@@ -296,30 +471,46 @@ class VectorStore:
             if all_chunks_text:
                 try:
                     print(f"  Generating embeddings for {len(all_chunks_text)} chunks...")
+                    embed_started = time.monotonic()
                     
-                    # Use LangChain's OpenAI embeddings
-                    embeddings_list = self.embeddings.embed_documents(all_chunks_text)
-                    
-                    print(f"  ✓ Generated {len(embeddings_list)} embeddings")
-                    print(f"  Storing in ChromaDB...")
-                    
-                    # Batch insert to ChromaDB
-                    batch_size = 5000
-                    for i in range(0, len(all_chunks_text), batch_size):
-                        batch_texts = all_chunks_text[i:i + batch_size]
-                        batch_metadatas = all_metadatas[i:i + batch_size]
-                        batch_ids = all_ids[i:i + batch_size]
-                        batch_embeddings = embeddings_list[i:i + batch_size]
+                    # Each batch is stored as soon as it is embedded, while
+                    # later batches are still in flight
+                    for indices, embeddings_list, batch_stats in self.embedding_scheduler.embed_stream(all_chunks_text):
+                        stats['embed_batches'] += 1
+                        
+                        if embeddings_list is None:
+                            stats['errors'].append(f"Embedding batch error: {batch_stats['error']}")
+                            continue
                         
-                        self.collection.add(
-                            documents=batch_texts,
-                            metadatas=batch_metadatas,
-                            ids=batch_ids,
-                            embeddings=batch_embeddings
+                        stats['embed_retries'] += batch_stats['retries']
+                        stats['tokens_embedded'] += batch_stats['tokens']
+                        
+                        # Chunk IDs are deterministic: overwrite the previous version
+                        # (collection.add would silently keep it)
+                        self.collection.upsert(
+                            documents=[all_chunks_text[i] for i in indices],
+                            metadatas=[all_metadatas[i] for i in indices],
+                            ids=[all_ids[i] for i in indices],
+                            embeddings=embeddings_list
                         )
+                        stats['chunks_stored'] += len(indices)
+                        
+                        if self.local_index is not None:
+                            self.local_index.add(
+                                ids=[all_ids[i] for i in indices],
+                                embeddings=embeddings_list,
+                                documents=[all_chunks_text[i] for i in indices],
+                                metadatas=[all_metadatas[i] for i in indices]
+                            )
                     
-                    stats['chunks_stored'] = len(all_chunks_text)
-                    print(f"✓ Ingested {stats['chunks_stored']} chunks for {company_name}")
+                    stats['embed_seconds'] = round(time.monotonic() - embed_started, 3)
+                    print(f"✓ Ingested {stats['chunks_stored']} chunks for {company_name} "
+                          f"({stats['embed_batches']} batches, {stats['embed_seconds']}s)")
+                    
+                    if stats['chunks_stored'] and not force_refresh:
+                        self._delete_stale_chunks(
+                            company_name, all_ids, {metadata['source_type'] for metadata in all_metadatas}
+                        )
                     
                 except Exception as e:
                     stats['errors'].append(f"ChromaDB/Embedding error: {str(e)}")
@@ -330,8 +521,42 @@ class VectorStore:
         
         return stats
     
+    def _delete_stale_chunks(self, company_name: str, current_ids: List[str], source_types: Set[str]) -> int:
+        """
+        Delete chunks left over from a longer previous version of a source.
+
+        Chunk IDs are company/source_type/index, so when a source now yields
+        fewer chunks, its old higher-index chunks would otherwise stay searchable.
+        
+        Args:
+            company_name: Company that was just re-ingested
+            current_ids: IDs written by this ingestion
+            source_types: Source types that were re-ingested (others are left alone)
+        
+        Returns:
+            Number of chunks deleted
+        """
+        current = set(current_ids)
+        try:
+            existing = self.collection.get(where={"company_name": company_name}, include=['metadatas'])
+            stale = [
+                chunk_id for chunk_id, metadata in zip(existing['ids'], existing['metadatas'])
+                if chunk_id not in current and (metadata or {}).get('source_type') in source_types
+            ]
+            if stale:
+                self.collection.delete(ids=stale)
+                if self.local_index is not None:
+                    self.local_index.delete(stale)
+                print(f"✓ Deleted {len(stale)} stale chunks for {company_name}")
+            return len(stale)
+        except Exception as e:
+            print(f"Warning: Could not delete stale chunks: {str(e)}")
+            return 0
+    
     def _delete_company_data(self, company_name: str):
         """Delete all chunks for a company."""
+        if self.local_index is not None:
+            self.local_index.delete_company(company_name)
         try:
             results = self.collection.get(where={"company_name": company_name})
             if results['ids']:
@@ -352,6 +577,16 @@ class VectorStore:
             # Generate embedding for query using OpenAI
             query_embedding = self.embeddings.embed_query(query)
             
+            # Score in-process when the company is held in the local index
+            if self.local_index is not None and self.local_index.has_company(company_name):
+                return self.local_index.search(
+                    query_embedding,
+                    top_k=top_k,
+                    company_name=company_name,
+                    source_type=filter_by_source_type,
+                    rerank_top_n=self.rerank_top_n
+                )
+            
             # Build filter - FIXED for ChromaDB's syntax
             where_filter = {"company_name": company_name}
             
@@ -399,6 +634,28 @@ class VectorStore:
             traceback.print_exc()
             return []
     
+    def warm_local_index(self, precision: str = "int8", keep_float32: bool = False) -> QuantizedIndex:
+        """
+        Load every chunk from ChromaDB into an in-process quantized index.
+        
+        Args:
+            precision: 'int8' (~4x smaller), 'float16' (~2x) or 'float32'
+            keep_float32: Also keep full-precision vectors in RAM for top-N re-ranking
+        
+        Returns:
+            The new QuantizedIndex (also set as self.local_index)
+        """
+        started = time.monotonic()
+        self.local_index = QuantizedIndex.from_collection(
+            self.collection,
+            precision=precision,
+            keep_float32=keep_float32
+        )
+        sizes = self.local_index.memory_bytes()
+        print(f"✓ Local {precision} index: {len(self.local_index)} chunks, "
+              f"{sizes['codes'] / 1024:.0f} KB codes in {time.monotonic() - started:.1f}s")
+        return self.local_index
+    
     def get_all_context(self, company_name: str, max_chunks: int = 20) -> List[Dict]:
         """Get all available context for a company."""
         try:
@@ -465,7 +722,8 @@ class VectorStore:
                 'companies': sorted(list(companies)),
                 'source_types': sorted(list(source_types)),
                 'embedding_model': 'text-embedding-3-small',
-                'chunking_method': 'LangChain RecursiveCharacterTextSplitter'
+                'chunking_method': ('Heading sections (token-sized)' if self.chunking == 'sections'
+                                    else 'LangChain RecursiveCharacterTextSplitter')
             }
         except Exception as e:
             return {'error': str(e)}
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Generated-Dashboard Result Cache
+
+Caches GPT dashboard output under a fingerprint of everything that shapes the
+completion (prompt template, model, temperature, retrieved chunks or payload
+hash), so an identical request is answered without a new completion.
+
+Two tiers:
+- in-memory LRU per process
+- on-disk JSON files under data/cache/<name>/ with a TTL, shared by the API
+  server, MCP server and batch jobs on the same host
+
+Entries also record the company's generation marker. Re-ingesting a company
+(see ingest_companies.py) or saving a new payload calls bump_company_generation(),
+which invalidates that company's entries in every process on the next lookup.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from metrics import register_collector, stats_families
+
+CACHE_ROOT = Path(__file__).resolve().parents[1] / "data" / "cache"
+GENERATIONS_DIR = CACHE_ROOT / "_generations"
+
+DEFAULT_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", 256))
+
+
+def fingerprint(**parts) -> str:
+    """Stable SHA-256 over keyword parts (canonical JSON)."""
+    canonical = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def text_digest(text: str) -> str:
+    """Short content hash used inside fingerprints."""
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()[:16]
+
+
+def chunk_signature(chunks: Iterable[Dict]) -> list:
+    """
+    Identify retrieved chunks by ID and content.
+
+    Chunk IDs are deterministic (company/source/index), so the text hash is
+    what changes when a company is re-ingested with new content.
+    """
+    return [
+        [chunk.get('source_type'), chunk.get('chunk_index'), text_digest(chunk.get('text', ''))]
+        for chunk in chunks
+    ]
+
+
+def _generation_path(company_id: str) -> Path:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in company_id)
+    return GENERATIONS_DIR / safe
+
+
+def company_generation(company_id: str) -> int:
+    """Current generation marker for a company (0 if never bumped)."""
+    try:
+        return _generation_path(company_id).stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def bump_company_generation(company_id: str):
+    """Invalidate cached results for a company (call after re-ingest or payload save)."""
+    try:
+        path = _generation_path(company_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(str(time.time_ns()))
+    except OSError as e:
+        print(f"Warning: could not bump cache generation for {company_id}: {e}")
+
+
+class ResultCache:
+    """Two-tier (memory LRU + disk TTL) cache for generated dashboards."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        cache_dir: Optional[Path] = None,
+        use_disk: bool = True
+    ):
+        """
+        Args:
+            name: Cache namespace (also the on-disk subdirectory)
+            max_entries: In-memory LRU capacity
+            ttl_seconds: Entry lifetime in both tiers
+            cache_dir: Override the on-disk location (defaults to data/cache/<name>)
+            use_disk: Disable the on-disk tier (memory only)
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_ROOT / name
+        self.use_disk = use_disk
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        if time.time() - entry['created_at'] > self.ttl_seconds:
+            return False
+        company_id = entry.get('company_id')
+        return company_id is None or entry.get('generation', 0) == company_generation(company_id)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss / expired / invalidated entry."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_fresh(entry):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry['value']
+                del self._memory[key]
+
+        if self.use_disk:
+            path = self.cache_dir / f"{key}.json"
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError, OSError):
+                entry = None
+            if entry is not None:
+                if self._is_fresh(entry):
+                    self._remember(key, entry)
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return entry['value']
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, company_id: Optional[str] = None):
+        """Store a JSON-serialisable value, tied to the company's current generation."""
+        entry = {
+            'created_at': time.time(),
+            'company_id': company_id,
+            'generation': company_generation(company_id) if company_id else 0,
+            'value': value
+        }
+        self._remember(key, entry)
+
+        if self.use_disk:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.cache_dir / f".{key}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, self.cache_dir / f"{key}.json")
+            except (OSError, TypeError) as e:
+                print(f"Warning: could not write {self.name} cache entry: {e}")
+
+    def _remember(self, key: str, entry: Dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry in both tiers."""
+        with self._lock:
+            self._memory.clear()
+        if self.use_disk and self.cache_dir.exists():
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._memory),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses
+            }
+
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str) -> ResultCache:
+    """Process-wide cache instance per namespace."""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = ResultCache(name)
+        return _caches[name]
+
+
+def cache_stats() -> Dict[str, Dict]:
+    with _caches_lock:
+        return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def _collect_metrics():
+    return stats_families("pe_cache", "cache", cache_stats())
+
+
+register_collector(_collect_metrics)
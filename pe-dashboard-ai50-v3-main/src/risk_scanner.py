@@ -0,0 +1,516 @@
+"""
+Risk Scanner - multi-pattern risk term matching over dashboards and scraped text
+
+risk_detector_node used to lowercase the structured dashboard and test four
+hard-coded keywords with `in`, one pass per keyword, without saying where a
+match occurred. The scanner compiles a lexicon of terms per RiskType into an
+Aho-Corasick automaton, so every text is scanned once regardless of how many
+terms there are, and each hit comes back with its position and a snippet.
+
+- Terms match on word boundaries; a trailing '*' also matches longer words
+  ('layoff*' -> layoffs)
+- weak_terms are generic words ('regulatory', 'litigation') that signal a risk
+  in a dashboard written to summarize risks but are everyday vocabulary on
+  company websites; scans of scraped pages pass include_weak=False
+- A match preceded by a negation cue ('no', 'without', 'prevent', ...) within
+  the risk type's negation window (in words, same sentence) is kept but
+  marked negated and does not count as a risk
+- The lexicon can be replaced with a JSON file (RISK_LEXICON_PATH) using the
+  same structure as DEFAULT_LEXICON
+
+pyahocorasick is used for the automaton when installed; the pure-Python
+automaton gives the same matches.
+
+Batch job over the scraped corpus:
+    python src/risk_scanner.py                      # every page under data/raw
+    python src/risk_scanner.py --companies abridge --output scan.jsonl --record
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+RAW_DATA_DIR = PROJECT_ROOT / "data" / "raw"
+RISK_LEXICON_PATH = os.getenv("RISK_LEXICON_PATH")
+
+SNIPPET_CHARS = 80
+DEFAULT_NEGATION_WINDOW = 4
+
+# Per RiskType (see tools/risk_logger.py): severity, terms (synonyms), weak_terms and negation window in words
+DEFAULT_LEXICON = {
+    "negations": [
+        "no", "not", "never", "without", "zero", "denied", "denies", "deny", "free of",
+        "prevent", "prevents", "preventing", "protect against", "protects against", "avoid", "rumors of"
+    ],
+    "negation_window": DEFAULT_NEGATION_WINDOW,
+    "risk_types": {
+        "layoff": {
+            "severity": "high",
+            "terms": [
+                "layoff*", "laid off", "lay off", "lays off", "laying off", "job cuts", "cut jobs",
+                "cutting jobs", "workforce reduction", "reduction in force", "headcount reduction",
+                "downsizing", "furlough*"
+            ]
+        },
+        "security_incident": {
+            "severity": "critical",
+            "terms": [
+                "breach", "breaches", "breached", "data leak*", "security incident*", "cyberattack*",
+                "cyber attack*", "ransomware attack*", "hacked", "unauthorized access", "compromised accounts"
+            ]
+        },
+        "regulatory": {
+            "severity": "high",
+            "terms": [
+                "regulatory action", "regulatory investigation", "regulatory probe", "investigation into",
+                "subpoena*", "consent decree", "antitrust", "fined", "civil penalty", "cease and desist",
+                "ftc complaint", "sec charges"
+            ],
+            "weak_terms": ["regulatory"],
+            "negation_window": 3
+        },
+        "financial_distress": {
+            "severity": "high",
+            "terms": [
+                "bankruptcy", "bankrupt", "insolvency", "insolvent", "chapter 11", "going concern",
+                "missed payroll", "cash crunch", "defaulted on", "down round"
+            ]
+        },
+        "leadership_crisis": {
+            "severity": "medium",
+            "terms": [
+                "ousted", "resigned abruptly", "abrupt resignation", "stepped down", "steps down",
+                "leadership shake-up", "leadership shakeup", "interim ceo", "fired ceo", "ceo fired"
+            ]
+        },
+        "legal_action": {
+            "severity": "medium",
+            "terms": [
+                "lawsuit*", "sued", "class action", "class-action", "legal action",
+                "copyright infringement", "patent infringement"
+            ],
+            "weak_terms": ["litigation"]
+        },
+        "product_recall": {
+            "severity": "high",
+            "terms": ["product recall*", "recalled", "safety recall*", "pulled the product"]
+        },
+        "market_disruption": {
+            "severity": "medium",
+            "terms": ["lost its largest customer", "price war", "market downturn", "customer churn"]
+        }
+    }
+}
+
+_SENTENCE_END = re.compile(r"[.!?\n]")
+_WORD = re.compile(r"[a-z0-9']+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def load_lexicon(path: Optional[str] = None) -> Dict:
+    """
+    Lexicon from a JSON file (same structure as DEFAULT_LEXICON), or the default.
+
+    Args:
+        path: JSON file; defaults to RISK_LEXICON_PATH when set
+    """
+    path = path or RISK_LEXICON_PATH
+    if not path:
+        return DEFAULT_LEXICON
+    with open(path, "r", encoding="utf-8") as f:
+        lexicon = json.load(f)
+    if not isinstance(lexicon.get("risk_types"), dict):
+        raise ValueError(f"Risk lexicon {path} has no 'risk_types' mapping")
+    return lexicon
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class _Automaton:
+    """Pure-Python Aho-Corasick automaton over lowercase keys."""
+
+    def __init__(self, keys: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for key_id, key in enumerate(keys):
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(key_id)
+
+        # Breadth-first failure links; outputs of the failure state are inherited
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end_index, key_id) for every key occurrence (end_index inclusive)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for key_id in out[state]:
+                    yield i, key_id
+
+
+class RiskScanner:
+    """Compiled risk lexicon; scans texts in a single pass and returns positioned matches."""
+
+    def __init__(self, lexicon: Optional[Dict] = None):
+        """
+        Args:
+            lexicon: {"negations": [...], "negation_window": int,
+                      "risk_types": {risk_type: {"severity", "terms", "weak_terms"?, "negation_window"?}}}
+                (defaults to load_lexicon())
+        """
+        lexicon = lexicon or load_lexicon()
+        self.negations = {" ".join(_WORD.findall(cue.lower())) for cue in lexicon.get("negations", [])}
+        self.negation_window = int(lexicon.get("negation_window", DEFAULT_NEGATION_WINDOW))
+
+        # One automaton key per distinct term; a term may belong to several risk types
+        self._keys: List[str] = []
+        self._key_terms: List[List[Tuple[str, str, bool, bool]]] = []   # [(risk_type, term, prefix, weak)]
+        self.severity: Dict[str, str] = {}
+        self.windows: Dict[str, int] = {}
+        key_ids: Dict[str, int] = {}
+        for risk_type, spec in lexicon["risk_types"].items():
+            self.severity[risk_type] = spec.get("severity", "medium")
+            self.windows[risk_type] = int(spec.get("negation_window", self.negation_window))
+            terms = [(term, False) for term in spec.get("terms", [])]
+            terms += [(term, True) for term in spec.get("weak_terms", [])]
+            for term, weak in terms:
+                prefix = term.endswith("*")
+                key = term.rstrip("*").strip().lower()
+                if not key:
+                    continue
+                if key not in key_ids:
+                    key_ids[key] = len(self._keys)
+                    self._keys.append(key)
+                    self._key_terms.append([])
+                self._key_terms[key_ids[key]].append((risk_type, term, prefix, weak))
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for key_id, key in enumerate(self._keys):
+                self._automaton.add_word(key, key_id)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = _Automaton(self._keys)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._keys)
+
+    def scan(self, text: str, source: Optional[str] = None, include_weak: bool = True) -> List[Dict]:
+        """
+        All risk term matches in one text.
+
+        Args:
+            text: Text to scan (any case)
+            source: Label stored on each match (e.g. "rag_dashboard", "raw:about")
+            include_weak: Also match weak_terms (False for scraped pages)
+
+        Returns:
+            Matches in text order: {"risk_type", "severity", "term", "matched", "start", "end",
+            "snippet", "negated", "source"}. Overlapping matches of one risk type keep the longest.
+        """
+        if not text or not self._keys:
+            return []
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters lowercase to two; keep offsets aligned with the original text
+            lowered = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+        candidates = []
+        for end, key_id in self._automaton.iter(lowered):
+            start = end - len(self._keys[key_id]) + 1
+            end += 1
+            if start > 0 and _is_word_char(lowered[start - 1]):
+                continue
+            whole_word = end >= len(lowered) or not _is_word_char(lowered[end])
+            for risk_type, term, prefix, weak in self._key_terms[key_id]:
+                if weak and not include_weak:
+                    continue
+                if whole_word:
+                    candidates.append((start, end, risk_type, term))
+                elif prefix:
+                    word_end = end
+                    while word_end < len(lowered) and _is_word_char(lowered[word_end]):
+                        word_end += 1
+                    candidates.append((start, word_end, risk_type, term))
+
+        # Longest match first at each start; drop matches inside a kept span of the same type
+        candidates.sort(key=lambda c: (c[0], -(c[1] - c[0])))
+        matches, covered = [], {}
+        for start, end, risk_type, term in candidates:
+            if covered.get(risk_type, -1) >= end:
+                continue
+            covered[risk_type] = end
+            matches.append({
+                "risk_type": risk_type,
+                "severity": self.severity[risk_type],
+                "term": term,
+                "matched": text[start:end],
+                "start": start,
+                "end": end,
+                "snippet": self._snippet(text, start, end),
+                "negated": self._negated(lowered, start, self.windows[risk_type]),
+                "source": source
+            })
+        return matches
+
+    def scan_sources(self, sources: Dict[str, str], include_weak: bool = True) -> List[Dict]:
+        """Scan several labelled texts ({source: text}); matches carry their source label."""
+        matches = []
+        for source, text in sources.items():
+            matches.extend(self.scan(text, source=source, include_weak=include_weak))
+        return matches
+
+    def _negated(self, lowered: str, start: int, window: int) -> bool:
+        if window <= 0 or not self.negations:
+            return False
+        # Only look back within the current sentence
+        lookback = lowered[max(0, start - 200):start]
+        sentence_break = None
+        for sentence_break in _SENTENCE_END.finditer(lookback):
+            pass
+        if sentence_break is not None:
+            lookback = lookback[sentence_break.end():]
+        words = _WORD.findall(lookback)[-window:]
+        if not words:
+            return False
+        padded = f" {' '.join(words)} "
+        return any(f" {cue} " in padded for cue in self.negations)
+
+    @staticmethod
+    def _snippet(text: str, start: int, end: int) -> str:
+        left = max(0, start - SNIPPET_CHARS)
+        right = min(len(text), end + SNIPPET_CHARS)
+        snippet = _WHITESPACE.sub(" ", text[left:right]).strip()
+        return ("…" if left else "") + snippet + ("…" if right < len(text) else "")
+
+
+def summarize_matches(matches: Iterable[Dict]) -> Dict:
+    """
+    Counts of non-negated matches per risk type.
+
+    Returns:
+        {"risk_types": {risk_type: count}, "sources": {source: count}, "negated": int}
+    """
+    risk_types, sources, negated = Counter(), Counter(), 0
+    for match in matches:
+        if match["negated"]:
+            negated += 1
+            continue
+        risk_types[match["risk_type"]] += 1
+        sources[match.get("source")] += 1
+    return {"risk_types": dict(risk_types), "sources": dict(sources), "negated": negated}
+
+
+_scanner: Optional[RiskScanner] = None
+_scanner_lock = threading.Lock()
+
+
+def get_risk_scanner() -> RiskScanner:
+    """Process-wide scanner compiled from load_lexicon()."""
+    global _scanner
+    with _scanner_lock:
+        if _scanner is None:
+            _scanner = RiskScanner()
+        return _scanner
+
+
+# ============================================================================
+# BATCH SCAN OVER data/raw
+# ============================================================================
+
+def iter_raw_pages(raw_dir: Path = RAW_DATA_DIR, companies: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Yield every scraped text page: {"company_id", "run_id", "section", "path", "source_url", "crawled_at", "text"}.
+
+    All runs are included (not only the newest version of each section), so a
+    scan covers everything that was ever scraped.
+    """
+    raw_dir = Path(raw_dir)
+    company_dirs = sorted(p for p in raw_dir.iterdir() if p.is_dir()) if raw_dir.is_dir() else []
+    for company_dir in company_dirs:
+        if companies and company_dir.name not in companies:
+            continue
+        for text_path in sorted(company_dir.rglob("*.txt")):
+            meta = {}
+            for meta_path in (text_path.with_suffix(".meta.json"), text_path.with_suffix(".meta")):
+                if meta_path.exists():
+                    try:
+                        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                    except (OSError, ValueError):
+                        pass
+                    break
+            try:
+                text = text_path.read_text(encoding="utf-8", errors="ignore")
+            except OSError as e:
+                print(f"⚠️ Could not read {text_path}: {e}")
+                continue
+            yield {
+                "company_id": company_dir.name,
+                "run_id": text_path.parent.name,
+                "section": text_path.stem,
+                "path": str(text_path),
+                "source_url": meta.get("source_url") or meta.get("url") or meta.get("final_url"),
+                "crawled_at": meta.get("crawled_at") or meta.get("timestamp"),
+                "text": text
+            }
+
+
+def scan_raw_corpus(
+    scanner: Optional[RiskScanner] = None,
+    raw_dir: Path = RAW_DATA_DIR,
+    companies: Optional[List[str]] = None
+) -> Iterator[Tuple[Dict, List[Dict]]]:
+    """Yield (page, matches) for every scraped page (page without its text)."""
+    scanner = scanner or get_risk_scanner()
+    for page in iter_raw_pages(raw_dir, companies):
+        text = page.pop("text")
+        page["chars"] = len(text)
+        yield page, scanner.scan(text, source=f"raw:{page['section']}", include_weak=False)
+
+
+@lru_cache(maxsize=256)
+def _run_manifest_date(run_dir: str) -> Optional[str]:
+    """crawled_at/run_started_at from a run directory's manifest.json, if it has one."""
+    try:
+        manifest = json.loads((Path(run_dir) / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    return manifest.get("crawled_at") or manifest.get("run_started_at")
+
+
+def _page_date(page: Dict) -> str:
+    """
+    Date for a page-derived signal.
+
+    Uses the page's crawl time, else the run directory's date, else the run
+    manifest, else the text file's mtime. The date is part of the signal
+    fingerprint, so it must not change between scans of the same file.
+    """
+    run_dir = str(Path(page["path"]).parent)
+    for value in (page.get("crawled_at"), page.get("run_id"), _run_manifest_date(run_dir)):
+        if value and re.match(r"\d{4}-\d{2}-\d{2}", str(value)):
+            return str(value)[:10]
+    return datetime.fromtimestamp(os.path.getmtime(page["path"]), timezone.utc).date().isoformat()
+
+
+def signals_from_page(page: Dict, matches: List[Dict]) -> List[Dict]:
+    """One risk signal per risk type found (non-negated) on a page, for the risk store."""
+    signals = {}
+    for match in matches:
+        if match["negated"] or match["risk_type"] in signals:
+            continue
+        signals[match["risk_type"]] = {
+            "company_id": page["company_id"],
+            "occurred_on": _page_date(page),
+            "description": f"Risk scanner: '{match['matched']}' on {page['section']} page: {match['snippet']}",
+            "source_url": page.get("source_url") or f"file://{page['path']}",
+            "risk_type": match["risk_type"],
+            "severity": match["severity"]
+        }
+    return list(signals.values())
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Scan scraped pages (data/raw) for risk terms.")
+    p.add_argument("--raw-dir", default=str(RAW_DATA_DIR), help="Scraped data directory (default: data/raw).")
+    p.add_argument("--companies", nargs="*", default=None, help="Only scan these companies.")
+    p.add_argument("--lexicon", default=None, help="Lexicon JSON (default: built-in or RISK_LEXICON_PATH).")
+    p.add_argument("--output", default=None, help="Write every match as JSONL to this file.")
+    p.add_argument("--include-negated", action="store_true", help="Also write negated matches to --output.")
+    p.add_argument("--record", action="store_true",
+                   help="Record one risk signal per page and risk type in the risk store (deduplicated).")
+    return p.parse_args()
+
+
+def main():
+    """Scan the scraped corpus and print per-company risk counts."""
+    args = _parse_args()
+    scanner = RiskScanner(load_lexicon(args.lexicon))
+    print(f"🔎 Risk scan: {scanner.term_count} terms, "
+          f"{'pyahocorasick' if AHOCORASICK_AVAILABLE else 'pure-Python'} automaton")
+
+    store = None
+    if args.record:
+        from risk_store import get_risk_store
+        store = get_risk_store()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    started = time.perf_counter()
+    pages = chars = recorded = 0
+    per_company: Dict[str, Counter] = {}
+    try:
+        for page, matches in scan_raw_corpus(scanner, Path(args.raw_dir), args.companies):
+            pages += 1
+            chars += page["chars"]
+            counts = per_company.setdefault(page["company_id"], Counter())
+            for match in matches:
+                if not match["negated"]:
+                    counts[match["risk_type"]] += 1
+                if output is not None and (args.include_negated or not match["negated"]):
+                    output.write(json.dumps({**match, "company_id": page["company_id"],
+                                             "run_id": page["run_id"], "path": page["path"],
+                                             "source_url": page["source_url"]}) + "\n")
+            if store is not None:
+                recorded += len(store.record_many(signals_from_page(page, matches)))
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - started
+
+    for company_id, counts in sorted(per_company.items()):
+        if counts:
+            print(f"  {company_id}: " + ", ".join(f"{k}={v}" for k, v in counts.most_common()))
+    print(f"\n✅ Scanned {pages} pages ({chars / 1e6:.1f}M chars) in {elapsed:.2f}s "
+          f"({chars / 1e6 / elapsed if elapsed else 0:.1f}M chars/s)")
+    if store is not None:
+        print(f"  Recorded {recorded} new risk signals")
+    if args.output:
+        print(f"  Matches: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+"""
+Risk Store - batched, concurrency-safe risk signal log with a SQLite query index
+
+report_risk_signal used to open data/risk_signals/risk_signals.jsonl once per
+signal, and the MCP server also uploaded one tiny GCS object per signal.
+Readers (risk dashboards, HITL triage) had to re-read the whole log. The
+store keeps:
+
+- risk_signals.jsonl as the append-only audit log (same line format as before)
+- risk_index.db, a SQLite index by company / type / severity / occurrence date
+  that GET /resource/risks pages through
+
+Writes use group commit: concurrent record() calls queue their signals, and
+whichever caller holds the write lock appends everything queued so far in one
+locked write plus one index transaction. A lone writer still returns as soon
+as its own signal is written, so record() returning means the signal is in
+the log. GCS export is batched separately (see export_batch).
+
+Every signal carries a fingerprint over (company_id, risk_type, occurred_on,
+normalized source_url). Workflow runs re-derive the same events and agents
+re-report them, so a signal whose fingerprint is already known is dropped:
+an in-memory set answers repeats in this process without touching the lock,
+and a UNIQUE index catches repeats written by other processes.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: rely on O_APPEND and the in-process lock
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+RISK_DIR = Path(__file__).resolve().parents[1] / "data" / "risk_signals"
+RISK_LOG = RISK_DIR / "risk_signals.jsonl"
+RISK_INDEX_DB = Path(os.getenv("RISK_INDEX_DB_PATH", RISK_DIR / "risk_index.db"))
+
+SEVERITY_RANK = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+HITL_SEVERITIES = ("high", "critical")
+
+# Entries logged before risk types existed came from report_layoff_signal
+LEGACY_RISK_TYPE = "layoff"
+# Query parameters that vary per share/click but not per article
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS risks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id TEXT NOT NULL,
+    occurred_on TEXT,
+    recorded_at TEXT NOT NULL,
+    risk_type TEXT,
+    severity TEXT,
+    severity_rank INTEGER NOT NULL DEFAULT 0,
+    hitl_required INTEGER NOT NULL DEFAULT 0,
+    description TEXT,
+    source_url TEXT,
+    fingerprint TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS risks_company ON risks (company_id, occurred_on);
+CREATE INDEX IF NOT EXISTS risks_type ON risks (risk_type, occurred_on);
+CREATE INDEX IF NOT EXISTS risks_severity ON risks (severity_rank, occurred_on);
+CREATE INDEX IF NOT EXISTS risks_occurred ON risks (occurred_on);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def normalize_source_url(url) -> str:
+    """
+    Canonical form of a source URL for fingerprints.
+
+    Drops the scheme, 'www.', default ports, fragments, trailing slashes and
+    tracking parameters (utm_*, fbclid, ...); sorts the remaining query.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(str(url).strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+def risk_fingerprint(entry: Dict) -> str:
+    """
+    Identity of a risk event: (company_id, risk_type, occurred_on, normalized source_url).
+
+    Args:
+        entry: Signal dict (log entry, RiskSignal.model_dump(), ...)
+
+    Returns:
+        32-character hex digest
+    """
+    canonical = json.dumps([
+        entry.get("company_id"),
+        entry.get("risk_type") or LEGACY_RISK_TYPE,
+        str(entry.get("occurred_on") or ""),
+        normalize_source_url(entry.get("source_url"))
+    ], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class RiskStore:
+    """Append-only JSONL risk log plus SQLite index, safe for concurrent writers."""
+
+    def __init__(self, log_path: Path = RISK_LOG, db_path: Path = None):
+        """
+        Args:
+            log_path: JSONL audit log
+            db_path: SQLite index (defaults to data/risk_signals/risk_index.db or RISK_INDEX_DB_PATH)
+        """
+        self.log_path = Path(log_path)
+        self.db_path = Path(db_path or RISK_INDEX_DB)
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()          # SQLite connection
+        self._write_lock = threading.Lock()    # held by the caller flushing the queue
+        self._pending_lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self.flushes = 0
+        self.signals_written = 0
+        self.duplicates = 0
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        # Fingerprints already in the index: repeats are answered without the write path
+        self._known = {row[0] for row in self._conn.execute("SELECT fingerprint FROM risks")}
+
+    def _migrate(self):
+        """Add fingerprints to an index created before deduplication, dropping rows that repeat an event."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(risks)")}
+        if "fingerprint" not in columns:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have migrated while we waited for the lock
+                columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(risks)")}
+                if "fingerprint" not in columns:
+                    self._conn.execute("ALTER TABLE risks ADD COLUMN fingerprint TEXT")
+                    seen, updates, repeats = set(), [], []
+                    for row in self._conn.execute("SELECT id, entry FROM risks ORDER BY id").fetchall():
+                        fp = risk_fingerprint(json.loads(row["entry"]))
+                        if fp in seen:
+                            repeats.append((row["id"],))
+                        else:
+                            seen.add(fp)
+                            updates.append((fp, row["id"]))
+                    self._conn.executemany("DELETE FROM risks WHERE id = ?", repeats)
+                    self._conn.executemany("UPDATE risks SET fingerprint = ? WHERE id = ?", updates)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS risks_fingerprint ON risks (fingerprint)")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(self, entry: Dict) -> bool:
+        """
+        Append one signal (batched with any concurrent callers) unless its event is already logged.
+
+        Args:
+            entry: Log entry (company_id, occurred_on, description, source_url, risk_type, severity);
+                'timestamp' and 'fingerprint' are added when missing
+
+        Returns:
+            True if the signal was written, False if its fingerprint was already known
+
+        Raises:
+            OSError / sqlite3.Error: If the batch containing this entry could not be written
+        """
+        return bool(self.record_many([entry]))
+
+    def record_many(self, entries: Iterable[Dict]) -> List[Dict]:
+        """Append several signals in one batch (e.g. from a bulk scan). Returns the entries actually written."""
+        now = datetime.now(timezone.utc).isoformat()
+        fresh = []
+        for entry in entries:
+            fp = entry.get("fingerprint") or risk_fingerprint(entry)
+            if fp in self._known:
+                self.duplicates += 1
+                continue
+            fresh.append(dict(entry, timestamp=entry.get("timestamp") or now, fingerprint=fp))
+        if not fresh:
+            return []
+
+        item = {
+            "entries": fresh,
+            "written": [],
+            "done": threading.Event(),
+            "error": None
+        }
+        with self._pending_lock:
+            self._pending.append(item)
+
+        with self._write_lock:
+            # A caller that held the lock before us may already have written our entries
+            if not item["done"].is_set():
+                with self._pending_lock:
+                    batch, self._pending = self._pending, []
+                try:
+                    written = {id(entry) for entry in self._write_batch(
+                        [entry for queued in batch for entry in queued["entries"]]
+                    )}
+                    for queued in batch:
+                        queued["written"] = [entry for entry in queued["entries"] if id(entry) in written]
+                except Exception as e:
+                    for queued in batch:
+                        queued["error"] = e
+                finally:
+                    for queued in batch:
+                        queued["done"].set()
+
+        if item["error"] is not None:
+            raise item["error"]
+        return item["written"]
+
+    def _write_batch(self, entries: List[Dict]) -> List[Dict]:
+        """Index entries and append the ones the index accepted, as one unit. Returns those entries."""
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            # Other processes (Airflow workers, the MCP server) append to the same log
+            if FCNTL_AVAILABLE:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                with self._lock:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        # Another process may already have logged some of these events
+                        written = self._insert(entries)
+                        if written:
+                            f.write("".join(json.dumps(entry) + "\n" for entry in written))
+                            f.flush()
+                        self._conn.execute("COMMIT")
+                    except Exception:
+                        self._conn.execute("ROLLBACK")
+                        raise
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        self._known.update(entry["fingerprint"] for entry in written)
+        self.flushes += 1
+        self.signals_written += len(written)
+        self.duplicates += len(entries) - len(written)
+        return written
+
+    def _insert(self, entries: List[Dict]) -> List[Dict]:
+        """INSERT OR IGNORE entries inside the caller's transaction. Returns the ones that were new."""
+        inserted = []
+        for entry in entries:
+            if not entry.get("company_id"):
+                continue
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO risks (company_id, occurred_on, recorded_at, risk_type, severity,
+                    severity_rank, hitl_required, description, source_url, fingerprint, entry)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    entry.get("company_id"), entry.get("occurred_on"), entry.get("timestamp") or "",
+                    entry.get("risk_type"), entry.get("severity"),
+                    SEVERITY_RANK.get(entry.get("severity"), 0),
+                    int(entry.get("severity") in HITL_SEVERITIES),
+                    entry.get("description"), entry.get("source_url"),
+                    entry.get("fingerprint") or risk_fingerprint(entry), json.dumps(entry)
+                )
+            )
+            if cursor.rowcount:
+                inserted.append(entry)
+        return inserted
+
+    def is_known(self, entry: Dict) -> bool:
+        """True if this process has seen the signal's fingerprint (constant time, no I/O)."""
+        return (entry.get("fingerprint") or risk_fingerprint(entry)) in self._known
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        company_id: Optional[str] = None,
+        since: Optional[str] = None,
+        risk_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        min_severity: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[int] = None
+    ) -> Dict:
+        """
+        One page of signals, most recently recorded first.
+
+        Args:
+            company_id: Filter by company
+            since: Only events that occurred on or after this date (YYYY-MM-DD)
+            risk_type: Filter by risk type
+            severity: Exact severity
+            min_severity: Severity at or above ('high' -> high and critical)
+            limit: Page size
+            cursor: next_cursor from the previous page
+
+        Returns:
+            {"items": [...], "next_cursor": int or None}
+        """
+        clauses, args = self._filters(company_id, since, risk_type, severity, min_severity)
+        if cursor is not None:
+            clauses.append("id < ?")
+            args.append(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM risks {where} ORDER BY id DESC LIMIT ?",
+                args + [limit + 1]
+            ).fetchall()
+
+        items = [self._to_dict(row) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def count(
+        self,
+        company_id: Optional[str] = None,
+        since: Optional[str] = None,
+        risk_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        min_severity: Optional[str] = None
+    ) -> int:
+        clauses, args = self._filters(company_id, since, risk_type, severity, min_severity)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM risks {where}", args).fetchone()[0]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM risks LIMIT 1").fetchone() is None
+
+    def backfill_from_log(self) -> int:
+        """
+        Index a log written before the index existed. Returns the number indexed.
+
+        Used once when the index is created next to an existing risk_signals.jsonl;
+        does nothing if another process has already filled the index. Repeated
+        events in the log are indexed once.
+        """
+        if not self.log_path.exists():
+            return 0
+        entries = []
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    print(f"⚠️ Skipping unreadable risk log line: {line[:80]}")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT 1 FROM risks LIMIT 1").fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                inserted = self._insert(entries)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._known.update(row[0] for row in self._conn.execute("SELECT fingerprint FROM risks"))
+        return len(inserted)
+
+    # ------------------------------------------------------------------
+    # Batched export (e.g. to GCS)
+    # ------------------------------------------------------------------
+
+    def export_batch(self, upload, max_rows: int = 5000) -> Optional[Dict]:
+        """
+        Hand signals indexed since the last export to upload() in one batch.
+
+        Args:
+            upload: Callable(rows, first_id, last_id) -> location; raising leaves the cursor unchanged
+            max_rows: Largest batch per call
+
+        Returns:
+            {"rows", "first_id", "last_id", "location"} or None when there was nothing new
+        """
+        with self._lock:
+            exported = self._conn.execute("SELECT value FROM meta WHERE key = 'exported_id'").fetchone()
+            exported_id = int(exported["value"]) if exported else 0
+            rows = self._conn.execute(
+                "SELECT * FROM risks WHERE id > ? ORDER BY id LIMIT ?",
+                (exported_id, max_rows)
+            ).fetchall()
+        if not rows:
+            return None
+
+        items = [self._to_dict(row) for row in rows]
+        first_id, last_id = items[0]["id"], items[-1]["id"]
+        location = upload(items, first_id, last_id)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('exported_id', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (str(last_id),)
+            )
+        return {"rows": len(items), "first_id": first_id, "last_id": last_id, "location": location}
+
+    def stats(self) -> Dict:
+        return {
+            "flushes": self.flushes,
+            "signals_written": self.signals_written,
+            "duplicates": self.duplicates,
+            "pending": len(self._pending)
+        }
+
+    @staticmethod
+    def _filters(company_id, since, risk_type, severity, min_severity):
+        clauses, args = [], []
+        if company_id is not None:
+            clauses.append("company_id = ?")
+            args.append(company_id)
+        if since is not None:
+            clauses.append("occurred_on >= ?")
+            args.append(since)
+        if risk_type is not None:
+            clauses.append("risk_type = ?")
+            args.append(risk_type)
+        if severity is not None:
+            clauses.append("severity = ?")
+            args.append(severity)
+        if min_severity is not None:
+            clauses.append("severity_rank >= ?")
+            args.append(SEVERITY_RANK.get(min_severity, 0))
+        return clauses, args
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        entry = json.loads(row["entry"])
+        entry.update(id=row["id"], fingerprint=row["fingerprint"], hitl_required=bool(row["hitl_required"]))
+        return entry
+
+
+_store: Optional[RiskStore] = None
+_store_lock = threading.Lock()
+
+
+def get_risk_store() -> RiskStore:
+    """Process-wide store; the first call indexes an existing risk_signals.jsonl if the index is empty."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RiskStore()
+            if _store.is_empty():
+                count = _store.backfill_from_log()
+                if count:
+                    print(f"✅ Indexed {count} existing risk signals")
+        return _store
@@ -0,0 +1,251 @@
+"""
+Run Resolver for scraped company data (data/raw/<company>/<run>/...)
+
+Shared by the RAG loader (rag_pipeline) and structured extraction so both
+agree on which scrape run is newest. Directory listings are indexed once per
+company and revalidated with a stat() per run, so repeat lookups do not
+re-walk the tree and only the chosen file versions are ever read.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+RUN_DIR_DATE_FORMATS = (
+    "%Y%m%d",
+    "%Y%m%d%H%M%S",
+    "%Y-%m-%d_%H%M%S",
+    "%Y-%m-%d-%H%M%S",
+    "%Y-%m-%dT%H-%M-%SZ",
+    "%Y-%m-%dT%H-%M-%S",
+)
+
+INITIAL_RUN = "initial"
+
+# Bare (extension-less) section files written by the original scraper
+LEGACY_SECTION_NAMES = {
+    'homepage', 'home', 'about', 'product', 'careers',
+    'blog', 'news', 'manifest', 'platform'
+}
+
+# Sections smaller than this are treated as empty scrapes ("Not found", etc.)
+MIN_SECTION_BYTES = 50
+
+
+def parse_run_directory_name(name: str) -> Optional[datetime]:
+    """Parse a run directory name (2025-11-19, 2025-11-19T06-10-03Z, ...) into a datetime."""
+    candidate_values = {name.strip()}
+    if "_" in name:
+        candidate_values.add(name.split("_", 1)[0])
+    if name.endswith("Z"):
+        candidate_values.add(name[:-1])
+
+    for candidate in candidate_values:
+        # Normalize ISO-like with hyphenated time, e.g., 2025-11-07T06-37-33Z
+        # Strip trailing Z before normalization
+        normalized = candidate[:-1] if candidate.endswith("Z") else candidate
+        if "T" in normalized and "-" in normalized.split("T", 1)[1]:
+            date_part, time_part = normalized.split("T", 1)
+            time_part_colon = time_part.replace("-", ":")
+            iso_like = f"{date_part}T{time_part_colon}"
+            try:
+                return datetime.fromisoformat(iso_like)
+            except ValueError:
+                pass
+        try:
+            return datetime.fromisoformat(normalized)
+        except ValueError:
+            pass
+        for fmt in RUN_DIR_DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, fmt)
+            except ValueError:
+                continue
+    return None
+
+
+@dataclass
+class RunInfo:
+    """One scrape run directory and the file sizes found in it."""
+    name: str
+    path: Path
+    started_at: Optional[datetime]          # None for the 'initial' run
+    mtime_ns: int
+    files: Dict[str, int] = field(default_factory=dict)             # filename -> size
+    external_files: Dict[str, int] = field(default_factory=dict)    # external/<filename> -> size
+    external_mtime_ns: Optional[int] = None                         # None if there is no external/
+
+    @property
+    def is_initial(self) -> bool:
+        return self.name == INITIAL_RUN
+
+
+@dataclass
+class SectionVersion:
+    """The newest usable version of a section across all runs."""
+    section: str
+    run: RunInfo
+    text_path: Path
+    meta_path: Optional[Path]
+    html_path: Optional[Path] = None     # raw HTML from the same run, if saved
+
+
+def _external_mtime(run_path: Path) -> Optional[int]:
+    """mtime of a run's external/ directory (files added there do not touch the run's own mtime)."""
+    try:
+        return (run_path / "external").stat().st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _scan_run(path: Path, started_at: Optional[datetime], mtime_ns: int) -> RunInfo:
+    run = RunInfo(name=path.name, path=path, started_at=started_at, mtime_ns=mtime_ns)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                run.files[entry.name] = entry.stat().st_size
+            elif entry.is_dir() and entry.name == "external":
+                run.external_mtime_ns = entry.stat().st_mtime_ns
+                with os.scandir(entry.path) as ext_entries:
+                    for ext in ext_entries:
+                        if ext.is_file():
+                            run.external_files[ext.name] = ext.stat().st_size
+    return run
+
+
+class RunIndex:
+    """
+    Process-wide index of scrape runs per company directory.
+
+    Runs are ordered newest first with 'initial' last. The cached listing is
+    reused while the company directory and each run directory (and its
+    external/ directory) keep the same mtime; only changed runs are rescanned.
+    """
+
+    _cache: Dict[Path, Tuple[int, List[RunInfo]]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def runs(cls, company_dir: Path) -> List[RunInfo]:
+        """Return all runs for a company, newest first ('initial' last)."""
+        company_dir = Path(company_dir)
+        try:
+            company_mtime = company_dir.stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        if not company_dir.is_dir():
+            return []
+
+        with cls._lock:
+            cached = cls._cache.get(company_dir)
+
+        if cached and cached[0] == company_mtime:
+            runs = []
+            for run in cached[1]:
+                try:
+                    run_mtime = run.path.stat().st_mtime_ns
+                except FileNotFoundError:
+                    return cls._rebuild(company_dir, company_mtime)
+                unchanged = run_mtime == run.mtime_ns and _external_mtime(run.path) == run.external_mtime_ns
+                runs.append(run if unchanged else _scan_run(run.path, run.started_at, run_mtime))
+            with cls._lock:
+                cls._cache[company_dir] = (company_mtime, runs)
+            return runs
+
+        return cls._rebuild(company_dir, company_mtime)
+
+    @classmethod
+    def _rebuild(cls, company_dir: Path, company_mtime: int) -> List[RunInfo]:
+        dated: List[RunInfo] = []
+        initial: Optional[RunInfo] = None
+
+        with os.scandir(company_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                mtime_ns = entry.stat().st_mtime_ns
+                if entry.name == INITIAL_RUN:
+                    initial = _scan_run(Path(entry.path), None, mtime_ns)
+                    continue
+                parsed = parse_run_directory_name(entry.name)
+                if parsed is not None:
+                    dated.append(_scan_run(Path(entry.path), parsed, mtime_ns))
+
+        dated.sort(key=lambda run: run.started_at, reverse=True)
+        runs = dated + ([initial] if initial else [])
+
+        with cls._lock:
+            cls._cache[company_dir] = (company_mtime, runs)
+        return runs
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._cache.clear()
+
+
+def resolve_company_run_directory(company_dir: Path) -> Optional[Path]:
+    """Return the newest dated run directory, else 'initial', else None."""
+    runs = RunIndex.runs(company_dir)
+    return runs[0].path if runs else None
+
+
+def _section_files(run: RunInfo) -> Dict[str, str]:
+    """Map section name -> preferred text filename within one run."""
+    sections: Dict[str, str] = {}
+    html_only: Dict[str, str] = {}
+
+    for filename in run.files:
+        if filename.endswith(".txt"):
+            sections[filename[:-4]] = filename
+        elif filename in LEGACY_SECTION_NAMES:
+            sections.setdefault(filename, filename)
+        elif filename.endswith(".html"):
+            html_only[filename[:-5]] = filename
+
+    # Fall back to raw HTML only for legacy sections that have no text export
+    for section, filename in html_only.items():
+        if section in LEGACY_SECTION_NAMES:
+            sections.setdefault(section, filename)
+    return sections
+
+
+def iter_latest_sections(company_dir: Path, min_bytes: int = MIN_SECTION_BYTES) -> Iterator[SectionVersion]:
+    """
+    Yield the newest usable version of every section across all runs.
+
+    A section from a newer run wins over older runs; versions smaller than
+    min_bytes (failed or empty scrapes) fall through to the next-newest run.
+    """
+    seen = set()
+    for run in RunIndex.runs(company_dir):
+        for section, filename in sorted(_section_files(run).items()):
+            if section in seen or run.files[filename] < min_bytes:
+                continue
+            seen.add(section)
+
+            meta_path = None
+            for meta_name in (f"{section}.meta.json", f"{section}.meta"):
+                if meta_name in run.files:
+                    meta_path = run.path / meta_name
+                    break
+
+            html_name = f"{section}.html"
+            yield SectionVersion(
+                section=section,
+                run=run,
+                text_path=run.path / filename,
+                meta_path=meta_path,
+                html_path=run.path / html_name if html_name in run.files else None
+            )
+
+
+def iter_external_files(company_dir: Path, filename: str, min_bytes: int = 3) -> Iterator[Tuple[RunInfo, Path]]:
+    """Yield (run, path) for external/<filename> in every run, newest first."""
+    for run in RunIndex.runs(company_dir):
+        size = run.external_files.get(filename)
+        if size is not None and size >= min_bytes:
+            yield run, run.path / "external" / filename
@@ -1,6 +1,14 @@
 from bs4 import BeautifulSoup
+from bs4.element import Comment, Declaration, Doctype
 
-def html_to_structured_text(html: str) -> str:
+# Elements that start a new text block when include_all_text=True
+BLOCK_TAGS = {
+    "p", "li", "blockquote", "div", "section", "article", "header", "footer",
+    "td", "th", "dd", "dt", "figcaption", "h4", "h5", "h6", "pre", "main", "aside", "nav"
+}
+
+
+def html_to_structured_text(html: str, include_all_text: bool = False) -> str:
     """
     Returns a simple, sectioned text format:
     # <H1>
@@ -9,11 +17,19 @@ def html_to_structured_text(html: str) -> str:
     <paragraphs...>
 
     If no headings exist, falls back to whole-page text.
+
+    By default only p/li/blockquote siblings of a heading are kept. With
+    include_all_text=True every text block in document order is kept under
+    the nearest preceding heading (used by the RAG chunker, where dropping
+    div-based layouts would lose most of a page).
     """
     soup = BeautifulSoup(html, "html.parser")
     for t in soup(["script","style","noscript"]):
         t.decompose()
 
+    if include_all_text:
+        return _walk_blocks(soup)
+
     # Collect headings and following paragraphs until next heading
     lines = []
     # Order of headings we consider as “section boundaries”
@@ -44,3 +60,40 @@ def html_to_structured_text(html: str) -> str:
         lines.extend(chunks)
 
     return "\n".join(lines)
+
+
+def _walk_blocks(soup) -> str:
+    """Emit headings and text blocks in document order."""
+    heading_tags = ["h1","h2","h3"]
+    lines = []
+    current_block = None
+    current_parts = []
+
+    def flush():
+        if current_parts:
+            txt = " ".join(current_parts).strip()
+            if txt:
+                lines.append(txt)
+
+    for string in soup.find_all(string=True):
+        txt = string.strip()
+        if not txt or isinstance(string, (Comment, Declaration, Doctype)):
+            continue
+        if string.find_parent(["head", "title"]) is not None:
+            continue
+
+        heading = string.find_parent(heading_tags)
+        block = heading if heading is not None else string.find_parent(BLOCK_TAGS)
+
+        if block is not current_block:
+            flush()
+            current_block = block
+            current_parts = []
+            if heading is not None:
+                prefix = "#" * (heading_tags.index(heading.name.lower()) + 1)
+                current_parts = [prefix]
+
+        current_parts.append(txt)
+
+    flush()
+    return "\n".join(lines)
@@ -1435,13 +1435,16 @@ Exposes tools, resources, and prompts for AI agents
 Now fetches data from GCS and uses GPT for structured output
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field, HttpUrl
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl, ValidationError
 from typing import List, Dict, Optional, Literal
 from datetime import date, datetime, timezone
 import os
 import sys
 import json
+import time
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
@@ -1457,31 +1460,52 @@ load_dotenv(dotenv_path=env_path, override=True)
 
 # Import GCS storage client
 try:
-    from storage.gcs_client import DashboardStorage
+    from storage.gcs_client import DashboardStorage, get_storage
     GCS_AVAILABLE = True
     logger.info("✅ GCS module loaded")
 except ImportError as e:
     logger.warning(f"⚠️ GCS not available: {e}")
     DashboardStorage = None
+    get_storage = None
     GCS_AVAILABLE = False
 
 # Import your tools
 from tools.payload_tool import get_latest_structured_payload
 from tools.rag_tool import rag_search_company
-from tools.risk_logger import report_risk_signal, RiskSignal
+from tools.risk_logger import record_risk_signal, RiskSignal
+from concurrency import (
+    chat_completion, get_single_flight, limiter_stats, run_in_thread,
+    single_flight_stats, stream_chat_completion
+)
+from streaming import SSE_HEADERS, SSE_MEDIA_TYPE, sse_event
+from result_cache import cache_stats, fingerprint, get_cache, text_digest
+from payload_repository import payload_cache_stats
+from payload_dashboard import render_dashboard
+from job_queue import JobQueue, JobWorkerPool
+from approvals_index import get_approvals_index
+from company_catalog import get_company_catalog
+from risk_store import get_risk_store
+from metrics import instrument_app, register_collector, stats_families, timed
+from http_encoding import CompactJSONResponse, enable_compression, select_fields, select_response
 
 app = FastAPI(
     title="MCP Server - PE Due Diligence",
     description="Model Context Protocol server for AI agent tool access with GCS integration",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=CompactJSONResponse
 )
 
+# Request counters / latency per route, plus GET /metrics
+instrument_app(app, "mcp")
+# gzip / br for large tool responses and approval listings
+enable_compression(app)
+
 # Initialize GCS storage
 gcs_storage = None
 if GCS_AVAILABLE:
     try:
         bucket_name = os.getenv('GCS_BUCKET_NAME', 'ai-pe-dashboard')
-        gcs_storage = DashboardStorage(bucket_name)
+        gcs_storage = get_storage(bucket_name)
         print(f"✅ GCS Storage initialized: {bucket_name}")
     except Exception as e:
         print(f"⚠️ GCS initialization failed: {e}")
@@ -1505,6 +1529,7 @@ class UnifiedDashboardRequest(ToolRequest):
     prefer_structured: bool = Field(default=True, description="Prefer structured data when available")
     save_to_gcs: bool = Field(default=True, description="Save dashboard to GCS bucket")
     restructure_with_gpt: bool = Field(default=True, description="Use GPT to restructure fetched dashboard")
+    refresh_latest: bool = Field(default=False, description="Re-check the latest dashboard now instead of trusting the short-lived pointer cache")
 
 class RiskReportRequest(BaseModel):
     company_id: str = Field(..., description="Company identifier")
@@ -1540,12 +1565,36 @@ class UnifiedDashboardResponse(BaseModel):
 class CompanyListResponse(BaseModel):
     companies: List[str]
     count: int
+    details: Optional[Dict[str, Dict]] = None
+    built_at: Optional[str] = None
 
 class PromptResponse(BaseModel):
     prompt_id: str
     template: str
     description: str
 
+class DashboardJobRequest(BaseModel):
+    company_id: str = Field(..., description="Company identifier (e.g., 'abridge')")
+    dashboard_type: Literal["unified", "rag", "structured"] = Field(default="unified")
+    params: Dict = Field(default_factory=dict, description="Extra tool parameters (e.g. top_k, restructure_with_gpt)")
+    priority: int = Field(default=0, description="Higher runs first")
+    callback_url: Optional[HttpUrl] = Field(default=None, description="Webhook POSTed with the finished job")
+
+MAX_BATCH_CALLS = int(os.getenv("MAX_BATCH_CALLS", 200))
+
+class BatchToolCall(BaseModel):
+    tool: Literal[
+        "generate_unified_dashboard", "generate_structured_dashboard",
+        "generate_rag_dashboard", "report_risk"
+    ] = Field(..., description="Tool name (same as /tool/<name>)")
+    params: Dict = Field(default_factory=dict, description="Request body the tool endpoint takes")
+    id: Optional[str] = Field(default=None, description="Caller's correlation ID, echoed in the result")
+    fields: Optional[str] = Field(default=None, description="Response fields to keep (same as ?fields= on /tool/<name>)")
+
+class BatchToolRequest(BaseModel):
+    calls: List[BatchToolCall] = Field(..., min_length=1, max_length=MAX_BATCH_CALLS)
+    max_concurrency: int = Field(default=8, ge=1, le=32, description="Calls run at once (upstream limits still apply)")
+
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
@@ -1559,7 +1608,7 @@ async def root():
         "gcs_enabled": GCS_AVAILABLE,
         "endpoints": {
             "tools": 4,
-            "resources": 1,
+            "resources": 2,
             "prompts": 1
         }
     }
@@ -1576,8 +1625,15 @@ async def health_check():
             "generate_unified_dashboard",
             "report_risk"
         ],
-        "resources_available": ["ai50/companies"],
-        "prompts_available": ["pe-dashboard"]
+        "resources_available": ["ai50/companies", "risks"],
+        "prompts_available": ["pe-dashboard"],
+        "upstreams": limiter_stats(),
+        "caches": cache_stats(),
+        "payloads": payload_cache_stats(),
+        "company_catalog": company_catalog().stats(),
+        "risk_store": get_risk_store().stats(),
+        "coalescing": single_flight_stats(),
+        "jobs": job_workers.stats() if job_workers else None
     }
 
 # ============================================================================
@@ -1585,16 +1641,25 @@ async def health_check():
 # ============================================================================
 
 @app.post("/tool/generate_unified_dashboard", response_model=UnifiedDashboardResponse)
-async def tool_generate_unified_dashboard(request: UnifiedDashboardRequest):
+async def tool_generate_unified_dashboard(request: UnifiedDashboardRequest, fields: Optional[str] = None):
     """
     Fetch pre-generated unified dashboard from GCS bucket
     Optionally restructure it using GPT for better formatting
     
     This endpoint retrieves dashboards that were already generated and saved to GCS
     by the supervisor agent or batch processing pipeline.
+    
+    Pass `fields` (comma-separated, dotted) to return only part of the response,
+    e.g. fields=success,result or fields=metadata.source_generation.
     """
+    # Identical concurrent requests share one GCS fetch (+ GPT restructure)
+    key = (request.company_id, request.restructure_with_gpt, request.refresh_latest)
+    with timed("total", tool="generate_unified_dashboard"):
+        response = await get_single_flight("unified_dashboard").do(key, lambda: _unified_dashboard(request))
+    return select_response(response, fields)
+
+async def _unified_dashboard(request: UnifiedDashboardRequest) -> UnifiedDashboardResponse:
     try:
-        from openai import OpenAI
         from datetime import datetime
         
         company_id = request.company_id
@@ -1608,13 +1673,17 @@ async def tool_generate_unified_dashboard(request: UnifiedDashboardRequest):
         
         print(f"📥 Fetching dashboard from GCS for: {company_id}")
         
-        # Fetch latest unified dashboard from GCS
-        dashboard_content = gcs_storage.get_latest_dashboard(
-            company_id=company_id,
-            dashboard_type="unified"
-        )
+        # Fetch latest unified dashboard from GCS (blocking SDK call, run off the event loop)
+        with timed("gcs_fetch"):
+            latest = await run_in_thread(
+                'gcs',
+                gcs_storage.get_latest_dashboard_ref,
+                company_id=company_id,
+                dashboard_type="unified",
+                max_age_seconds=0 if request.refresh_latest else None
+            )
         
-        if not dashboard_content:
+        if not latest:
             # Dashboard not found in GCS
             return UnifiedDashboardResponse(
                 success=False,
@@ -1628,64 +1697,45 @@ async def tool_generate_unified_dashboard(request: UnifiedDashboardRequest):
                 }
             )
         
+        dashboard_content = latest["content"]
         print(f"✓ Dashboard retrieved from GCS ({len(dashboard_content)} chars)")
         
         # Parse data sources from dashboard if available
-        data_sources = {}
-        if "**Data Sources Used:**" in dashboard_content:
-            lines = dashboard_content.split("**Data Sources Used:**")[1].split("\n")
-            for line in lines:
-                if ":" in line and any(emoji in line for emoji in ["📊", "🔍", "❌", "🔄"]):
-                    parts = line.split(":")
-                    if len(parts) >= 2:
-                        section = parts[0].strip("- 📊🔍❌🔄 ")
-                        source = parts[1].strip()
-                        data_sources[section] = source
-        
-        # Optionally restructure with GPT
+        data_sources = parse_data_sources(dashboard_content)
+        
+        # Optionally restructure with GPT (stored per source generation, so usually a lookup)
+        tokens_used = 0
+        restructure_cache = None
         if request.restructure_with_gpt:
-            print(f"🤖 Restructuring dashboard with GPT-4o...")
-            
-            system_prompt = """You are a PE analyst improving dashboard formatting.
-
-Take the existing dashboard and:
-- Clean up any formatting issues
-- Ensure all 8 sections are properly formatted
-- Remove duplicate information
-- Format numbers consistently ($100M, 1,500 employees)
-- Improve bullet point structure
-- Keep "Not disclosed" for missing data
-- Make it more readable and professional
-
-Maintain all factual information - only improve structure and formatting."""
-
-            user_prompt = f"""Improve the formatting and structure of this dashboard:
-
-{dashboard_content}
-
-Return a clean, well-formatted version with all 8 sections properly structured."""
-
-            client = OpenAI(api_key=os.getenv('OPENAI_KEY'))
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.2,  # Lower temperature for consistency
-                max_tokens=4000
-            )
-            
-            dashboard_content = response.choices[0].message.content
-            tokens_used = response.usage.total_tokens
-            
-            print(f"✓ Dashboard restructured ({tokens_used} tokens)")
-            
-            # Add restructuring note
-            dashboard_content += f"\n\n---\n*Fetched from GCS and restructured with GPT-4o ({tokens_used} tokens)*\n"
-        else:
-            tokens_used = 0
+            with timed("restructure_lookup"):
+                restructured = await run_in_thread(
+                    'gcs',
+                    gcs_storage.get_derived_dashboard,
+                    latest["blob"],
+                    latest["generation"],
+                    restructure_variant()
+                )
+            if restructured is not None:
+                restructure_cache = "hit"
+                dashboard_content = restructured + "\n\n---\n*Fetched from GCS and restructured with GPT-4o (stored restructure)*\n"
+            else:
+                print(f"🤖 Restructuring dashboard with GPT-4o...")
+                
+                response = await chat_completion(
+                    model="gpt-4o",
+                    messages=restructure_messages(dashboard_content),
+                    temperature=RESTRUCTURE_TEMPERATURE,
+                    max_tokens=4000
+                )
+                
+                restructured = response.choices[0].message.content
+                tokens_used = response.usage.total_tokens
+                restructure_cache = "miss"
+                print(f"✓ Dashboard restructured ({tokens_used} tokens)")
+                await store_restructured(latest, restructured)
+                
+                # Add restructuring note
+                dashboard_content = restructured + f"\n\n---\n*Fetched from GCS and restructured with GPT-4o ({tokens_used} tokens)*\n"
         
         # Return dashboard
         return UnifiedDashboardResponse(
@@ -1693,15 +1743,17 @@ Return a clean, well-formatted version with all 8 sections properly structured."
             company_id=company_id,
             result=dashboard_content,
             data_sources=data_sources,
-            gcs_uri=f"gs://{os.getenv('GCS_BUCKET_NAME')}/data/dashboards/{company_id}/unified_*.md",
+            gcs_uri=f"gs://{gcs_storage.bucket_name}/{latest['blob']}",
             metadata={
                 "source": "gcs_bucket",
                 "tool": "unified_dashboard",
                 "fetched_from": "google_cloud_storage",
                 "dashboard_type": "unified",
                 "fetched_at": datetime.now().isoformat(),
+                "source_generation": latest["generation"],
                 "restructured_with_gpt": request.restructure_with_gpt,
-                "tokens_used": tokens_used if request.restructure_with_gpt else 0
+                "restructure_cache": restructure_cache,
+                "tokens_used": tokens_used
             }
         )
     
@@ -1720,13 +1772,35 @@ Return a clean, well-formatted version with all 8 sections properly structured."
         )
 
 @app.post("/tool/generate_structured_dashboard", response_model=ToolResponse)
-async def tool_generate_structured_dashboard(request: StructuredDashboardRequest):
-    """Generate structured dashboard from Pydantic payloads"""
+async def tool_generate_structured_dashboard(request: StructuredDashboardRequest, fields: Optional[str] = None):
+    """Generate structured dashboard from Pydantic payloads (`fields` trims the response)"""
+    with timed("total", tool="generate_structured_dashboard"):
+        response = await get_single_flight("structured_dashboard").do(
+            request.company_id,
+            lambda: _structured_dashboard(request)
+        )
+    return select_response(response, fields)
+
+async def _structured_dashboard(request: StructuredDashboardRequest) -> ToolResponse:
     try:
         company_id = request.company_id
         
-        payload = await get_latest_structured_payload(company_id)
-        dashboard_markdown = generate_dashboard_from_payload(payload, company_id)
+        with timed("payload_load"):
+            payload = await get_latest_structured_payload(company_id)
+        
+        cache = get_cache("mcp_structured")
+        cache_key = fingerprint(
+            tool="generate_structured_dashboard",
+            template=STRUCTURED_TEMPLATE_VERSION,
+            payload=text_digest(payload.model_dump_json())
+        )
+        dashboard_markdown = cache.get(cache_key)
+        cache_status = "hit"
+        if dashboard_markdown is None:
+            with timed("render"):
+                dashboard_markdown = generate_dashboard_from_payload(payload, company_id)
+            cache.set(cache_key, dashboard_markdown, company_id=company_id)
+            cache_status = "miss"
         
         return ToolResponse(
             success=True,
@@ -1739,7 +1813,8 @@ async def tool_generate_structured_dashboard(request: StructuredDashboardRequest
                 "type": "markdown",
                 "has_events": len(payload.events) > 0,
                 "has_leadership": len(payload.leadership) > 0,
-                "has_products": len(payload.products) > 0
+                "has_products": len(payload.products) > 0,
+                "cache": cache_status
             }
         )
     
@@ -1757,99 +1832,61 @@ async def tool_generate_structured_dashboard(request: StructuredDashboardRequest
         )
 
 @app.post("/tool/generate_rag_dashboard", response_model=ToolResponse)
-async def tool_generate_rag_dashboard(request: RAGDashboardRequest):
-    """Generate RAG dashboard using GPT to structure content"""
+async def tool_generate_rag_dashboard(request: RAGDashboardRequest, fields: Optional[str] = None):
+    """Generate RAG dashboard using GPT to structure content (`fields` trims the response)"""
+    # Identical concurrent requests share one set of searches + GPT call
+    key = (request.company_id, request.top_k, request.query)
+    with timed("total", tool="generate_rag_dashboard"):
+        response = await get_single_flight("rag_dashboard").do(key, lambda: _rag_dashboard(request))
+    return select_response(response, fields)
+
+async def _rag_dashboard(request: RAGDashboardRequest) -> ToolResponse:
     try:
-        from openai import OpenAI
-        
         company_id = request.company_id
         top_k = request.top_k
         
-        sections = [
-            ("Company Overview", "company overview business model mission"),
-            ("Funding History", "funding history investors series round valuation"),
-            ("Leadership", "leadership team executives CEO founder management"),
-            ("Product/Technology", "product technology platform features innovation"),
-            ("Market Position", "market position competitors industry landscape"),
-            ("Recent Developments", "recent news developments announcements updates"),
-            ("Key Metrics", "metrics revenue growth employees customers headcount"),
-            ("Risk Factors", "risks challenges problems issues concerns")
-        ]
-        
         # Collect RAG results
-        context = f"# Company Data: {company_id}\n\n"
-        all_chunks_count = 0
+        context, all_chunks_count, retrieval = await build_rag_context(company_id, top_k, request.query)
         
-        for section_name, query in sections:
-            chunks = await rag_search_company(
+        # Same context + prompt -> reuse the earlier completion
+        cache = get_cache("mcp_rag")
+        cache_key = rag_cache_key(company_id, context)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return ToolResponse(
+                success=True,
                 company_id=company_id,
-                query=request.query or query,
-                top_k=top_k
+                result=cached['result'],
+                metadata=dict(cached['metadata'], cache="hit", tokens_used=0, retrieval=retrieval)
             )
-            
-            if chunks:
-                context += f"## {section_name}\n"
-                for i, chunk in enumerate(chunks[:3], 1):
-                    text = chunk.get('text', '')
-                    if text and len(text) > 30:
-                        context += f"**Source {i}:** {text[:500]}...\n\n"
-                all_chunks_count += len(chunks)
         
         # Generate with GPT
-        system_prompt = """You are a PE analyst generating investor dashboards.
-
-Create a professional, well-structured 8-section dashboard.
-
-Rules:
-- Use ONLY information from the provided context
-- If information is missing, write "Not disclosed"
-- Be concise and factual
-- Format numbers properly (e.g., $100M, 500 employees)
-- Use bullet points for lists
-- Synthesize information coherently
-
-Generate exactly these 8 sections:
-1. Company Overview
-2. Business Model and GTM
-3. Funding & Investor Profile
-4. Growth Momentum
-5. Visibility & Market Sentiment
-6. Risks and Challenges
-7. Outlook
-8. Disclosure Gaps"""
-
-        user_prompt = f"""Generate a PE dashboard for {company_id}.
-
-{context}
-
-Create a professional markdown dashboard with all 8 sections."""
-
-        client = OpenAI(api_key=os.getenv('OPENAI_KEY'))
-        response = client.chat.completions.create(
+        response = await chat_completion(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=rag_dashboard_messages(company_id, context),
             temperature=0.3,
             max_tokens=4000
         )
         
         dashboard_markdown = response.choices[0].message.content
+        metadata = {
+            "source": "rag_pipeline",
+            "tool": "rag_tool",
+            "model": "gpt-4o",
+            "top_k": top_k,
+            "sections": 8,
+            "total_chunks_retrieved": all_chunks_count,
+            "tokens_used": response.usage.total_tokens,
+            "cache": "miss"
+        }
+        cache.set(cache_key, {"result": dashboard_markdown, "metadata": metadata}, company_id=company_id)
+        metadata = dict(metadata, retrieval=retrieval)
         
         return ToolResponse(
             success=True,
             company_id=company_id,
             result=dashboard_markdown,
-            metadata={
-                "source": "rag_pipeline",
-                "tool": "rag_tool",
-                "model": "gpt-4o",
-                "top_k": top_k,
-                "sections": 8,
-                "total_chunks_retrieved": all_chunks_count,
-                "tokens_used": response.usage.total_tokens
-            }
+            metadata=metadata
         )
     
     except Exception as e:
@@ -1860,9 +1897,207 @@ Create a professional markdown dashboard with all 8 sections."""
             metadata={"error_type": type(e).__name__}
         )
 
+@app.post("/tool/generate_rag_dashboard/stream")
+async def tool_generate_rag_dashboard_stream(request: RAGDashboardRequest):
+    """
+    Streaming variant of generate_rag_dashboard (Server-Sent Events).
+    
+    Events: start -> retrieval -> delta* -> done (or error). See streaming.py.
+    """
+    async def events():
+        started = time.monotonic()
+        yield sse_event("start", {"company_id": request.company_id})
+        try:
+            context, all_chunks_count, retrieval = await build_rag_context(request.company_id, request.top_k, request.query)
+            yield sse_event("retrieval", {
+                "chunks_retrieved": all_chunks_count,
+                "elapsed_s": round(time.monotonic() - started, 3),
+                "sections": retrieval["sections"]
+            })
+            
+            cache = get_cache("mcp_rag")
+            cache_key = rag_cache_key(request.company_id, context)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                yield sse_event("delta", {"text": cached['result']})
+                yield sse_event("done", {"metadata": dict(cached['metadata'], cache="hit", tokens_used=0)})
+                return
+            
+            def store(text: str, metadata: Dict):
+                cache.set(cache_key, {"result": text, "metadata": metadata}, company_id=request.company_id)
+            
+            async for event in _stream_completion(
+                rag_dashboard_messages(request.company_id, context),
+                temperature=0.3,
+                started=started,
+                metadata={
+                    "source": "rag_pipeline",
+                    "tool": "rag_tool",
+                    "model": "gpt-4o",
+                    "top_k": request.top_k,
+                    "sections": 8,
+                    "total_chunks_retrieved": all_chunks_count,
+                    "cache": "miss"
+                },
+                on_complete=store
+            ):
+                yield event
+        except Exception as e:
+            yield sse_event("error", {"error": str(e), "error_type": type(e).__name__})
+    
+    return StreamingResponse(
+        _timed_stream("generate_rag_dashboard_stream", events()),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS
+    )
+
+@app.post("/tool/generate_unified_dashboard/stream")
+async def tool_generate_unified_dashboard_stream(request: UnifiedDashboardRequest):
+    """
+    Streaming variant of generate_unified_dashboard (Server-Sent Events).
+    
+    'retrieval' carries the data sources parsed from the GCS dashboard; the
+    GPT restructure is streamed as 'delta' events (or the stored dashboard is
+    sent as a single delta when restructure_with_gpt is false).
+    """
+    async def events():
+        started = time.monotonic()
+        company_id = request.company_id
+        yield sse_event("start", {"company_id": company_id})
+        try:
+            if not gcs_storage:
+                yield sse_event("error", {
+                    "error": "GCS storage not configured. Check GCS_BUCKET_NAME in .env",
+                    "error_type": "GCSUnavailable"
+                })
+                return
+            
+            with timed("gcs_fetch"):
+                latest = await run_in_thread(
+                    'gcs',
+                    gcs_storage.get_latest_dashboard_ref,
+                    company_id=company_id,
+                    dashboard_type="unified",
+                    max_age_seconds=0 if request.refresh_latest else None
+                )
+            if not latest:
+                yield sse_event("error", {
+                    "error": f"No unified dashboard found in GCS for '{company_id}'",
+                    "error_type": "DashboardNotFound",
+                    "command": f"python src/agents/supervisor_mcp.py {company_id}"
+                })
+                return
+            
+            dashboard_content = latest["content"]
+            data_sources = parse_data_sources(dashboard_content)
+            yield sse_event("retrieval", {
+                "data_sources": data_sources,
+                "chars": len(dashboard_content),
+                "elapsed_s": round(time.monotonic() - started, 3)
+            })
+            
+            metadata = {
+                "source": "gcs_bucket",
+                "tool": "unified_dashboard",
+                "dashboard_type": "unified",
+                "data_sources": data_sources,
+                "restructured_with_gpt": request.restructure_with_gpt,
+                "source_generation": latest["generation"],
+                "gcs_uri": f"gs://{gcs_storage.bucket_name}/{latest['blob']}"
+            }
+            
+            restructured = None
+            if request.restructure_with_gpt:
+                with timed("restructure_lookup"):
+                    restructured = await run_in_thread(
+                        'gcs',
+                        gcs_storage.get_derived_dashboard,
+                        latest["blob"],
+                        latest["generation"],
+                        restructure_variant()
+                    )
+            
+            if not request.restructure_with_gpt or restructured is not None:
+                yield sse_event("delta", {"text": restructured if restructured is not None else dashboard_content})
+                metadata.update({
+                    "restructure_cache": "hit" if restructured is not None else None,
+                    "tokens_used": 0,
+                    "total_s": round(time.monotonic() - started, 3)
+                })
+                yield sse_event("done", {"metadata": metadata})
+                return
+            
+            async def store(text: str, _metadata: Dict):
+                await store_restructured(latest, text)
+            
+            async for event in _stream_completion(
+                restructure_messages(dashboard_content),
+                temperature=RESTRUCTURE_TEMPERATURE,
+                started=started,
+                metadata=dict(metadata, restructure_cache="miss"),
+                on_complete=store
+            ):
+                yield event
+        except Exception as e:
+            yield sse_event("error", {"error": str(e), "error_type": type(e).__name__})
+    
+    return StreamingResponse(
+        _timed_stream("generate_unified_dashboard_stream", events()),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS
+    )
+
+async def _timed_stream(tool: str, events):
+    """Re-yield an SSE generator, timing it as the tool's 'total' stage (until the last event is sent)."""
+    with timed("total", tool=tool):
+        async for event in events:
+            yield event
+
+async def _stream_completion(
+    messages: List[Dict],
+    temperature: float,
+    started: float,
+    metadata: Dict,
+    on_complete=None
+):
+    """
+    Stream a GPT-4o completion as 'delta' events followed by a 'done' event.
+    
+    on_complete(text, metadata) is called with the full text before 'done' is sent
+    (and awaited if it is a coroutine function).
+    """
+    first_token_s = None
+    usage = None
+    parts = []
+    async for delta, final_usage in stream_chat_completion(
+        model="gpt-4o",
+        messages=messages,
+        temperature=temperature,
+        max_tokens=4000
+    ):
+        if final_usage is not None:
+            usage = final_usage
+            continue
+        if first_token_s is None:
+            first_token_s = round(time.monotonic() - started, 3)
+        parts.append(delta)
+        yield sse_event("delta", {"text": delta})
+    
+    metadata = dict(metadata)
+    metadata["tokens_used"] = usage.total_tokens if usage else None
+    if on_complete is not None:
+        completed = on_complete("".join(parts), dict(metadata))
+        if asyncio.iscoroutine(completed):
+            await completed
+    metadata.update({
+        "first_token_s": first_token_s,
+        "total_s": round(time.monotonic() - started, 3)
+    })
+    yield sse_event("done", {"metadata": metadata})
+
 @app.post("/tool/report_risk", response_model=ToolResponse)
 async def tool_report_risk(request: RiskReportRequest):
-    """Report risk signal and save to GCS"""
+    """Report risk signal (idempotent per fingerprint; exported to GCS in batches by export_risk_batches)"""
     try:
         risk_signal = RiskSignal(
             company_id=request.company_id,
@@ -1873,46 +2108,33 @@ async def tool_report_risk(request: RiskReportRequest):
             severity=request.severity
         )
         
-        success = await report_risk_signal(risk_signal)
+        recorded = await record_risk_signal(risk_signal)
         
-        if not success:
+        if recorded is None:
             return ToolResponse(
                 success=False,
                 company_id=request.company_id,
                 error="Failed to log risk signal"
             )
         
-        hitl_required = request.severity in ["high", "critical"]
-        
-        # Save to GCS if available
-        gcs_uri = None
-        if gcs_storage:
-            try:
-                risk_data = [{
-                    "company_id": request.company_id,
-                    "occurred_on": request.occurred_on.isoformat(),
-                    "description": request.description,
-                    "source_url": str(request.source_url),
-                    "risk_type": request.risk_type,
-                    "severity": request.severity,
-                    "hitl_required": hitl_required
-                }]
-                
-                gcs_uri = gcs_storage.save_risk_log(request.company_id, risk_data)
-            except Exception as e:
-                print(f"⚠️ Failed to save risk to GCS: {e}")
+        duplicate = recorded["duplicate"]
+        # A repeat of a logged event is already in the HITL queue
+        hitl_required = request.severity in ["high", "critical"] and not duplicate
         
         return ToolResponse(
             success=True,
             company_id=request.company_id,
-            result=f"Risk logged: {request.risk_type} - {request.description}",
+            result=f"Risk {'already logged' if duplicate else 'logged'}: {request.risk_type} - {request.description}",
             metadata={
                 "tool": "risk_logger",
+                "fingerprint": recorded["fingerprint"],
+                "duplicate": duplicate,
                 "hitl_required": hitl_required,
                 "severity": request.severity,
                 "risk_type": request.risk_type,
                 "occurred_on": request.occurred_on.isoformat(),
-                "gcs_uri": gcs_uri
+                # Uploaded with the next batch under data/risks/batches/ (no per-signal object)
+                "gcs_export": "batched" if gcs_storage and not duplicate else None
             }
         )
     
@@ -1929,53 +2151,116 @@ async def tool_report_risk(request: RiskReportRequest):
 # ============================================================================
 
 @app.get("/resource/ai50/companies", response_model=CompanyListResponse)
-async def resource_list_companies():
-    """List all AI50 companies from forbes_ai50_seed.json"""
-    
-    companies = []
-    
-    # Method 1: Read from forbes_ai50_seed.json
-    try:
-        seed_file = Path(__file__).resolve().parents[2] / "data" / "forbes_ai50_seed.json"
-        
-        if seed_file.exists():
-            with open(seed_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if isinstance(data, list):
-                for item in data:
-                    if 'company_name' in item:
-                        # Normalize: lowercase, replace spaces with hyphens
-                        company_name = item['company_name'].lower().replace(' ', '-')
-                        companies.append(company_name)
-            
-            print(f"✓ Loaded {len(companies)} companies from forbes_ai50_seed.json")
-        else:
-            print(f"❌ forbes_ai50_seed.json not found at: {seed_file}")
-    except Exception as e:
-        print(f"Error reading forbes_ai50_seed.json: {e}")
+def resource_list_companies(
+    request: Request,
+    response: Response,
+    details: bool = Query(False, description="Include per-company status (payload, data freshness, last dashboard)")
+):
+    """
+    List all AI50 companies from forbes_ai50_seed.json
     
-    # Method 2: Fallback to payloads directory
-    if not companies:
-        try:
-            data_dir = Path(__file__).resolve().parents[1] / "data" / "payloads"
-            if data_dir.exists():
-                companies = [f.stem for f in data_dir.glob("*.json")]
-                print(f"✓ Found {len(companies)} companies from payloads")
-        except Exception as e:
-            print(f"Could not scan payloads: {e}")
+    Served from the in-memory company catalog. Responses carry an ETag;
+    send it back as If-None-Match to get 304 Not Modified while the
+    catalog is unchanged.
+    """
+    snapshot = company_catalog().snapshot()
+    etag = f'"{snapshot["etag"]}{"-d" if details else ""}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
     
-    companies = sorted(list(set(companies)))
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
     
+    response.headers.update(headers)
     return CompanyListResponse(
-        companies=companies,
-        count=len(companies)
+        companies=snapshot["companies"],
+        count=len(snapshot["companies"]),
+        details=snapshot["details"] if details else None,
+        built_at=snapshot["built_at"]
     )
 
+def company_catalog():
+    """Process-wide catalog; last-dashboard info comes from the approvals index."""
+    return get_company_catalog(dashboard_lookup=lambda: get_approvals_index().latest_by_company())
+
+@app.on_event("startup")
+async def preload_company_catalog():
+    try:
+        # A few stats and one SQLite query; cheap enough to run inline once
+        company_catalog().snapshot()
+    except Exception as e:
+        logger.warning(f"⚠️ Company catalog preload failed: {e}")
+
 # ============================================================================
 # PROMPT ENDPOINTS
 # ============================================================================
 
+@app.get("/resource/risks")
+def resource_list_risks(
+    company: Optional[str] = None,
+    since: Optional[date] = Query(None, description="Events that occurred on or after this date"),
+    risk_type: Optional[str] = None,
+    severity: Optional[Literal["low", "medium", "high", "critical"]] = None,
+    min_severity: Optional[Literal["low", "medium", "high", "critical"]] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """
+    Reported risk signals from the risk index, most recently recorded first
+    
+    Pass the returned next_cursor as `cursor` for the next page; use
+    min_severity=high for the signals that need HITL review.
+    """
+    filters = {
+        "company_id": company,
+        "since": since.isoformat() if since else None,
+        "risk_type": risk_type,
+        "severity": severity,
+        "min_severity": min_severity
+    }
+    store = get_risk_store()
+    page = store.query(limit=limit, cursor=cursor, **filters)
+    return {
+        "risks": select_fields(page["items"], fields),
+        "next_cursor": page["next_cursor"],
+        "total": store.count(**filters)
+    }
+
+RISK_EXPORT_INTERVAL_SECONDS = float(os.getenv("RISK_EXPORT_INTERVAL_SECONDS", 60))
+risk_export_task: Optional[asyncio.Task] = None
+
+async def export_risk_batches():
+    """Upload risk signals indexed since the last export as one GCS object per batch."""
+    store = get_risk_store()
+    while True:
+        batch = await run_in_thread('gcs', store.export_batch, gcs_storage.save_risk_batch)
+        if batch is None:
+            return
+        logger.info(f"✅ Exported {batch['rows']} risk signals to {batch['location']}")
+
+async def _risk_export_loop():
+    while True:
+        await asyncio.sleep(RISK_EXPORT_INTERVAL_SECONDS)
+        try:
+            await export_risk_batches()
+        except Exception as e:
+            logger.warning(f"⚠️ Risk export failed (retrying next interval): {e}")
+
+@app.on_event("startup")
+async def start_risk_export():
+    global risk_export_task
+    if gcs_storage:
+        risk_export_task = asyncio.create_task(_risk_export_loop())
+
+@app.on_event("shutdown")
+async def stop_risk_export():
+    if risk_export_task:
+        risk_export_task.cancel()
+        try:
+            await export_risk_batches()
+        except Exception as e:
+            logger.warning(f"⚠️ Final risk export failed: {e}")
+
 @app.get("/prompt/pe-dashboard", response_model=PromptResponse)
 async def prompt_pe_dashboard():
     """PE Dashboard Template"""
@@ -2017,125 +2302,182 @@ Use "Not disclosed" for missing information. Never hallucinate."""
 # HELPER FUNCTIONS
 # ============================================================================
 
-def generate_dashboard_from_payload(payload, company_id: str) -> str:
-    """Generate markdown dashboard from structured payload"""
-    
-    company_record = payload.company_record
-    
-    def safe_get(obj, attr, default="Not disclosed"):
-        if obj is None:
-            return default
-        value = getattr(obj, attr, None)
-        return value if value is not None else default
-    
-    company_name = safe_get(company_record, 'brand_name') or \
-                  safe_get(company_record, 'legal_name', company_id.title())
-    
-    markdown = f"""# PE Dashboard for {company_name}
+RESTRUCTURE_SYSTEM_PROMPT = """You are a PE analyst improving dashboard formatting.
 
-## 1. Company Overview
-**Legal Name:** {safe_get(company_record, 'legal_name')}
-**Website:** {safe_get(company_record, 'website')}
-**Industry:** {', '.join(company_record.categories) if company_record.categories else 'Not disclosed'}
-**Founded:** {safe_get(company_record, 'founded_year')}
-**Headquarters:** {safe_get(company_record, 'hq_city')}, {safe_get(company_record, 'hq_country')}
+Take the existing dashboard and:
+- Clean up any formatting issues
+- Ensure all 8 sections are properly formatted
+- Remove duplicate information
+- Format numbers consistently ($100M, 1,500 employees)
+- Improve bullet point structure
+- Keep "Not disclosed" for missing data
+- Make it more readable and professional
 
-## 2. Business Model and GTM
-"""
+Maintain all factual information - only improve structure and formatting."""
+
+RESTRUCTURE_TEMPERATURE = 0.2  # Lower temperature for consistency
+
+def restructure_variant() -> str:
+    """Name of the stored GPT restructure; changes whenever the prompt or model settings do."""
+    digest = fingerprint(
+        prompt=text_digest(RESTRUCTURE_SYSTEM_PROMPT + restructure_messages("")[1]["content"]),
+        model="gpt-4o",
+        temperature=RESTRUCTURE_TEMPERATURE,
+        max_tokens=4000
+    )
+    return f"restructured-{digest[:12]}"
+
+async def store_restructured(latest: Dict, restructured: str):
+    """Persist a GPT restructure next to its source dashboard (failures only cost a future GPT call)."""
+    try:
+        await run_in_thread(
+            'gcs',
+            gcs_storage.save_derived_dashboard,
+            latest["blob"],
+            latest["generation"],
+            restructure_variant(),
+            restructured
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Could not store restructured dashboard for {latest['blob']}: {e}")
+
+RAG_DASHBOARD_SYSTEM_PROMPT = """You are a PE analyst generating investor dashboards.
+
+Create a professional, well-structured 8-section dashboard.
+
+Rules:
+- Use ONLY information from the provided context
+- If information is missing, write "Not disclosed"
+- Be concise and factual
+- Format numbers properly (e.g., $100M, 500 employees)
+- Use bullet points for lists
+- Synthesize information coherently
+
+Generate exactly these 8 sections:
+1. Company Overview
+2. Business Model and GTM
+3. Funding & Investor Profile
+4. Growth Momentum
+5. Visibility & Market Sentiment
+6. Risks and Challenges
+7. Outlook
+8. Disclosure Gaps"""
+
+RAG_SECTIONS = [
+    ("Company Overview", "company overview business model mission"),
+    ("Funding History", "funding history investors series round valuation"),
+    ("Leadership", "leadership team executives CEO founder management"),
+    ("Product/Technology", "product technology platform features innovation"),
+    ("Market Position", "market position competitors industry landscape"),
+    ("Recent Developments", "recent news developments announcements updates"),
+    ("Key Metrics", "metrics revenue growth employees customers headcount"),
+    ("Risk Factors", "risks challenges problems issues concerns")
+]
+
+# Bump when generate_dashboard_from_payload's output format changes (part of the cache key)
+STRUCTURED_TEMPLATE_VERSION = 1
+
+def rag_cache_key(company_id: str, context: str) -> str:
+    """Fingerprint of everything that shapes a RAG dashboard completion."""
+    return fingerprint(
+        tool="generate_rag_dashboard",
+        prompt=text_digest(RAG_DASHBOARD_SYSTEM_PROMPT + rag_dashboard_messages("", "")[1]["content"]),
+        model="gpt-4o",
+        temperature=0.3,
+        max_tokens=4000,
+        company=company_id,
+        context=text_digest(context)
+    )
+
+def parse_data_sources(dashboard_content: str) -> Dict[str, str]:
+    """Parse the '**Data Sources Used:**' block of a unified dashboard into {section: source}."""
+    data_sources = {}
+    if "**Data Sources Used:**" in dashboard_content:
+        lines = dashboard_content.split("**Data Sources Used:**")[1].split("\n")
+        for line in lines:
+            if ":" in line and any(emoji in line for emoji in ["📊", "🔍", "❌", "🔄"]):
+                parts = line.split(":")
+                if len(parts) >= 2:
+                    section = parts[0].strip("- 📊🔍❌🔄 ")
+                    source = parts[1].strip()
+                    data_sources[section] = source
+    return data_sources
+
+def restructure_messages(dashboard_content: str) -> List[Dict]:
+    """Chat messages asking GPT to reformat a stored dashboard."""
+    user_prompt = f"""Improve the formatting and structure of this dashboard:
+
+{dashboard_content}
+
+Return a clean, well-formatted version with all 8 sections properly structured."""
+    return [
+        {"role": "system", "content": RESTRUCTURE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def rag_dashboard_messages(company_id: str, context: str) -> List[Dict]:
+    """Chat messages asking GPT to write a dashboard from RAG context."""
+    user_prompt = f"""Generate a PE dashboard for {company_id}.
+
+{context}
+
+Create a professional markdown dashboard with all 8 sections."""
+    return [
+        {"role": "system", "content": RAG_DASHBOARD_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+async def build_rag_context(company_id: str, top_k: int, query: Optional[str] = None):
+    """
+    Run the per-section RAG searches and format them as prompt context.
     
-    if payload.products:
-        markdown += "**Products/Services:**\n"
-        for product in payload.products:
-            markdown += f"- **{product.name}**: {product.description or 'No description'}\n"
-            if product.pricing_model:
-                markdown += f"  - Pricing: {product.pricing_model}\n"
-    else:
-        markdown += "Not disclosed\n"
-    
-    markdown += "\n## 3. Funding & Investor Profile\n"
-    
-    total_raised = safe_get(company_record, 'total_raised_usd')
-    if total_raised != "Not disclosed":
-        markdown += f"**Total Raised:** ${float(total_raised):,.0f} USD\n"
-    
-    funding_events = [e for e in payload.events if e.event_type == "funding"]
-    if funding_events:
-        markdown += "\n**Funding History:**\n"
-        for event in sorted(funding_events, key=lambda e: e.occurred_on, reverse=True)[:5]:
-            markdown += f"- **{event.title}** ({event.occurred_on.isoformat()})"
-            if event.amount_usd:
-                markdown += f" - ${event.amount_usd:,.0f}"
-            if event.investors:
-                markdown += f" - {', '.join(event.investors[:3])}"
-            markdown += "\n"
-    
-    markdown += "\n## 4. Growth Momentum\n"
-    
-    if payload.snapshots:
-        latest = max(payload.snapshots, key=lambda s: s.as_of)
-        if latest.headcount_total:
-            markdown += f"**Employee Count:** {latest.headcount_total:,}\n"
-        if latest.headcount_growth_pct:
-            markdown += f"**Growth Rate:** {latest.headcount_growth_pct:.1f}%\n"
-    else:
-        markdown += "Not disclosed\n"
-    
-    markdown += "\n## 5. Visibility & Market Sentiment\n"
-    
-    if payload.visibility:
-        latest_vis = max(payload.visibility, key=lambda v: v.as_of)
-        if latest_vis.news_mentions_30d:
-            markdown += f"**News Mentions (30d):** {latest_vis.news_mentions_30d}\n"
-        if latest_vis.github_stars:
-            markdown += f"**GitHub Stars:** {latest_vis.github_stars:,}\n"
-    else:
-        markdown += "Not disclosed\n"
-    
-    markdown += "\n## 6. Risks and Challenges\n"
-    
-    risk_events = [e for e in payload.events if e.event_type in [
-        "layoff", "security_incident", "regulatory", "legal_action"
-    ]]
-    
-    if risk_events:
-        for event in sorted(risk_events, key=lambda e: e.occurred_on, reverse=True):
-            markdown += f"- **{event.event_type.title()}** ({event.occurred_on.isoformat()}): {event.title}\n"
-    else:
-        markdown += "No significant risks identified\n"
-    
-    markdown += "\n## 7. Outlook\n"
-    
-    strategic_events = [e for e in payload.events if e.event_type in [
-        "product_release", "partnership", "mna"
-    ]]
-    
-    if strategic_events:
-        markdown += "**Recent Strategic Initiatives:**\n"
-        for event in sorted(strategic_events, key=lambda e: e.occurred_on, reverse=True)[:5]:
-            markdown += f"- {event.title} ({event.occurred_on.isoformat()})\n"
-    else:
-        markdown += "Not disclosed\n"
-    
-    markdown += "\n## 8. Disclosure Gaps\n"
-    
-    gaps = []
-    if not company_record.website or company_record.website == "Not disclosed":
-        gaps.append("Company website")
-    if not payload.leadership:
-        gaps.append("Leadership team details")
-    if not payload.products:
-        gaps.append("Product information")
-    
-    if gaps:
-        markdown += "**Missing Information:**\n"
-        for gap in gaps:
-            markdown += f"- {gap}\n"
-    else:
-        markdown += "All key information available\n"
-    
-    markdown += f"\n---\n*Generated from structured payload*\n"
-    
-    return markdown
+    The searches run concurrently (bounded by the 'chroma' upstream limiter
+    inside rag_search_company); sections sharing a query share one search.
+    
+    Returns:
+        (context markdown, total chunks retrieved, retrieval timings)
+    """
+    started = time.monotonic()
+    section_queries = [(section_name, query or section_query) for section_name, section_query in RAG_SECTIONS]
+    unique_queries = list(dict.fromkeys(q for _, q in section_queries))
+    
+    async def timed_search(search_query: str):
+        with timed("rag_search") as search:
+            chunks = await rag_search_company(company_id=company_id, query=search_query, top_k=top_k)
+        return chunks, round(search.elapsed, 3)
+    
+    with timed("retrieval"):
+        searches = dict(zip(unique_queries, await asyncio.gather(*[timed_search(q) for q in unique_queries])))
+    
+    context = f"# Company Data: {company_id}\n\n"
+    all_chunks_count = 0
+    section_timings = {}
+    
+    for section_name, section_query in section_queries:
+        chunks, elapsed_s = searches[section_query]
+        section_timings[section_name] = {"elapsed_s": elapsed_s, "chunks": len(chunks)}
+        
+        if chunks:
+            context += f"## {section_name}\n"
+            for i, chunk in enumerate(chunks[:3], 1):
+                text = chunk.get('text', '')
+                if text and len(text) > 30:
+                    context += f"**Source {i}:** {text[:500]}...\n\n"
+            all_chunks_count += len(chunks)
+    
+    retrieval = {
+        "mode": "concurrent",
+        "searches": len(unique_queries),
+        "elapsed_s": round(time.monotonic() - started, 3),
+        # What the same searches would have cost one after another
+        "sequential_s": round(sum(elapsed for _, elapsed in searches.values()), 3),
+        "sections": section_timings
+    }
+    return context, all_chunks_count, retrieval
+
+def generate_dashboard_from_payload(payload, company_id: str) -> str:
+    """Generate markdown dashboard from structured payload (see payload_dashboard.py)"""
+    return render_dashboard(payload, company_id)
 
 # ============================================================================
 # MCP DISCOVERY
@@ -2157,6 +2499,7 @@ async def mcp_discover():
                     "name": "generate_unified_dashboard",
                     "description": "Generate unified dashboard (structured + RAG) with GPT synthesis",
                     "endpoint": "/tool/generate_unified_dashboard",
+                    "stream_endpoint": "/tool/generate_unified_dashboard/stream",
                     "method": "POST",
                     "features": ["gcs_storage", "gpt_synthesis", "dual_source"]
                 },
@@ -2170,25 +2513,248 @@ async def mcp_discover():
                     "name": "generate_rag_dashboard",
                     "description": "Generate dashboard using RAG with GPT",
                     "endpoint": "/tool/generate_rag_dashboard",
+                    "stream_endpoint": "/tool/generate_rag_dashboard/stream",
                     "method": "POST"
                 },
                 {
                     "name": "report_risk",
-                    "description": "Log risk signals to GCS",
+                    "description": "Log risk signals (repeats of a logged event are ignored)",
                     "endpoint": "/tool/report_risk",
                     "method": "POST"
                 }
             ],
+            "batch": {
+                "description": "Run many tool calls concurrently; results stream back as they complete",
+                "endpoint": "/tool/batch",
+                "method": "POST",
+                "tools": list(BATCH_TOOLS),
+                "max_calls": MAX_BATCH_CALLS
+            },
+            "jobs": [
+                {
+                    "name": "dashboard",
+                    "description": "Queue dashboard generation and poll (or receive a webhook) for the result",
+                    "submit_endpoint": "/jobs/dashboard",
+                    "status_endpoint": "/jobs/{job_id}",
+                    "dashboard_types": list(DASHBOARD_JOB_TOOLS)
+                }
+            ],
             "resources": [
                 {
                     "name": "ai50/companies",
                     "description": "List of AI50 companies from forbes_ai50_seed.json",
                     "endpoint": "/resource/ai50/companies"
+                },
+                {
+                    "name": "risks",
+                    "description": "Reported risk signals, filterable by company, since, risk_type and severity",
+                    "endpoint": "/resource/risks"
                 }
             ]
         }
     }
 
+# ============================================================================
+# JOB ENDPOINTS (async dashboard generation)
+# ============================================================================
+
+# dashboard_type -> (request model, tool endpoint); tools coalesce identical work
+DASHBOARD_JOB_TOOLS = {
+    "unified": (UnifiedDashboardRequest, tool_generate_unified_dashboard),
+    "rag": (RAGDashboardRequest, tool_generate_rag_dashboard),
+    "structured": (StructuredDashboardRequest, tool_generate_structured_dashboard),
+}
+
+job_queue: Optional[JobQueue] = None
+job_workers: Optional[JobWorkerPool] = None
+
+async def run_dashboard_job(params: Dict) -> Dict:
+    """Job handler: run a dashboard tool and return its response as JSON."""
+    request_model, tool = DASHBOARD_JOB_TOOLS[params["dashboard_type"]]
+    request = request_model(company_id=params["company_id"], **params.get("params", {}))
+    try:
+        response = await tool(request)
+    except HTTPException as e:
+        raise RuntimeError(f"HTTP {e.status_code}: {e.detail}")
+    if not response.success:
+        raise RuntimeError(response.error or "Dashboard generation failed")
+    return response.model_dump()
+
+@app.on_event("startup")
+async def start_job_workers():
+    global job_queue, job_workers
+    try:
+        job_queue = JobQueue()
+        job_workers = JobWorkerPool(
+            job_queue,
+            handlers={"dashboard": run_dashboard_job},
+            workers=int(os.getenv("JOB_WORKERS", 4)),
+            job_timeout=float(os.getenv("JOB_TIMEOUT_SECONDS", 300))
+        )
+        job_workers.start()
+        logger.info(f"✅ Job workers started ({job_workers.workers}) using {job_queue.db_path}")
+    except Exception as e:
+        logger.warning(f"⚠️ Job queue unavailable: {e}")
+        job_queue = job_workers = None
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    if job_workers:
+        await job_workers.stop()
+
+def _collect_metrics():
+    """Payload cache, company catalog and job queue state for GET /metrics."""
+    families = stats_families("pe_payload_cache", "source", payload_cache_stats())
+    families += stats_families("pe_company_catalog", "catalog", {"ai50": company_catalog().stats()})
+    families += stats_families("pe_risk_store", "store", {"risk_signals": get_risk_store().stats()})
+    if job_workers:
+        stats = job_workers.stats()
+        families += stats_families("pe_job_workers", "pool", {"dashboard": stats})
+        families += stats_families("pe_jobs", "status", {
+            status: {"count": count} for status, count in stats["jobs"].items()
+        })
+    return families
+
+register_collector(_collect_metrics)
+
+@app.post("/jobs/dashboard", status_code=202)
+def submit_dashboard_job(request: DashboardJobRequest):
+    """
+    Queue a dashboard generation job and return its ID immediately.
+    
+    Re-submitting the same company/type/params while a job is queued or
+    running returns that job instead of starting another GPT run.
+    """
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    
+    params = {
+        "company_id": request.company_id,
+        "dashboard_type": request.dashboard_type,
+        "params": request.params
+    }
+    # Validate tool parameters now rather than failing inside the worker
+    request_model, _ = DASHBOARD_JOB_TOOLS[request.dashboard_type]
+    try:
+        request_model(company_id=request.company_id, **request.params)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid params: {e}")
+    
+    try:
+        job, deduplicated = job_queue.submit(
+            "dashboard",
+            params,
+            priority=request.priority,
+            dedupe_key=fingerprint(**params),
+            callback_url=str(request.callback_url) if request.callback_url else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid callback_url: {e}")
+    job_workers.notify()
+    
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "deduplicated": deduplicated,
+        "status_url": f"/jobs/{job['id']}"
+    }
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, fields: Optional[str] = None):
+    """
+    Job status; 'result' holds the tool response once status is 'succeeded'.
+    
+    Poll with e.g. fields=status,error and fetch result once it succeeded.
+    """
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return select_fields(job, fields)
+
+# ============================================================================
+# BATCH TOOL ENDPOINT
+# ============================================================================
+
+# tool name -> (request model, tool endpoint)
+BATCH_TOOLS = {
+    "generate_unified_dashboard": (UnifiedDashboardRequest, tool_generate_unified_dashboard),
+    "generate_structured_dashboard": (StructuredDashboardRequest, tool_generate_structured_dashboard),
+    "generate_rag_dashboard": (RAGDashboardRequest, tool_generate_rag_dashboard),
+    "report_risk": (RiskReportRequest, tool_report_risk),
+}
+
+async def _run_batch_call(index: int, call: BatchToolCall, semaphore: asyncio.Semaphore) -> Dict:
+    """Run one batch entry and describe the outcome the way /tool/<name> would have."""
+    request_model, tool = BATCH_TOOLS[call.tool]
+    result = {
+        "index": index,
+        "id": call.id,
+        "tool": call.tool,
+        "company_id": call.params.get("company_id"),
+        "success": False
+    }
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            response = await tool(request_model(**call.params))
+            result.update(
+                status_code=200,
+                success=response.success,
+                response=select_fields(response.model_dump(mode="json"), call.fields)
+            )
+        except ValidationError as e:
+            result.update(status_code=422, response={"success": False, "error": f"Invalid params: {e}"})
+        except HTTPException as e:
+            result.update(status_code=e.status_code, response={"success": False, "error": str(e.detail)})
+        except Exception as e:
+            result.update(status_code=500, response={
+                "success": False,
+                "error": str(e),
+                "metadata": {"error_type": type(e).__name__}
+            })
+        result["elapsed_s"] = round(time.monotonic() - started, 3)
+    return result
+
+@app.post("/tool/batch")
+async def tool_batch(request: BatchToolRequest):
+    """
+    Run many tool calls (e.g. one dashboard per company) in one request (Server-Sent Events).
+    
+    Calls run concurrently, at most max_concurrency at a time, and share the
+    server's upstream limiters and request coalescing with the single-call
+    endpoints. Events: start -> result* (in completion order, with the call's
+    index/id) -> done.
+    """
+    async def events():
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(request.max_concurrency)
+        tasks = [
+            asyncio.ensure_future(_run_batch_call(index, call, semaphore))
+            for index, call in enumerate(request.calls)
+        ]
+        yield sse_event("start", {"calls": len(tasks), "max_concurrency": request.max_concurrency})
+        succeeded = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                if result.get("success"):
+                    succeeded += 1
+                yield sse_event("result", result)
+            yield sse_event("done", {
+                "calls": len(tasks),
+                "succeeded": succeeded,
+                "failed": len(tasks) - succeeded,
+                "elapsed_s": round(time.monotonic() - started, 3)
+            })
+        finally:
+            # Client went away: don't keep generating dashboards nobody will read
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
 # ============================================================================
 # APPROVAL ENDPOINTS (Option 1: External HITL)
 # ============================================================================
@@ -2202,69 +2768,73 @@ class ApprovalRequest(BaseModel):
     notes: Optional[str] = None
 
 @app.get("/api/pending-approvals")
-async def list_pending_approvals():
-    """List all dashboards pending approval"""
+def list_pending_approvals(
+    status: Optional[Literal["pending", "approved", "rejected"]] = "pending",
+    company_id: Optional[str] = None,
+    min_score: Optional[float] = None,
+    risk_detected: Optional[bool] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """
+    List dashboards pending approval from the approvals index (sync: FastAPI runs it in the threadpool)
+    
+    Pass the returned next_cursor as `cursor` to fetch the next page. `fields`
+    trims each entry, e.g. fields=company_id,run_id,evaluation_score,metadata.status
+    leaves out the preview and the full metadata (risk_details, ...).
+    """
     try:
-        data_dir = Path(__file__).parent.parent.parent / "data" / "dashboards"
-        pending_dashboards = []
-        
-        if not data_dir.exists():
-            return {"pending": []}
+        index = get_approvals_index()
+        page = index.list(
+            status=status,
+            company_id=company_id,
+            min_score=min_score,
+            risk_detected=risk_detected,
+            limit=limit,
+            cursor=cursor
+        )
         
-        # Scan for pending_approval folders
-        seen_runs = set()  # Track seen company_id + run_id combinations to avoid duplicates
+        pending_dashboards = [
+            {
+                "company_id": entry["company_id"],
+                "run_id": entry["run_id"],
+                "status": entry["status"],
+                "evaluation_score": entry["evaluation_score"] or 0.0,
+                "risk_detected": entry["risk_detected"],
+                "generated_at": entry["generated_at"],
+                "file_path": entry["local_path"],
+                "gcs_blob": entry["gcs_blob"],
+                "preview": entry["preview"],
+                "metadata": entry["metadata"]
+            }
+            for entry in page["items"]
+        ]
         
-        for company_dir in data_dir.iterdir():
-            if not company_dir.is_dir():
-                continue
-            
-            pending_dir = company_dir / "pending_approval"
-            if not pending_dir.exists():
-                continue
-            
-            # Find all .md files with corresponding .json metadata
-            for md_file in pending_dir.glob("*.md"):
-                json_file = md_file.with_suffix('.json')
-                if json_file.exists():
-                    try:
-                        with open(json_file, 'r') as f:
-                            metadata = json.load(f)
-                        
-                        # Create unique key to avoid duplicates
-                        company_id = metadata.get("company_id")
-                        run_id = metadata.get("run_id")
-                        unique_key = f"{company_id}_{run_id}"
-                        
-                        if unique_key in seen_runs:
-                            continue  # Skip duplicate
-                        seen_runs.add(unique_key)
-                        
-                        # Read dashboard content preview
-                        with open(md_file, 'r') as f:
-                            content = f.read()
-                            preview = content[:500] + "..." if len(content) > 500 else content
-                        
-                        pending_dashboards.append({
-                            "company_id": company_id,
-                            "run_id": run_id,
-                            "evaluation_score": metadata.get("evaluation_score", 0.0),
-                            "risk_detected": metadata.get("risk_detected", False),
-                            "generated_at": metadata.get("generated_at"),
-                            "file_path": str(md_file),
-                            "preview": preview,
-                            "metadata": metadata
-                        })
-                    except Exception as e:
-                        logger.warning(f"Error reading {md_file}: {e}")
-                        continue
-        
-        return {"pending": pending_dashboards}
+        return {
+            "pending": select_fields(pending_dashboards, fields),
+            "next_cursor": page["next_cursor"],
+            "total": index.count(status=status, company_id=company_id, min_score=min_score, risk_detected=risk_detected)
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing pending approvals: {str(e)}")
 
+def _record_approval_decision(request: ApprovalRequest, status: str, metadata: Dict, new_blob_name: Optional[str]):
+    """Keep the approvals index in step with a decision (non-critical)."""
+    try:
+        get_approvals_index().set_status(
+            request.company_id,
+            request.run_id,
+            status,
+            metadata,
+            gcs_blob=new_blob_name
+        )
+    except Exception as e:
+        logger.warning(f"Approvals index update failed (non-critical): {e}")
+
 @app.post("/api/approve-dashboard")
-async def approve_dashboard(request: ApprovalRequest):
-    """Approve or reject a pending dashboard - GCS-based"""
+def approve_dashboard(request: ApprovalRequest):
+    """Approve or reject a pending dashboard - GCS-based (sync: blocking GCS calls run in the threadpool)"""
     try:
         # Use GCS as primary source, local filesystem as fallback
         bucket_name = os.getenv('GCS_BUCKET_NAME', 'ai-pe-dashboard')
@@ -2276,23 +2846,37 @@ async def approve_dashboard(request: ApprovalRequest):
         dashboard_content = None
         metadata = {}
         
+        # The approvals index knows the exact blob for this run (no listing or downloads)
+        try:
+            indexed = get_approvals_index().get(request.company_id, request.run_id)
+        except Exception as e:
+            logger.warning(f"Approvals index lookup failed: {e}")
+            indexed = None
+        
         if GCS_AVAILABLE and DashboardStorage is not None:
             try:
-                storage = DashboardStorage(bucket_name)
+                storage = get_storage(bucket_name)
                 
-                # Find the GCS blob in pending_approval folder by run_id
-                pending_prefix = f"data/dashboards/{request.company_id}/pending_approval/"
-                blobs = list(storage.bucket.list_blobs(prefix=pending_prefix))
+                if indexed and indexed.get("gcs_blob") and "/pending_approval/" in indexed["gcs_blob"]:
+                    source_blob = storage.bucket.get_blob(indexed["gcs_blob"])
+                    if indexed.get("gcs_metadata_blob"):
+                        source_metadata_blob = storage.bucket.get_blob(indexed["gcs_metadata_blob"])
+                    metadata = dict(indexed["metadata"])
                 
-                # Find matching blob by run_id (more flexible than exact filename)
-                for blob in blobs:
-                    if request.run_id in blob.name:
-                        if blob.name.endswith('.md'):
-                            source_blob = blob
-                            dashboard_content = blob.download_as_text()
-                        elif blob.name.endswith('.json'):
-                            source_metadata_blob = blob
-                            metadata = json.loads(blob.download_as_text())
+                if not source_blob:
+                    # Not indexed: find the GCS blob in pending_approval folder by run_id
+                    pending_prefix = f"data/dashboards/{request.company_id}/pending_approval/"
+                    blobs = list(storage.bucket.list_blobs(prefix=pending_prefix))
+                    
+                    # Find matching blob by run_id (more flexible than exact filename)
+                    for blob in blobs:
+                        if request.run_id in blob.name:
+                            if blob.name.endswith('.md'):
+                                source_blob = blob
+                                dashboard_content = blob.download_as_text()
+                            elif blob.name.endswith('.json'):
+                                source_metadata_blob = blob
+                                metadata = json.loads(blob.download_as_text())
                 
                 if not source_blob:
                     raise HTTPException(status_code=404, detail=f"Dashboard not found in GCS for run_id: {request.run_id}")
@@ -2367,7 +2951,7 @@ async def approve_dashboard(request: ApprovalRequest):
             new_gcs_path = None
             if GCS_AVAILABLE and DashboardStorage is not None and source_blob:
                 try:
-                    storage = DashboardStorage(bucket_name)
+                    storage = get_storage(bucket_name)
                     
                     # Extract filename from source blob
                     md_filename = source_blob.name.split('/')[-1]
@@ -2429,6 +3013,8 @@ async def approve_dashboard(request: ApprovalRequest):
             except Exception as e:
                 logger.warning(f"Local file move failed (non-critical): {e}")
             
+            _record_approval_decision(request, "approved", metadata, new_blob_name)
+            
             return {
                 "status": "approved",
                 "message": f"Dashboard for {request.company_id} approved",
@@ -2448,7 +3034,7 @@ async def approve_dashboard(request: ApprovalRequest):
             new_gcs_path = None
             if GCS_AVAILABLE and DashboardStorage is not None and source_blob:
                 try:
-                    storage = DashboardStorage(bucket_name)
+                    storage = get_storage(bucket_name)
                     
                     # Extract filename from source blob
                     md_filename = source_blob.name.split('/')[-1]
@@ -2510,6 +3096,8 @@ async def approve_dashboard(request: ApprovalRequest):
             except Exception as e:
                 logger.warning(f"Local file move failed (non-critical): {e}")
             
+            _record_approval_decision(request, "rejected", metadata, new_blob_name)
+            
             return {
                 "status": "rejected",
                 "message": f"Dashboard for {request.company_id} rejected",
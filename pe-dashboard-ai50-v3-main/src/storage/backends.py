@@ -0,0 +1,284 @@
+"""
+Offline storage backends with the GCS bucket/blob interface
+
+DashboardStorage, the MCP server and the due diligence workflow only use a
+small part of google.cloud.storage (bucket.blob/list_blobs/copy_blob and
+blob upload/download/metadata). These classes implement that subset so the
+same code paths run without credentials or network:
+
+- MemoryBucket: objects held in process memory (tests, benchmarks)
+- LocalBucket: objects stored as files under a directory (offline runs)
+
+Generations and If-Generation-(Not-)Match preconditions follow GCS semantics.
+Both count operations in `ops` so benchmarks can compare round trips.
+Custom blob metadata set with patch() is kept in memory only.
+"""
+
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+try:
+    from google.api_core.exceptions import NotFound, NotModified, PreconditionFailed
+except ImportError:  # google-cloud-storage not installed; keep the offline backends usable
+    class NotFound(Exception):
+        pass
+
+    class NotModified(Exception):
+        pass
+
+    class PreconditionFailed(Exception):
+        pass
+
+
+class OfflineBlob:
+    """Blob handle for MemoryBucket / LocalBucket."""
+
+    def __init__(self, bucket: "OfflineBucket", name: str, generation: Optional[int] = None):
+        self.bucket = bucket
+        self.name = name
+        self.metadata: Optional[Dict] = None
+        self.content_type: Optional[str] = None
+        self.generation = generation
+        self.size: Optional[int] = None
+        self.time_created: Optional[datetime] = None
+        self.updated: Optional[datetime] = None
+        self._load_properties()
+
+    def _load_properties(self):
+        info = self.bucket._stat(self.name)
+        if info is None:
+            return
+        if self.generation is None:
+            self.generation = info['generation']
+        self.size = info['size']
+        self.time_created = info['created']
+        self.updated = info['created']
+        self.content_type = info.get('content_type')
+        self.metadata = self.bucket._metadata.get(self.name)
+
+    @property
+    def public_url(self) -> str:
+        return f"{self.bucket.uri_scheme}://{self.bucket.name}/{self.name}"
+
+    def exists(self) -> bool:
+        return self.bucket._stat(self.name) is not None
+
+    def reload(self):
+        if not self.exists():
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self.generation = None
+        self._load_properties()
+
+    def upload_from_string(self, data, content_type: Optional[str] = None, if_generation_match: Optional[int] = None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.bucket.ops['upload'] += 1
+        info = self.bucket._write(self.name, data, content_type, if_generation_match)
+        self.generation = info['generation']
+        self.size = info['size']
+        self.time_created = self.updated = info['created']
+        self.content_type = content_type
+
+    def download_as_bytes(
+        self,
+        if_generation_match: Optional[int] = None,
+        if_generation_not_match: Optional[int] = None
+    ) -> bytes:
+        self.bucket.ops['download'] += 1
+        info = self.bucket._stat(self.name)
+        if info is None:
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        if if_generation_not_match is not None and info['generation'] == if_generation_not_match:
+            raise NotModified(f"{self.name} unchanged")
+        if if_generation_match is not None and info['generation'] != if_generation_match:
+            raise PreconditionFailed(f"{self.name} generation changed")
+        data = self.bucket._read(self.name)
+        self.generation = info['generation']
+        self.size = info['size']
+        return data
+
+    def download_as_text(self, encoding: str = "utf-8", **kwargs) -> str:
+        return self.download_as_bytes(**kwargs).decode(encoding)
+
+    def patch(self):
+        self.bucket.ops['patch'] += 1
+        if not self.exists():
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self.bucket._metadata[self.name] = dict(self.metadata or {})
+
+    def delete(self):
+        self.bucket.ops['delete'] += 1
+        if not self.bucket._delete(self.name):
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self.bucket._metadata.pop(self.name, None)
+
+
+class OfflineBucket:
+    """Shared bucket logic; subclasses provide object storage."""
+
+    uri_scheme = "offline"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ops: Counter = Counter()
+        self._metadata: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._next_generation = 0
+
+    def _new_generation(self) -> int:
+        self._next_generation += 1
+        return self._next_generation
+
+    def exists(self) -> bool:
+        return True
+
+    def blob(self, name: str, generation: Optional[int] = None) -> OfflineBlob:
+        return OfflineBlob(self, name, generation)
+
+    def get_blob(self, name: str) -> Optional[OfflineBlob]:
+        return self.blob(name) if self._stat(name) is not None else None
+
+    def list_blobs(self, prefix: str = "") -> Iterator[OfflineBlob]:
+        self.ops['list'] += 1
+        return iter([self.blob(name) for name in sorted(self._names()) if name.startswith(prefix)])
+
+    def copy_blob(self, blob: OfflineBlob, destination_bucket: "OfflineBucket", new_name: str) -> OfflineBlob:
+        self.ops['copy'] += 1
+        data = self._read(blob.name)
+        info = self._stat(blob.name)
+        destination_bucket._write(new_name, data, info.get('content_type'), None)
+        if blob.name in self._metadata:
+            destination_bucket._metadata[new_name] = dict(self._metadata[blob.name])
+        return destination_bucket.blob(new_name)
+
+    # Storage primitives
+    def _names(self):
+        raise NotImplementedError
+
+    def _stat(self, name: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def _read(self, name: str) -> bytes:
+        raise NotImplementedError
+
+    def _write(self, name: str, data: bytes, content_type: Optional[str], if_generation_match: Optional[int]) -> Dict:
+        raise NotImplementedError
+
+    def _delete(self, name: str) -> bool:
+        raise NotImplementedError
+
+
+class MemoryBucket(OfflineBucket):
+    """Bucket whose objects live in a dict (lost when the process exits)."""
+
+    uri_scheme = "mem"
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._objects: Dict[str, Dict] = {}
+
+    def _names(self):
+        with self._lock:
+            return list(self._objects)
+
+    def _stat(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            stored = self._objects.get(name)
+            return {key: value for key, value in stored.items() if key != 'data'} if stored else None
+
+    def _read(self, name: str) -> bytes:
+        with self._lock:
+            stored = self._objects.get(name)
+            if stored is None:
+                raise NotFound(f"No such object: {self.name}/{name}")
+            return stored['data']
+
+    def _write(self, name: str, data: bytes, content_type: Optional[str], if_generation_match: Optional[int]) -> Dict:
+        with self._lock:
+            current = self._objects.get(name)
+            if if_generation_match is not None and (current['generation'] if current else 0) != if_generation_match:
+                raise PreconditionFailed(f"{name} generation changed")
+            stored = {
+                'data': data,
+                'generation': self._new_generation(),
+                'size': len(data),
+                'created': datetime.now(timezone.utc),
+                'content_type': content_type
+            }
+            self._objects[name] = stored
+            return {key: value for key, value in stored.items() if key != 'data'}
+
+    def _delete(self, name: str) -> bool:
+        with self._lock:
+            return self._objects.pop(name, None) is not None
+
+
+class LocalBucket(OfflineBucket):
+    """Bucket stored as files under root/<bucket name>/ (generation = file mtime_ns)."""
+
+    uri_scheme = "file"
+
+    def __init__(self, name: str, root: Path):
+        super().__init__(name)
+        self.root = Path(root) / name
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, name: str) -> Path:
+        path = (self.root / name).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Blob name escapes bucket directory: {name}")
+        return path
+
+    def _names(self):
+        return [
+            path.relative_to(self.root).as_posix()
+            for path in self.root.rglob("*")
+            if path.is_file() and not path.name.startswith(".")
+        ]
+
+    def _stat(self, name: str) -> Optional[Dict]:
+        try:
+            stat = self._path(name).stat()
+        except FileNotFoundError:
+            return None
+        return {
+            'generation': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'created': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        }
+
+    def _read(self, name: str) -> bytes:
+        try:
+            return self._path(name).read_bytes()
+        except FileNotFoundError:
+            raise NotFound(f"No such object: {self.name}/{name}")
+
+    def _write(self, name: str, data: bytes, content_type: Optional[str], if_generation_match: Optional[int]) -> Dict:
+        path = self._path(name)
+        with self._lock:
+            if if_generation_match is not None:
+                current = self._stat(name)
+                if (current['generation'] if current else 0) != if_generation_match:
+                    raise PreconditionFailed(f"{name} generation changed")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+            # Guarantee a new generation even on filesystems with coarse mtimes
+            stat = path.stat()
+            if stat.st_mtime_ns <= self._next_generation:
+                os.utime(path, ns=(stat.st_atime_ns, self._next_generation + 1))
+            info = self._stat(name)
+            self._next_generation = info['generation']
+            return info
+
+    def _delete(self, name: str) -> bool:
+        try:
+            self._path(name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
@@ -1,63 +1,144 @@
 """
 Cloud Storage client for saving dashboards to GCS
 Fixed to use GOOGLE_APPLICATION_CREDENTIALS from .env
+
+Each company/type has a small pointer blob, latest_{type}.json, that
+save_dashboard() rewrites, so reading the latest dashboard is one small
+(conditional) pointer read instead of a list_blobs() over its history.
+
+Use get_storage() rather than constructing DashboardStorage per call: it
+returns one handle per (backend, bucket) per process, sharing a single
+storage.Client (and its connection pool). The bucket is verified lazily on
+first use. STORAGE_BACKEND=local|memory swaps GCS for the offline backends
+in backends.py.
 """
 
 import os
-from google.cloud import storage
 from datetime import datetime
 from pathlib import Path
 import json
+import threading
+import time
 from typing import Dict, Any, Optional
 import logging
 
+from .backends import LocalBucket, MemoryBucket, NotFound, NotModified
+
+try:
+    from google.cloud import storage
+    GCS_SDK_AVAILABLE = True
+except ImportError:
+    storage = None
+    GCS_SDK_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# How long a cached pointer is trusted without re-checking GCS (0 = always check)
+LATEST_POINTER_TTL_SECONDS = float(os.getenv("GCS_LATEST_POINTER_TTL_SECONDS", 30))
+
+# Subfolder (next to the source dashboard) holding stored renditions such as GPT restructures
+DERIVED_DIR = "derived"
+
+STORAGE_BACKENDS = ("gcs", "local", "memory")
+DEFAULT_BACKEND = os.getenv("STORAGE_BACKEND", "gcs")
+LOCAL_STORAGE_ROOT = Path(os.getenv("LOCAL_STORAGE_ROOT", Path(__file__).resolve().parents[2] / "data" / "local_buckets"))
+
+_gcs_client = None
+_gcs_client_lock = threading.Lock()
+
+
+def get_gcs_client():
+    """Process-wide storage.Client (resolves a relative GOOGLE_APPLICATION_CREDENTIALS once)."""
+    global _gcs_client
+    with _gcs_client_lock:
+        if _gcs_client is not None:
+            return _gcs_client
+        
+        if not GCS_SDK_AVAILABLE:
+            raise ImportError("google-cloud-storage is not installed (use STORAGE_BACKEND=local or memory)")
+        
+        # Get credentials path from environment
+        creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+        
+        if creds_path:
+            # Convert to absolute path if relative
+            if not os.path.isabs(creds_path):
+                # Get project root (3 levels up from gcs_client.py)
+                project_root = Path(__file__).resolve().parents[2]
+                creds_path = project_root / creds_path
+            
+            creds_path = str(creds_path)
+            
+            # Verify file exists
+            if not os.path.exists(creds_path):
+                raise FileNotFoundError(f"Credentials file not found: {creds_path}")
+            
+            # Set environment variable to absolute path
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
+            print(f"  🔑 Using credentials: {creds_path}")
+        
+        # Initialize GCS client (will use GOOGLE_APPLICATION_CREDENTIALS automatically)
+        _gcs_client = storage.Client()
+        return _gcs_client
+
+
+def open_bucket(bucket_name: str, backend: str = None):
+    """Bucket handle for a backend (no network calls)."""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "gcs":
+        return get_gcs_client().bucket(bucket_name)
+    if backend == "local":
+        return LocalBucket(bucket_name, LOCAL_STORAGE_ROOT)
+    if backend == "memory":
+        return MemoryBucket(bucket_name)
+    raise ValueError(f"Unknown storage backend '{backend}', expected one of {STORAGE_BACKENDS}")
+
 
 class DashboardStorage:
     """Client for storing dashboards in Google Cloud Storage"""
     
-    def __init__(self, bucket_name: str = None):
-        """Initialize GCS client using credentials from environment"""
+    def __init__(self, bucket_name: str = None, backend: str = None, bucket=None):
+        """
+        Initialize a storage handle (prefer get_storage() to reuse handles)
+        
+        Args:
+            bucket_name: Bucket name (defaults to GCS_BUCKET_NAME)
+            backend: 'gcs', 'local' or 'memory' (defaults to STORAGE_BACKEND, then 'gcs')
+            bucket: Pre-built bucket object (skips backend selection and verification)
+        """
         
         self.bucket_name = bucket_name or os.getenv("GCS_BUCKET_NAME", "ai-pe-dashboard")
+        self.backend = backend or DEFAULT_BACKEND
+        
+        # (company_id, dashboard_type) -> cached pointer + content
+        self._latest_cache: Dict[tuple, Dict[str, Any]] = {}
+        self._latest_lock = threading.Lock()
+        # derived blob name -> content (names embed the source generation, so entries never go stale)
+        self._derived_cache: Dict[str, str] = {}
+        self._verify_lock = threading.Lock()
         
         try:
-            # Get credentials path from environment
-            creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-            
-            if creds_path:
-                # Convert to absolute path if relative
-                if not os.path.isabs(creds_path):
-                    # Get project root (3 levels up from gcs_client.py)
-                    project_root = Path(__file__).resolve().parents[2]
-                    creds_path = project_root / creds_path
-                
-                creds_path = str(creds_path)
-                
-                # Verify file exists
-                if not os.path.exists(creds_path):
-                    raise FileNotFoundError(f"Credentials file not found: {creds_path}")
-                
-                # Set environment variable to absolute path
-                os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = creds_path
-                print(f"  🔑 Using credentials: {creds_path}")
-            
-            # Initialize GCS client (will use GOOGLE_APPLICATION_CREDENTIALS automatically)
-            self.client = storage.Client()
-            self.bucket = self.client.bucket(self.bucket_name)
-            
-            # Verify bucket exists
-            if not self.bucket.exists():
-                raise ValueError(f"GCS bucket '{self.bucket_name}' does not exist")
-            
-            logger.info(f"GCS client initialized with bucket: {self.bucket_name}")
-            print(f"  ✅ Connected to GCS bucket: {self.bucket_name}")
+            self.client = get_gcs_client() if self.backend == "gcs" and bucket is None else None
+            self._bucket = bucket if bucket is not None else open_bucket(self.bucket_name, self.backend)
+            self._verified = bucket is not None or self.backend != "gcs"
+            logger.info(f"Storage handle created: {self.backend}://{self.bucket_name}")
             
         except Exception as e:
             logger.error(f"Failed to initialize GCS client: {e}")
             raise
     
+    @property
+    def bucket(self):
+        """Bucket handle; the first access checks that the GCS bucket exists."""
+        if not self._verified:
+            with self._verify_lock:
+                if not self._verified:
+                    if not self._bucket.exists():
+                        raise ValueError(f"GCS bucket '{self.bucket_name}' does not exist")
+                    self._verified = True
+                    print(f"  ✅ Connected to GCS bucket: {self.bucket_name}")
+        return self._bucket
+    
     def save_dashboard(
         self,
         company_id: str,
@@ -94,6 +175,7 @@ class DashboardStorage:
             print(f"  ✅ Uploaded: gs://{self.bucket_name}/{blob_name}")
             
             # Save metadata if provided
+            metadata_blob_name = None
             if metadata:
                 metadata_blob_name = f"data/dashboards/{company_id}/{dashboard_type}_{timestamp}_metadata.json"
                 metadata_blob = self.bucket.blob(metadata_blob_name)
@@ -103,6 +185,8 @@ class DashboardStorage:
                 )
                 logger.info(f"Metadata uploaded: {metadata_blob_name}")
             
+            self._write_latest_pointer(company_id, dashboard_type, blob, content, metadata_blob_name)
+            
             gcs_uri = f"gs://{self.bucket_name}/{blob_name}"
             return gcs_uri
         
@@ -131,8 +215,138 @@ class DashboardStorage:
             logger.error(f"Failed to save risks to GCS: {e}")
             raise
     
+    def save_risk_batch(self, risks: list, first_id: int, last_id: int) -> str:
+        """
+        Save a batch of indexed risk signals as one JSONL object.
+
+        Named by the index id range, so re-exporting the same batch overwrites it.
+        """
+        blob_name = f"data/risks/batches/risks_{first_id:010d}-{last_id:010d}.jsonl"
+        blob = self.bucket.blob(blob_name)
+        blob.upload_from_string(
+            "".join(json.dumps(risk, default=str) + "\n" for risk in risks),
+            content_type='application/x-ndjson'
+        )
+        logger.info(f"Risk batch uploaded: {blob_name} ({len(risks)} signals)")
+        return f"gs://{self.bucket_name}/{blob_name}"
+    
+    def _latest_pointer_name(self, company_id: str, dashboard_type: str) -> str:
+        return f"data/dashboards/{company_id}/latest_{dashboard_type}.json"
+    
+    def _write_latest_pointer(
+        self,
+        company_id: str,
+        dashboard_type: str,
+        blob,
+        content: str,
+        metadata_blob_name: Optional[str] = None
+    ):
+        """Point latest_{type}.json at a dashboard blob and cache its content locally."""
+        pointer = {
+            "blob": blob.name,
+            "generation": blob.generation,
+            "size": blob.size,
+            "metadata_blob": metadata_blob_name,
+            "updated_at": datetime.now().isoformat()
+        }
+        pointer_blob = self.bucket.blob(self._latest_pointer_name(company_id, dashboard_type))
+        pointer_blob.upload_from_string(
+            json.dumps(pointer, indent=2),
+            content_type='application/json'
+        )
+        
+        with self._latest_lock:
+            self._latest_cache[(company_id, dashboard_type)] = {
+                "pointer_generation": pointer_blob.generation,
+                "blob": blob.name,
+                "generation": blob.generation,
+                "content": content,
+                "checked_at": time.monotonic()
+            }
+    
     def get_latest_dashboard(self, company_id: str, dashboard_type: str = "unified") -> Optional[str]:
-        """Get most recent dashboard for a company from GCS"""
+        """
+        Get most recent dashboard for a company from GCS
+        
+        Reads the latest_{type}.json pointer (conditionally, so an unchanged
+        pointer costs no body) and serves the dashboard from the in-process
+        cache when the pointed-to generation is already cached. Companies
+        saved before pointers existed fall back to listing blobs once, which
+        also backfills the pointer.
+        """
+        latest = self.get_latest_dashboard_ref(company_id, dashboard_type)
+        return latest["content"] if latest else None
+    
+    def get_latest_dashboard_ref(
+        self,
+        company_id: str,
+        dashboard_type: str = "unified",
+        max_age_seconds: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Most recent dashboard with the blob it came from (see get_latest_dashboard)
+        
+        Args:
+            company_id: Company identifier
+            dashboard_type: Type ('unified', 'structured', 'rag')
+            max_age_seconds: Trust the cached pointer for this long (defaults to
+                LATEST_POINTER_TTL_SECONDS; 0 always re-checks the pointer)
+        
+        Returns:
+            {"blob", "generation", "content"} or None if the company has no dashboard
+        """
+        key = (company_id, dashboard_type)
+        with self._latest_lock:
+            cached = self._latest_cache.get(key)
+        
+        if max_age_seconds is None:
+            max_age_seconds = LATEST_POINTER_TTL_SECONDS
+        if cached and time.monotonic() - cached["checked_at"] < max_age_seconds:
+            return self._ref(cached)
+        
+        try:
+            pointer_blob = self.bucket.blob(self._latest_pointer_name(company_id, dashboard_type))
+            try:
+                raw_pointer = pointer_blob.download_as_bytes(
+                    if_generation_not_match=cached["pointer_generation"] if cached else None
+                )
+            except NotModified:
+                with self._latest_lock:
+                    cached["checked_at"] = time.monotonic()
+                return self._ref(cached)
+            except NotFound:
+                return self._get_latest_dashboard_by_listing(company_id, dashboard_type)
+            
+            pointer = json.loads(raw_pointer)
+            if cached and cached["blob"] == pointer["blob"] and cached["generation"] == pointer["generation"]:
+                content = cached["content"]
+            else:
+                content = self.bucket.blob(
+                    pointer["blob"],
+                    generation=pointer["generation"]
+                ).download_as_text()
+                print(f"  ✅ Retrieved from GCS: {pointer['blob']}")
+            
+            with self._latest_lock:
+                entry = self._latest_cache[key] = {
+                    "pointer_generation": pointer_blob.generation,
+                    "blob": pointer["blob"],
+                    "generation": pointer["generation"],
+                    "content": content,
+                    "checked_at": time.monotonic()
+                }
+            return self._ref(entry)
+        
+        except Exception as e:
+            logger.error(f"Failed to retrieve dashboard: {e}")
+            return None
+    
+    @staticmethod
+    def _ref(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {"blob": entry["blob"], "generation": entry["generation"], "content": entry["content"]}
+    
+    def _get_latest_dashboard_by_listing(self, company_id: str, dashboard_type: str) -> Optional[Dict[str, Any]]:
+        """Legacy lookup: list every dashboard blob and take the newest (backfills the pointer)."""
         
         try:
             prefix = f"data/dashboards/{company_id}/{dashboard_type}_"
@@ -156,12 +370,58 @@ class DashboardStorage:
             logger.info(f"Retrieved dashboard: {latest_blob.name}")
             print(f"  ✅ Retrieved from GCS: {latest_blob.name}")
             
-            return content
+            try:
+                self._write_latest_pointer(company_id, dashboard_type, latest_blob, content)
+            except Exception as e:
+                logger.warning(f"Could not backfill latest pointer for {company_id}: {e}")
+            
+            return {"blob": latest_blob.name, "generation": latest_blob.generation, "content": content}
         
         except Exception as e:
             logger.error(f"Failed to retrieve dashboard: {e}")
             return None
     
+    def _derived_blob_name(self, source_blob: str, generation: int, variant: str) -> str:
+        directory, filename = source_blob.rsplit("/", 1)
+        stem = filename[:-len(".md")] if filename.endswith(".md") else filename
+        return f"{directory}/{DERIVED_DIR}/{stem}.{variant}.g{generation}.md"
+    
+    def get_derived_dashboard(self, source_blob: str, generation: int, variant: str) -> Optional[str]:
+        """
+        Stored rendition of a dashboard (e.g. its GPT restructure), if one exists
+        
+        Renditions are keyed by the source blob's generation, so a re-uploaded
+        source never serves an old rendition.
+        
+        Args:
+            source_blob: Source dashboard blob name
+            generation: Source blob generation the rendition was made from
+            variant: Rendition name (include anything that changes the output, e.g. a prompt hash)
+        
+        Returns:
+            Rendition markdown, or None if it has not been stored yet
+        """
+        name = self._derived_blob_name(source_blob, generation, variant)
+        with self._latest_lock:
+            if name in self._derived_cache:
+                return self._derived_cache[name]
+        try:
+            content = self.bucket.blob(name).download_as_text()
+        except NotFound:
+            return None
+        with self._latest_lock:
+            self._derived_cache[name] = content
+        return content
+    
+    def save_derived_dashboard(self, source_blob: str, generation: int, variant: str, content: str) -> str:
+        """Store a rendition next to its source (derived/<source>.<variant>.g<generation>.md); returns the blob name."""
+        name = self._derived_blob_name(source_blob, generation, variant)
+        self.bucket.blob(name).upload_from_string(content, content_type='text/markdown')
+        with self._latest_lock:
+            self._derived_cache[name] = content
+        logger.info(f"Derived dashboard uploaded: {name}")
+        return name
+    
     def list_dashboards(self, company_id: str = None) -> list:
         """List all dashboards (optionally filtered by company)"""
         
@@ -178,11 +438,37 @@ class DashboardStorage:
                     "public_url": blob.public_url
                 }
                 for blob in blobs
-                if blob.name.endswith('.md')
+                if blob.name.endswith('.md') and f"/{DERIVED_DIR}/" not in blob.name
             ]
             
             return dashboards
         
         except Exception as e:
             logger.error(f"Failed to list dashboards: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+_handles: Dict[tuple, DashboardStorage] = {}
+_handles_lock = threading.Lock()
+
+
+def get_storage(bucket_name: str = None, backend: str = None) -> DashboardStorage:
+    """
+    Shared DashboardStorage handle for a bucket (one per backend/bucket per process)
+    
+    Args:
+        bucket_name: Bucket name (defaults to GCS_BUCKET_NAME)
+        backend: 'gcs', 'local' or 'memory' (defaults to STORAGE_BACKEND, then 'gcs')
+    
+    Returns:
+        DashboardStorage reusing the process-wide client and latest-pointer cache
+    """
+    bucket_name = bucket_name or os.getenv("GCS_BUCKET_NAME", "ai-pe-dashboard")
+    backend = backend or DEFAULT_BACKEND
+    key = (backend, bucket_name)
+    with _handles_lock:
+        handle = _handles.get(key)
+        if handle is None:
+            handle = DashboardStorage(bucket_name, backend=backend)
+            _handles[key] = handle
+        return handle
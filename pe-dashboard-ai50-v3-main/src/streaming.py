@@ -0,0 +1,71 @@
+"""
+Server-Sent Events helpers for streaming dashboard generation.
+
+Event sequence used by the streaming dashboard endpoints:
+- start      {company_id}                      sent immediately
+- retrieval  {chunks_retrieved, sources, ...}  once context is ready
+- delta      {text}                            one per completion token delta
+- done       {metadata}                        final frame (tokens, timings)
+- error      {error, error_type}               on failure (stream then ends)
+
+The MCP /tool/batch endpoint streams start -> result* -> done instead.
+"""
+
+import json
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Disable proxy buffering so deltas reach the browser as they are produced
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Format one SSE frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _feed_sse_line(line, pending: Dict) -> Optional[Tuple[str, Dict]]:
+    """Add one line to the frame being parsed; returns (event, data) when a frame ends."""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    if line == "":
+        frame = None
+        if pending["data"]:
+            frame = (pending["event"], json.loads("\n".join(pending["data"])))
+        pending.update(event="message", data=[])
+        return frame
+    if line.startswith("event:"):
+        pending["event"] = line[len("event:"):].strip()
+    elif line.startswith("data:"):
+        pending["data"].append(line[len("data:"):].lstrip())
+    return None
+
+
+def iter_sse_events(lines: Iterable) -> Iterator[Tuple[str, Dict]]:
+    """
+    Parse an SSE byte/str line stream (e.g. requests' iter_lines()) into (event, data) pairs.
+    """
+    pending = {"event": "message", "data": []}
+    for line in lines:
+        frame = _feed_sse_line(line, pending)
+        if frame:
+            yield frame
+    frame = _feed_sse_line("", pending)
+    if frame:
+        yield frame
+
+
+async def aiter_sse_events(lines: AsyncIterable) -> AsyncIterator[Tuple[str, Dict]]:
+    """Async variant of iter_sse_events (e.g. httpx's Response.aiter_lines())."""
+    pending = {"event": "message", "data": []}
+    async for line in lines:
+        frame = _feed_sse_line(line, pending)
+        if frame:
+            yield frame
+    frame = _feed_sse_line("", pending)
+    if frame:
+        yield frame
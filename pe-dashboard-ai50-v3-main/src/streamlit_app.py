@@ -9,6 +9,8 @@ import os
 import dotenv
 import pandas as pd
 
+from streaming import iter_sse_events
+
 dotenv.load_dotenv()
 
 API_BASE = os.environ.get("API_BASE_URL", "http://localhost:8000")
@@ -75,12 +77,21 @@ with tab1:
         """
     )
 
-    # Company list
+    # Company list (revalidated with the catalog's ETag, so reruns usually get a 304)
     try:
-        companies_resp = requests.get(
-            f"{MCP_BASE}/resource/ai50/companies", timeout=5
-        ).json()
-        company_names = companies_resp.get("companies", [])
+        cached_catalog = st.session_state.get("company_catalog")
+        headers = {"If-None-Match": cached_catalog["etag"]} if cached_catalog else {}
+        resp = requests.get(
+            f"{MCP_BASE}/resource/ai50/companies", headers=headers, timeout=5
+        )
+        if resp.status_code == 304 and cached_catalog:
+            company_names = cached_catalog["companies"]
+        else:
+            company_names = resp.json().get("companies", [])
+            st.session_state["company_catalog"] = {
+                "etag": resp.headers.get("ETag"),
+                "companies": company_names,
+            }
         if not company_names:
             company_names = ["abridge", "openai", "anthropic"]
     except:
@@ -107,35 +118,51 @@ with tab1:
         use_container_width=True,
         key="btn_generate",
     ):
-        progress_text = st.empty()
-        progress_bar = st.progress(0)
+        status = st.status("Retrieving contextual data…", expanded=False)
+        report_header = st.empty()
+        report_area = st.empty()
 
         try:
-            progress_text.text("Retrieving contextual data…")
-            progress_bar.progress(40)
-
+            # Stream the dashboard (SSE): retrieval status first, then the
+            # report text as it is generated, then a final metadata frame
             resp = requests.post(
-                f"{MCP_BASE}/tool/generate_unified_dashboard",
+                f"{MCP_BASE}/tool/generate_unified_dashboard/stream",
                 json={
                     "company_id": company_name,
                     "top_k": top_k,
                     "prefer_structured": False,
                 },
-                timeout=120,
+                stream=True,
+                timeout=(5, 120),
             )
-
-            progress_bar.progress(90)
-            data = resp.json()
             resp.raise_for_status()
 
-            progress_bar.progress(100)
-            progress_text.empty()
+            parts = []
+            data = {"success": False, "data_sources": {}}
+
+            for event, payload in iter_sse_events(resp.iter_lines(chunk_size=None, decode_unicode=True)):
+                if event == "retrieval":
+                    data["data_sources"] = payload.get("data_sources", {})
+                    status.update(label="Generating insights report…", state="running")
+                    report_header.markdown("### Generated Insights Report")
+                elif event == "delta":
+                    parts.append(payload["text"])
+                    report_area.markdown("".join(parts) + " ▌")
+                elif event == "done":
+                    data["success"] = True
+                    data["metadata"] = payload.get("metadata", {})
+                elif event == "error":
+                    data["error"] = payload.get("error")
+
+            data["result"] = "".join(parts)
 
             if not data.get("success"):
+                status.update(label="Dashboard generation failed", state="error")
                 st.error(f"Dashboard generation failed: {data.get('error')}")
                 st.stop()
 
-            st.success("Dashboard generated successfully.")
+            report_area.markdown(data["result"])
+            status.update(label="Dashboard generated successfully.", state="complete")
 
             # Metrics
             data_sources = data.get("data_sources", {})
@@ -153,10 +180,6 @@ with tab1:
                 with cols[idx % 4]:
                     st.markdown(f"- **{section}** → `{source}`")
 
-            st.divider()
-            st.markdown("### Generated Insights Report")
-            st.markdown(data["result"])
-
             st.divider()
             col_download1, col_download2 = st.columns(2)
 
@@ -186,8 +209,7 @@ Context Window Size: {top_k}
                 )
 
         except Exception as e:
-            progress_text.empty()
-            progress_bar.empty()
+            status.update(label="Dashboard generation failed", state="error")
             st.error(f"Error: {e}")
 
 # -----------------------------------------------------
@@ -28,6 +28,10 @@ if __package__ in (None, "", "__main__"):
         Snapshot,
         Visibility,
     )
+    from run_resolver import (  # type: ignore
+        parse_run_directory_name,
+        resolve_company_run_directory,
+    )
 else:
     from .models import (
         Company,
@@ -38,6 +42,10 @@ else:
         Snapshot,
         Visibility,
     )
+    from .run_resolver import (
+        parse_run_directory_name,
+        resolve_company_run_directory,
+    )
 
 load_dotenv()
 
@@ -45,16 +53,6 @@ RAW_DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
 STRUCTURED_DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "structured"
 DEFAULT_MODEL = "gpt-4o-mini"
 
-RUN_DIR_DATE_FORMATS = (
-    "%Y%m%d",
-    "%Y%m%d%H%M%S",
-    "%Y-%m-%d_%H%M%S",
-    "%Y-%m-%d-%H%M%S",
-    "%Y-%m-%dT%H-%M-%SZ",
-    "%Y-%m-%dT%H-%M-%S",
-)
-
-
 @dataclass
 class SourceDocument:
     company_id: str
@@ -226,63 +224,9 @@ class StructuredExtractor:
         return response
 
 
-def _parse_run_directory_name(name: str) -> Optional[datetime]:
-    candidate_values = {name.strip()}
-    if "_" in name:
-        candidate_values.add(name.split("_", 1)[0])
-    if name.endswith("Z"):
-        candidate_values.add(name[:-1])
-
-    for candidate in candidate_values:
-        # Normalize ISO-like with hyphenated time, e.g., 2025-11-07T06-37-33Z
-        # Strip trailing Z before normalization
-        normalized = candidate[:-1] if candidate.endswith("Z") else candidate
-        if "T" in normalized and "-" in normalized.split("T", 1)[1]:
-            date_part, time_part = normalized.split("T", 1)
-            time_part_colon = time_part.replace("-", ":")
-            iso_like = f"{date_part}T{time_part_colon}"
-            try:
-                return datetime.fromisoformat(iso_like)
-            except ValueError:
-                pass
-        try:
-            return datetime.fromisoformat(normalized)
-        except ValueError:
-            pass
-        for fmt in RUN_DIR_DATE_FORMATS:
-            try:
-                return datetime.strptime(candidate, fmt)
-            except ValueError:
-                continue
-    return None
-
-
-def _resolve_company_run_directory(company_dir: Path) -> Optional[Path]:
-    if not company_dir.exists() or not company_dir.is_dir():
-        return None
-
-    initial_dir: Optional[Path] = None
-    dated_dirs: List[tuple[datetime, Path]] = []
-
-    for entry in company_dir.iterdir():
-        if not entry.is_dir():
-            continue
-        if entry.name == "initial":
-            initial_dir = entry
-            continue
-
-        parsed = _parse_run_directory_name(entry.name)
-        if parsed is not None:
-            dated_dirs.append((parsed, entry))
-
-    if dated_dirs:
-        dated_dirs.sort(key=lambda item: item[0], reverse=True)
-        return dated_dirs[0][1]
-
-    if initial_dir is not None and initial_dir.exists():
-        return initial_dir
-
-    return None
+# Run resolution is shared with the RAG loader (see run_resolver.py)
+_parse_run_directory_name = parse_run_directory_name
+_resolve_company_run_directory = resolve_company_run_directory
 
 
 def load_company_documents(company_id: str) -> Iterable[SourceDocument]:
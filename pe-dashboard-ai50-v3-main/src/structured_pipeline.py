@@ -116,6 +116,7 @@ from pathlib import Path
 from typing import Optional
 from src.models import Payload
 from src.utils import gcs_util as gcs_utils 
+from src.payload_repository import get_payload_repository
 # from models import Payload
 # from utils import gcs_util as gcs_utils 
 
@@ -127,26 +128,23 @@ if ENVIRONMENT == "local":
 
 
 def load_payload(company_id: str) -> Optional[Payload]:
+    """
+    Validated payload for a company from data/payloads (local) or the GCS bucket.
+
+    Served from the shared payload cache, so repeated loads only stat the file
+    (or check the blob generation) instead of re-reading and re-validating it.
+    Returns None if the company has no payload or it cannot be loaded.
+    """
     if ENVIRONMENT == "local":
-        fp = DATA_DIR / f"{company_id}.json"
-        if not fp.exists():
-            # Return None if company file doesn't exist (don't fall back to starter)
-            return None
-        try:
-            return Payload.model_validate_json(fp.read_text(encoding='utf-8'))
-        except Exception as e:
-            print(f"Error loading payload {company_id}: {e}")
-            return None
+        repository = get_payload_repository(Payload)
     else:
-        # GCS mode - read_gcs_json_string returns a string or None
-        payload_str = gcs_utils.read_gcs_json_string(f"payloads/{company_id}.json")
-        
-        if not payload_str:
-            # Return None if company file doesn't exist (don't fall back to starter)
-            return None
-        
-        try:
-            return Payload.model_validate_json(payload_str)
-        except Exception as e:
-            print(f"Error validating payload {company_id}: {e}")
-            return None
\ No newline at end of file
+        repository = get_payload_repository(Payload, bucket_getter=gcs_utils.get_bucket)
+
+    try:
+        return repository.get(company_id)
+    except FileNotFoundError:
+        # Return None if company file doesn't exist (don't fall back to starter)
+        return None
+    except Exception as e:
+        print(f"Error loading payload {company_id}: {e}")
+        return None
@@ -6,15 +6,18 @@ Returns relevant text chunks from scraped company documents.
 """
 
 import os
+import threading
 from typing import List, Dict, Optional
 
 # from src.rag_pipeline import VectorStore
 # Windows:
 from rag_pipeline import VectorStore
+from concurrency import run_in_thread
 
 
 # Singleton instance to avoid re-initializing VectorStore
 _vector_store: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
 
 
 def _get_vector_store() -> Optional[VectorStore]:
@@ -24,6 +27,16 @@ def _get_vector_store() -> Optional[VectorStore]:
     if _vector_store is not None:
         return _vector_store
     
+    with _vector_store_lock:
+        if _vector_store is None:
+            _create_vector_store()
+    return _vector_store
+
+
+def _create_vector_store():
+    """Create the VectorStore singleton (called under _vector_store_lock)."""
+    global _vector_store
+    
     # Get credentials from environment
     credentials = {
         'api_key': os.getenv('CHROMA_API_KEY'),
@@ -32,15 +45,25 @@ def _get_vector_store() -> Optional[VectorStore]:
         'openai_api_key': os.getenv('OPENAI_KEY')
     }
     
-    # Return None if any credential is missing
+    # Leave the singleton unset if any credential is missing
     if not all(credentials.values()):
-        return None
+        return
     
     try:
-        _vector_store = VectorStore(**credentials)
-        return _vector_store
+        vector_store = VectorStore(**credentials)
     except Exception:
-        return None
+        return
+    
+    # Optionally keep every chunk hot in RAM as a quantized index
+    # (RAG_LOCAL_INDEX=int8|float16|float32; unset or 'off' searches ChromaDB)
+    precision = os.getenv('RAG_LOCAL_INDEX', '').strip().lower()
+    if precision and precision != 'off':
+        try:
+            vector_store.warm_local_index(precision=precision)
+        except Exception as e:
+            print(f"Warning: local index unavailable, using ChromaDB search: {str(e)}")
+    
+    _vector_store = vector_store
 
 
 async def rag_search_company(company_id: str, query: str, top_k: int = 5) -> List[Dict]:
@@ -63,14 +86,16 @@ async def rag_search_company(company_id: str, query: str, top_k: int = 5) -> Lis
     if not (company_id and company_id.strip()) or not (query and query.strip()):
         return []
     
-    # Get VectorStore instance
-    vector_store = _get_vector_store()
+    # Get VectorStore instance (first call connects to ChromaDB; keep it off the event loop)
+    vector_store = _vector_store or await run_in_thread('chroma', _get_vector_store)
     if vector_store is None:
         return []
     
     try:
-        # Perform search
-        results = vector_store.search(
+        # Perform search in a worker thread (query embedding + ChromaDB are blocking)
+        results = await run_in_thread(
+            'chroma',
+            vector_store.search,
             company_name=company_id.strip(),
             query=query.strip(),
             top_k=top_k
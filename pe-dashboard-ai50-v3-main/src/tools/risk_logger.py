@@ -3,14 +3,19 @@ Tool: Risk Logger
 
 Logs high-risk events (layoffs, breaches, regulatory issues, etc.) for human review.
 Creates an audit trail that triggers HITL (Human-in-the-Loop) workflow.
+Signals go through the shared risk store (see risk_store.py), which batches
+concurrent writes and indexes them for GET /resource/risks. Reporting is
+idempotent: a signal for an event that is already logged (same company,
+risk type, date and source URL) is accepted without being written again.
 """
 
-import json
+import asyncio
 from datetime import date, datetime, timezone
-from pathlib import Path
-from typing import Literal
+from typing import Dict, Literal, Optional
 from pydantic import BaseModel, HttpUrl
 
+from risk_store import get_risk_store, risk_fingerprint
+
 # Define high-risk event types (aligned with Event model where applicable)
 RiskType = Literal[
     "layoff",                    # Workforce reduction
@@ -35,31 +40,18 @@ class RiskSignal(BaseModel):
     severity: Literal["low", "medium", "high", "critical"] = "medium"
 
 
-async def report_risk_signal(signal_data: RiskSignal) -> bool:
+async def record_risk_signal(signal_data: RiskSignal) -> Optional[Dict]:
     """
-    Tool: report_risk_signal
-
-    Record a high-risk event for the given company.
-    This creates a persistent audit trail that can trigger HITL (Human-in-the-Loop) review.
+    Record a risk signal unless its event is already logged.
 
     Args:
-        signal_data: RiskSignal with company_id, occurred_on, description, 
-                    source_url, risk_type, and optional severity.
+        signal_data: RiskSignal to record
 
     Returns:
-        True if logging succeeded, False otherwise.
-        Never raises exceptions - graceful degradation on errors.
+        {"fingerprint": str, "duplicate": bool}, or None if logging failed.
+        Never raises exceptions.
     """
     try:
-        # Create risk signals directory if it doesn't exist
-        # From: src/tools/risk_logger.py -> go up 2 levels to project root
-        project_root = Path(__file__).parent.parent.parent
-        risk_log_dir = project_root / "data" / "risk_signals"
-        risk_log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Append to JSONL file (one JSON object per line)
-        risk_log_file = risk_log_dir / "risk_signals.jsonl"
-        
         # Create log entry with timestamp
         log_entry = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -70,17 +62,39 @@ async def report_risk_signal(signal_data: RiskSignal) -> bool:
             "risk_type": signal_data.risk_type,
             "severity": signal_data.severity,
         }
-        
-        # Append to file (append mode ensures we never overwrite)
-        with open(risk_log_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_entry) + '\n')
-        
-        return True
-        
+        log_entry["fingerprint"] = risk_fingerprint(log_entry)
+
+        store = get_risk_store()
+        if store.is_known(log_entry):
+            # Already logged by this process: no I/O
+            return {"fingerprint": log_entry["fingerprint"], "duplicate": True}
+
+        # Appended to data/risk_signals/risk_signals.jsonl (batched with concurrent
+        # reports) and indexed; returns once the entry is written
+        written = await asyncio.to_thread(store.record, log_entry)
+        return {"fingerprint": log_entry["fingerprint"], "duplicate": not written}
+
     except Exception:
-        # Graceful degradation: return False on any error
-        # Don't expose internal errors to the client
-        return False
+        # Graceful degradation: don't expose internal errors to the client
+        return None
+
+
+async def report_risk_signal(signal_data: RiskSignal) -> bool:
+    """
+    Tool: report_risk_signal
+
+    Record a high-risk event for the given company.
+    This creates a persistent audit trail that can trigger HITL (Human-in-the-Loop) review.
+
+    Args:
+        signal_data: RiskSignal with company_id, occurred_on, description, 
+                    source_url, risk_type, and optional severity.
+
+    Returns:
+        True if logging succeeded (or the event was already logged), False otherwise.
+        Never raises exceptions - graceful degradation on errors.
+    """
+    return await record_risk_signal(signal_data) is not None
 
 
 # Convenience wrapper for backward compatibility
@@ -4,11 +4,14 @@ Due Diligence Workflow using LangGraph with conditional branching
 Integrates with Assignment 4 real company data
 """
 
-from typing import TypedDict, Annotated, Literal, Optional, Dict, List
+from typing import TypedDict, Annotated, Callable, Literal, Optional, Dict, List
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+import asyncio
 import json
 import logging
+import threading
+import time
 from datetime import datetime, timezone
 import sys
 import os
@@ -47,13 +50,36 @@ except ImportError as e:
     generate_dashboard_from_rag = None
     load_payload = None
 
+# Risk fingerprints (same event re-derived from several payload sources counts once)
+try:
+    from src.risk_store import risk_fingerprint
+except ImportError as e:
+    logger.warning(f"Could not import risk fingerprints: {e}")
+    risk_fingerprint = None
+
+# Risk scanner (compiled risk lexicon over dashboards and scraped pages)
+try:
+    from src.risk_scanner import RAW_DATA_DIR, get_risk_scanner
+    from src.run_resolver import iter_latest_sections
+except ImportError as e:
+    logger.warning(f"Could not import risk scanner: {e}")
+    get_risk_scanner = None
+
+# Approvals index (lets the MCP approval endpoints page without directory scans)
+try:
+    from src.approvals_index import get_approvals_index
+except ImportError as e:
+    logger.warning(f"Could not import approvals index: {e}")
+    get_approvals_index = None
+
 # Import GCS storage client (optional)
 try:
-    from src.storage.gcs_client import DashboardStorage
+    from src.storage.gcs_client import DashboardStorage, get_storage
     GCS_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"Could not import GCS client: {e}. Dashboards will be saved locally only.")
     DashboardStorage = None
+    get_storage = None
     GCS_AVAILABLE = False
 
 
@@ -70,14 +96,30 @@ except ImportError:  # pragma: no cover - httpx is in requirements.txt
     httpx = None
     logger.warning("[MCP] httpx is not installed; MCP tools will be disabled.")
 
+from src.streaming import aiter_sse_events
+
 
 class MCPHttpClient:
-    """Simple HTTP client for calling MCP tool endpoints."""
+    """
+    Simple HTTP client for calling MCP tool endpoints.
+
+    Calls share one httpx.AsyncClient (and its keep-alive connection pool) per
+    event loop instead of opening a client, and a new connection, per call.
+    Whoever drives the loop should await aclose() before it shuts down
+    (run_workflow does); clients of loops that closed without that are
+    dropped the next time a client is created.
+    """
 
     def __init__(self, config_path: Path):
         self.enabled = False
         self.base_url: Optional[str] = None
         self.timeout: float = 60.0
+        self.max_connections: int = 20
+        # httpx clients are bound to the loop they were first used on, and the
+        # workflow may be driven by several asyncio.run() calls or threads.
+        # A plain dict: each client references its loop, so weak keys never expire.
+        self._clients: Dict[asyncio.AbstractEventLoop, "httpx.AsyncClient"] = {}
+        self._clients_lock = threading.Lock()
 
         if httpx is None:
             logger.warning("[MCP] Cannot initialize MCP client without httpx.")
@@ -91,6 +133,7 @@ class MCPHttpClient:
             # Check environment variable first (set by Docker Compose), then config file
             self.base_url = os.getenv('MCP_SERVER_URL') or server_cfg.get("base_url", "http://mcp-server:8100")
             self.timeout = float(server_cfg.get("timeout", 60))
+            self.max_connections = int(server_cfg.get("max_connections", self.max_connections))
 
             self.enabled = True
             logger.info(f"[MCP] MCP client configured for base_url={self.base_url}")
@@ -99,16 +142,72 @@ class MCPHttpClient:
         except Exception as e:
             logger.warning(f"[MCP] Failed to initialize MCP client: {e}")
 
+    def _client(self) -> "httpx.AsyncClient":
+        """Shared AsyncClient for the running event loop (created on first use)."""
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                # Forget clients whose loop is gone; they can no longer be awaited
+                for stale in [old for old in self._clients if old.is_closed()]:
+                    del self._clients[stale]
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+                self._clients[loop] = client
+            return client
+
+    async def aclose(self):
+        """Close the running loop's shared client (e.g. before the loop shuts down)."""
+        with self._clients_lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
     async def call_tool(self, tool_name: str, payload: Dict) -> Dict:
         """Call an MCP tool endpoint and return JSON response."""
         if not self.enabled or httpx is None or self.base_url is None:
             raise RuntimeError("MCP client is not enabled or httpx is missing.")
 
         url = f"{self.base_url}/tool/{tool_name}"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.post(url, json=payload)
+        resp = await self._client().post(url, json=payload)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def call_tools_batch(
+        self,
+        calls: List[Dict],
+        max_concurrency: int = 8,
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """
+        Run many tool calls through the MCP server's /tool/batch endpoint.
+
+        calls are {"tool", "params", optional "id" / "fields"}; results come back in the
+        same order with the tool's JSON response under "response". on_result
+        is called for each result as it streams in.
+        """
+        if not self.enabled or httpx is None or self.base_url is None:
+            raise RuntimeError("MCP client is not enabled or httpx is missing.")
+
+        url = f"{self.base_url}/tool/batch"
+        body = {"calls": calls, "max_concurrency": max_concurrency}
+        results: List[Optional[Dict]] = [None] * len(calls)
+
+        # The timeout applies per read, so it bounds the gap between results
+        async with self._client().stream("POST", url, json=body) as resp:
             resp.raise_for_status()
-            return resp.json()
+            async for event, data in aiter_sse_events(resp.aiter_lines()):
+                if event != "result":
+                    continue
+                results[data["index"]] = data
+                if on_result:
+                    on_result(data)
+        return results
 
 
 # Create a global MCP client instance if possible
@@ -297,12 +396,99 @@ def planner_node(state: WorkflowState) -> WorkflowState:
     return state
 
 
+async def _call_mcp_dashboard(tool_name: str, payload: Dict) -> Optional[str]:
+    """Dashboard markdown from an MCP tool, or None when MCP is unavailable or the call fails."""
+    if not MCP_AVAILABLE or mcp_client is None:
+        return None
+    try:
+        resp = await mcp_client.call_tool(tool_name, payload)
+        if resp.get("success"):
+            logger.info(f"[DataGenerator] {tool_name} obtained via MCP")
+            return resp.get("result") or None
+        logger.warning(f"[DataGenerator] MCP {tool_name} error: {resp.get('error')}")
+    except Exception as e:
+        logger.warning(f"[DataGenerator] MCP {tool_name} exception: {e}")
+    return None
+
+
+async def _generate_structured_dashboard(company_id: str, company_name: str) -> str:
+    """Structured dashboard via MCP, else from the local payload pipeline."""
+    dashboard = await _call_mcp_dashboard("generate_structured_dashboard", {"company_id": company_id})
+    if dashboard:
+        return dashboard
+
+    if load_payload is None or generate_dashboard is None:
+        return (
+            f"# Structured Dashboard - {company_name}\n\n"
+            "*Dashboard generator not available*"
+        )
+    try:
+        # Blocking payload load + GPT call: keep the RAG leg running meanwhile
+        payload = await asyncio.to_thread(load_payload, company_id)
+        dashboard = await asyncio.to_thread(generate_dashboard, payload)
+        logger.info("[DataGenerator] Structured dashboard generated from local payload pipeline")
+        return dashboard
+    except Exception as e:
+        logger.warning(f"[DataGenerator] Local structured dashboard error: {e}")
+        return (
+            f"# Structured Dashboard - {company_name}\n\n"
+            "*Error generating structured dashboard*"
+        )
+
+
+async def _generate_rag_dashboard(company_id: str, company_name: str) -> str:
+    """RAG dashboard via MCP, else from local RAG searches (run concurrently) and a GPT call."""
+    dashboard = await _call_mcp_dashboard("generate_rag_dashboard", {"company_id": company_id, "top_k": 10})
+    if dashboard:
+        return dashboard
+
+    if generate_dashboard_from_rag is None or rag_search_company is None:
+        logger.warning("[DataGenerator] RAG dashboard generation skipped - tools not available")
+        return (
+            f"# RAG Dashboard - {company_name}\n\n"
+            "*RAG dashboard generation not available (Lab 4/7 integration pending)*"
+        )
+    try:
+        rag_queries = [
+            f"{company_name} company overview mission",
+            f"{company_name} funding investors",
+            f"{company_name} business model revenue",
+            f"{company_name} risks challenges layoffs",
+        ]
+        results = await asyncio.gather(
+            *(rag_search_company(company_id, query, top_k=3) for query in rag_queries),
+            return_exceptions=True
+        )
+        all_context: List[Dict] = []
+        for query, result in zip(rag_queries, results):
+            if isinstance(result, Exception):
+                logger.warning(f"[DataGenerator] RAG search error for query '{query}': {result}")
+                continue
+            all_context.extend(result)
+
+        if not all_context:
+            return (
+                f"# RAG Dashboard - {company_name}\n\n"
+                "*No RAG context available*"
+            )
+        dashboard = await asyncio.to_thread(generate_dashboard_from_rag, company_name, all_context)
+        logger.info(f"[DataGenerator] Generated RAG dashboard with {len(all_context)} context chunks")
+        return dashboard
+    except Exception as e:
+        logger.warning(f"[DataGenerator] Error generating RAG dashboard: {e}")
+        return (
+            f"# RAG Dashboard - {company_name}\n\n"
+            f"*Error: {str(e)}*"
+        )
+
+
 async def data_generator_node(state: WorkflowState) -> WorkflowState:
     """
     Data Generator Node (Lab 17):
     - Loads REAL company data from Assignment 4 outputs
     - Prefers MCP dashboard tools for generation
     - Falls back to local Python tools if MCP is unavailable
+    - Structured and RAG dashboards are generated concurrently
     """
     logger.info(f"[DataGenerator] Generating dashboards for: {state['company_id']}")
 
@@ -313,110 +499,25 @@ async def data_generator_node(state: WorkflowState) -> WorkflowState:
     company_data = loader.load_company_payload(company_id)
     risks_found: List[Dict[str, str]] = []
 
-    structured_from_mcp: Optional[str] = None
-    rag_from_mcp: Optional[str] = None
-
     # ------------------------------------------------------------
-    # 1) Call MCP tools (preferred path)
-    # ------------------------------------------------------------
-    if MCP_AVAILABLE and mcp_client is not None:
-        logger.info("[DataGenerator] Using MCP tools for dashboard generation")
-
-        # Structured dashboard via MCP
-        try:
-            struct_resp = await mcp_client.call_tool(
-                "generate_structured_dashboard",
-                {"company_id": company_id}
-            )
-            if struct_resp.get("success"):
-                structured_from_mcp = struct_resp.get("result") or ""
-                logger.info("[DataGenerator] Structured dashboard obtained via MCP")
-            else:
-                logger.warning(f"[DataGenerator] MCP structured_dashboard error: {struct_resp.get('error')}")
-        except Exception as e:
-            logger.warning(f"[DataGenerator] MCP structured_dashboard exception: {e}")
-
-        # RAG dashboard via MCP
-        try:
-            rag_resp = await mcp_client.call_tool(
-                "generate_rag_dashboard",
-                {"company_id": company_id, "top_k": 10}
-            )
-            if rag_resp.get("success"):
-                rag_from_mcp = rag_resp.get("result") or ""
-                logger.info("[DataGenerator] RAG dashboard obtained via MCP")
-            else:
-                logger.warning(f"[DataGenerator] MCP rag_dashboard error: {rag_resp.get('error')}")
-        except Exception as e:
-            logger.warning(f"[DataGenerator] MCP rag_dashboard exception: {e}")
-    else:
-        logger.info("[DataGenerator] MCP client not available; falling back to local tools")
-
-    # ------------------------------------------------------------
-    # 2) Generate dashboards using payload-backed data + fallbacks
+    # Structured and RAG dashboards, generated concurrently
     # ------------------------------------------------------------
     if company_data:
         company_name = company_data.get("name", company_id)
 
-        # -------- Structured dashboard --------
-        if structured_from_mcp:
-            state["structured_dashboard"] = structured_from_mcp
-        elif load_payload is not None and generate_dashboard is not None:
-            try:
-                payload = load_payload(company_id)
-                state["structured_dashboard"] = generate_dashboard(payload)
-                logger.info("[DataGenerator] Structured dashboard generated from local payload pipeline")
-            except Exception as e:
-                logger.warning(f"[DataGenerator] Local structured dashboard error: {e}")
-                state["structured_dashboard"] = (
-                    f"# Structured Dashboard - {company_name}\n\n"
-                    "*Error generating structured dashboard*"
-                )
+        if MCP_AVAILABLE and mcp_client is not None:
+            logger.info("[DataGenerator] Using MCP tools for dashboard generation")
         else:
-            state["structured_dashboard"] = (
-                f"# Structured Dashboard - {company_name}\n\n"
-                "*Dashboard generator not available*"
-            )
-
-        # -------- RAG dashboard --------
-        if rag_from_mcp:
-            state["rag_dashboard"] = rag_from_mcp
-        elif generate_dashboard_from_rag is not None and rag_search_company is not None:
-            try:
-                rag_queries = [
-                    f"{company_name} company overview mission",
-                    f"{company_name} funding investors",
-                    f"{company_name} business model revenue",
-                    f"{company_name} risks challenges layoffs",
-                ]
-                all_context: List[Dict] = []
-                for query in rag_queries:
-                    try:
-                        results = await rag_search_company(company_id, query, top_k=3)
-                        all_context.extend(results)
-                    except Exception as e:
-                        logger.warning(f"[DataGenerator] RAG search error for query '{query}': {e}")
-
-                if all_context:
-                    state["rag_dashboard"] = generate_dashboard_from_rag(company_name, all_context)
-                    logger.info(f"[DataGenerator] Generated RAG dashboard with {len(all_context)} context chunks")
-                else:
-                    state["rag_dashboard"] = (
-                        f"# RAG Dashboard - {company_name}\n\n"
-                        "*No RAG context available*"
-                    )
-            except Exception as e:
-                logger.warning(f"[DataGenerator] Error generating RAG dashboard: {e}")
-                state["rag_dashboard"] = (
-                    f"# RAG Dashboard - {company_name}\n\n"
-                    f"*Error: {str(e)}*"
-                )
-        else:
-            state["rag_dashboard"] = (
-                f"# RAG Dashboard - {company_name}\n\n"
-                "*RAG dashboard generation not available (Lab 4/7 integration pending)*"
-            )
-            logger.warning("[DataGenerator] RAG dashboard generation skipped - tools not available")
+            logger.info("[DataGenerator] MCP client not available; falling back to local tools")
+
+        # Each leg falls back to local tools as soon as its own MCP call fails,
+        # so the node takes about as long as the slower leg
+        started = time.perf_counter()
+        state["structured_dashboard"], state["rag_dashboard"] = await asyncio.gather(
+            _generate_structured_dashboard(company_id, company_name),
+            _generate_rag_dashboard(company_id, company_name)
+        )
+        logger.info(f"[DataGenerator] Dashboards ready in {time.perf_counter() - started:.1f}s")
 
         # -------- Dashboard metadata from company_data --------
         dashboard_data = {
@@ -447,17 +548,29 @@ async def data_generator_node(state: WorkflowState) -> WorkflowState:
         # Extract risk events if we have a payload events list
         payload_obj = company_data.get("payload")
         if payload_obj is not None and hasattr(payload_obj, "events"):
+            seen_fingerprints = set()
             for event in payload_obj.events:
                 event_type = getattr(event, "event_type", None)
                 if event_type in ["layoff", "security_incident", "regulatory", "legal_action"]:
-                    risks_found.append(
-                        {
-                            "type": event_type,
-                            "severity": "high" if event_type == "layoff" else "medium",
-                            "description": getattr(event, "description", "") or getattr(event, "title", ""),
-                            "occurred_on": str(getattr(event, "occurred_on", "Unknown")),
-                        }
-                    )
+                    provenance = getattr(event, "provenance", None) or []
+                    risk = {
+                        "type": event_type,
+                        "severity": "high" if event_type == "layoff" else "medium",
+                        "description": getattr(event, "description", "") or getattr(event, "title", ""),
+                        "occurred_on": str(getattr(event, "occurred_on", "Unknown")),
+                    }
+                    if risk_fingerprint is not None:
+                        # Re-extracted payloads can repeat an event; keep the first copy
+                        risk["fingerprint"] = risk_fingerprint({
+                            "company_id": company_id,
+                            "risk_type": event_type,
+                            "occurred_on": risk["occurred_on"],
+                            "source_url": str(provenance[0].source_url) if provenance else ""
+                        })
+                        if risk["fingerprint"] in seen_fingerprints:
+                            continue
+                        seen_fingerprints.add(risk["fingerprint"])
+                    risks_found.append(risk)
 
         logger.info(f"[DataGenerator] Using REAL data for {company_name}")
 
@@ -537,27 +650,63 @@ def evaluator_node(state: WorkflowState) -> WorkflowState:
     return state
 
 
+def _scan_for_risks(state: WorkflowState) -> List[Dict]:
+    """Non-negated risk lexicon matches in both dashboards and the company's latest scraped pages."""
+    scanner = get_risk_scanner()
+    matches = scanner.scan_sources({
+        "structured_dashboard": state.get("structured_dashboard") or "",
+        "rag_dashboard": state.get("rag_dashboard") or ""
+    })
+
+    company_dir = RAW_DATA_DIR / state["company_id"]
+    if company_dir.is_dir():
+        for version in iter_latest_sections(company_dir):
+            try:
+                text = version.text_path.read_text(encoding="utf-8", errors="ignore")
+            except OSError:
+                continue
+            # Generic words ('regulatory') are everyday vocabulary on company websites
+            matches.extend(scanner.scan(text, source=f"raw:{version.section}", include_weak=False))
+
+    return [match for match in matches if not match["negated"]]
+
+
 def risk_detector_node(state: WorkflowState) -> WorkflowState:
     """
     Risk Detector Node:
-    - Simple keyword-based risk detection for Lab 17
+    - Scans the structured and RAG dashboards and the latest scraped pages
+      with the risk lexicon (see risk_scanner.py) in one pass per text
     - Can be extended with LLM-based risk analysis
     """
     logger.info(f"[RiskDetector] Checking risks for company_id={state['company_id']}")
 
-    structured_text = state["structured_dashboard"].lower()
-    risk_keywords = ["layoff", "breach", "regulatory", "security incident"]
+    if get_risk_scanner is not None:
+        matches = _scan_for_risks(state)
+    else:
+        structured_text = state["structured_dashboard"].lower()
+        matches = [
+            {"risk_type": "other", "severity": "medium", "term": k, "source": "structured_dashboard", "snippet": ""}
+            for k in ["layoff", "breach", "regulatory", "security incident"] if k in structured_text
+        ]
 
-    risk_detected = any(k in structured_text for k in risk_keywords)
+    risk_detected = bool(matches)
     state["risk_detected"] = risk_detected
 
     if risk_detected:
         logger.warning("[RiskDetector] Risk detected -> HITL branch!")
+        severity_rank = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+        sources = sorted({m["source"] for m in matches})
         state["risk_details"].append({
             "type": "keyword_match",
-            "severity": "medium",
-            "description": "Risk keywords found in structured dashboard",
-            "keywords": risk_keywords
+            "severity": max((m["severity"] for m in matches), key=lambda s: severity_rank.get(s, 0)),
+            "description": f"Risk terms found in {', '.join(sources)}",
+            "keywords": sorted({m["term"] for m in matches}),
+            "risk_types": sorted({m["risk_type"] for m in matches}),
+            # Where each hit occurred, for the reviewer
+            "matches": [
+                {key: m.get(key) for key in ("risk_type", "term", "source", "start", "snippet")}
+                for m in matches[:20]
+            ]
         })
     else:
         logger.info("[RiskDetector] No risk detected -> Auto-approve branch.")
@@ -739,7 +888,7 @@ def save_execution_trace(state: WorkflowState):
     if GCS_AVAILABLE and DashboardStorage is not None:
         try:
             bucket_name = os.getenv('GCS_BUCKET_NAME', 'ai-pe-dashboard')
-            storage = DashboardStorage(bucket_name)
+            storage = get_storage(bucket_name)
             
             # Save trace as JSON content
             trace_content = json.dumps(trace, indent=2, default=str)
@@ -826,7 +975,7 @@ def save_dashboard(state: WorkflowState):
     if GCS_AVAILABLE and DashboardStorage is not None:
         try:
             bucket_name = os.getenv('GCS_BUCKET_NAME', 'ai-pe-dashboard')
-            storage = DashboardStorage(bucket_name)
+            storage = get_storage(bucket_name)
             
             # Prepare metadata
             metadata = {
@@ -874,6 +1023,7 @@ def save_dashboard(state: WorkflowState):
                 json.dump(metadata, f, indent=2)
             
             logger.info(f"[Finalize] Also saved locally: {full_path}")
+            _index_saved_dashboard(company_id, run_id, dashboard_content, metadata, blob_name, full_path)
             return
             
         except Exception as e:
@@ -909,6 +1059,31 @@ def save_dashboard(state: WorkflowState):
         json.dump(metadata, f, indent=2)
 
     logger.info(f"[Finalize] Saved dashboard markdown to {full_path}")
+    _index_saved_dashboard(company_id, run_id, dashboard_content, metadata, None, full_path)
+
+
+def _index_saved_dashboard(
+    company_id: str,
+    run_id: str,
+    dashboard_content: str,
+    metadata: Dict,
+    gcs_blob: Optional[str],
+    local_path: Path
+):
+    """Record a saved dashboard in the approvals index (non-critical)."""
+    if get_approvals_index is None:
+        return
+    try:
+        get_approvals_index().record(
+            company_id,
+            run_id,
+            dashboard_content,
+            metadata,
+            gcs_blob=gcs_blob,
+            local_path=str(local_path)
+        )
+    except Exception as e:
+        logger.warning(f"[Finalize] Approvals index update failed: {e}")
 
 
 async def run_workflow(company_id: str) -> WorkflowState:
@@ -943,10 +1118,15 @@ async def run_workflow(company_id: str) -> WorkflowState:
     final_output = None
     node_name = None
 
-    async for output in app.astream(initial_state, config):
-        node_name = list(output.keys())[0]
-        print(f"\n✓ Completed: {node_name}")
-        final_output = output
+    try:
+        async for output in app.astream(initial_state, config):
+            node_name = list(output.keys())[0]
+            print(f"\n✓ Completed: {node_name}")
+            final_output = output
+    finally:
+        # The shared MCP client is bound to this loop, which asyncio.run() is about to close
+        if mcp_client is not None:
+            await mcp_client.aclose()
 
     final_state = final_output[node_name] if final_output else initial_state
 
@@ -0,0 +1,129 @@
+"""
+Unit tests for the approvals index behind /api/pending-approvals.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add src to Python path
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from approvals_index import PREVIEW_CHARS, ApprovalsIndex
+
+
+def _metadata(company_id, run_id, score=0.8, status="pending"):
+    return {
+        "company_id": company_id,
+        "run_id": run_id,
+        "evaluation_score": score,
+        "risk_detected": True,
+        "status": status,
+        "generated_at": "2025-11-21T05:00:00+00:00"
+    }
+
+
+def test_pages_filters_and_previews(tmp_path):
+    """Pending entries page newest first with a stable cursor; filters narrow the page."""
+    index = ApprovalsIndex(tmp_path / "approvals.db")
+    for i in range(5):
+        company = "acme" if i % 2 == 0 else "other"
+        index.record(company, f"run_{i}", "x" * 800, _metadata(company, f"run_{i}", score=i / 10),
+                     gcs_blob=f"data/dashboards/{company}/pending_approval/run_{i}.md")
+
+    first = index.list(limit=2)
+    second = index.list(limit=2, cursor=first["next_cursor"])
+    last = index.list(limit=2, cursor=second["next_cursor"])
+
+    assert [e["run_id"] for e in first["items"] + second["items"] + last["items"]] == \
+        ["run_4", "run_3", "run_2", "run_1", "run_0"]
+    assert last["next_cursor"] is None
+    assert len(first["items"][0]["preview"]) == PREVIEW_CHARS + 3
+
+    assert [e["run_id"] for e in index.list(company_id="acme", min_score=0.2)["items"]] == ["run_4", "run_2"]
+    assert index.count(company_id="other") == 2
+
+
+def test_decision_moves_entry_out_of_pending(tmp_path):
+    """set_status records the decision and new location; the entry leaves the pending list."""
+    index = ApprovalsIndex(tmp_path / "approvals.db")
+    index.record("acme", "run_1", "# Dashboard", _metadata("acme", "run_1"),
+                 gcs_blob="data/dashboards/acme/pending_approval/run_1.md")
+
+    assert index.set_status("acme", "run_1", "approved", {"status": "approved"},
+                            gcs_blob="data/dashboards/acme/run_1.md")
+    assert index.count() == 0
+    entry = index.get("acme", "run_1")
+    assert entry["status"] == "approved"
+    assert entry["gcs_blob"] == "data/dashboards/acme/run_1.md"
+    assert index.set_status("acme", "missing", "rejected", {}) is False
+
+
+def test_backfill_indexes_existing_pending_files(tmp_path):
+    """Dashboards saved before the index existed are picked up from their JSON sidecars."""
+    pending = tmp_path / "dashboards" / "acme" / "pending_approval"
+    pending.mkdir(parents=True)
+    (pending / "due_diligence_run_1.md").write_text("# Acme", encoding="utf-8")
+    (pending / "due_diligence_run_1.json").write_text(json.dumps(_metadata("acme", "run_1")), encoding="utf-8")
+
+    index = ApprovalsIndex(tmp_path / "approvals.db")
+    assert index.backfill_from_directory(tmp_path / "dashboards") == 1
+    assert index.list()["items"][0]["local_path"].endswith("due_diligence_run_1.md")
+
+
+def test_backfill_takes_status_from_folder(tmp_path):
+    """A dashboard's folder decides its status even when the sidecar still says pending."""
+    company_dir = tmp_path / "dashboards" / "acme"
+    for folder, run_id in ((company_dir / "rejected", "run_1"), (company_dir, "run_2"),
+                           (company_dir / "pending_approval", "run_3")):
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"due_diligence_{run_id}.md").write_text("# Acme", encoding="utf-8")
+        (folder / f"due_diligence_{run_id}.json").write_text(
+            json.dumps(_metadata("acme", run_id, status="pending")), encoding="utf-8")
+
+    index = ApprovalsIndex(tmp_path / "approvals.db")
+    assert index.backfill_from_directory(tmp_path / "dashboards") == 3
+
+    assert index.get("acme", "run_1")["status"] == "rejected"
+    assert index.get("acme", "run_2")["status"] == "approved"
+    assert [e["run_id"] for e in index.list()["items"]] == ["run_3"]
+
+
+def test_reconcile_picks_up_dashboards_saved_outside_the_index(tmp_path):
+    """Only files that are new or not yet indexed are read when the directory changes."""
+    pending = tmp_path / "dashboards" / "acme" / "pending_approval"
+    pending.mkdir(parents=True)
+    (pending / "due_diligence_run_1.md").write_text("# Acme 1", encoding="utf-8")
+    (pending / "due_diligence_run_1.json").write_text(json.dumps(_metadata("acme", "run_1")), encoding="utf-8")
+    index = ApprovalsIndex(tmp_path / "approvals.db")
+    assert index.reconcile_with_directory(tmp_path / "dashboards") == 1
+    assert index.reconcile_with_directory(tmp_path / "dashboards") == 0
+
+    (pending / "due_diligence_run_2.md").write_text("# Acme 2", encoding="utf-8")
+    (pending / "due_diligence_run_2.json").write_text(json.dumps(_metadata("acme", "run_2")), encoding="utf-8")
+
+    assert index.reconcile_with_directory(tmp_path / "dashboards") == 1
+    assert index.count() == 2
+
+
+def test_reconcile_keeps_decision_metadata(tmp_path):
+    """A decided dashboard moved on disk keeps the decision's metadata; the stale sidecar is not re-read into it."""
+    company_dir = tmp_path / "dashboards" / "acme"
+    pending = company_dir / "pending_approval"
+    pending.mkdir(parents=True)
+    (pending / "due_diligence_run_1.md").write_text("# Acme", encoding="utf-8")
+    (pending / "due_diligence_run_1.json").write_text(json.dumps(_metadata("acme", "run_1")), encoding="utf-8")
+    index = ApprovalsIndex(tmp_path / "approvals.db")
+    index.reconcile_with_directory(tmp_path / "dashboards")
+
+    decision = dict(_metadata("acme", "run_1", status="approved"), approved_by="analyst", notes="ok")
+    assert index.set_status("acme", "run_1", "approved", decision)
+    for f in pending.iterdir():
+        f.rename(company_dir / f.name)
+
+    assert index.reconcile_with_directory(tmp_path / "dashboards") == 0
+    entry = index.get("acme", "run_1")
+    assert entry["status"] == "approved"
+    assert entry["metadata"]["approved_by"] == "analyst" and entry["metadata"]["notes"] == "ok"
+    assert entry["local_path"] == str(company_dir / "due_diligence_run_1.md")
@@ -0,0 +1,63 @@
+"""
+Unit tests for the heading-aware, token-sized section chunker.
+
+Token counts are stubbed as one token per word so results are deterministic.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to Python path (rag modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from chunker import SectionChunker, parse_sections
+from sectionizer import html_to_structured_text
+
+
+def _chunker(max_tokens=20, overlap_tokens=0):
+    chunker = SectionChunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    chunker.count_tokens_batch = lambda texts: [len(text.split()) for text in texts]
+    return chunker
+
+
+def test_parse_sections_tracks_heading_path():
+    """Nested headings produce a heading path; text before any heading has an empty path."""
+    sections = parse_sections("intro line\n# About\nwho we are\n## Team\nfounders\n# Product\nthe app")
+
+    assert [s.heading_path for s in sections] == [(), ("About",), ("About", "Team"), ("Product",)]
+    assert sections[2].units == ["founders"]
+
+
+def test_small_sections_are_packed_and_large_ones_split():
+    """Neighbouring small sections share a chunk; an oversized section spans several chunks."""
+    text = "# About\n## Team\nfour words right here\n## Values\nthree words here\n# Careers\n" + \
+        "\n".join(f"line {i} has five words" for i in range(10))
+
+    chunks = _chunker(max_tokens=20).chunk(text, {'source_type': 'about'})
+
+    assert chunks[0].metadata['heading_path'] == "About"
+    assert "## Team" in chunks[0].page_content and "## Values" in chunks[0].page_content
+    careers = [c for c in chunks if c.metadata['heading_path'] == "Careers"]
+    assert len(careers) > 1
+    assert all(c.metadata['chunk_tokens'] <= 20 for c in chunks)
+    assert all(c.metadata['source_type'] == 'about' for c in chunks)
+
+
+def test_long_paragraph_is_split_into_sentences_with_overlap():
+    """A single paragraph over the limit is split on sentences, repeating the tail as overlap."""
+    paragraph = " ".join(f"Sentence number {i} ends." for i in range(12))
+
+    chunks = _chunker(max_tokens=12, overlap_tokens=4).chunk(paragraph)
+
+    assert len(chunks) > 1
+    assert chunks[1].page_content.startswith(chunks[0].page_content.splitlines()[-1])
+
+
+def test_sectionizer_keeps_div_text_when_requested():
+    """include_all_text keeps text held in divs, not just p/li siblings of headings."""
+    html = "<html><body><h1>Acme</h1><div>Built for teams</div><h2>Pricing</h2><p>Free tier</p></body></html>"
+
+    assert html_to_structured_text(html, include_all_text=True).splitlines() == [
+        "# Acme", "Built for teams", "## Pricing", "Free tier"
+    ]
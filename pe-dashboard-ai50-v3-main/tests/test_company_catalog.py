@@ -0,0 +1,83 @@
+"""
+Tests for the in-memory company catalog and its ETag-served MCP resource.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Add src to Python path (server modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+import company_catalog
+import result_cache
+from company_catalog import CompanyCatalog
+from server import mcp_server
+
+
+def _write_seed(path, names):
+    path.write_text(json.dumps([{"company_name": name} for name in names]), encoding="utf-8")
+    # Make sure the (mtime, size) signature changes even on coarse-mtime filesystems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def _catalog(tmp_path, monkeypatch, dashboards=None):
+    monkeypatch.setattr(result_cache, "GENERATIONS_DIR", tmp_path / "_generations")
+    payloads = tmp_path / "payloads"
+    payloads.mkdir()
+    (payloads / "acme-ai.json").write_text("{}", encoding="utf-8")
+    seed = tmp_path / "seed.json"
+    _write_seed(seed, ["Acme AI", "Beta Labs"])
+    return CompanyCatalog(
+        seed_file=seed,
+        payloads_dir=payloads,
+        dashboard_lookup=lambda: dashboards or {},
+        refresh_interval=0
+    ), seed
+
+
+def test_catalog_rebuilds_only_when_sources_change(tmp_path, monkeypatch):
+    """Unchanged sources keep the snapshot (and ETag); seed edits and re-ingests rebuild it."""
+    dashboards = {"acme-ai": {"generated_at": "2025-11-21T05:00:00+00:00", "status": "approved"}}
+    catalog, seed = _catalog(tmp_path, monkeypatch, dashboards)
+
+    first = catalog.snapshot()
+    assert first["companies"] == ["acme-ai", "beta-labs"]
+    assert first["details"]["acme-ai"]["payload_available"] is True
+    assert first["details"]["beta-labs"]["payload_available"] is False
+    assert first["details"]["acme-ai"]["last_dashboard_status"] == "approved"
+    assert catalog.snapshot() is first
+
+    result_cache.bump_company_generation("beta-labs")
+    refreshed = catalog.snapshot()
+    assert refreshed["etag"] != first["etag"]
+    assert refreshed["details"]["beta-labs"]["data_updated_at"] is not None
+
+    _write_seed(seed, ["Acme AI", "Beta Labs", "Gamma"])
+    assert catalog.snapshot()["companies"] == ["acme-ai", "beta-labs", "gamma"]
+    assert catalog.rebuilds == 3
+
+
+def test_resource_answers_304_for_matching_etag(tmp_path, monkeypatch):
+    """The MCP resource sends an ETag and a bodyless 304 when the client already has it."""
+    catalog, _ = _catalog(tmp_path, monkeypatch)
+    monkeypatch.setattr(company_catalog, "_catalog", catalog)
+    client = TestClient(mcp_server.app)
+
+    response = client.get("/resource/ai50/companies")
+    assert response.status_code == 200
+    assert response.json()["companies"] == ["acme-ai", "beta-labs"]
+    assert response.json()["details"] is None
+
+    revalidated = client.get("/resource/ai50/companies", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    detailed = client.get("/resource/ai50/companies?details=true", headers={"If-None-Match": response.headers["ETag"]})
+    assert detailed.status_code == 200
+    assert set(detailed.json()["details"]) == {"acme-ai", "beta-labs"}
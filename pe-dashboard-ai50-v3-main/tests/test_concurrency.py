@@ -0,0 +1,112 @@
+"""
+Unit tests for the per-upstream concurrency limiters and single-flight groups
+used by the API and MCP servers.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add src to Python path (server modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from concurrency import SingleFlight, UpstreamLimiter, get_limiter, run_in_thread
+
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_in_flight_calls():
+    """No more than `limit` calls run at once; the rest wait."""
+    limiter = UpstreamLimiter("test", limit=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[call() for _ in range(10)])
+
+    assert peak == 2
+    assert limiter.stats()['total'] == 10
+    assert limiter.in_flight == 0 and limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_run_in_thread_keeps_event_loop_responsive():
+    """A blocking call offloaded with run_in_thread does not stall other coroutines."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    started = time.monotonic()
+    result, _ = await asyncio.gather(run_in_thread("blocking-test", time.sleep, 0.2), ticker())
+
+    assert result is None
+    assert ticks == 5
+    assert time.monotonic() - started < 0.5
+
+
+def test_get_limiter_reads_env_override(monkeypatch):
+    """<NAME>_MAX_CONCURRENCY sets the limit for a new upstream."""
+    monkeypatch.setenv("ENVTEST_MAX_CONCURRENCY", "3")
+    assert get_limiter("envtest").limit == 3
+    assert get_limiter("envtest") is get_limiter("envtest")
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_identical_calls():
+    """N concurrent calls for one key run the work once; other keys run separately."""
+    group = SingleFlight("test")
+    executions = []
+
+    async def work(key):
+        executions.append(key)
+        await asyncio.sleep(0.02)
+        return f"dashboard:{key}"
+
+    results = await asyncio.gather(
+        *[group.do("acme", lambda: work("acme")) for _ in range(5)],
+        group.do("other", lambda: work("other"))
+    )
+
+    assert results == ["dashboard:acme"] * 5 + ["dashboard:other"]
+    assert executions == ["acme", "other"]
+    assert group.stats() == {'calls': 6, 'executions': 2, 'coalesced': 4, 'errors': 0, 'in_flight': 0}
+
+    # Finished flights are not reused
+    assert await group.do("acme", lambda: work("acme")) == "dashboard:acme"
+    assert group.stats()['executions'] == 3
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors_and_survives_cancelled_caller():
+    """Errors reach every waiter; cancelling one waiter does not cancel the work."""
+    group = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.02)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(*[group.do("k", failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert group.stats()['errors'] == 1
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(group.do("slow", slow))
+    second = asyncio.create_task(group.do("slow", slow))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
@@ -0,0 +1,132 @@
+"""
+Unit tests for the embedding scheduler used by the RAG ingestion pipeline.
+
+Uses a fake embeddings object so no OpenAI calls are made.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src to Python path (rag modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from embedding_scheduler import EmbeddingScheduler, RateLimiter, is_rate_limit_error
+
+
+class FakeRateLimitError(Exception):
+    """Mimics an HTTP 429 raised by the OpenAI client."""
+    status_code = 429
+
+
+class FakeEmbeddings:
+    """Returns one-dimensional vectors equal to the text length."""
+
+    def __init__(self, fail_first: int = 0):
+        self.calls = []
+        self.fail_first = fail_first
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                raise FakeRateLimitError("rate limited")
+        return [[float(len(t))] for t in texts]
+
+
+def _scheduler(embeddings, **kwargs):
+    scheduler = EmbeddingScheduler(embeddings, base_backoff=0.0, max_backoff=0.0, **kwargs)
+    scheduler.count_tokens = lambda text: len(text)
+    return scheduler
+
+
+def test_make_batches_respects_token_and_size_limits():
+    """Batches never exceed max_batch_tokens or max_batch_size."""
+    scheduler = _scheduler(FakeEmbeddings(), max_batch_tokens=10, max_batch_size=3)
+    texts = ["aaaa", "bbbb", "cc", "d", "e", "f", "gggggggggg"]
+
+    batches = scheduler.make_batches(texts)
+
+    assert [indices for indices, _ in batches] == [[0, 1, 2], [3, 4, 5], [6]]
+    for indices, tokens in batches:
+        assert len(indices) <= 3
+        assert tokens <= 10
+
+
+def test_embed_all_preserves_input_order():
+    """Concurrent batches are reassembled in input order."""
+    texts = ["x" * n for n in range(1, 21)]
+    scheduler = _scheduler(FakeEmbeddings(), max_batch_size=4, max_workers=4)
+
+    vectors = scheduler.embed_all(texts)
+
+    assert vectors == [[float(n)] for n in range(1, 21)]
+
+
+def test_embed_stream_retries_rate_limit_errors():
+    """A 429 is retried and the batch still succeeds."""
+    embeddings = FakeEmbeddings(fail_first=2)
+    scheduler = _scheduler(embeddings, max_batch_size=10, max_workers=1)
+
+    results = list(scheduler.embed_stream(["one", "two"]))
+
+    assert len(results) == 1
+    indices, vectors, batch_stats = results[0]
+    assert indices == [0, 1]
+    assert vectors == [[3.0], [3.0]]
+    assert batch_stats['retries'] == 2
+
+
+def test_embed_stream_reports_failed_batch_without_stopping():
+    """A non-retryable failure is reported per batch; other batches still land."""
+
+    class BrokenOnce(FakeEmbeddings):
+        def embed_documents(self, texts):
+            if "bad" in texts:
+                raise ValueError("boom")
+            return super().embed_documents(texts)
+
+    scheduler = _scheduler(BrokenOnce(), max_batch_size=1, max_workers=2)
+    results = {tuple(i): (v, s) for i, v, s in scheduler.embed_stream(["ok", "bad", "fine"])}
+
+    assert results[(1,)][0] is None
+    assert "boom" in results[(1,)][1]['error']
+    assert results[(0,)][0] == [[2.0]]
+    assert results[(2,)][0] == [[4.0]]
+
+
+def test_is_rate_limit_error():
+    """429s are recognised from status_code; other errors are not."""
+    assert is_rate_limit_error(FakeRateLimitError())
+    assert not is_rate_limit_error(ValueError("nope"))
+
+
+def test_rate_limiter_allows_requests_within_budget():
+    """Requests inside the RPM/TPM budget do not block."""
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    for _ in range(5):
+        limiter.acquire(100)
+    assert limiter._request_allowance < 60
+    assert limiter._token_allowance <= 500.1
+
+
+def test_concurrent_penalties_share_one_pause():
+    """Several workers penalizing at once pause everyone once, not once per worker."""
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    workers = [threading.Thread(target=limiter.penalize, args=(0.2,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    started = time.monotonic()
+    limiter.acquire(100)
+    waited = time.monotonic() - started
+
+    assert 0.1 <= waited < 0.5
+    # The pause does not eat into the budget
+    assert limiter._request_allowance >= 58
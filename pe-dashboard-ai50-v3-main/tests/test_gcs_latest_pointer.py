@@ -0,0 +1,57 @@
+"""
+Tests for the latest-dashboard pointer in DashboardStorage.
+
+Uses the in-memory backend, which counts list and download calls, so no
+credentials are needed (see test_gcs_upload.py for the live test).
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to Python path
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+import storage.gcs_client as gcs_client
+from storage.backends import MemoryBucket
+from storage.gcs_client import DashboardStorage
+
+
+def _storage(monkeypatch, bucket=None, ttl=0):
+    monkeypatch.setattr(gcs_client, "LATEST_POINTER_TTL_SECONDS", ttl)
+    return DashboardStorage("test-bucket", bucket=bucket or MemoryBucket("test-bucket"))
+
+
+def test_latest_dashboard_uses_pointer_without_listing(monkeypatch):
+    """After a save, lookups read only the pointer, and nothing when it is unchanged."""
+    storage = _storage(monkeypatch)
+    storage.save_dashboard("acme", "# v1")
+    storage.save_dashboard("acme", "# v2")
+
+    # A second process: one pointer read + one dashboard read, then nothing while unchanged
+    fresh = _storage(monkeypatch, bucket=storage.bucket)
+    ops = storage.bucket.ops
+    ops.clear()
+    assert fresh.get_latest_dashboard("acme") == "# v2"
+    assert ops["download"] == 2
+
+    ops.clear()
+    assert fresh.get_latest_dashboard("acme") == "# v2"
+    assert ops["download"] == 1  # conditional pointer read answered "not modified"
+    assert ops["list"] == 0
+
+    # A save from another process moves the pointer; the next read follows it
+    storage.save_dashboard("acme", "# v3")
+    assert fresh.get_latest_dashboard("acme") == "# v3"
+
+
+def test_legacy_company_falls_back_to_listing_once(monkeypatch):
+    """Dashboards saved before pointers existed are found by listing, which backfills the pointer."""
+    storage = _storage(monkeypatch)
+    storage.bucket.blob("data/dashboards/acme/unified_20250101_000000.md").upload_from_string("# old")
+    storage.bucket.blob("data/dashboards/acme/unified_20250102_000000.md").upload_from_string("# newer")
+
+    assert storage.get_latest_dashboard("acme") == "# newer"
+    assert storage.get_latest_dashboard("acme") == "# newer"
+    assert storage.bucket.ops["list"] == 1
+    assert storage.bucket.blob("data/dashboards/acme/latest_unified.json").exists()
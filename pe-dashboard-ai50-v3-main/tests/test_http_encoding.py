@@ -0,0 +1,70 @@
+"""
+Tests for negotiated response compression, compact JSON and `fields=` selection.
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from http_encoding import (
+    CompactJSONResponse, enable_compression, negotiate_encoding, select_fields
+)
+
+
+def _app():
+    app = FastAPI(default_response_class=CompactJSONResponse)
+    enable_compression(app, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return {"items": [{"id": i, "text": "dashboard " * 20} for i in range(50)]}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: x\n\n"] * 200), media_type="text/event-stream")
+
+    return app
+
+
+def test_compression_is_negotiated_and_skips_small_bodies_and_sse():
+    """Large JSON is gzipped when accepted; small bodies, SSE and identity clients are left alone."""
+    client = TestClient(_app())
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()["items"]) == 50
+    # httpx decodes the body; the header is the compressed size on the wire
+    assert int(response.headers["content-length"]) < len(response.content) / 5
+
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/events", headers={"Accept-Encoding": "gzip"}).headers
+
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+
+
+def test_select_fields_trims_nested_paths_and_lists():
+    """Dotted paths keep nested keys; lists are trimmed per item; unknown fields are ignored."""
+    entries = [
+        {"company_id": "abridge", "preview": "...", "metadata": {"status": "pending", "risk_details": [1, 2]}},
+        {"company_id": "anthropic", "metadata": {"status": "approved"}},
+    ]
+
+    assert select_fields(entries, "company_id, metadata.status, missing") == [
+        {"company_id": "abridge", "metadata": {"status": "pending"}},
+        {"company_id": "anthropic", "metadata": {"status": "approved"}},
+    ]
+    assert select_fields(entries, None) is entries
+    assert select_fields(entries, " , ") is entries
@@ -0,0 +1,207 @@
+"""
+Unit tests for parallel company ingestion and its JSONL stats stream.
+
+A fake VectorStore stands in for ChromaDB/OpenAI; no network calls are made.
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add src to Python path (ingestion modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+import ingest_companies
+from chunker import SectionChunker
+from ingest_companies import StatsSink, ingest_companies_parallel, summarize_records
+from quantized_index import QuantizedIndex
+from rag_pipeline import VectorStore
+
+
+class FakeVectorStore:
+    """Records which companies were ingested; raises for the ones listed in fail."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def ingest_company_data(self, company_name, scraped_data, force_refresh=False):
+        with self._lock:
+            self.calls.append(company_name)
+        if company_name in self.fail:
+            raise RuntimeError(f"embedding failed for {company_name}")
+        return {
+            'sources_processed': 2,
+            'bytes_processed': 1000,
+            'chunks_created': 10,
+            'chunks_stored': 8,
+            'embed_batches': 1,
+            'embed_retries': 0,
+            'tokens_embedded': 500,
+            'embed_seconds': 0.5,
+            'errors': []
+        }
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    """data/raw with one empty directory per company; cache invalidation is recorded, not written."""
+    bumped = []
+    monkeypatch.setattr(ingest_companies, "bump_company_generation", bumped.append)
+    for company in ("acme", "globex", "initech", "umbrella"):
+        (tmp_path / "raw" / company).mkdir(parents=True)
+    return tmp_path / "raw"
+
+
+def test_parallel_ingest_records_each_company_once(raw_dir):
+    """With several workers every company is ingested exactly once and gets one record."""
+    store = FakeVectorStore()
+    companies = ["acme", "globex", "initech", "umbrella"]
+
+    records = ingest_companies_parallel(companies, raw_dir, store, workers=3)
+
+    assert sorted(store.calls) == companies
+    assert sorted(r['company'] for r in records) == companies
+    assert all(r['status'] == 'success' and r['chunks_skipped'] == 2 for r in records)
+
+
+def test_failing_company_is_recorded_without_aborting_the_pool(raw_dir, monkeypatch):
+    """A company that raises (inside or outside the stats wrapper) becomes a failed record."""
+    store = FakeVectorStore(fail={"globex"})
+    original = ingest_companies.ingest_company_with_stats
+
+    def flaky(company_name, *args):
+        if company_name == "initech":
+            raise MemoryError("worker crashed")
+        return original(company_name, *args)
+
+    monkeypatch.setattr(ingest_companies, "ingest_company_with_stats", flaky)
+
+    records = {r['company']: r for r in ingest_companies_parallel(
+        ["acme", "globex", "initech", "umbrella"], raw_dir, store, workers=2)}
+
+    assert set(records) == {"acme", "globex", "initech", "umbrella"}
+    assert records["acme"]['status'] == records["umbrella"]['status'] == 'success'
+    assert records["globex"]['status'] == 'failed'
+    assert records["globex"]['errors'] == ["RuntimeError: embedding failed for globex"]
+    assert records["initech"]['status'] == 'failed'
+    assert records["initech"]['errors'] == ["MemoryError: worker crashed"]
+
+
+def test_stats_sink_writes_company_lines_and_summary(raw_dir, tmp_path):
+    """The JSONL stream has one line per company followed by the summary line."""
+    sink = StatsSink(tmp_path / "stats" / "ingest.jsonl")
+    records = ingest_companies_parallel(["acme", "globex"], raw_dir, FakeVectorStore(), workers=2, sink=sink)
+    sink.write(summarize_records(records, elapsed=1.0))
+    sink.close()
+
+    lines = [json.loads(line) for line in (tmp_path / "stats" / "ingest.jsonl").read_text().splitlines()]
+
+    assert [line['event'] for line in lines] == ['company', 'company', 'summary']
+    assert sorted(line['company'] for line in lines[:2]) == ["acme", "globex"]
+    assert all('timestamp' in line for line in lines)
+    assert lines[2]['companies'] == 2 and lines[2]['chunks_stored'] == 16
+
+
+def test_summarize_records_totals_and_percentiles():
+    """Totals add up per status and counter; percentiles use nearest rank."""
+    records = []
+    for i in range(1, 21):
+        record = ingest_companies._empty_record(f"c{i}")
+        record.update(status='success' if i <= 18 else 'failed', chunks_created=10, chunks_stored=9,
+                      chunks_skipped=1, bytes=100, tokens_embedded=50, embed_retries=i % 2,
+                      elapsed_s=float(i), embed_latency_s=i / 10)
+        records.append(record)
+    records.append(dict(ingest_companies._empty_record("empty"), status='no_data'))
+
+    summary = summarize_records(records, elapsed=12.3456)
+
+    assert (summary['companies'], summary['success'], summary['failed'], summary['no_data']) == (21, 18, 2, 1)
+    assert (summary['chunks_created'], summary['chunks_stored'], summary['chunks_skipped']) == (200, 180, 20)
+    assert (summary['bytes'], summary['tokens_embedded'], summary['embed_retries']) == (2000, 1000, 10)
+    # 21 values (0.0 for the no_data record, then 1..20): ranks 11 and 20
+    assert summary['company_elapsed_p50_s'] == 10.0
+    assert summary['company_elapsed_p95_s'] == 19.0
+    assert summary['embed_latency_p95_s'] == pytest.approx(1.9)
+    assert summary['elapsed_s'] == 12.346
+    assert summarize_records([], elapsed=0)['company_elapsed_p95_s'] == 0.0
+
+
+class FakeCollection:
+    """Dict-backed stand-in for a ChromaDB collection."""
+
+    def __init__(self, rows=None):
+        self.rows = dict(rows or {})
+
+    def get(self, where=None, include=None):
+        ids = [i for i, row in self.rows.items()
+               if not where or row['metadata'].get('company_name') == where.get('company_name')]
+        return {'ids': ids, 'metadatas': [self.rows[i]['metadata'] for i in ids]}
+
+    def delete(self, ids):
+        for i in ids:
+            self.rows.pop(i, None)
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        for i, document, metadata in zip(ids, documents, metadatas):
+            self.rows[i] = {'document': document, 'metadata': metadata}
+
+
+class FakeScheduler:
+    """Embeds every text as the same unit vector in one batch."""
+
+    def embed_stream(self, texts):
+        yield list(range(len(texts))), [[1.0, 0.0, 0.0]] * len(texts), {'retries': 0, 'tokens': len(texts)}
+
+
+def _vector_store(collection):
+    """A VectorStore wired to fakes, skipping the ChromaDB/OpenAI clients built in __init__."""
+    store = VectorStore.__new__(VectorStore)
+    store.collection = collection
+    store.chunking = 'sections'
+    store.section_chunker = SectionChunker()
+    store.local_index = None
+    store.embedding_scheduler = FakeScheduler()
+    return store
+
+
+def test_force_refresh_keeps_chunks_when_company_has_no_usable_data(raw_dir):
+    """Stub-only scrapes are reported as no_data without deleting the chunks already stored."""
+    (raw_dir / "acme" / "2025-11-20").mkdir()
+    (raw_dir / "acme" / "2025-11-20" / "about.txt").write_text("Not found", encoding="utf-8")
+    collection = FakeCollection({"old": {'metadata': {'company_name': 'acme'}}})
+
+    record = ingest_companies.ingest_company_with_stats("acme", raw_dir, _vector_store(collection),
+                                                        force_refresh=True)
+
+    assert record['status'] == 'no_data'
+    assert set(collection.rows) == {"old"}
+
+
+def test_reingest_replaces_chunks_in_chroma_and_local_index():
+    """A shorter new version of a source overwrites its chunks and drops the old extra ones everywhere."""
+    collection = FakeCollection()
+    store = _vector_store(collection)
+    store.local_index = QuantizedIndex()
+    long_text = "\n\n".join(f"Old paragraph {i}. " + "word " * 150 for i in range(6))
+
+    def ingest(text, source_type="about"):
+        return store.ingest_company_data(
+            "acme", [{'source_type': source_type, 'text': text, 'source_url': 'https://acme.example'}]
+        )
+
+    assert ingest(long_text)['chunks_stored'] > 1
+    ingest("Acme now builds rockets. " * 5, source_type="news")
+    assert ingest("Acme builds robots. " * 5)['chunks_stored'] == 1
+
+    about = {i: row for i, row in collection.rows.items() if row['metadata']['source_type'] == 'about'}
+    assert [row['document'] for row in about.values()] == [("Acme builds robots. " * 5).strip()]
+    assert len(collection.rows) == 2
+    assert len(store.local_index) == 2
+    local = store.local_index.search([1.0, 0.0, 0.0], top_k=5, company_name="acme", source_type="about")
+    assert [r['text'] for r in local] == [row['document'] for row in about.values()]
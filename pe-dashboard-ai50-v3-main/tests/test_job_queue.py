@@ -0,0 +1,115 @@
+"""
+Unit tests for the SQLite job queue and worker pool behind /jobs/dashboard.
+
+Each test uses its own database under tmp_path.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add src to Python path (server modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+import job_queue
+from job_queue import JobQueue, JobWorkerPool
+
+
+def test_claim_order_and_dedupe(tmp_path):
+    """Higher priority is claimed first; an active duplicate is reused, not re-queued."""
+    queue = JobQueue(tmp_path / "jobs.db")
+    low, _ = queue.submit("dashboard", {"company_id": "acme"}, dedupe_key="acme")
+    high, _ = queue.submit("dashboard", {"company_id": "other"}, priority=5, dedupe_key="other")
+    again, deduplicated = queue.submit("dashboard", {"company_id": "acme"}, dedupe_key="acme")
+
+    assert deduplicated and again["id"] == low["id"]
+    assert queue.counts()["queued"] == 2
+
+    assert queue.claim()["id"] == high["id"]
+    claimed = queue.claim()
+    assert claimed["id"] == low["id"] and claimed["status"] == "running"
+    assert queue.claim() is None
+
+    queue.complete(low["id"], {"result": "# Dashboard"})
+    assert queue.get(low["id"])["result"] == {"result": "# Dashboard"}
+    # Finished jobs no longer absorb new submissions
+    assert queue.submit("dashboard", {"company_id": "acme"}, dedupe_key="acme")[1] is False
+
+
+def test_expired_lease_is_reclaimed_and_retries_are_bounded(tmp_path):
+    """A job whose worker died is claimed again; fail() re-queues until max_attempts."""
+    queue = JobQueue(tmp_path / "jobs.db", lease_seconds=0)
+    job, _ = queue.submit("dashboard", {}, max_attempts=2)
+
+    assert queue.claim()["attempts"] == 1
+    time.sleep(0.01)
+    assert queue.claim()["attempts"] == 2
+
+    assert queue.fail(job["id"], "boom") is False
+    failed = queue.get(job["id"])
+    assert failed["status"] == "failed" and failed["error"] == "boom"
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_jobs(tmp_path):
+    """Workers run handlers concurrently and record results and errors."""
+    queue = JobQueue(tmp_path / "jobs.db")
+
+    async def handler(params):
+        await asyncio.sleep(0.05)
+        if params.get("fail"):
+            raise RuntimeError("no payload")
+        return {"company_id": params["company_id"]}
+
+    pool = JobWorkerPool(queue, {"dashboard": handler}, workers=3, poll_interval=0.01)
+    ok = [queue.submit("dashboard", {"company_id": f"c{i}"})[0] for i in range(3)]
+    bad, _ = queue.submit("dashboard", {"company_id": "x", "fail": True})
+
+    pool.start()
+    try:
+        for _ in range(200):
+            if queue.counts()["succeeded"] + queue.counts()["failed"] == 4:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+
+    assert [queue.get(job["id"])["result"] for job in ok] == [{"company_id": f"c{i}"} for i in range(3)]
+    assert queue.get(bad["id"])["error"] == "no payload"
+
+
+def test_expired_lease_without_attempts_left_fails(tmp_path):
+    """A job whose worker keeps dying is failed once max_attempts runs are used, not retried forever."""
+    queue = JobQueue(tmp_path / "jobs.db", lease_seconds=0)
+    job, _ = queue.submit("dashboard", {}, max_attempts=1)
+
+    assert queue.claim()["attempts"] == 1
+    time.sleep(0.01)
+    assert queue.claim() is None
+
+    failed = queue.get(job["id"])
+    assert failed["status"] == "failed" and failed["attempts"] == 1
+    assert "Lease expired" in failed["error"]
+    assert queue.counts()["running"] == 0
+
+
+def test_callback_url_must_be_public_http(tmp_path, monkeypatch):
+    """Callbacks to other schemes or internal addresses are refused; an allowlist overrides the check."""
+    queue = JobQueue(tmp_path / "jobs.db")
+    for url in ("ftp://example.com/hook", "http://127.0.0.1:8000/hook", "http://10.1.2.3/hook",
+                "http://169.254.169.254/latest/meta-data", "http://[::1]/hook"):
+        with pytest.raises(ValueError):
+            queue.submit("dashboard", {}, callback_url=url)
+    assert queue.counts()["queued"] == 0
+
+    job, _ = queue.submit("dashboard", {}, callback_url="https://93.184.216.34/hook")
+    assert job["callback_url"] == "https://93.184.216.34/hook"
+
+    monkeypatch.setattr(job_queue, "CALLBACK_ALLOWED_HOSTS", {"hooks.internal"})
+    assert job_queue.validate_callback_url("http://hooks.internal/done") == "http://hooks.internal/done"
+    with pytest.raises(ValueError):
+        job_queue.validate_callback_url("https://93.184.216.34/hook")
@@ -0,0 +1,82 @@
+"""
+Tests for the in-process metrics registry, stage timing and the /metrics endpoint.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import metrics
+from metrics import STAGE_ERRORS, STAGE_SECONDS, Histogram, instrument_app, record_llm_usage, stats_families, timed
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative with a +Inf bucket, and _sum/_count match the observations."""
+    hist = Histogram("test_latency_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        hist.observe(value, stage="llm")
+
+    lines = hist.render()
+    assert 'test_latency_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="llm",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="llm",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="llm"} 3' in lines
+
+    with pytest.raises(ValueError):
+        hist.observe(1.0, tool="x")
+
+
+def test_nested_stages_inherit_tool_and_count_errors():
+    """A tool set on the outer block labels inner stages (and LLM usage); failures are counted."""
+    tool = "test_metrics_tool"
+    with timed("total", tool=tool):
+        with timed("retrieval"):
+            pass
+        with pytest.raises(KeyError):
+            with timed("render"):
+                raise KeyError("missing")
+
+        class Usage:
+            prompt_tokens = 120
+            completion_tokens = 30
+
+        record_llm_usage("test-model", Usage())
+
+    assert metrics.current_tool() == "none"
+    assert STAGE_SECONDS.count(tool=tool, stage="retrieval") == 1
+    assert STAGE_SECONDS.count(tool=tool, stage="total") == 1
+    assert STAGE_ERRORS.value(tool=tool, stage="render", error="KeyError") == 1
+    assert metrics.LLM_TOKENS.value(model="test-model", kind="prompt") == 120
+    assert metrics.LLM_CALLS.value(model="test-model", tool=tool) == 1
+
+
+def test_metrics_endpoint_exposes_routes_and_stats():
+    """The app gets per-route request metrics; stats snapshots become counters, gauges and hit ratios."""
+    app = FastAPI()
+    instrument_app(app, "test_app")
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    text = client.get("/metrics").text
+
+    assert 'pe_http_requests_total{app="test_app",method="GET",route="/items/{item_id}",status="200"} 2' in text
+    assert "pe_stage_duration_seconds_bucket" in text
+
+    families = {name: (metric_type, samples) for name, metric_type, _, samples in stats_families(
+        "pe_cache", "cache", {"mcp_rag": {"entries": 2, "hits": 3, "disk_hits": 1, "misses": 4}}
+    )}
+    assert families["pe_cache_hits_total"] == ("counter", [({"cache": "mcp_rag"}, 3)])
+    assert families["pe_cache_entries"][0] == "gauge"
+    # disk_hits are a subset of hits: 3 / (3 + 4)
+    assert families["pe_cache_hit_ratio"][1] == [({"cache": "mcp_rag"}, 3 / 7)]
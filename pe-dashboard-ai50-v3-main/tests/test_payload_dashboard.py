@@ -0,0 +1,66 @@
+"""
+Tests for the structured dashboard renderer (payload_dashboard.py).
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add src to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from models import Company, Event, Payload
+from payload_dashboard import SECTIONS, render_dashboard, render_many
+
+
+def _event(event_id, event_type, occurred_on, title):
+    return Event(event_id=event_id, company_id="acme", occurred_on=occurred_on, event_type=event_type, title=title)
+
+
+def test_sections_render_in_order_with_events_newest_first():
+    """All 8 sections appear once, in order, and event lists are newest first."""
+    payload = Payload(
+        company_record=Company(company_id="acme", legal_name="Acme Inc", brand_name="Acme", total_raised_usd=1.5e8),
+        events=[
+            _event("e1", "funding", date(2023, 1, 1), "Series A"),
+            _event("e2", "layoff", date(2024, 3, 1), "Cut 10% of staff"),
+            _event("e3", "funding", date(2024, 6, 1), "Series B"),
+            _event("e4", "partnership", date(2022, 5, 1), "Cloud partnership"),
+        ]
+    )
+
+    markdown = render_dashboard(payload, "acme")
+
+    headings = [line[3:] for line in markdown.splitlines() if line.startswith("## ")]
+    assert headings == [title for title, _ in SECTIONS] and len(headings) == 8
+    assert markdown.startswith("# PE Dashboard for Acme\n")
+    assert "**Total Raised:** $150,000,000 USD" in markdown
+    assert markdown.index("Series B") < markdown.index("Series A")
+    assert "- **Layoff** (2024-03-01): Cut 10% of staff" in markdown
+    assert "- Cloud partnership (2022-05-01)" in markdown
+    assert "- Leadership team details" in markdown
+
+
+def test_render_matches_legacy_golden_output():
+    """
+    Dashboards are byte-identical to the pre-refactor generate_dashboard_from_payload.
+
+    tests/golden/payload_dashboard holds payloads (copies of data/payloads plus a
+    synthetic one with risk events) next to the markdown the old server function
+    produced for them.
+    """
+    golden_dir = Path(__file__).parent / "golden" / "payload_dashboard"
+    payloads = {
+        path.stem: Payload.model_validate_json(path.read_text(encoding="utf-8"))
+        for path in sorted(golden_dir.glob("*.json"))
+    }
+    assert len(payloads) >= 5
+
+    dashboards = render_many(payloads)
+
+    assert list(dashboards) == list(payloads)
+    for company_id, markdown in dashboards.items():
+        expected = (golden_dir / f"{company_id}.md").read_bytes().decode("utf-8")
+        assert markdown == expected, company_id
+        assert render_dashboard(payloads[company_id], company_id) == expected
@@ -0,0 +1,78 @@
+"""
+Tests for the shared payload repository (validated-payload LRU with mtime / generation checks).
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from models import Payload
+from payload_repository import PayloadRepository
+from storage.backends import MemoryBucket
+
+SAMPLE_PAYLOAD = project_root / "data" / "payloads" / "abridge.json"
+
+
+def _repository(tmp_path, **kwargs):
+    shutil.copy(SAMPLE_PAYLOAD, tmp_path / "abridge.json")
+    return PayloadRepository(Payload, payload_dir=tmp_path, **kwargs)
+
+
+def test_repeat_loads_return_cached_payload_until_file_changes(tmp_path):
+    """A second load is a hit; touching the file re-reads and re-validates it."""
+    repository = _repository(tmp_path)
+
+    first = repository.get("abridge")
+    assert repository.get("abridge") is first
+    assert repository.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    path = tmp_path / "abridge.json"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = repository.get("abridge")
+
+    assert reloaded is not first
+    assert reloaded.company_record.company_id == first.company_record.company_id
+
+    with pytest.raises(FileNotFoundError, match="Payload not found"):
+        repository.get("missing-co")
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        repository.get("broken")
+
+
+def test_lru_evicts_and_preload_reports_failures(tmp_path):
+    """Preload fills the cache (reporting bad files) and the LRU stays within max_entries."""
+    repository = _repository(tmp_path, max_entries=1)
+    shutil.copy(SAMPLE_PAYLOAD, tmp_path / "abridge-copy.json")
+    (tmp_path / "broken.json").write_text("{}", encoding="utf-8")
+
+    errors = repository.preload()
+
+    assert list(errors) == ["broken"]
+    assert repository.stats()["entries"] == 1
+
+
+def test_gcs_mode_checks_generation_once_per_ttl():
+    """Blob payloads are downloaded once per generation and not re-checked inside the TTL."""
+    bucket = MemoryBucket("payloads")
+    blob = bucket.blob("data/payloads/abridge.json")
+    blob.upload_from_string(SAMPLE_PAYLOAD.read_text(encoding="utf-8"))
+    repository = PayloadRepository(Payload, bucket_getter=lambda: bucket, ttl_seconds=60)
+
+    first = repository.get("abridge")
+    bucket.ops.clear()
+    assert repository.get("abridge") is first
+    assert sum(bucket.ops.values()) == 0
+
+    repository.ttl_seconds = 0
+    blob.upload_from_string(SAMPLE_PAYLOAD.read_text(encoding="utf-8"))
+    assert repository.get("abridge") is not first
+    assert bucket.ops["download"] == 1
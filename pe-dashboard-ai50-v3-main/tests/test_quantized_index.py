@@ -0,0 +1,104 @@
+"""
+Unit tests for the in-process quantized vector index.
+
+Uses random vectors; no OpenAI or ChromaDB calls are made.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to Python path (rag modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from quantized_index import QuantizedIndex
+
+
+def _build(precision, n=200, dim=384, seed=0, keep_float32=False):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    index = QuantizedIndex(precision=precision, keep_float32=keep_float32)
+    index.add(
+        ids=[f"id{i}" for i in range(n)],
+        embeddings=vectors,
+        documents=[f"doc {i}" for i in range(n)],
+        metadatas=[{'company_name': 'acme' if i % 2 else 'globex', 'source_type': 'about', 'chunk_index': i}
+                   for i in range(n)]
+    )
+    return index, vectors
+
+
+def test_int8_search_finds_exact_match_and_filters_company():
+    """A stored vector is its own nearest neighbour, within the requested company only."""
+    index, vectors = _build("int8", keep_float32=True)
+
+    results = index.search(vectors[7], top_k=3, company_name='acme', rerank_top_n=10)
+
+    assert results[0]['text'] == "doc 7"
+    assert results[0]['distance'] < 1e-3
+    assert all(r['metadata']['company_name'] == 'acme' for r in results)
+
+
+def test_int8_storage_is_quarter_of_float32():
+    """Everything the int8 index holds in RAM is about a quarter of the float32 footprint."""
+    index, vectors = _build("int8", n=2000, dim=1536)
+    sizes = index.memory_bytes()
+
+    assert sizes['codes'] * 4 == vectors.nbytes
+    assert sizes['float32_resident'] == 0
+    assert sum(sizes.values()) <= vectors.nbytes / 4 * 1.01
+
+
+def test_upsert_and_delete_company():
+    """Re-adding an ID replaces the row; delete_company tombstones rows."""
+    index, vectors = _build("float16", n=10)
+    index.add(['id1'], [vectors[2]], ['replaced'], [{'company_name': 'acme', 'source_type': 'about'}])
+
+    assert len(index) == 10
+    assert index.search(vectors[2], top_k=1, company_name='acme')[0]['text'] == 'replaced'
+
+    assert index.delete_company('acme') == 5
+    assert not index.has_company('acme')
+    assert index.search(vectors[2], top_k=1, company_name='acme') == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """A saved index loads with memory-mapped float32 vectors and returns the same results."""
+    index, vectors = _build("int8", n=50, keep_float32=True)
+    index.save(tmp_path / "index")
+
+    loaded = QuantizedIndex.load(tmp_path / "index")
+
+    assert loaded.memory_bytes()['float32_resident'] == 0
+    assert loaded.search(vectors[3], top_k=1, rerank_top_n=5)[0]['text'] == "doc 3"
+
+
+def test_distance_matches_chromadb_l2():
+    """Local distances equal what the default (l2) ChromaDB collection returns for the same hits."""
+    chromadb = pytest.importorskip("chromadb")
+    index, vectors = _build("float32", n=20, dim=32)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection(
+        name="quantized_index_distance_test",
+        metadata={"description": "Forbes AI 50 company data with LangChain"}
+    )
+    collection.add(
+        ids=[f"id{i}" for i in range(len(unit))],
+        embeddings=unit.tolist(),
+        documents=[f"doc {i}" for i in range(len(unit))]
+    )
+    chroma = collection.query(query_embeddings=[unit[4].tolist()], n_results=5)
+    chroma_distances = dict(zip(chroma['documents'][0], chroma['distances'][0]))
+
+    local = index.search(vectors[4], top_k=5)
+
+    assert [r['text'] for r in local] == chroma['documents'][0]
+    for result in local:
+        assert result['distance'] == pytest.approx(chroma_distances[result['text']], abs=1e-4)
+        expected = float(np.sum((unit[4] - unit[int(result['text'].split()[1])]) ** 2))
+        assert result['distance'] == pytest.approx(expected, abs=1e-4)
@@ -0,0 +1,51 @@
+"""
+Tests for the MCP server's RAG context builder (vector search is stubbed).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add src to Python path (server modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from server import mcp_server
+
+
+def test_section_searches_run_concurrently(monkeypatch):
+    """All section searches overlap, and each section reports its own timing."""
+    queries = []
+
+    async def fake_search(company_id, query, top_k):
+        queries.append(query)
+        await asyncio.sleep(0.05)
+        return [{"text": f"{company_id} detail about {query} " * 3}]
+
+    monkeypatch.setattr(mcp_server, "rag_search_company", fake_search)
+
+    context, chunks, retrieval = asyncio.run(mcp_server.build_rag_context("acme", top_k=3))
+
+    sections = len(mcp_server.RAG_SECTIONS)
+    assert chunks == sections
+    assert len(queries) == sections
+    assert set(retrieval["sections"]) == {name for name, _ in mcp_server.RAG_SECTIONS}
+    assert retrieval["elapsed_s"] < retrieval["sequential_s"] / 2
+    assert context.index(f"## {mcp_server.RAG_SECTIONS[0][0]}") < context.index(f"## {mcp_server.RAG_SECTIONS[-1][0]}")
+
+
+def test_explicit_query_is_searched_once(monkeypatch):
+    """When every section uses the caller's query, one search serves them all."""
+    calls = []
+
+    async def fake_search(company_id, query, top_k):
+        calls.append(query)
+        return []
+
+    monkeypatch.setattr(mcp_server, "rag_search_company", fake_search)
+
+    _, chunks, retrieval = asyncio.run(mcp_server.build_rag_context("acme", top_k=3, query="layoffs"))
+
+    assert calls == ["layoffs"]
+    assert chunks == 0
+    assert retrieval["searches"] == 1
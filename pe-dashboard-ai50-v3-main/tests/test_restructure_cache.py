@@ -0,0 +1,60 @@
+"""
+Tests for the stored GPT restructure of unified dashboards (GPT is stubbed, storage is in-memory).
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+# Add src to Python path (server modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from server import mcp_server
+from storage.backends import MemoryBucket
+from storage.gcs_client import DashboardStorage
+
+
+def test_restructure_is_stored_per_source_generation(monkeypatch):
+    """GPT runs once per dashboard upload; later views are served from the stored restructure."""
+    storage = DashboardStorage("test-bucket", bucket=MemoryBucket("test-bucket"))
+    storage.save_dashboard("acme", "# Acme v1")
+    gpt_inputs = []
+
+    async def fake_completion(**kwargs):
+        source = kwargs["messages"][1]["content"]
+        gpt_inputs.append(source)
+        text = "# Restructured v2" if "Acme v2" in source else "# Restructured v1"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+            usage=SimpleNamespace(total_tokens=1200)
+        )
+
+    monkeypatch.setattr(mcp_server, "gcs_storage", storage)
+    monkeypatch.setattr(mcp_server, "chat_completion", fake_completion)
+    client = TestClient(mcp_server.app)
+
+    first = client.post("/tool/generate_unified_dashboard", json={"company_id": "acme"}).json()
+    second = client.post("/tool/generate_unified_dashboard", json={"company_id": "acme"}).json()
+
+    assert first["metadata"]["restructure_cache"] == "miss"
+    assert first["metadata"]["tokens_used"] == 1200
+    assert second["metadata"]["restructure_cache"] == "hit"
+    assert second["metadata"]["tokens_used"] == 0
+    assert second["result"].startswith("# Restructured v1")
+    assert len(gpt_inputs) == 1
+    assert any("/derived/" in blob.name for blob in storage.bucket.list_blobs(prefix="data/dashboards/acme/"))
+    assert all("/derived/" not in d["name"] for d in storage.list_dashboards("acme"))
+
+    # A new upload is a new generation: restructured again, never the stale version
+    storage.save_dashboard("acme", "# Acme v2")
+    third = client.post(
+        "/tool/generate_unified_dashboard",
+        json={"company_id": "acme", "refresh_latest": True}
+    ).json()
+
+    assert third["metadata"]["restructure_cache"] == "miss"
+    assert third["result"].startswith("# Restructured v2")
+    assert len(gpt_inputs) == 2
@@ -0,0 +1,69 @@
+"""
+Unit tests for the generated-dashboard result cache.
+
+Cache files and generation markers live under tmp_path; nothing touches data/cache.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to Python path (rag modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+import result_cache
+from result_cache import ResultCache, bump_company_generation, chunk_signature, fingerprint
+
+
+@pytest.fixture(autouse=True)
+def isolated_generations(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "GENERATIONS_DIR", tmp_path / "_generations")
+
+
+def test_fingerprint_tracks_inputs():
+    """Keys are order-independent but change with any input, including chunk text."""
+    chunks = [{'source_type': 'about', 'chunk_index': 0, 'text': 'Acme builds robots.'}]
+    edited = [{'source_type': 'about', 'chunk_index': 0, 'text': 'Acme builds drones.'}]
+
+    assert fingerprint(model="gpt-4o", company="acme") == fingerprint(company="acme", model="gpt-4o")
+    assert fingerprint(model="gpt-4o", chunks=chunk_signature(chunks)) != \
+        fingerprint(model="gpt-4o", chunks=chunk_signature(edited))
+    assert fingerprint(model="gpt-4o", temperature=0.3) != fingerprint(model="gpt-4o", temperature=0.5)
+
+
+def test_lru_eviction_and_disk_tier(tmp_path):
+    """Entries evicted from memory are still served from disk by a fresh instance."""
+    cache = ResultCache("dash", max_entries=2, cache_dir=tmp_path / "dash")
+    for key in ("a", "b", "c"):
+        cache.set(key, {"dashboard": key})
+
+    assert cache.stats()['entries'] == 2
+    assert cache.get("a") == {"dashboard": "a"}
+    assert cache.stats()['disk_hits'] == 1
+
+    other_process = ResultCache("dash", cache_dir=tmp_path / "dash")
+    assert other_process.get("c") == {"dashboard": "c"}
+
+
+def test_ttl_expiry(tmp_path):
+    """Expired entries are misses in both tiers."""
+    cache = ResultCache("dash", ttl_seconds=-1, cache_dir=tmp_path / "dash")
+    cache.set("a", "markdown")
+
+    assert cache.get("a") is None
+    assert cache.stats()['misses'] == 1
+    assert not (tmp_path / "dash" / "a.json").exists()
+
+
+def test_bump_generation_invalidates_company(tmp_path):
+    """Re-ingest / payload save drops that company's entries only."""
+    cache = ResultCache("dash", cache_dir=tmp_path / "dash")
+    cache.set("acme-key", "acme dashboard", company_id="acme")
+    cache.set("other-key", "other dashboard", company_id="other")
+
+    bump_company_generation("acme")
+
+    assert cache.get("acme-key") is None
+    assert cache.get("other-key") == "other dashboard"
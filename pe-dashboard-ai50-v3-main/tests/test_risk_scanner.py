@@ -0,0 +1,132 @@
+"""
+Tests for the Aho-Corasick risk scanner, its batch scan over data/raw and the risk detector node.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add src to Python path (server modules use flat imports)
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from risk_scanner import RiskScanner, _Automaton, load_lexicon, scan_raw_corpus, signals_from_page
+from risk_store import RiskStore
+
+
+def test_scan_returns_positioned_matches_on_word_boundaries():
+    """Terms match case-insensitively on word boundaries; '*' terms extend to the whole word."""
+    scanner = RiskScanner()
+    text = "Acme announced LAYOFFS in May.\nAn unrelated playoff game and a data breach followed."
+
+    matches = scanner.scan(text, source="rag_dashboard")
+
+    assert [(m["risk_type"], m["matched"]) for m in matches] == [
+        ("layoff", "LAYOFFS"), ("security_incident", "breach")
+    ]
+    layoff = matches[0]
+    assert text[layoff["start"]:layoff["end"]] == "LAYOFFS"
+    assert "Acme announced LAYOFFS" in layoff["snippet"] and layoff["source"] == "rag_dashboard"
+    assert layoff["severity"] == "high" and not layoff["negated"]
+
+
+def test_pure_python_automaton_finds_overlapping_terms():
+    """The fallback automaton reports every occurrence, including keys inside other keys."""
+    keys = ["he", "she", "his", "hers"]
+    found = sorted((end, keys[key_id]) for end, key_id in _Automaton(keys).iter("ushers"))
+    assert found == [(3, "he"), (3, "she"), (5, "hers")]
+
+
+def test_negation_window_and_weak_terms(tmp_path):
+    """Negation cues within the window (same sentence) mark a match negated; weak terms are optional."""
+    scanner = RiskScanner()
+
+    assert scanner.scan("There were no layoffs this year.")[0]["negated"] is True
+    assert scanner.scan("We never had to lay off staff.")[0]["negated"] is True
+    assert scanner.scan("No debt. Layoffs followed in March.")[0]["negated"] is False
+    assert scanner.scan("It did not expect that the board would approve layoffs.")[0]["negated"] is False
+
+    text = "Faced a regulatory investigation; regulatory compliance tooling."
+    assert [m["term"] for m in scanner.scan(text)] == ["regulatory investigation", "regulatory"]
+    assert [m["term"] for m in scanner.scan(text, include_weak=False)] == ["regulatory investigation"]
+
+    lexicon_file = tmp_path / "lexicon.json"
+    lexicon_file.write_text(json.dumps({
+        "negations": ["unfounded"],
+        "risk_types": {"other": {"severity": "low", "terms": ["short seller*"], "negation_window": 2}}
+    }), encoding="utf-8")
+    custom = RiskScanner(load_lexicon(str(lexicon_file)))
+    assert [m["matched"] for m in custom.scan("Short sellers piled in.")] == ["Short sellers"]
+    assert custom.scan("Unfounded short seller claims.")[0]["negated"] is True
+
+
+def test_raw_corpus_scan_records_deduplicated_signals(tmp_path):
+    """The batch scan walks every run, skips weak terms and records one signal per page and risk type."""
+    run = tmp_path / "raw" / "acme" / "2025-11-19"
+    run.mkdir(parents=True)
+    (run / "blog.txt").write_text(
+        "In 2020 we had to lay off most of the company. The layoffs hurt. Regulatory compliance matters.",
+        encoding="utf-8"
+    )
+    (run / "blog.meta.json").write_text(json.dumps({
+        "source_url": "https://acme.example/blog", "crawled_at": "2025-11-19T06:36:49Z"
+    }), encoding="utf-8")
+    (run / "about.txt").write_text("We are growing quickly.", encoding="utf-8")
+
+    results = list(scan_raw_corpus(RiskScanner(), tmp_path / "raw"))
+
+    assert [(page["section"], len(matches)) for page, matches in results] == [("about", 0), ("blog", 2)]
+    page, matches = results[1]
+    signals = signals_from_page(page, matches)
+    assert len(signals) == 1
+    assert signals[0]["occurred_on"] == "2025-11-19" and signals[0]["source_url"] == "https://acme.example/blog"
+
+    store = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    assert len(store.record_many(signals)) == 1
+    assert store.record_many(signals) == []
+
+
+def test_undated_runs_get_a_stable_signal_date(tmp_path):
+    """Runs without crawled_at or a dated folder use the run manifest, else the file mtime - never today."""
+    with_manifest = tmp_path / "raw" / "acme" / "initial"
+    without_manifest = tmp_path / "raw" / "globex" / "initial"
+    for run in (with_manifest, without_manifest):
+        run.mkdir(parents=True)
+        (run / "news.txt").write_text("The company announced layoffs.", encoding="utf-8")
+    (with_manifest / "manifest.json").write_text(json.dumps({"crawled_at": "2025-11-18T07:18:55Z"}),
+                                                 encoding="utf-8")
+    mtime = 1731628800  # 2024-11-15
+    os.utime(without_manifest / "news.txt", (mtime, mtime))
+
+    def scan():
+        return [signal for page, matches in scan_raw_corpus(RiskScanner(), tmp_path / "raw")
+                for signal in signals_from_page(page, matches)]
+
+    signals = scan()
+    assert sorted((s["company_id"], s["occurred_on"]) for s in signals) == \
+        [("acme", "2025-11-18"), ("globex", "2024-11-15")]
+
+    store = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    assert len(store.record_many(signals)) == 2
+    assert store.record_many(scan()) == []
+
+
+def test_risk_detector_node_scans_rag_dashboard():
+    """The detector flags risks found only in the RAG dashboard and reports where they occurred."""
+    from src.workflows.due_diligence_graph import risk_detector_node
+
+    state = {
+        "company_id": "test-company",
+        "structured_dashboard": "# Dashboard\n\nNo layoffs have been reported.",
+        "rag_dashboard": "# RAG\n\nThe company disclosed a security incident in 2024.",
+        "risk_detected": False,
+        "risk_details": [],
+        "messages": []
+    }
+
+    result = risk_detector_node(state)
+
+    assert result["risk_detected"] is True
+    details = result["risk_details"][0]
+    assert details["type"] == "keyword_match" and details["severity"] == "critical"
+    assert [(m["source"], m["term"]) for m in details["matches"]] == [("rag_dashboard", "security incident*")]
@@ -0,0 +1,195 @@
+"""
+Tests for the batched risk store (JSONL log + SQLite index) and GET /resource/risks.
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add src to Python path (server modules use flat imports)
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import risk_store
+from risk_store import RiskStore, normalize_source_url
+from server import mcp_server
+
+
+def _signal(company_id, occurred_on="2025-11-01", risk_type="layoff", severity="medium", n=0):
+    return {
+        "company_id": company_id,
+        "occurred_on": occurred_on,
+        "description": f"signal {n}",
+        "source_url": f"https://example.com/{n}",
+        "risk_type": risk_type,
+        "severity": severity,
+    }
+
+
+def test_concurrent_writers_are_batched_without_losing_lines(tmp_path, monkeypatch):
+    """Concurrent record() calls share flushes; every signal lands once in the log and the index."""
+    store = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    write_batch = store._write_batch
+
+    def slow_write_batch(entries):
+        time.sleep(0.005)
+        return write_batch(entries)
+
+    monkeypatch.setattr(store, "_write_batch", slow_write_batch)
+
+    def writer(worker):
+        for n in range(20):
+            store.record(_signal(f"company-{worker}", n=n))
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lines = (tmp_path / "risk_signals.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 160
+    assert all("timestamp" in json.loads(line) for line in lines)
+    assert store.count() == 160
+    assert store.flushes < 160
+
+
+def test_query_filters_pages_and_backfills_existing_log(tmp_path):
+    """An existing log is indexed once; filters, min_severity and cursors page through it."""
+    log = tmp_path / "risk_signals.jsonl"
+    old = [
+        {"timestamp": "2025-11-16T21:35:47Z", "company_id": "abridge", "occurred_on": "2025-10-01",
+         "description": "old layoff", "source_url": "https://example.com/old"},
+        _signal("abridge", "2025-11-02", "security_incident", "critical", 1),
+    ]
+    log.write_text("".join(json.dumps(entry) + "\n" for entry in old), encoding="utf-8")
+
+    store = RiskStore(log, tmp_path / "risk_index.db")
+    assert store.backfill_from_log() == 2
+    assert store.backfill_from_log() == 0
+
+    store.record_many([_signal("abridge", "2025-11-05", n=2), _signal("clay", "2025-11-06", "regulatory", "high", 3)])
+
+    recent = store.query(company_id="abridge", since="2025-11-01")
+    assert [item["description"] for item in recent["items"]] == ["signal 2", "signal 1"]
+
+    urgent = store.query(min_severity="high")
+    assert {item["company_id"] for item in urgent["items"]} == {"abridge", "clay"}
+    assert all(item["hitl_required"] for item in urgent["items"])
+
+    first = store.query(limit=3)
+    second = store.query(limit=3, cursor=first["next_cursor"])
+    assert len(first["items"]) == 3 and [item["description"] for item in second["items"]] == ["old layoff"]
+    assert second["next_cursor"] is None
+
+
+def test_export_batch_advances_only_after_upload(tmp_path):
+    """Export hands new rows over in one batch and only moves its cursor when the upload succeeds."""
+    store = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    store.record_many([_signal("abridge", n=n) for n in range(3)])
+
+    def failing_upload(rows, first_id, last_id):
+        raise RuntimeError("bucket unavailable")
+
+    with pytest.raises(RuntimeError):
+        store.export_batch(failing_upload)
+
+    uploads = []
+    batch = store.export_batch(lambda rows, first_id, last_id: uploads.append(rows) or f"{first_id}-{last_id}")
+    assert batch["rows"] == 3 and batch["location"] == "1-3"
+    assert store.export_batch(lambda *args: "unused") is None
+
+    store.record(_signal("clay", n=9))
+    assert store.export_batch(lambda rows, first_id, last_id: f"{first_id}-{last_id}")["location"] == "4-4"
+
+
+def test_risks_resource_filters_by_company_and_since(tmp_path, monkeypatch):
+    """GET /resource/risks serves the index with the same filters and paging."""
+    store = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    store.record_many([
+        _signal("abridge", "2025-10-01", n=1),
+        _signal("abridge", "2025-11-03", severity="high", n=2),
+        _signal("clay", "2025-11-04", n=3),
+    ])
+    monkeypatch.setattr(risk_store, "_store", store)
+    client = TestClient(mcp_server.app)
+
+    response = client.get("/resource/risks", params={"company": "abridge", "since": "2025-11-01"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert body["risks"][0]["description"] == "signal 2"
+    assert body["risks"][0]["hitl_required"] is True
+
+    assert client.get("/resource/risks", params={"since": "not-a-date"}).status_code == 422
+
+
+def test_repeated_events_are_written_once_across_processes(tmp_path):
+    """A fingerprint known to the index is rejected even by a store that has not seen it yet."""
+    assert normalize_source_url("HTTPS://www.Example.com/a/?utm_source=x&b=2&a=1#top") == "example.com/a?a=1&b=2"
+
+    first = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    other = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+
+    assert first.record(_signal("abridge", n=1)) is True
+    assert first.record(dict(_signal("abridge", n=1), description="reworded")) is False
+    # other loaded its fingerprints before the write: the UNIQUE index catches the repeat
+    assert other.record(dict(_signal("abridge", n=1), source_url="http://example.com/1/")) is False
+    assert other.record(_signal("abridge", n=2)) is True
+
+    lines = (tmp_path / "risk_signals.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["description"] for line in lines] == ["signal 1", "signal 2"]
+    assert first.stats()["duplicates"] == 1 and other.stats()["duplicates"] == 1
+
+
+def test_index_without_fingerprints_is_migrated(tmp_path):
+    """An index created before fingerprints gets the column and drops rows repeating an event."""
+    db_path = tmp_path / "risk_index.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute(
+        "CREATE TABLE risks (id INTEGER PRIMARY KEY AUTOINCREMENT, company_id TEXT NOT NULL, occurred_on TEXT, "
+        "recorded_at TEXT NOT NULL, risk_type TEXT, severity TEXT, severity_rank INTEGER NOT NULL DEFAULT 0, "
+        "hitl_required INTEGER NOT NULL DEFAULT 0, description TEXT, source_url TEXT, entry TEXT NOT NULL)"
+    )
+    for entry in [_signal("abridge", n=1), _signal("abridge", n=1), _signal("clay", n=1)]:
+        conn.execute(
+            "INSERT INTO risks (company_id, occurred_on, recorded_at, entry) VALUES (?, ?, '', ?)",
+            (entry["company_id"], entry["occurred_on"], json.dumps(entry))
+        )
+    conn.commit()
+    conn.close()
+
+    store = RiskStore(tmp_path / "risk_signals.jsonl", db_path)
+
+    assert store.count() == 2
+    assert store.record(_signal("clay", n=1)) is False
+
+
+def test_report_risk_tool_flags_duplicates(tmp_path, monkeypatch):
+    """POST /tool/report_risk accepts a repeat but marks it duplicate and does not re-queue HITL."""
+    store = RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    monkeypatch.setattr(risk_store, "_store", store)
+    client = TestClient(mcp_server.app)
+    request = {
+        "company_id": "abridge",
+        "occurred_on": "2025-11-03",
+        "description": "Breach disclosed",
+        "source_url": "https://example.com/breach",
+        "risk_type": "security_incident",
+        "severity": "critical"
+    }
+
+    first = client.post("/tool/report_risk", json=request).json()
+    repeat = client.post("/tool/report_risk", json=request).json()
+
+    assert first["success"] and repeat["success"]
+    assert first["metadata"]["fingerprint"] == repeat["metadata"]["fingerprint"]
+    assert (first["metadata"]["duplicate"], first["metadata"]["hitl_required"]) == (False, True)
+    assert (repeat["metadata"]["duplicate"], repeat["metadata"]["hitl_required"]) == (True, False)
+    assert store.count() == 1
@@ -0,0 +1,84 @@
+"""
+Unit tests for the shared run resolver (latest-wins merging across scrape runs).
+
+Builds small data/raw style trees under tmp_path; nothing is read from the repo data.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add src to Python path (rag modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from run_resolver import RunIndex, iter_external_files, iter_latest_sections, resolve_company_run_directory
+
+SECTION_TEXT = "x" * 80
+
+
+def _write(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def test_resolve_prefers_newest_dated_run(tmp_path):
+    """The newest dated run wins over older runs and 'initial'."""
+    company = tmp_path / "acme"
+    _write(company / "initial" / "about.txt", SECTION_TEXT)
+    _write(company / "2025-11-19" / "about.txt", SECTION_TEXT)
+    _write(company / "2025-11-19T06-10-03Z" / "manifest.json", "{}")
+    _write(company / "latest_manifest.json", "{}")
+
+    assert resolve_company_run_directory(company).name == "2025-11-19T06-10-03Z"
+
+
+def test_latest_sections_merge_across_runs(tmp_path):
+    """Each section comes from the newest run that has a usable copy."""
+    company = tmp_path / "acme"
+    _write(company / "initial" / "about.txt", SECTION_TEXT)
+    _write(company / "initial" / "careers.txt", SECTION_TEXT)
+    _write(company / "initial" / "careers.meta.json", json.dumps({"source_url": "https://acme.com/careers"}))
+    _write(company / "2025-11-20" / "about.txt", SECTION_TEXT)
+    _write(company / "2025-11-20" / "about.html", "<html></html>")
+    # An empty scrape in the newest run falls through to the older copy
+    _write(company / "2025-11-21" / "careers.txt", "Not found")
+
+    sections = {version.section: version for version in iter_latest_sections(company)}
+
+    assert set(sections) == {"about", "careers"}
+    assert sections["about"].run.name == "2025-11-20"
+    assert sections["about"].text_path.suffix == ".txt"
+    assert sections["careers"].run.name == "initial"
+    assert sections["careers"].meta_path.name == "careers.meta.json"
+
+
+def test_run_index_picks_up_new_runs(tmp_path):
+    """Adding a run directory invalidates the cached listing."""
+    company = tmp_path / "acme"
+    _write(company / "initial" / "about.txt", SECTION_TEXT)
+    assert [run.name for run in RunIndex.runs(company)] == ["initial"]
+
+    _write(company / "2025-11-20" / "about.txt", SECTION_TEXT)
+    # Force a different mtime in case the filesystem clock is coarse
+    stat = company.stat()
+    os.utime(company, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert [run.name for run in RunIndex.runs(company)] == ["2025-11-20", "initial"]
+
+
+def test_run_index_picks_up_new_external_files(tmp_path):
+    """A file added to an existing run's external/ directory is found without a restart."""
+    company = tmp_path / "acme"
+    _write(company / "2025-11-20" / "about.txt", SECTION_TEXT)
+    _write(company / "2025-11-20" / "external" / "github.json", json.dumps({"stars": 1}))
+    assert set(RunIndex.runs(company)[0].external_files) == {"github.json"}
+    assert list(iter_external_files(company, "news.json")) == []
+
+    _write(company / "2025-11-20" / "external" / "news.json", json.dumps({"articles": []}))
+    external = company / "2025-11-20" / "external"
+    stat = external.stat()
+    os.utime(external, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert [path.name for _, path in iter_external_files(company, "news.json")] == ["news.json"]
@@ -0,0 +1,59 @@
+"""
+Tests for the storage handle registry and the offline (local / in-memory) backends.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from google.api_core.exceptions import NotFound, NotModified
+
+# Add src to Python path
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+import storage.gcs_client as gcs_client
+from storage.backends import LocalBucket
+from storage.gcs_client import get_storage
+
+
+def test_get_storage_reuses_handles():
+    """One handle per backend/bucket, so the latest-pointer cache is shared."""
+    first = get_storage("registry-test", backend="memory")
+
+    assert get_storage("registry-test", backend="memory") is first
+    assert get_storage("registry-other", backend="memory") is not first
+
+    first.save_dashboard("acme", "# Dashboard")
+    assert get_storage("registry-test", backend="memory").get_latest_dashboard("acme") == "# Dashboard"
+
+
+def test_local_bucket_follows_gcs_blob_semantics(tmp_path):
+    """Uploads bump generations; conditional reads, listing, copy and delete behave like GCS."""
+    bucket = LocalBucket("dash", tmp_path)
+    blob = bucket.blob("data/dashboards/acme/unified_1.md")
+    blob.upload_from_string("# v1", content_type="text/markdown")
+    first_generation = blob.generation
+    blob.upload_from_string("# v2")
+
+    assert blob.generation > first_generation
+    assert bucket.blob(blob.name).download_as_text() == "# v2"
+    with pytest.raises(NotModified):
+        bucket.blob(blob.name).download_as_bytes(if_generation_not_match=blob.generation)
+
+    copied = bucket.copy_blob(blob, bucket, "data/dashboards/acme/approved/unified_1.md")
+    blob.delete()
+    assert [b.name for b in bucket.list_blobs(prefix="data/dashboards/acme/")] == [copied.name]
+    with pytest.raises(NotFound):
+        bucket.blob(blob.name).download_as_text()
+
+
+def test_dashboard_storage_on_local_backend(tmp_path, monkeypatch):
+    """DashboardStorage runs unchanged on the local backend (offline benchmarking)."""
+    monkeypatch.setattr(gcs_client, "LOCAL_STORAGE_ROOT", tmp_path)
+    storage = gcs_client.DashboardStorage("offline", backend="local")
+
+    storage.save_dashboard("acme", "# Local dashboard", metadata={"run_id": "r1"})
+
+    assert storage.get_latest_dashboard("acme") == "# Local dashboard"
+    assert (tmp_path / "offline" / "data" / "dashboards" / "acme" / "latest_unified.json").exists()
@@ -0,0 +1,82 @@
+"""
+Tests for the SSE dashboard stream: frame format, client parser, and the
+/dashboard/rag/stream event sequence (retrieval and GPT are stubbed).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Add src to Python path (server modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+import api
+import result_cache
+from streaming import aiter_sse_events, iter_sse_events, sse_event
+
+
+def test_sse_round_trip():
+    """Frames produced by sse_event parse back into (event, data) pairs."""
+    stream = sse_event("start", {"company_name": "acme"}) + sse_event("delta", {"text": "line\nbreak"})
+
+    events = list(iter_sse_events(stream.split("\n")))
+
+    assert events == [("start", {"company_name": "acme"}), ("delta", {"text": "line\nbreak"})]
+
+
+def test_async_sse_parser_matches_sync():
+    """aiter_sse_events (used with httpx streams) yields the same frames as iter_sse_events."""
+    lines = (sse_event("result", {"index": 0}) + sse_event("done", {"calls": 1})).split("\n")
+
+    async def collect():
+        async def aiter():
+            for line in lines:
+                yield line
+        return [frame async for frame in aiter_sse_events(aiter())]
+
+    assert asyncio.run(collect()) == list(iter_sse_events(lines))
+
+
+def test_dashboard_stream_emits_retrieval_deltas_and_done(monkeypatch, tmp_path):
+    """The stream sends start, retrieval, one delta per token chunk, then done; a repeat is a cache hit."""
+
+    async def fake_retrieve(company_name, top_k):
+        return [{'source_type': 'about', 'chunk_index': 0, 'text': 'Acme builds rockets.', 'distance': 0.1}]
+
+    class Usage:
+        total_tokens = 42
+
+    async def fake_stream(**kwargs):
+        for delta in ["## Company Overview\n", "Acme builds rockets."]:
+            yield delta, None
+        yield None, Usage()
+
+    monkeypatch.setattr(api, "retrieve_context_for_dashboard_async", fake_retrieve)
+    monkeypatch.setattr(api, "stream_chat_completion", fake_stream)
+    monkeypatch.setattr(result_cache, "CACHE_ROOT", tmp_path)
+    monkeypatch.setattr(result_cache, "GENERATIONS_DIR", tmp_path / "_generations")
+    monkeypatch.setattr(result_cache, "_caches", {})
+
+    client = TestClient(api.app)
+    with client.stream("POST", "/dashboard/rag/stream", json={"company_name": "acme"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = list(iter_sse_events(response.iter_lines()))
+
+    names = [name for name, _ in events]
+    assert names == ["start", "retrieval", "delta", "delta", "done"]
+    assert events[1][1]["chunks_retrieved"] == 1
+    assert "".join(data["text"] for name, data in events if name == "delta").startswith("## Company Overview")
+    metadata = events[-1][1]["metadata"]
+    assert metadata["tokens_used"] == {"total": 42}
+    assert metadata["sections_present"] == 1
+    assert metadata["cache"] == "miss"
+
+    with client.stream("POST", "/dashboard/rag/stream", json={"company_name": "acme"}) as response:
+        repeat = list(iter_sse_events(response.iter_lines()))
+
+    assert [name for name, _ in repeat] == ["start", "retrieval", "delta", "done"]
+    assert repeat[2][1]["text"] == "## Company Overview\nAcme builds rockets."
+    assert repeat[-1][1]["metadata"]["cache"] == "hit"
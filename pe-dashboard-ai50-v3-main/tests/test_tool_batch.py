@@ -0,0 +1,65 @@
+"""
+Tests for the MCP server's /tool/batch endpoint (tools are stubbed).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+# Add src to Python path (server modules use flat imports)
+src_root = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_root))
+
+from server import mcp_server
+from streaming import iter_sse_events
+
+
+def test_batch_streams_results_with_per_call_status(monkeypatch):
+    """Each call gets a result event (with the tool's status) and the batch ends with a summary."""
+    running = {"now": 0, "peak": 0}
+
+    async def fake_structured(request):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        if request.company_id == "missing":
+            raise HTTPException(status_code=404, detail="Company 'missing' not found")
+        return mcp_server.ToolResponse(success=True, company_id=request.company_id, result=f"# {request.company_id}")
+
+    tools = dict(mcp_server.BATCH_TOOLS)
+    tools["generate_structured_dashboard"] = (mcp_server.StructuredDashboardRequest, fake_structured)
+    monkeypatch.setattr(mcp_server, "BATCH_TOOLS", tools)
+
+    companies = ["abridge", "clay", "cohere", "missing"]
+    calls = [{"tool": "generate_structured_dashboard", "params": {"company_id": c}, "id": c} for c in companies]
+    calls[2]["fields"] = "success"
+    calls.append({"tool": "generate_rag_dashboard", "params": {"top_k": 3}, "id": "no-company"})
+
+    client = TestClient(mcp_server.app)
+    with client.stream("POST", "/tool/batch", json={"calls": calls, "max_concurrency": 2}) as response:
+        assert response.status_code == 200
+        events = list(iter_sse_events(response.iter_lines()))
+
+    assert events[0] == ("start", {"calls": 5, "max_concurrency": 2})
+    results = {data["id"]: data for name, data in events if name == "result"}
+    assert results["abridge"]["status_code"] == 200
+    assert results["abridge"]["response"]["result"] == "# abridge"
+    assert results["cohere"]["response"] == {"success": True}
+    assert results["missing"]["status_code"] == 404
+    assert results["no-company"]["status_code"] == 422
+    assert events[-1][0] == "done"
+    assert events[-1][1]["succeeded"] == 3 and events[-1][1]["failed"] == 2
+    assert running["peak"] <= 2
+
+
+def test_batch_rejects_unknown_tools():
+    """Unknown tool names fail validation before anything runs."""
+    client = TestClient(mcp_server.app)
+
+    response = client.post("/tool/batch", json={"calls": [{"tool": "drop_tables", "params": {}}]})
+
+    assert response.status_code == 422
@@ -10,7 +10,6 @@ Test suites:
 import json
 import pytest
 from datetime import date
-from pathlib import Path
 
 from src.tools.payload_tool import get_latest_structured_payload
 from src.tools.rag_tool import rag_search_company
@@ -211,9 +210,23 @@ async def test_rag_search_company_result_quality():
 # ========== Tool 3: Risk Logger Tests ==========
 
 
+@pytest.fixture
+def risk_log_file(tmp_path, monkeypatch):
+    """
+    Send risk signals to a temporary store and return its log file.
+
+    Reporting is idempotent per event, so tests that re-run with the same
+    signals must not share the project's risk log.
+    """
+    import risk_store
+    store = risk_store.RiskStore(tmp_path / "risk_signals.jsonl", tmp_path / "risk_index.db")
+    monkeypatch.setattr(risk_store, "_store", store)
+    return store.log_path
+
+
 @pytest.mark.asyncio
 @pytest.mark.tool3
-async def test_report_layoff_signal_success():
+async def test_report_layoff_signal_success(risk_log_file):
     """
     Test that risk signals are logged successfully to a file.
     """
@@ -229,9 +242,6 @@ async def test_report_layoff_signal_success():
     assert success is True, "Should return True on successful logging"
     
     # Verify file was created
-    # From: tests/test_tools.py -> go up 1 level to project root
-    project_root = Path(__file__).parent.parent
-    risk_log_file = project_root / "data" / "risk_signals" / "risk_signals.jsonl"
     assert risk_log_file.exists(), "Risk log file should be created"
     
     # Verify file contains the logged entry
@@ -249,7 +259,7 @@ async def test_report_layoff_signal_success():
 
 @pytest.mark.asyncio
 @pytest.mark.tool3
-async def test_report_layoff_signal_multiple_entries():
+async def test_report_layoff_signal_multiple_entries(risk_log_file):
     """
     Test that multiple risk signals can be logged (append mode).
     """
@@ -275,8 +285,6 @@ async def test_report_layoff_signal_multiple_entries():
     assert success2 is True
     
     # Verify both entries exist in file
-    project_root = Path(__file__).parent.parent
-    risk_log_file = project_root / "data" / "risk_signals" / "risk_signals.jsonl"
     
     with open(risk_log_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
@@ -291,7 +299,7 @@ async def test_report_layoff_signal_multiple_entries():
 
 @pytest.mark.asyncio
 @pytest.mark.tool3
-async def test_report_layoff_signal_structure():
+async def test_report_layoff_signal_structure(risk_log_file):
     """
     Test that logged entries have the correct structure.
     """
@@ -306,8 +314,6 @@ async def test_report_layoff_signal_structure():
     assert success is True
     
     # Verify entry structure
-    project_root = Path(__file__).parent.parent
-    risk_log_file = project_root / "data" / "risk_signals" / "risk_signals.jsonl"
     
     with open(risk_log_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
@@ -329,7 +335,7 @@ async def test_report_layoff_signal_structure():
 
 @pytest.mark.asyncio
 @pytest.mark.tool3
-async def test_report_risk_signal_security_incident():
+async def test_report_risk_signal_security_incident(risk_log_file):
     """
     Test that security incident risks can be logged.
     """
@@ -346,8 +352,6 @@ async def test_report_risk_signal_security_incident():
     assert success is True
     
     # Verify file contains the risk type and severity
-    project_root = Path(__file__).parent.parent
-    risk_log_file = project_root / "data" / "risk_signals" / "risk_signals.jsonl"
     
     with open(risk_log_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
@@ -358,7 +362,7 @@ async def test_report_risk_signal_security_incident():
 
 @pytest.mark.asyncio
 @pytest.mark.tool3
-async def test_report_risk_signal_regulatory():
+async def test_report_risk_signal_regulatory(risk_log_file):
     """
     Test that regulatory risks can be logged.
     """
@@ -375,8 +379,6 @@ async def test_report_risk_signal_regulatory():
     assert success is True
     
     # Verify entry
-    project_root = Path(__file__).parent.parent
-    risk_log_file = project_root / "data" / "risk_signals" / "risk_signals.jsonl"
     
     with open(risk_log_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
@@ -387,7 +389,7 @@ async def test_report_risk_signal_regulatory():
 
 @pytest.mark.asyncio
 @pytest.mark.tool3
-async def test_report_risk_signal_all_types():
+async def test_report_risk_signal_all_types(risk_log_file):
     """
     Test that all risk types can be logged.
     """
@@ -408,8 +410,6 @@ async def test_report_risk_signal_all_types():
         assert success is True, f"Failed to log {risk_type}"
     
     # Verify all types were logged
-    project_root = Path(__file__).parent.parent
-    risk_log_file = project_root / "data" / "risk_signals" / "risk_signals.jsonl"
     
     with open(risk_log_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
@@ -419,4 +419,33 @@ async def test_report_risk_signal_all_types():
         
         # Verify all types are present
         for risk_type in risk_types:
-            assert risk_type in logged_types, f"Risk type {risk_type} not found in logs"
\ No newline at end of file
+            assert risk_type in logged_types, f"Risk type {risk_type} not found in logs"
+
+
+@pytest.mark.asyncio
+@pytest.mark.tool3
+async def test_report_risk_signal_duplicate_is_noop(risk_log_file):
+    """
+    Test that re-reporting the same event succeeds without writing it again.
+    """
+    signal = RiskSignal(
+        company_id="test-company",
+        occurred_on=date(2025, 3, 1),
+        description="Layoffs announced",
+        source_url="https://www.example.com/news/layoffs/?utm_source=feed",
+        risk_type="layoff",
+        severity="high"
+    )
+    # Same event reported again from a differently formatted link
+    repeat = signal.model_copy(update={
+        "description": "Company confirms layoffs",
+        "source_url": "http://example.com/news/layoffs"
+    })
+    
+    assert await report_risk_signal(signal) is True
+    assert await report_risk_signal(repeat) is True
+    
+    with open(risk_log_file, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+        assert len(lines) == 1, "A repeated event should not be logged twice"
+        assert json.loads(lines[0])['description'] == "Layoffs announced"
@@ -6,8 +6,10 @@ Tests the conditional branching in the due diligence workflow graph:
 - No risk → Auto-approve branch
 """
 
+import asyncio
 import pytest
 import sys
+import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime, timezone
@@ -284,5 +286,138 @@ def test_risk_detector_preserves_existing_risk_details():
     assert any(r["type"] == "keyword_match" for r in result_state["risk_details"])
 
 
+
+def _generator_state() -> WorkflowState:
+    return {
+        "company_id": "acme",
+        "run_id": "test_run",
+        "plan": {},
+        "rag_dashboard": "",
+        "structured_dashboard": "",
+        "dashboard_data": {},
+        "evaluation_result": {},
+        "evaluation_score": 0.0,
+        "risk_detected": False,
+        "risk_details": [],
+        "human_approval": False,
+        "final_dashboard": "",
+        "messages": []
+    }
+
+
+@pytest.mark.asyncio
+async def test_data_generator_runs_structured_and_rag_concurrently(monkeypatch):
+    """Test both MCP dashboard calls are in flight at once, so the node takes about max(structured, rag)."""
+    from src.workflows import due_diligence_graph as graph
+
+    in_flight, peak = 0, 0
+
+    async def call_tool(tool_name, payload):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.2)
+        in_flight -= 1
+        return {"success": True, "result": f"# {tool_name}"}
+
+    monkeypatch.setattr(graph, "MCP_AVAILABLE", True)
+    monkeypatch.setattr(graph, "mcp_client", MagicMock(call_tool=call_tool))
+    monkeypatch.setattr(graph.CompanyDataLoader, "load_company_payload", lambda self, company_id: {"name": "Acme"})
+
+    started = time.perf_counter()
+    state = await graph.data_generator_node(_generator_state())
+    elapsed = time.perf_counter() - started
+
+    assert state["structured_dashboard"] == "# generate_structured_dashboard"
+    assert state["rag_dashboard"] == "# generate_rag_dashboard"
+    assert peak == 2
+    assert elapsed < 0.35
+
+
+@pytest.mark.asyncio
+async def test_data_generator_falls_back_per_leg(monkeypatch):
+    """Test a failed MCP leg falls back to local tools while the other leg is still running."""
+    from src.workflows import due_diligence_graph as graph
+
+    events = []
+
+    async def call_tool(tool_name, payload):
+        if tool_name == "generate_structured_dashboard":
+            raise RuntimeError("MCP down")
+        await asyncio.sleep(0.2)
+        events.append("rag_mcp_done")
+        return {"success": True, "result": "# RAG via MCP"}
+
+    def generate_dashboard(payload):
+        events.append("local_structured")
+        return "# Structured locally"
+
+    monkeypatch.setattr(graph, "MCP_AVAILABLE", True)
+    monkeypatch.setattr(graph, "mcp_client", MagicMock(call_tool=call_tool))
+    monkeypatch.setattr(graph, "load_payload", lambda company_id: {"company_id": company_id})
+    monkeypatch.setattr(graph, "generate_dashboard", generate_dashboard)
+    monkeypatch.setattr(graph.CompanyDataLoader, "load_company_payload", lambda self, company_id: {"name": "Acme"})
+
+    state = await graph.data_generator_node(_generator_state())
+
+    assert state["structured_dashboard"] == "# Structured locally"
+    assert state["rag_dashboard"] == "# RAG via MCP"
+    assert events == ["local_structured", "rag_mcp_done"]
+
+
+def test_mcp_http_client_shares_one_client_per_event_loop(tmp_path):
+    """Test tool calls reuse one httpx.AsyncClient per event loop instead of opening one per call."""
+    from src.workflows.due_diligence_graph import MCPHttpClient
+
+    config = tmp_path / "mcp_server.config.json"
+    config.write_text('{"mcp_server": {"base_url": "http://localhost:8100", "timeout": 5}}', encoding="utf-8")
+    client = MCPHttpClient(config)
+
+    async def clients():
+        first, second = client._client(), client._client()
+        await client.aclose()
+        return first, second, first.is_closed
+
+    first, second, closed = asyncio.run(clients())
+    assert first is second and closed
+    other_loop_client, _, _ = asyncio.run(clients())
+    assert other_loop_client is not first
+
+
+
+def test_run_workflow_closes_its_mcp_client(tmp_path, monkeypatch):
+    """One asyncio.run(run_workflow()) per company (as the DAGs do) leaves no clients behind."""
+    import src.workflows.due_diligence_graph as graph
+
+    config = tmp_path / "mcp_server.config.json"
+    config.write_text('{"mcp_server": {"base_url": "http://localhost:8100", "timeout": 5}}', encoding="utf-8")
+    client = graph.MCPHttpClient(config)
+    opened = []
+
+    class FakeApp:
+        async def astream(self, state, config):
+            opened.append(client._client())
+            yield {"finalize": dict(state, final_dashboard="# Dashboard")}
+
+    monkeypatch.setattr(graph, "mcp_client", client)
+    monkeypatch.setattr(graph, "build_workflow", lambda: MagicMock(compile=lambda checkpointer: FakeApp()))
+    monkeypatch.setattr(graph, "save_execution_trace", lambda state: None)
+    monkeypatch.setattr(graph, "save_dashboard", lambda state: None)
+
+    for company_id in ("acme", "globex", "initech"):
+        asyncio.run(graph.run_workflow(company_id))
+
+    assert client._clients == {}
+    assert len(opened) == 3 and all(c.is_closed for c in opened)
+
+    # A caller that never closes still only leaves the most recent loop's client
+    async def leak():
+        client._client()
+
+    for _ in range(3):
+        asyncio.run(leak())
+    assert len(client._clients) == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file